@@ -16,71 +16,216 @@ import asyncio
 import logging
 import os
 import sys
-import json
 import traceback 
-from typing import Optional, AsyncIterator 
+from typing import List, Optional, AsyncIterator 
 
 # Add the backend directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from livekit import rtc
-from livekit.agents import JobContext, WorkerOptions, cli
+from livekit.agents import AgentServer, JobContext, JobRequest, WorkerOptions, cli
 from livekit.agents.voice import Agent, AgentSession
 from livekit.plugins import assemblyai, openai, cartesia, silero 
 import aiohttp
 
 from config import settings
+from services.audio_cache import PhraseAudio, PhraseAudioCache, iter_frames
+from services.data_protocol import (
+    CAPTION_TOPIC,
+    CaptionEncoder,
+    CaptionPeers,
+    hello_ack,
+    legacy_text_message,
+    negotiate,
+    stream_caption,
+)
+from services.embedding_client import AsyncEmbeddingServiceClient
+from services.worker_load import WorkerLoadMonitor
+from services.profiling import LoopBlockMonitor, install_profile_signal
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Voice used for every spoken reply; changing it invalidates the phrase audio cache
+TTS_MODEL = "tts-1"
+TTS_VOICE = "alloy"
+
+# Fixed utterances, synthesized once and replayed from the phrase audio cache
+GREETING = (
+    "Welcome to the AI Debate Arena! I'm your philosophical opponent. "
+    "Present your argument, and I'll challenge it with reasoned counter-arguments."
+)
+FALLBACK_NO_RESPONSE = "I need a moment to formulate my response."
+FALLBACK_KNOWLEDGE_UNAVAILABLE = "I'm having trouble accessing my philosophical knowledge right now."
+FALLBACK_THINKING = "Let me think about that for a moment..."
+FALLBACK_SPEECH_ERROR = "I need a moment to consider your argument more carefully."
+FIXED_PHRASES = (GREETING, FALLBACK_NO_RESPONSE, FALLBACK_KNOWLEDGE_UNAVAILABLE, FALLBACK_THINKING, FALLBACK_SPEECH_ERROR)
+
 class DebateAgent:
     """
     Real-time AI debate agent that provides philosophical counter-arguments
     """
     
-    def __init__(self):
-        self.rag_endpoint = "http://localhost:8000/api/debate/test"
+    def __init__(self, room_name: Optional[str] = None):
+        self.rag_endpoint = "http://localhost:8000/api/debate/test?fields=response"  # Only the reply is spoken
+        self.room_name = room_name  # Keys the server-side debate history for this room
         self.session = None
+        self.embedding_client = None  # Shared embedding service, if configured
     
     async def initialize(self):
         """Initialize the agent with necessary services"""
         self.session = aiohttp.ClientSession()
+        if settings.EMBEDDING_SERVICE_URL:
+            self.embedding_client = AsyncEmbeddingServiceClient(
+                settings.EMBEDDING_SERVICE_URL,
+                pool_size=settings.EMBEDDING_SERVICE_POOL_SIZE,
+                timeout=settings.EMBEDDING_SERVICE_TIMEOUT
+            )
         logger.info("Debate agent initialized")
     
     async def cleanup(self):
         """Clean up resources"""
         if self.session:
             await self.session.close()
+        if self.embedding_client:
+            await self.embedding_client.close()
         logger.info("Debate agent cleaned up")
     
+    async def embed_query(self, user_argument: str) -> Optional[List[float]]:
+        """
+        Query embedding from the shared embedding service, sent with the RAG
+        call so the API retrieves with it instead of embedding the text again.
+        """
+        if not self.embedding_client:
+            return None
+        try:
+            return (await self.embedding_client.embed([user_argument]))[0]
+        except Exception as e:
+            logger.warning(f"Embedding service unavailable, the API will embed the query: {e}")
+            return None
+    
     async def generate_counter_argument(self, user_argument: str) -> str:
         """
         Generate a philosophical counter-argument using the RAG system
         """
         try:
+            payload = {
+                "content": user_argument,
+                "user_id": "voice_agent",
+                "session_id": self.room_name
+            }
+            headers = {"Content-Type": "application/json"}
+            query_vector = await self.embed_query(user_argument) if settings.AGENT_API_TOKEN else None
+            if query_vector is not None:
+                # The API only trusts a precomputed vector from the agent
+                payload["query_vector"] = query_vector
+                headers["X-Agent-Token"] = settings.AGENT_API_TOKEN
             async with self.session.post(
                 self.rag_endpoint,
-                json={
-                    "content": user_argument,
-                    "user_id": "voice_agent"
-                },
-                headers={"Content-Type": "application/json"}
+                json=payload,
+                headers=headers
             ) as response:
                 if response.status == 200:
                     data = await response.json()
-                    return data.get("response", "I need a moment to formulate my response.")
+                    return data.get("response", FALLBACK_NO_RESPONSE)
                 else:
                     logger.error(f"RAG endpoint returned status {response.status}")
-                    return "I'm having trouble accessing my philosophical knowledge right now."
+                    return FALLBACK_KNOWLEDGE_UNAVAILABLE
         
         except Exception as e:
             logger.error(f"Error generating counter-argument: {e}")
-            return "Let me think about that for a moment..."
+            return FALLBACK_THINKING
+
+def create_tts():
+    return openai.TTS(
+        api_key=settings.OPENAI_API_KEY,
+        model=TTS_MODEL,
+        voice=TTS_VOICE,
+    )
+
+def create_phrase_cache(tts) -> Optional[PhraseAudioCache]:
+    """Phrase audio cache for this voice, or None when disabled"""
+    if not settings.AUDIO_CACHE_ENABLED:
+        return None
+    cache_dir = os.path.join(os.path.dirname(__file__), "..", settings.AUDIO_CACHE_DIR)
+    voice_config = {
+        "provider": tts.provider,
+        "model": TTS_MODEL,
+        "voice": TTS_VOICE,
+        "sample_rate": tts.sample_rate,
+        "num_channels": tts.num_channels
+    }
+    try:
+        return PhraseAudioCache(cache_dir, voice_config, max_bytes=settings.AUDIO_CACHE_MAX_BYTES)
+    except OSError as e:
+        logger.warning(f"Phrase audio cache unavailable: {e}")
+        return None
+
+async def synthesize_phrase(tts, text: str) -> PhraseAudio:
+    """Run one TTS request and collect its frames as PCM"""
+    chunks = []
+    sample_rate, num_channels = tts.sample_rate, tts.num_channels
+    async with tts.synthesize(text) as stream:
+        async for synthesized in stream:
+            frame = synthesized.frame
+            sample_rate, num_channels = frame.sample_rate, frame.num_channels
+            chunks.append(frame.data.tobytes())
+    return PhraseAudio(b"".join(chunks), sample_rate, num_channels)
+
+async def phrase_frames(audio: PhraseAudio) -> AsyncIterator[rtc.AudioFrame]:
+    for data, samples_per_channel in iter_frames(audio):
+        yield rtc.AudioFrame(data, audio.sample_rate, audio.num_channels, samples_per_channel)
+
+class CaptionPublisher:
+    """
+    Streams what the agent says to the room's participants.
+
+    Participants that sent a caption hello get binary START/DELTA/END frames
+    paced with the audio; everyone else gets the original JSON agent_text message.
+    """
+
+    def __init__(self, room: rtc.Room):
+        self.room = room
+        self.encoder = CaptionEncoder()
+        self.binary_peers = CaptionPeers(self.encoder)
+        room.on("data_received", self._on_data)
+
+    def _on_data(self, packet: rtc.DataPacket):
+        if packet.topic != CAPTION_TOPIC or packet.participant is None:
+            return
+        version = negotiate(packet.data)
+        if version is None:
+            return
+        identity = packet.participant.identity
+        self.binary_peers.accept(identity)  # A reconnecting browser starts a fresh assembler at seq 1
+        logger.info(f"Caption protocol v{version} negotiated with {identity}")
+        asyncio.create_task(self.room.local_participant.publish_data(
+            hello_ack(version), reliable=True, destination_identities=[identity], topic=CAPTION_TOPIC
+        ))
+
+    async def _send_binary(self, frame: bytes):
+        peers = [identity for identity in self.binary_peers if identity in self.room.remote_participants]
+        for payload, destinations in self.binary_peers.frames(frame, peers):
+            await self.room.local_participant.publish_data(
+                payload, reliable=True, destination_identities=destinations, topic=CAPTION_TOPIC
+            )
+
+    async def publish(self, text: str, duration_seconds: float):
+        legacy_peers = [identity for identity in self.room.remote_participants if identity not in self.binary_peers]
+        try:
+            if legacy_peers:
+                await self.room.local_participant.publish_data(
+                    legacy_text_message(text), reliable=True, destination_identities=legacy_peers
+                )
+            if self.binary_peers:
+                await stream_caption(text, self._send_binary, self.encoder, duration_seconds,
+                                     flush_interval=settings.AGENT_CAPTION_FLUSH_MS / 1000)
+        except Exception as e:
+            logger.error(f"Failed to send agent captions: {e}")
 
 class DebateLiveKitAgent(Agent):
-    def __init__(self, debate_api_client: DebateAgent):
+    def __init__(self, debate_api_client: DebateAgent, captions: Optional[CaptionPublisher] = None):
         super().__init__(
             instructions=(
                 "You are a sophisticated AI philosopher engaged in a real-time debate. "
@@ -98,11 +243,7 @@ class DebateLiveKitAgent(Agent):
                 api_key=settings.OPENAI_API_KEY
             ),
             # Temporarily use OpenAI TTS to test if the issue is with Cartesia
-            tts=openai.TTS(
-                api_key=settings.OPENAI_API_KEY,
-                model="tts-1",
-                voice="alloy",
-            ),
+            tts=create_tts(),
             # Original Cartesia config (commented out for testing):
             # tts=cartesia.TTS(
             #     api_key=settings.CARTESIA_API_KEY,
@@ -114,19 +255,51 @@ class DebateLiveKitAgent(Agent):
         )
         
         self.debate_api_client = debate_api_client
+        self.phrase_cache = create_phrase_cache(self.tts)
+        self.captions = captions
+        self._warm_task = None
+        self._caption_task = None
+
+    def _speak(self, text: str, audio: Optional[PhraseAudio] = None):
+        """Say `text` (from cached audio when given) and stream its caption alongside the audio"""
+        handle = self.session.say(text, audio=phrase_frames(audio)) if audio else self.session.say(text)
+        if self.captions is None:
+            return
+        if audio:
+            duration = audio.duration_seconds
+        else:
+            duration = len(text.split()) / settings.AGENT_CAPTION_WORDS_PER_SECOND
+        if self._caption_task is not None:
+            self._caption_task.cancel()  # A new reply supersedes the previous caption
+        task = asyncio.create_task(self.captions.publish(text, duration))
+        self._caption_task = task
+        # Stop revealing words once the user interrupts; the END still carries the full text
+        handle.add_done_callback(lambda h: task.cancel() if h.interrupted else None)
+
+    def warm_phrases(self):
+        """Synthesize missing fixed phrases in the background; the greeting shares this synthesis"""
+        if self.phrase_cache is not None:
+            self._warm_task = asyncio.create_task(
+                self.phrase_cache.warm(FIXED_PHRASES, lambda text: synthesize_phrase(self.tts, text))
+            )
+
+    async def say_fixed(self, text: str):
+        """Speak a fixed phrase from cached audio, synthesizing it only on the first use"""
+        if self.phrase_cache is not None:
+            try:
+                audio = await self.phrase_cache.get_or_synthesize(text, lambda t: synthesize_phrase(self.tts, t))
+                self._speak(text, audio)
+                return
+            except Exception as e:
+                logger.warning(f"Cached phrase playback failed, using live TTS: {e}")
+        self._speak(text)
 
     async def on_enter(self):
         """Called when the agent enters the room"""
         logger.info("Agent entered the room")
         
-        # Send initial greeting
-        initial_message = (
-            "Welcome to the AI Debate Arena! I'm your philosophical opponent. "
-            "Present your argument, and I'll challenge it with reasoned counter-arguments."
-        )
-        
-        # Generate initial reply to start the conversation
-        self.session.generate_reply(initial_message)
+        # Send initial greeting (pre-synthesized, so it starts without a TTS round trip)
+        await self.say_fixed(GREETING)
 
     async def on_user_speech_committed(self, user_msg):
         """Called when user speech is transcribed and committed"""
@@ -144,40 +317,62 @@ class DebateLiveKitAgent(Agent):
                     counter_argument = counter_argument[:500] + "..."
                     logger.info("Truncated response for TTS stability")
                 
-                # Send the counter-argument as agent's response
-                self.session.generate_reply(counter_argument)
-                
-                # Send text via data channel for frontend display if needed
-                await self._send_agent_text_data_channel(counter_argument)
+                # Speak the counter-argument verbatim; its caption streams over the data channel
+                if counter_argument in FIXED_PHRASES:
+                    await self.say_fixed(counter_argument)
+                else:
+                    self._speak(counter_argument)
 
             except Exception as e:
                 logger.error(f"Error processing user speech: {e}")
-                fallback_response = "I need a moment to consider your argument more carefully."
-                self.session.generate_reply(fallback_response)
+                await self.say_fixed(FALLBACK_SPEECH_ERROR)
 
-    async def _send_agent_text_data_channel(self, text: str):
-        """Helper to send text responses via data channel to frontend"""
-        try:
-            if hasattr(self, 'session') and self.session and self.session.room:
-                data_payload = json.dumps({
-                    "type": "agent_text",
-                    "content": text
-                }).encode('utf-8')
-                await self.session.room.local_participant.publish_data(
-                    data_payload,
-                    kind=rtc.DataPacket_Kind.RELIABLE
-                )
-                logger.info(f"Sent agent text via data channel: {text[:50]}...")
-        except Exception as e:
-            logger.error(f"Failed to send agent text via data channel: {e}")
 
+# Load reporting and admission control for this worker process
+worker_load = WorkerLoadMonitor(
+    max_jobs=settings.AGENT_MAX_JOBS,
+    lag_limit_ms=settings.AGENT_LOOP_LAG_LIMIT_MS,
+    load_threshold=settings.AGENT_LOAD_THRESHOLD
+)
+_worker_draining = False
+agent_server: Optional[AgentServer] = None  # Set when this module runs the worker
+
+# Logs what blocks the event loop (VAD, STT/TTS callbacks, RAG calls) in the worker and in each job process
+loop_monitor = LoopBlockMonitor(settings.LOOP_BLOCK_THRESHOLD_MS)
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles")
+
+def compute_load(worker) -> float:
+    """LiveKit load_fnc: jobs, CPU and loop lag; LiveKit stops dispatching above AGENT_LOAD_THRESHOLD"""
+    global _worker_draining
+    _worker_draining = worker.draining
+    return worker_load.update(len(worker.active_jobs))
+
+def start_worker_monitors():
+    """Loop-lag sampling and block detection on the worker's event loop, from the moment it starts"""
+    worker_load.lag_monitor.start()
+    loop_monitor.start()
+
+async def request_fnc(req: JobRequest):
+    """Accept a job only while this worker has room for it; otherwise let another worker take it"""
+    running = len(agent_server.active_jobs) if agent_server is not None else worker_load.active_jobs
+    accepted, reason = worker_load.admit(running, draining=_worker_draining)
+    if not accepted:
+        logger.warning(f"Rejecting job for room {req.room.name}: {reason} ({worker_load.snapshot()})")
+        await req.reject(terminate=False)
+        return
+    try:
+        await req.accept()  # Returns once the job has launched (or raises)
+    finally:
+        worker_load.release_pending()
 
 async def entrypoint(ctx: JobContext):
     """Main entrypoint for the LiveKit agent"""
     logger.info(f"Job assigned for room: {ctx.room.name}")
+    loop_monitor.start()  # Job processes have their own loop
+    install_profile_signal(PROFILE_DIR)  # kill -USR1 <pid> writes a collapsed-stack profile
     
     # Initialize RAG API client
-    debate_api_client = DebateAgent()
+    debate_api_client = DebateAgent(room_name=ctx.room.name)
     await debate_api_client.initialize()
 
     try:
@@ -185,7 +380,8 @@ async def entrypoint(ctx: JobContext):
         session = AgentSession()
         
         # Create agent instance
-        agent = DebateLiveKitAgent(debate_api_client)
+        agent = DebateLiveKitAgent(debate_api_client, captions=CaptionPublisher(ctx.room))
+        agent.warm_phrases()
         
         # Start the agent session
         await session.start(
@@ -220,9 +416,18 @@ if __name__ == "__main__":
         logger.error(f"Missing required environment variables: {missing_vars}")
         sys.exit(1)
     
+    install_profile_signal(PROFILE_DIR)
+
     # Run the agent
-    cli.run_app(
-        WorkerOptions(
-            entrypoint_fnc=entrypoint,
-        )
-    )
\ No newline at end of file
+    worker_options = dict(
+        entrypoint_fnc=entrypoint,
+        request_fnc=request_fnc,
+        load_fnc=compute_load,
+        load_threshold=settings.AGENT_LOAD_THRESHOLD,
+        drain_timeout=settings.AGENT_DRAIN_TIMEOUT,
+    )
+    if settings.AGENT_PROMETHEUS_PORT:
+        worker_options["prometheus_port"] = settings.AGENT_PROMETHEUS_PORT  # Also serves the debate_agent_* gauges
+    agent_server = AgentServer.from_server_options(WorkerOptions(**worker_options))
+    agent_server.on("worker_started", start_worker_monitors)
+    cli.run_app(agent_server)
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+AI Debate Partner - Batch Debate CLI
+Sprint 4: Run the debate pipeline over a file of arguments without the HTTP server
+
+Reads a JSON Lines file (one argument string, or {"id": ..., "content": ...},
+per line), embeds all arguments in one pass, runs one FAISS matrix query and
+generates counter-arguments with bounded LLM concurrency. Results are written
+as JSON Lines in completion order, each with per-item timing; a summary goes to
+stderr.
+
+Usage (from the project root):
+    python backend/batch_debate.py arguments.jsonl --output results.jsonl --concurrency 16
+    cat arguments.jsonl | python backend/batch_debate.py - > results.jsonl
+    python backend/batch_debate.py arguments.jsonl --offline   # fake embedder and LLM, no API keys
+
+The same pipeline is served over HTTP as POST /api/debate/batch.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings
+from services.batch_debate import parse_jsonl
+from services.responses import dumps
+
+logger = logging.getLogger("batch_debate")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate counter-arguments for a batch of opening arguments")
+    parser.add_argument("input", help="JSON Lines file of arguments, or - for stdin")
+    parser.add_argument("--output", help="Write results here instead of stdout")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_LLM_CONCURRENCY,
+                        help="LLM calls in flight")
+    parser.add_argument("--no-answer-cache", action="store_true",
+                        help="Always generate, even for canonical claims in the answer cache")
+    parser.add_argument("--offline", action="store_true",
+                        help="Use the fake embedding and LLM providers (pipeline and latency checks)")
+    return parser.parse_args(argv)
+
+
+async def run_batch(runner, items, output):
+    """Write results as they complete; returns the batch summary"""
+    done = 0
+    async for result in runner.run(items):
+        output.write(dumps(result).decode("utf-8") + "\n")
+        done += 1
+        if done % 100 == 0:
+            output.flush()
+            logger.info(f"{done}/{len(items)} arguments done")
+    output.flush()
+    return runner.summary
+
+
+def main_cli(argv=None):
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    args = parse_args(argv)
+
+    if args.input == "-":
+        items = parse_jsonl(sys.stdin)
+    else:
+        with open(args.input, "r", encoding="utf-8") as f:
+            items = parse_jsonl(f)
+
+    if args.offline:
+        settings.LLM_PROVIDER = "fake"
+        settings.EMBEDDING_PROVIDER = "fake"
+
+    import main
+    if not main.initialize_rag():
+        logger.error("RAG pipeline failed to initialise; check API keys and the knowledge base index")
+        sys.exit(1)
+
+    runner = main.create_batch_runner(args.concurrency, use_answer_cache=not args.no_answer_cache)
+    runner.concurrency = max(1, args.concurrency)  # The CLI is not bound by the API's per-request cap
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        summary = asyncio.run(run_batch(runner, items, output))
+    finally:
+        if args.output:
+            output.close()
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    if summary.get("errors"):
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main_cli()
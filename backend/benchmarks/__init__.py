@@ -0,0 +1,2 @@
+# AI Debate Partner Benchmarks
+# Sprint 4: Offline load testing and performance regression checks
\ No newline at end of file
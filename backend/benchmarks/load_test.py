@@ -0,0 +1,322 @@
+"""
+AI Debate Partner - Load Test and Benchmark Suite
+Sprint 4: Offline throughput/latency benchmarks for the FastAPI backend
+
+Drives /api/debate/test, /api/knowledge/search and the voice session endpoints
+in-process (httpx ASGI transport) at a configurable concurrency. The RAG
+pipeline runs for real - FAISS search over the Markdown knowledge base, prompt
+formatting, memory, logging - but with the built-in fake providers (see
+services/providers.py): a deterministic hash embedder and a streaming fake LLM
+with a configurable per-token latency, so no OpenAI or LiveKit access is
+needed. Because the app shares the benchmark's event loop, the event-loop lag
+sampler sees any handler that blocks the loop.
+
+Traffic is either a synthetic mix or a replayed trace captured with
+REQUEST_TRACE_FILE (see services/request_trace.py).
+
+Usage (from the project root):
+    python backend/benchmarks/load_test.py --concurrency 16 --requests 400
+    python backend/benchmarks/load_test.py --trace backend/benchmarks/traces/sample_trace.jsonl --replay-speed 1
+    python backend/benchmarks/load_test.py --output bench.json --baseline last_bench.json --max-regression 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import httpx
+
+import main
+from config import settings
+
+UUID_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+SYNTHETIC_ARGUMENTS = [
+    "Free will is an illusion because every choice is determined by prior causes.",
+    "The right action is whatever maximises overall happiness.",
+    "Consciousness is nothing more than neurons firing.",
+    "Lying is always wrong, even to save a life.",
+    "A just society distributes wealth equally.",
+    "All knowledge comes from sensory experience.",
+]
+SYNTHETIC_QUERIES = ["veil of ignorance", "categorical imperative", "hard problem", "blank slate", "compatibilism"]
+
+
+def install_offline_pipeline(token_latency_ms: float, response_tokens: int, failure_rate: float = 0.0):
+    """Initialise main's RAG pipeline with the fake providers"""
+    settings.LLM_PROVIDER = "fake"
+    settings.EMBEDDING_PROVIDER = "fake"
+    settings.FAKE_LLM_TOKEN_DELAY_MS = token_latency_ms
+    settings.FAKE_LLM_RESPONSE_TOKENS = response_tokens
+    settings.FAKE_LLM_FAILURE_RATE = failure_rate
+    settings.RERANK_ENABLED = False
+    settings.ANSWER_CACHE_ENABLED = False
+
+    # initialize_rag() resolves knowledge base paths relative to the project root
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    previous_cwd = os.getcwd()
+    os.chdir(project_root)
+    try:
+        if not main.initialize_rag():
+            raise RuntimeError("Offline RAG pipeline failed to initialise")
+    finally:
+        os.chdir(previous_cwd)
+
+    # Token minting is local HMAC signing; dummy credentials never leave the process
+    settings.LIVEKIT_API_KEY = settings.LIVEKIT_API_KEY or "bench_api_key"
+    settings.LIVEKIT_API_SECRET = settings.LIVEKIT_API_SECRET or "bench_api_secret_bench_api_secret"
+    settings.MAX_CONCURRENT_SESSIONS = 1_000_000
+
+    # Keep benchmark traffic out of the production performance log
+    main.PERFORMANCE_LOG_FILE = os.path.join(tempfile.mkdtemp(prefix="aidebate-bench-"), "performance_logs.jsonl")
+    return main.vectorstore.index.ntotal
+
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_trace(total: int) -> List[Dict[str, Any]]:
+    """A mix of debate turns, searches and voice session lifecycles"""
+    trace = []
+    i = 0
+    while len(trace) < total:
+        kind = i % 10
+        if kind < 5:
+            trace.append({"method": "POST", "path": "/api/debate/test", "json": {
+                "content": SYNTHETIC_ARGUMENTS[i % len(SYNTHETIC_ARGUMENTS)],
+                "session_id": f"bench-{i % 25}"
+            }})
+        elif kind < 8:
+            trace.append({"method": "GET", "path": "/api/knowledge/search",
+                          "query": f"query={SYNTHETIC_QUERIES[i % len(SYNTHETIC_QUERIES)]}&limit=5"})
+        elif kind == 8:
+            trace.append({"method": "POST", "path": "/api/voice/start-session",
+                          "json": {"user_identity": f"bench-user-{i}"}})
+            trace.append({"method": "GET", "path": "/api/voice/session/{session_id}"})
+        else:
+            trace.append({"method": "DELETE", "path": "/api/voice/session/{session_id}"})
+        i += 1
+    return trace[:total]
+
+
+def endpoint_label(path: str) -> str:
+    return UUID_PATTERN.sub("{session_id}", path)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(1000 * sum(values) / len(values), 2) if values else 0.0,
+        "p50_ms": round(1000 * percentile(values, 50), 2),
+        "p95_ms": round(1000 * percentile(values, 95), 2),
+        "p99_ms": round(1000 * percentile(values, 99), 2),
+    }
+
+
+class LoopLagMonitor:
+    """Samples how late asyncio.sleep() wakes up; blocking handlers show up as lag"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> Dict[str, float]:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        values = sorted(self.samples)
+        return {
+            "samples": len(values),
+            "p50_ms": round(1000 * percentile(values, 50), 2),
+            "p99_ms": round(1000 * percentile(values, 99), 2),
+            "max_ms": round(1000 * values[-1], 2) if values else 0.0,
+        }
+
+
+async def run_load(trace: List[Dict[str, Any]], concurrency: int, replay_speed: float) -> Dict[str, Any]:
+    """
+    Replay the trace against the app.
+
+    replay_speed > 0 honours the trace's arrival offsets (open loop, scaled);
+    replay_speed == 0 sends as fast as the concurrency limit allows (closed loop).
+    """
+    results: List[Dict[str, Any]] = []
+    live_sessions: List[str] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    backlog = asyncio.Semaphore(concurrency * 2)  # Closed loop: requests issued but not yet finished
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def issue(entry: Dict[str, Any], throttled: bool = False):
+            try:
+                path = entry["path"]
+                if "{session_id}" in path or UUID_PATTERN.search(path):
+                    # Captured ids are meaningless here; target a session created in this run
+                    if not live_sessions:
+                        return
+                    session_id = live_sessions.pop() if entry["method"] == "DELETE" else live_sessions[-1]
+                    path = UUID_PATTERN.sub(session_id, path.replace("{session_id}", session_id))
+                url = f"{path}?{entry['query']}" if entry.get("query") else path
+
+                async with semaphore:
+                    start = time.perf_counter()
+                    try:
+                        response = await client.request(entry["method"], url, json=entry.get("json"))
+                        status = response.status_code
+                        if entry["path"] == "/api/voice/start-session" and status == 200:
+                            live_sessions.append(response.json()["session_id"])
+                    except Exception:
+                        status = 599
+                    results.append({
+                        "endpoint": f"{entry['method']} {endpoint_label(entry['path'])}",
+                        "latency": time.perf_counter() - start,
+                        "error": status >= 400
+                    })
+            finally:
+                if throttled:
+                    backlog.release()
+
+        monitor = LoopLagMonitor()
+        monitor.start()
+        started = time.perf_counter()
+
+        tasks = []
+        first_offset = trace[0].get("offset", 0.0) if trace else 0.0
+        for entry in trace:
+            if replay_speed > 0 and "offset" in entry:
+                delay = (entry["offset"] - first_offset) / replay_speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            closed_loop = replay_speed <= 0 or "offset" not in entry
+            if closed_loop:
+                # Do not build an unbounded backlog of pending tasks; waits without polling the loop
+                await backlog.acquire()
+            tasks.append(asyncio.create_task(issue(entry, closed_loop)))
+        await asyncio.gather(*tasks)
+
+        elapsed = time.perf_counter() - started
+        loop_lag = await monitor.stop()
+
+    per_endpoint: Dict[str, Dict[str, Any]] = {}
+    for endpoint in sorted({r["endpoint"] for r in results}):
+        rows = [r for r in results if r["endpoint"] == endpoint]
+        per_endpoint[endpoint] = summarize([r["latency"] for r in rows], sum(r["error"] for r in rows), elapsed)
+
+    return {
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "overall": summarize([r["latency"] for r in results], sum(r["error"] for r in results), elapsed),
+        "endpoints": per_endpoint,
+        "event_loop_lag": loop_lag,
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float,
+                        min_delta_ms: float = 5.0) -> List[str]:
+    """
+    List regressions beyond max_regression (fractional) in RPS or per-endpoint p95.
+
+    p95 must also grow by more than min_delta_ms, so sub-millisecond endpoints do
+    not fail the check on scheduler noise.
+    """
+    problems = []
+    base_rps = baseline["overall"]["rps"]
+    if base_rps and report["overall"]["rps"] < base_rps * (1 - max_regression):
+        problems.append(f"overall RPS {report['overall']['rps']} < baseline {base_rps}")
+    for endpoint, stats in report["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(endpoint)
+        if base and stats["p95_ms"] > base["p95_ms"] * (1 + max_regression) + min_delta_ms:
+            problems.append(f"{endpoint} p95 {stats['p95_ms']}ms > baseline {base['p95_ms']}ms")
+    return problems
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\nConcurrency {report['concurrency']}, {report['elapsed_seconds']}s elapsed")
+    header = f"{'endpoint':<42}{'reqs':>7}{'err':>6}{'rps':>9}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["overall"])]
+    for endpoint, s in rows:
+        print(f"{endpoint:<42}{s['requests']:>7}{s['errors']:>6}{s['rps']:>9}{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}")
+    lag = report["event_loop_lag"]
+    print(f"\nEvent-loop lag: p50 {lag['p50_ms']}ms, p99 {lag['p99_ms']}ms, max {lag['max_ms']}ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for the AI Debate backend")
+    parser.add_argument("--trace", help="JSONL request trace to replay (default: synthetic mix)")
+    parser.add_argument("--requests", type=int, default=200, help="Synthetic requests to send")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--replay-speed", type=float, default=0.0, help="Trace time scale; 0 = as fast as possible")
+    parser.add_argument("--token-latency-ms", type=float, default=20.0, help="Fake LLM delay per token")
+    parser.add_argument("--response-tokens", type=int, default=60, help="Fake LLM tokens per response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of fake LLM calls that fail")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed fractional regression vs baseline")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore p95 increases smaller than this")
+    return parser.parse_args(argv)
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    chunk_count = install_offline_pipeline(args.token_latency_ms, args.response_tokens, args.failure_rate)
+    print(f"Offline pipeline ready: {chunk_count} chunks, fake LLM {args.token_latency_ms}ms/token x {args.response_tokens} tokens")
+    trace = load_trace(args.trace) if args.trace else synthetic_trace(args.requests)
+    return asyncio.run(run_load(trace, args.concurrency, args.replay_speed))
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run_benchmark(args)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to '{args.output}'")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_to_baseline(report, json.load(f), args.max_regression, args.min_delta_ms)
+        if regressions:
+            print("\nPerformance regressions detected:")
+            for problem in regressions:
+                print(f"  - {problem}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
@@ -0,0 +1,206 @@
+"""
+AI Debate Partner - Quantization Benchmark
+Sprint 4: int8 embedding inference and SQ8 vector storage vs the float32 baseline
+
+Embeds the knowledge base chunks (same chunking as the served index) with the
+float32 model and with its dynamic-int8 copy, builds flat and 8-bit
+scalar-quantized FAISS indexes, and reports for every combination:
+
+- encode latency: single-query p50/p95 and full-corpus build time
+- memory: serialized model weights and index size
+- retrieval agreement with float32 + flat: top-1 match and overlap@k over the
+  canonical opening claims plus one query per chunk, and the cosine similarity
+  of int8 query vectors to their float32 counterparts
+
+Usage (from the project root):
+    python backend/benchmarks/quantization.py
+    python backend/benchmarks/quantization.py --model all-MiniLM-L6-v2 --k 3 --output quant.json
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import faiss
+import numpy as np
+
+from config import settings
+from services.providers import chunking_options, load_knowledge_base_chunks
+from services.quantization import index_size_bytes, quantize_model
+from benchmarks.load_test import percentile
+
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(__file__), '..', settings.KNOWLEDGE_BASE_PATH)
+CLAIMS_FILE = os.path.join(os.path.dirname(__file__), '..', settings.ANSWER_CACHE_CLAIMS_FILE)
+
+
+def tensor_bytes(value: Any) -> int:
+    """Storage of a state_dict entry; quantized Linear layers hold (weight, bias) tuples"""
+    import torch
+
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        return sum(tensor_bytes(item) for item in value)
+    return 0
+
+
+def model_size_mib(model: Any) -> float:
+    return round(sum(tensor_bytes(value) for value in model.state_dict().values()) / (1024 * 1024), 1)
+
+
+def benchmark_queries(chunks: List[Any]) -> List[str]:
+    """Canonical opening claims, plus the first sentence of every chunk"""
+    queries = []
+    if os.path.exists(CLAIMS_FILE):
+        with open(CLAIMS_FILE, "r", encoding="utf-8") as f:
+            for claims in json.load(f).values():
+                queries.extend(claims)
+    for chunk in chunks:
+        text = " ".join(line for line in chunk.page_content.splitlines() if line and not line.startswith("#"))
+        sentence = text.split(". ")[0][:200]
+        if sentence:
+            queries.append(sentence)
+    return queries
+
+
+def encode(model: Any, texts: List[str], batch_size: int = 32) -> np.ndarray:
+    return np.asarray(model.encode(texts, batch_size=batch_size, show_progress_bar=False), dtype=np.float32)
+
+
+def time_single_queries(model: Any, queries: List[str], repeats: int) -> Dict[str, float]:
+    encode(model, queries[:4])  # Warm-up
+    latencies = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            encode(model, [query])
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "query_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "query_p95_ms": round(percentile(latencies, 95) * 1000, 2),
+    }
+
+
+def build_index(vectors: np.ndarray, quantized: bool) -> Any:
+    if quantized:
+        index = faiss.IndexScalarQuantizer(vectors.shape[1], faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+        index.train(vectors)
+    else:
+        index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    return index
+
+
+def agreement(baseline: np.ndarray, candidate: np.ndarray, k: int) -> Dict[str, float]:
+    top1 = float(np.mean(baseline[:, 0] == candidate[:, 0]))
+    overlap = float(np.mean([len(set(b) & set(c)) / k for b, c in zip(baseline, candidate)]))
+    return {"top1_agreement": round(top1, 4), f"overlap_at_{k}": round(overlap, 4)}
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    from sentence_transformers import SentenceTransformer
+
+    chunks = load_knowledge_base_chunks(KNOWLEDGE_BASE_DIR, **chunking_options(settings))
+    texts = [chunk.page_content.replace("\n", " ") for chunk in chunks]
+    queries = benchmark_queries(chunks)
+
+    float_model = SentenceTransformer(args.model, device="cpu")
+    int8_model = quantize_model(copy.deepcopy(float_model))
+    models = {"float32": float_model, "dynamic-int8": int8_model}
+
+    encoders: Dict[str, Dict[str, Any]] = {}
+    for name, model in models.items():
+        start = time.perf_counter()
+        doc_vectors = encode(model, texts)
+        build_seconds = time.perf_counter() - start
+        encoders[name] = {
+            "doc_vectors": doc_vectors,
+            "query_vectors": encode(model, queries),
+            "report": {
+                "model_mib": model_size_mib(model),
+                "corpus_encode_seconds": round(build_seconds, 3),
+                **time_single_queries(model, queries[:args.latency_queries], args.repeats),
+            },
+        }
+
+    query_cosine = np.sum(
+        encoders["float32"]["query_vectors"] * encoders["dynamic-int8"]["query_vectors"], axis=1
+    ) / (
+        np.linalg.norm(encoders["float32"]["query_vectors"], axis=1)
+        * np.linalg.norm(encoders["dynamic-int8"]["query_vectors"], axis=1)
+    )
+
+    results = []
+    baseline_ids = None
+    for model_name in models:
+        for storage in ("flat", "sq8"):
+            index = build_index(encoders[model_name]["doc_vectors"], quantized=storage == "sq8")
+            query_vectors = encoders[model_name]["query_vectors"]
+            start = time.perf_counter()
+            _, ids = index.search(query_vectors, args.k)
+            search_ms = (time.perf_counter() - start) * 1000 / len(query_vectors)
+            if baseline_ids is None:
+                baseline_ids = ids
+            results.append({
+                "model": model_name,
+                "storage": storage,
+                **encoders[model_name]["report"],
+                "index_kib": round(index_size_bytes(index) / 1024, 1),
+                "search_ms_per_query": round(search_ms, 4),
+                **agreement(baseline_ids, ids, args.k),
+            })
+
+    return {
+        "model": args.model,
+        "chunks": len(chunks),
+        "queries": len(queries),
+        "k": args.k,
+        "int8_query_cosine_mean": round(float(np.mean(query_cosine)), 5),
+        "int8_query_cosine_min": round(float(np.min(query_cosine)), 5),
+        "results": results,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    k = report["k"]
+    print(f"\n{report['model']}: {report['chunks']} chunks, {report['queries']} queries, k={k}")
+    print(f"int8 vs float32 query vectors: mean cosine {report['int8_query_cosine_mean']}, min {report['int8_query_cosine_min']}")
+    header = f"{'model':<14}{'index':<7}{'model MiB':>10}{'index KiB':>11}{'encode s':>10}{'q p50 ms':>10}{'q p95 ms':>10}{'top1':>8}{f'ovl@{k}':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in report["results"]:
+        print(
+            f"{r['model']:<14}{r['storage']:<7}{r['model_mib']:>10}{r['index_kib']:>11}{r['corpus_encode_seconds']:>10}"
+            f"{r['query_p50_ms']:>10}{r['query_p95_ms']:>10}{r['top1_agreement']:>8}{r[f'overlap_at_{k}']:>8}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark quantized embeddings and vector storage")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--k", type=int, default=settings.RETRIEVAL_TOP_K)
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over the latency query set")
+    parser.add_argument("--latency-queries", type=int, default=50, help="Queries timed one at a time")
+    parser.add_argument("--output", help="Write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_benchmark(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
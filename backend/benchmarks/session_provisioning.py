@@ -0,0 +1,142 @@
+"""
+AI Debate Partner - Session Provisioning Benchmark
+Sprint 4: Voice sessions created per second, one by one vs in bulk
+
+Measures sessions/sec for:
+
+- token minting alone: generate_livekit_token() (livekit AccessToken + PyJWT)
+  per session vs TokenMinter.mint_many() over the whole batch
+- the API, in-process over the httpx ASGI transport: N concurrent
+  POST /api/voice/start-session calls (the tournament-start thundering herd) vs
+  one POST /api/admin/voice/sessions with count=N
+
+LiveKit credentials (and ADMIN_TOKEN, if unset) are set to throwaway values; no
+LiveKit server is contacted (tokens are only signed, never used).
+
+Usage (from the project root):
+    python backend/benchmarks/session_provisioning.py
+    python backend/benchmarks/session_provisioning.py --sessions 500 --concurrency 100 --repeat 5 --output prov.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import httpx
+
+import main
+from config import settings
+from services.session_tokens import TokenMinter
+
+
+def configure(sessions: int):
+    settings.LIVEKIT_API_KEY = "bench-key"
+    settings.LIVEKIT_API_SECRET = "bench-secret-" + "x" * 32
+    settings.MAX_CONCURRENT_SESSIONS = sessions
+    settings.VOICE_BULK_MAX_SESSIONS = max(settings.VOICE_BULK_MAX_SESSIONS, sessions)
+    settings.ADMIN_TOKEN = settings.ADMIN_TOKEN or "bench-admin-token"
+
+
+def reset_sessions():
+    for session_id in list(main.active_voice_sessions):
+        del main.active_voice_sessions[session_id]
+
+
+def best_rate(samples: List[float], sessions: int) -> Dict[str, float]:
+    best = min(samples)
+    return {"best_seconds": round(best, 4), "sessions_per_second": round(sessions / best, 1)}
+
+
+def bench_minting(sessions: int, repeat: int) -> Dict[str, Any]:
+    participants = [(f"room-{i}", f"student-{i}", None) for i in range(sessions)]
+    single, batch = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for room_name, identity, name in participants:
+            main.generate_livekit_token(room_name=room_name, identity=identity, name=name)
+        single.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        TokenMinter(settings.LIVEKIT_API_KEY, settings.LIVEKIT_API_SECRET).mint_many(participants, 3600)
+        batch.append(time.perf_counter() - start)
+    return {"access_token": best_rate(single, sessions), "batch_minter": best_rate(batch, sessions)}
+
+
+async def bench_api(sessions: int, concurrency: int, repeat: int) -> Dict[str, Any]:
+    transport = httpx.ASGITransport(app=main.app)
+    single, bulk = [], []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(repeat):
+            reset_sessions()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def start_one(i: int):
+                async with semaphore:
+                    response = await client.post("/api/voice/start-session", json={"user_identity": f"student-{i}"})
+                    response.raise_for_status()
+
+            start = time.perf_counter()
+            await asyncio.gather(*(start_one(i) for i in range(sessions)))
+            single.append(time.perf_counter() - start)
+
+            reset_sessions()
+            start = time.perf_counter()
+            response = await client.post("/api/admin/voice/sessions", json={"count": sessions, "identity_prefix": "student"},
+                                         headers={"X-Admin-Token": settings.ADMIN_TOKEN})
+            response.raise_for_status()
+            bulk.append(time.perf_counter() - start)
+            assert response.json()["count"] == sessions
+    reset_sessions()
+    return {"start_session": best_rate(single, sessions), "bulk_provision": best_rate(bulk, sessions)}
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n{report['sessions']} sessions, best of {report['repeat']} (API concurrency {report['concurrency']})")
+    header = f"{'Path':<42}{'Seconds':>10}{'Sessions/s':>14}"
+    print(header)
+    print("-" * len(header))
+    rows = [
+        ("Mint: AccessToken per session", report["minting"]["access_token"]),
+        ("Mint: TokenMinter batch", report["minting"]["batch_minter"]),
+        ("API: POST /api/voice/start-session x N", report["api"]["start_session"]),
+        ("API: POST /api/admin/voice/sessions", report["api"]["bulk_provision"]),
+    ]
+    for label, result in rows:
+        print(f"{label:<42}{result['best_seconds']:>10}{result['sessions_per_second']:>14}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Voice session provisioning benchmark")
+    parser.add_argument("--sessions", type=int, default=500, help="Sessions per run")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent start-session calls")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per path; the best is reported")
+    parser.add_argument("--output", help="Write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    configure(args.sessions)
+    report = {
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "repeat": args.repeat,
+        "minting": bench_minting(args.sessions, args.repeat),
+        "api": asyncio.run(bench_api(args.sessions, args.concurrency, args.repeat))
+    }
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to '{args.output}'")
+    return report
+
+
+if __name__ == "__main__":
+    run_benchmark(parse_args())
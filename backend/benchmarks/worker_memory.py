@@ -0,0 +1,124 @@
+"""
+AI Debate Partner - Worker Memory Benchmark
+Sprint 4: Per-worker RSS/PSS/USS with and without pre-fork model sharing
+
+Starts backend/serve.py twice - once with --no-preload (every worker loads its
+own model and index, like `uvicorn --workers N`) and once with the default
+preload mode - waits until it answers /health, and reads each process's
+/proc/<pid>/smaps_rollup (Linux only).
+
+- RSS counts shared pages in full in every process, so it overstates the total.
+- PSS splits shared pages between the processes sharing them; summing PSS
+  over master + workers gives the real footprint.
+- USS (private clean + private dirty) is what a worker would free on exit.
+
+Usage (from the project root):
+    python backend/benchmarks/worker_memory.py --workers 4
+Environment variables (EMBEDDING_MODEL, VECTOR_STORE_PATH, ...) are passed through.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+SERVE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'serve.py')
+
+
+def read_memory(pid: int) -> Dict[str, float]:
+    """RSS/PSS/USS in MiB from /proc/<pid>/smaps_rollup"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1]) / 1024.0
+    return {
+        "rss_mib": round(values.get("Rss", 0.0), 1),
+        "pss_mib": round(values.get("Pss", 0.0), 1),
+        "uss_mib": round(values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0), 1),
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            return [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def wait_until_ready(port: int, workers: int, master_pid: int, timeout: float) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=2) as response:
+                if response.status == 200 and len(child_pids(master_pid)) >= workers:
+                    return True
+        except Exception:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+def measure(preload: bool, workers: int, port: int, settle: float, timeout: float) -> Dict[str, object]:
+    command = [sys.executable, SERVE_SCRIPT, "--workers", str(workers), "--port", str(port), "--host", "127.0.0.1"]
+    if not preload:
+        command.append("--no-preload")
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_until_ready(port, workers, process.pid, timeout):
+            raise RuntimeError("server did not become ready in time")
+        # Every worker must have finished its own startup before we measure
+        for _ in range(workers * 2):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=5).read()
+        time.sleep(settle)
+
+        worker_stats = [read_memory(pid) for pid in child_pids(process.pid)]
+        master = read_memory(process.pid)
+        return {
+            "mode": "preload (shared)" if preload else "per-worker load",
+            "master": master,
+            "workers": worker_stats,
+            "avg_worker_rss_mib": round(sum(w["rss_mib"] for w in worker_stats) / len(worker_stats), 1),
+            "avg_worker_uss_mib": round(sum(w["uss_mib"] for w in worker_stats) / len(worker_stats), 1),
+            "total_pss_mib": round(master["pss_mib"] + sum(w["pss_mib"] for w in worker_stats), 1),
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-worker memory with and without preloading")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds to wait after startup before sampling")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="Write the JSON results here")
+    args = parser.parse_args()
+
+    results = [
+        measure(False, args.workers, args.port, args.settle, args.timeout),
+        measure(True, args.workers, args.port, args.settle, args.timeout),
+    ]
+
+    print(f"\n{'mode':<20}{'avg worker RSS':>16}{'avg worker USS':>16}{'total PSS':>12}")
+    for r in results:
+        print(f"{r['mode']:<20}{r['avg_worker_rss_mib']:>12} MiB{r['avg_worker_uss_mib']:>12} MiB{r['total_pss_mib']:>8} MiB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
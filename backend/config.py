@@ -38,6 +38,9 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = True
+    SERVER_WORKERS: int = 1  # Worker processes started by serve.py
+    SERVER_PRELOAD: bool = True  # Load RAG once in serve.py's master and share it with workers
+    TORCH_THREADS_PER_WORKER: int = 0  # 0 = library default
     
     # API Keys (Sprint 2+)
     OPENAI_API_KEY: Optional[str] = None
@@ -61,11 +64,149 @@ class Settings(BaseSettings):
     LLM_MODEL: str = "gpt-3.5-turbo"
     MAX_TOKENS: int = 500
     TEMPERATURE: float = 0.7
+    RETRIEVAL_TOP_K: int = 3  # Chunks passed to the prompt
+    KB_CHUNKER: str = "markdown"  # "markdown" (heading-aware) or "recursive" (fixed 1500/200 characters)
+    KB_CHUNK_TARGET_TOKENS: int = 450  # Small sections are packed up to this size
+    KB_CHUNK_MAX_TOKENS: int = 600  # Larger sections are split
+    KB_CHUNK_OVERLAP_TOKENS: int = 50  # Overlap between pieces of a split section only
+    
+    # Provider selection (Sprint 4+): "openai"/"huggingface", or "fake" for offline runs
+    LLM_PROVIDER: str = "openai"
+    EMBEDDING_PROVIDER: str = "huggingface"
+    FAKE_EMBEDDING_DIM: int = 384
+    FAKE_LLM_TOKEN_DELAY_MS: float = 20.0
+    FAKE_LLM_RESPONSE_TOKENS: int = 60
+    FAKE_LLM_FAILURE_RATE: float = 0.0  # Probability each fake LLM call raises
+    FAKE_LLM_SEED: int = 0
     
     # Voice Session Configuration (Sprint 3+)
     VOICE_SESSION_TIMEOUT: int = 3600  # 1 hour in seconds
     MAX_CONCURRENT_SESSIONS: int = 10
 
+    # Conversation memory configuration (Sprint 4+)
+    CONVERSATION_MAX_TURNS: int = 6  # Recent turns kept verbatim
+    CONVERSATION_HISTORY_TOKENS: int = 600  # Token budget for history in the prompt
+    CONVERSATION_SUMMARY_TOKENS: int = 200  # Share of the budget for the rolling summary
+    CONVERSATION_MAX_ACTIVE: int = 1000  # LRU capacity
+    CONVERSATION_TTL: int = 3600  # Idle seconds before a conversation is forgotten
+
+    # Re-ranking configuration (Sprint 4+)
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20  # Candidates fetched from FAISS before re-ranking
+    RERANK_BATCH_SIZE: int = 8
+    RERANK_TIME_BUDGET_MS: int = 150  # Fall back to vector order beyond this
+
+    # Answer warm-cache configuration (Sprint 4+)
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_PATH: str = "answer_cache"
+    ANSWER_CACHE_CLAIMS_FILE: str = "knowledge_base/canonical_claims.json"
+    ANSWER_CACHE_MIN_SIMILARITY: float = 0.92  # Cosine similarity needed to serve a cached answer
+    ANSWER_CACHE_MAX_AGE_DAYS: int = 30
+    ANSWER_CACHE_SERVE_STALE: bool = False  # Serve answers built from an older knowledge base
+
+    # Benchmarking configuration (Sprint 4+)
+    REQUEST_TRACE_FILE: Optional[str] = None  # e.g. backend/benchmarks/traces/captured.jsonl
+    
+    # Embedding service configuration (Sprint 4+)
+    EMBEDDING_SERVICE_URL: Optional[str] = None  # e.g. unix:///tmp/debate-embeddings.sock; unset = embed in-process
+    EMBEDDING_SERVICE_POOL_SIZE: int = 8  # Keep-alive connections per client
+    EMBEDDING_SERVICE_TIMEOUT: float = 5.0  # Seconds per request
+    EMBEDDING_SERVICE_MAX_BATCH: int = 64  # Texts per model call on the service side
+    EMBEDDING_SERVICE_BATCH_WAIT_MS: float = 2.0  # How long the service waits to fill a batch
+    AGENT_API_TOKEN: Optional[str] = None  # Shared by the voice agent and the API; query_vector is only used with a matching X-Agent-Token
+    
+    # Quantization configuration (Sprint 4+)
+    EMBEDDING_QUANTIZATION: str = "none"  # "dynamic-int8": int8 Linear layers for cheaper CPU encoding
+    VECTOR_INDEX_QUANTIZATION: str = "none"  # "sq8": 8-bit scalar-quantized vectors, 4x smaller index
+    
+    # Index hot reload configuration (Sprint 4+)
+    INDEX_WATCH_INTERVAL: float = 10.0  # Seconds between checks of faiss_index/CURRENT; 0 disables the watcher
+    INDEX_KEEP_VERSIONS: int = 3  # Index versions kept on disk for rollback
+    INDEX_SMOKE_QUERY: str = "What is justice?"  # Must return a document before a new index is swapped in
+    ADMIN_TOKEN: Optional[str] = None  # Required in X-Admin-Token for /api/admin/*; unset disables those endpoints
+    ADMIN_ALLOW_UNAUTHENTICATED: bool = False  # Local development only: open /api/admin/* while ADMIN_TOKEN is unset
+
+    # Knowledge search configuration (Sprint 4+)
+    SEARCH_MAX_LIMIT: int = 20  # Results per page of /api/knowledge/search
+    SEARCH_MAX_RESULTS: int = 50  # Ranked results kept per query; pages are served from this list
+    SEARCH_CACHE_SIZE: int = 256  # Queries kept in the search result cache (LRU)
+    SEARCH_CACHE_TTL: float = 300.0  # Seconds a cached ranking is reused; 0 keeps it until evicted
+    SEARCH_SNIPPET_CHARS: int = 240  # Snippet length with snippets=true
+    SUGGEST_INDEX_PATH: str = "suggest_index.json"  # Fallback concept autocomplete file; new builds save it inside each faiss_index version
+    SUGGEST_MAX_LIMIT: int = 10  # Completions per /api/knowledge/suggest request
+
+    # Response encoding configuration (Sprint 4+)
+    RESPONSE_COMPRESSION: bool = True  # br (if the brotli package is installed) or gzip, per Accept-Encoding
+    COMPRESSION_MIN_BYTES: int = 1024  # Smaller bodies are not worth compressing
+
+    # Batch debate configuration (Sprint 4+)
+    BATCH_MAX_ITEMS: int = 5000  # Arguments per /api/debate/batch request
+    BATCH_LLM_CONCURRENCY: int = 8  # Default LLM calls in flight per batch
+    BATCH_MAX_CONCURRENCY: int = 32  # Upper bound for a caller-supplied concurrency
+    BATCH_ITEM_TIMEOUT: float = 60.0  # Seconds per LLM call before the item is reported as failed
+
+    # LLM routing configuration (Sprint 4+)
+    LLM_FALLBACK_PROVIDER: Optional[str] = None  # "openai" or "fake"; defaults to LLM_PROVIDER when only the model is set
+    LLM_FALLBACK_MODEL: Optional[str] = None  # e.g. gpt-4o-mini; unset = no fallback
+    LLM_DEADLINE_SECONDS: float = 20.0  # Whole generation call, across hedges and fallbacks
+    LLM_HEDGE_ENABLED: bool = False  # Race a second request when the primary is slower than usual
+    LLM_HEDGE_PERCENTILE: float = 95.0  # Hedge after this percentile of the primary's recent latency
+    LLM_HEDGE_MIN_DELAY_MS: float = 500.0  # Lower bound on the hedge delay
+    LLM_BREAKER_FAILURES: int = 5  # Consecutive failures that open a provider's circuit
+    LLM_BREAKER_RESET_SECONDS: float = 30.0  # Open circuit cool-down before a trial call
+
+    # Phrase audio cache configuration (Sprint 4+)
+    AUDIO_CACHE_ENABLED: bool = True  # Replay the agent's fixed phrases from pre-synthesized audio
+    AUDIO_CACHE_DIR: str = "audio_cache"  # Relative to backend/; wiped when the agent's voice changes
+    AUDIO_CACHE_MAX_BYTES: int = 16 * 1024 * 1024  # Raw PCM kept on disk; least recently used phrases are evicted
+
+    # Agent worker capacity configuration (Sprint 4+)
+    AGENT_MAX_JOBS: int = 4  # Voice jobs per agent worker; further jobs are rejected so LiveKit dispatches elsewhere
+    AGENT_LOAD_THRESHOLD: float = 0.8  # Worker load (max of jobs, CPU, loop lag) above which it takes no new jobs
+    AGENT_LOOP_LAG_LIMIT_MS: float = 200.0  # Event-loop lag that counts as fully loaded
+    AGENT_DRAIN_TIMEOUT: int = 900  # Seconds running sessions get to finish after SIGTERM
+    AGENT_PROMETHEUS_PORT: Optional[int] = None  # Expose worker load gauges on :port/metrics
+    AGENT_CAPTION_WORDS_PER_SECOND: float = 2.7  # Caption pacing for live TTS; cached phrases use their real duration
+    AGENT_CAPTION_FLUSH_MS: float = 100.0  # Caption deltas due within this window go out as one frame
+
+    # Voice session events configuration (Sprint 4+)
+    SESSION_EXPIRY_WARNING_SECONDS: float = 60.0  # Push an expiry_warning this long before a session expires
+    SESSION_EVENTS_QUEUE_SIZE: int = 32  # Undelivered events kept per subscriber; the oldest are dropped
+
+    # Performance log analytics configuration (Sprint 4+)
+    PERF_LOG_ROTATE_BYTES: int = 64 * 1024 * 1024  # Rotate performance_logs.jsonl into a segment past this size (0 = never)
+    PERF_LOG_SEGMENTS_DIR: str = "perf_logs/segments"  # Relative to backend/; rotated JSONL waiting for compaction
+    PERF_LOG_STORE_DIR: str = "perf_logs/columnar"  # Relative to backend/; day-partitioned NumPy columns
+
+    # Knowledge base dedup and retrieval diversity configuration (Sprint 4+)
+    KB_DEDUP_ENABLED: bool = True  # Drop near-duplicate chunks when building the index
+    KB_DEDUP_THRESHOLD: float = 0.8  # Word-shingle Jaccard similarity (MinHash/LSH) counted as a duplicate
+    KB_DEDUP_EMBEDDING_THRESHOLD: Optional[float] = None  # e.g. 0.95: also drop chunks this close in embedding space
+    KB_DEDUP_REPORT_PATH: str = "dedup_report.json"  # Relative to backend/; what the last build dropped
+    RETRIEVAL_MMR_ENABLED: bool = False  # Pick context chunks by maximal marginal relevance instead of plain top-k
+    RETRIEVAL_MMR_LAMBDA: float = 0.5  # 1 = relevance only, 0 = diversity only
+    RETRIEVAL_MMR_FETCH_K: int = 20  # Candidates MMR and adaptive retrieval choose from
+
+    # Adaptive retrieval configuration (Sprint 4+)
+    RETRIEVAL_ADAPTIVE_ENABLED: bool = False  # Pick a variable number of chunks by score, MMR and token budget
+    RETRIEVAL_MIN_K: int = 1  # Best chunks kept whatever their score
+    RETRIEVAL_MAX_K: int = 6  # Upper bound on chunks per query
+    RETRIEVAL_MIN_SCORE: float = 0.25  # Cosine similarity below which a chunk is never used
+    RETRIEVAL_RELATIVE_SCORE: float = 0.8  # Keep chunks scoring at least this fraction of the best chunk
+    RETRIEVAL_TOKEN_BUDGET: int = 1500  # Context tokens across the chosen chunks
+
+    # Profiling configuration (Sprint 4+)
+    PROFILING_ENABLED: bool = True  # /api/admin/profile/* endpoints and the per-request profile header; off while ADMIN_TOKEN is unset
+    PROFILE_MAX_SECONDS: float = 30.0  # Longest stack sampling run
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5.0  # Default time between stack samples
+    PROFILE_REQUEST_HEADER: str = "X-Debug-Profile"  # "1" on a request (plus X-Admin-Token) profiles it with cProfile
+    PROFILE_KEEP_REQUESTS: int = 20  # Request profiles kept in memory
+    LOOP_BLOCK_THRESHOLD_MS: float = 100.0  # Log the loop's stack when it is blocked this long (0 = off); API and agent
+
+    # Bulk voice session provisioning configuration (Sprint 4+)
+    VOICE_BULK_MAX_SESSIONS: int = 500  # Most sessions one /api/admin/voice/sessions call may create
+
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,67 @@
+"""
+AI Debate Partner - Embedding Service Launcher
+Sprint 4: Run the shared embedding model and FAISS index as their own process
+
+The API server and the LiveKit agent connect to it when EMBEDDING_SERVICE_URL
+is set, so neither has to load MiniLM itself and both can be scaled separately.
+
+Usage (from the project root):
+    python backend/embedding_server.py --uds /tmp/debate-embeddings.sock
+    python backend/embedding_server.py --host 127.0.0.1 --port 8100
+Then set EMBEDDING_SERVICE_URL=unix:///tmp/debate-embeddings.sock (or http://127.0.0.1:8100).
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import uvicorn
+
+from config import settings
+from services.embedding_service import create_embedding_app
+from services.providers import create_embeddings, embedding_model_id, load_vectorstore
+
+logger = logging.getLogger("embedding_server")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Embedding and search service for the AI Debate backend")
+    parser.add_argument("--uds", help="Listen on this Unix domain socket instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+
+    embeddings = create_embeddings(settings)
+    vectorstore = load_vectorstore(settings, embeddings)
+    if vectorstore is None:
+        sys.exit(1)
+
+    app = create_embedding_app(
+        embeddings,
+        vectorstore,
+        model_id=embedding_model_id(settings),
+        max_batch=settings.EMBEDDING_SERVICE_MAX_BATCH,
+        batch_wait_ms=settings.EMBEDDING_SERVICE_BATCH_WAIT_MS
+    )
+
+    if args.uds:
+        if os.path.exists(args.uds):
+            os.remove(args.uds)  # Stale socket from a previous run
+        logger.info(f"Embedding service listening on unix://{args.uds}")
+        uvicorn.run(app, uds=args.uds, log_level="warning")
+    else:
+        logger.info(f"Embedding service listening on http://{args.host}:{args.port}")
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,18 @@
 # backend/prepare_knowledge_base.py
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.document_loaders import DirectoryLoader # Will need to be adjusted for .md
-from langchain.vectorstores import FAISS
-from langchain.embeddings import HuggingFaceEmbeddings
+from langchain_community.vectorstores import FAISS
+import json
 import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config import settings
+from services.dedup import dedup_documents
+from services.providers import chunking_options, create_embeddings, load_knowledge_base_chunks
+from services.index_versions import publish_index_version
+from services.quantization import quantize_index
+from services.suggest_index import SUGGEST_INDEX_FILE, build_suggest_index, save_suggest_index
 
 print("Starting knowledge base creation...")
 
@@ -16,34 +25,58 @@ if not os.path.exists(knowledge_base_dir):
     print("Please ensure your philosophical text files are placed inside it.")
     exit()
 
-# Load documents from the knowledge_base directory and its subdirectories
-# --- IMPROVEMENT: Load Markdown files ---
-# You'll need a Markdown-specific loader or ensure DirectoryLoader can handle it.
-# For simplicity, if they are still parsed as plain text, using "**/*.md" is sufficient.
-# If you want to parse Markdown to extract structured data (e.g., metadata), you'd need a more advanced loader.
-# For now, let's assume DirectoryLoader with glob is fine for text extraction from .md files.
-loader = DirectoryLoader(knowledge_base_dir, glob="**/*.md", show_progress=True) # Changed to .md
-documents = loader.load()
+# Load and chunk the Markdown files
+# KB_CHUNKER="markdown" (default) splits on the heading hierarchy and records each
+# chunk's heading path, e.g. "Justice > Core Definition and Overview > Key Historical Figures";
+# small sections are packed up to KB_CHUNK_TARGET_TOKENS and only oversized sections
+# are split (with overlap). KB_CHUNKER="recursive" restores the fixed 1500/200 splitter.
+docs = load_knowledge_base_chunks(knowledge_base_dir, **chunking_options(settings))
 
-if not documents:
+if not docs:
     print(f"No Markdown files found in '{knowledge_base_dir}'. Please add some content.")
     exit()
 
-print(f"Loaded {len(documents)} documents.")
+print(f"Split into {len(docs)} chunks ({settings.KB_CHUNKER} chunker).")
 
-# Chunk the documents
-# Adjust chunk_size and chunk_overlap as needed.
-# For philosophical texts, you might want larger chunks to keep arguments coherent.
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200) # Slightly larger chunks
-docs = text_splitter.split_documents(documents)
+# Create embeddings and store in FAISS
+# EMBEDDING_QUANTIZATION / VECTOR_INDEX_QUANTIZATION select int8 encoding and 8-bit vector storage
+embeddings = create_embeddings(settings)
+texts = [doc.page_content for doc in docs]
+vectors = embeddings.embed_documents(texts) if settings.KB_DEDUP_ENABLED and settings.KB_DEDUP_EMBEDDING_THRESHOLD else None
 
-print(f"Split into {len(docs)} chunks.")
+# Drop near-duplicate chunks (shingle MinHash/LSH, plus embedding similarity when
+# KB_DEDUP_EMBEDDING_THRESHOLD is set) so top-k retrieval does not return copies
+if settings.KB_DEDUP_ENABLED:
+    docs, dedup_report = dedup_documents(docs, threshold=settings.KB_DEDUP_THRESHOLD, vectors=vectors,
+                                         embedding_threshold=settings.KB_DEDUP_EMBEDDING_THRESHOLD)
+    print(f"Dedup: dropped {dedup_report['dropped']} near-duplicate chunks, {dedup_report['kept']} remain.")
+    for cluster in dedup_report["clusters"]:
+        dropped = ", ".join(f"{d['chunk']} ({d['similarity']})" for d in cluster["dropped"])
+        print(f"  kept {cluster['kept']}; dropped {dropped}")
+    dedup_report_path = f"backend/{settings.KB_DEDUP_REPORT_PATH}"
+    os.makedirs(os.path.dirname(dedup_report_path), exist_ok=True)
+    with open(dedup_report_path, "w", encoding="utf-8") as f:
+        json.dump(dedup_report, f, indent=2)
+    if vectors is not None:
+        vectors = [vectors[i] for i in dedup_report["kept_indices"]]
 
-# Create embeddings and store in FAISS
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-db = FAISS.from_documents(docs, embeddings)
+if vectors is not None:
+    # Already embedded for the dedup pass; do not embed again
+    db = FAISS.from_embeddings([(doc.page_content, vector) for doc, vector in zip(docs, vectors)], embeddings,
+                               metadatas=[doc.metadata for doc in docs])
+else:
+    db = FAISS.from_documents(docs, embeddings)
+db = quantize_index(db, settings.VECTOR_INDEX_QUANTIZATION)
+
+# Concept autocomplete for /api/knowledge/suggest: tags, headings and bold terms with mention counts
+terms = build_suggest_index(knowledge_base_dir)
 
-# Save the local vector database
-faiss_index_path = "backend/faiss_index"
-db.save_local(faiss_index_path)
-print(f"Knowledge base created and saved to '{faiss_index_path}'.")
+# Publish the local vector database, with its suggest index, as a new version
+# Running servers load it in the background and swap it in (see services/index_versions.py)
+faiss_index_path = f"backend/{settings.VECTOR_STORE_PATH}"
+version = publish_index_version(
+    db, faiss_index_path, keep=settings.INDEX_KEEP_VERSIONS,
+    write_extras=lambda version_dir: save_suggest_index(os.path.join(version_dir, SUGGEST_INDEX_FILE), terms)
+)
+print(f"Knowledge base created and saved to '{faiss_index_path}' as version {version}.")
+print(f"Saved {len(terms)} autocomplete terms with version {version}.")
@@ -0,0 +1,89 @@
+# backend/knowledge_base/warm_answer_cache.py
+"""
+Offline warm-up job for the precomputed answer cache.
+
+Generates counter-arguments for the canonical opening claims listed per topic
+file in canonical_claims.json, embeds the claims, and writes everything to
+backend/answer_cache/ tagged with the current knowledge base version. The API
+loads this directory at startup and answers matching first turns from it.
+
+Re-run this after prepare_knowledge_base.py or after editing the claims file;
+until then the server treats the cache as stale.
+
+Usage (from the project root):
+    python backend/knowledge_base/warm_answer_cache.py
+    python backend/knowledge_base/warm_answer_cache.py --topics justice.md free_will.md
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import main
+from config import settings
+from services.answer_cache import compute_kb_version, save_answer_cache
+from services.providers import embedding_model_id
+
+
+def load_claims(claims_path, topics=None):
+    """Read {topic_file: [claim, ...]} and optionally restrict to some topics"""
+    with open(claims_path, 'r', encoding='utf-8') as f:
+        claims_by_topic = json.load(f)
+    if topics:
+        claims_by_topic = {topic: claims for topic, claims in claims_by_topic.items() if topic in topics}
+    return claims_by_topic
+
+
+def warm_cache():
+    parser = argparse.ArgumentParser(description="Precompute counter-arguments for canonical opening claims")
+    parser.add_argument("--claims", default=f"backend/{settings.ANSWER_CACHE_CLAIMS_FILE}", help="JSON file of claims per topic file")
+    parser.add_argument("--output", default=f"backend/{settings.ANSWER_CACHE_PATH}", help="Answer cache directory")
+    parser.add_argument("--topics", nargs="*", help="Only warm these topic files (e.g. justice.md)")
+    args = parser.parse_args()
+
+    print("Starting answer cache warm-up...")
+    if not main.initialize_rag():
+        print("Error: RAG pipeline could not be initialised. Check API keys and the FAISS index.")
+        sys.exit(1)
+
+    claims_by_topic = load_claims(args.claims, args.topics)
+    if not claims_by_topic:
+        print(f"No claims found in '{args.claims}'.")
+        sys.exit(1)
+
+    entries = []
+    for topic, claims in claims_by_topic.items():
+        for claim in claims:
+            start = time.time()
+            docs = main.retrieve_documents(claim, {})
+            response = main.rag_chain.invoke({
+                "docs": docs,
+                "question": claim,
+                "history": "(This is the opening argument of the debate.)"
+            })
+            sources, doc_info = main.describe_documents(docs)
+            entries.append({
+                "topic": topic,
+                "claim": claim,
+                "response": response,
+                "sources": sources,
+                "retrieved_docs": doc_info,
+                "generated_at": time.time()
+            })
+            print(f"[{topic}] {claim[:60]}... ({time.time() - start:.1f}s)")
+
+    # One batched embedding pass for all claims
+    vectors = main.embeddings.embed_documents([entry["claim"] for entry in entries])
+
+    kb_version = compute_kb_version(f"backend/{settings.KNOWLEDGE_BASE_PATH}")
+    save_answer_cache(args.output, entries, vectors, kb_version, embedding_model_id(settings))
+    print(f"Answer cache with {len(entries)} entries saved to '{args.output}' (knowledge base version {kb_version}).")
+
+
+if __name__ == "__main__":
+    warm_cache()
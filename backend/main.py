@@ -3,27 +3,30 @@ AI Debate Partner - FastAPI Backend with RAG
 Enhanced with Retrieval-Augmented Generation for philosophical debates
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 from livekit.api import AccessToken, VideoGrants 
+import asyncio
 import uvicorn
 import os
 import logging
 import time
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from operator import itemgetter
+from collections import deque
 import uuid
 import datetime
+import hmac
 
 # RAG and AI imports
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
-from langchain.schema.runnable import RunnablePassthrough
 from langchain.schema.output_parser import StrOutputParser
+from langchain.schema.runnable import RunnableLambda
+from langchain_core.documents import Document
 
 # LiveKit imports
 from livekit import agents
@@ -37,6 +40,24 @@ from livekit.plugins import (
 )
 
 from config import settings
+from services.conversation_memory import ConversationMemory
+from services.reranker import load_reranker
+from services.answer_cache import AnswerCache, compute_kb_version
+from services.request_trace import RequestTraceMiddleware
+from services.providers import create_embeddings, create_llm_router, embedding_model_id, load_faiss_index, load_vectorstore
+from services.index_versions import IndexReloader, resolve_index_version
+from services.embedding_client import connect_embedding_service
+from services.search_cache import SearchResultCache, make_snippet
+from services.suggest_index import SUGGEST_INDEX_FILE, SuggestIndex, build_suggest_index
+from services.responses import CompressionMiddleware, FastJSONResponse, dumps, select_fields
+from services.batch_debate import DebateBatchRunner, parse_batch_items, parse_jsonl
+from services.llm_router import LLMDeadlineExceeded, LLMUnavailableError, start_route_record
+from services.session_events import BROADCAST, FINAL_STATUSES, SessionEventHub, SessionExpiryScheduler
+from services.session_tokens import TokenMinter
+from services.adaptive_retrieval import adaptive_retrieve, supports_vectors
+from services.profiling import (LoopBlockMonitor, RequestProfilingMiddleware, find_profile, format_collapsed,
+                                run_in_threadpool, sample_stacks)
+from services.perf_store import PerfLogStore, compact_segments, confidence_histogram, error_rates, latency_percentiles, rotate_log
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -45,7 +66,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="AI Debate Partner API",
     description="Real-time AI debate partner with voice integration, philosophical knowledge base and RAG",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=FastJSONResponse  # orjson rendering when installed
 )
 
 # Enable CORS for frontend communication
@@ -57,6 +79,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Optionally record API traffic for replay by benchmarks/load_test.py
+if settings.REQUEST_TRACE_FILE:
+    app.add_middleware(RequestTraceMiddleware, trace_file=settings.REQUEST_TRACE_FILE)
+
+# br/gzip for large payloads (search pages, metrics); small debate turns are sent as-is
+if settings.RESPONSE_COMPRESSION:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
+
+# cProfile for requests sent with PROFILE_REQUEST_HEADER (admin only); outermost, so it sees every layer
+request_profiles = deque(maxlen=settings.PROFILE_KEEP_REQUESTS)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        RequestProfilingMiddleware,
+        profiles=request_profiles,
+        header=settings.PROFILE_REQUEST_HEADER,
+        authorize=lambda headers: admin_token_valid(headers.get("x-admin-token"))  # Never without ADMIN_TOKEN
+    )
+
+# Logs the stack of whatever blocks the event loop longer than LOOP_BLOCK_THRESHOLD_MS
+loop_monitor = LoopBlockMonitor(settings.LOOP_BLOCK_THRESHOLD_MS)
+
 # Serve static files (frontend)
 if os.path.exists("../frontend"):
     app.mount("/static", StaticFiles(directory="../frontend"), name="static")
@@ -66,12 +109,62 @@ vectorstore = None
 embeddings = None
 llm = None
 rag_chain = None
+reranker = None  # Optional cross-encoder stage, see RERANK_* settings
+answer_cache = None  # Precomputed first-turn answers, see ANSWER_CACHE_* settings
+index_reloader = None  # Swaps in new faiss_index versions, see INDEX_* settings
+suggest_index = None  # Concept autocomplete, built by prepare_knowledge_base.py
 active_voice_sessions = {}  # Track active voice sessions
 
+# Bounded per-debate history shared by the text and voice paths
+conversation_memory = ConversationMemory(
+    max_turns=settings.CONVERSATION_MAX_TURNS,
+    history_token_budget=settings.CONVERSATION_HISTORY_TOKENS,
+    summary_token_budget=settings.CONVERSATION_SUMMARY_TOKENS,
+    max_conversations=settings.CONVERSATION_MAX_ACTIVE,
+    ttl_seconds=settings.CONVERSATION_TTL
+)
+
+def expire_voice_session(session_id: str, session: Dict[str, Any]):
+    """The voice agent keys its debate history on the room name"""
+    conversation_memory.clear(f"session:{session['room_name']}")
+
+# Pushes session status, expiry warnings and backend readiness to WebSocket subscribers
+session_events = SessionEventHub(encode=dumps, max_queue=settings.SESSION_EVENTS_QUEUE_SIZE)
+session_expiry = SessionExpiryScheduler(
+    active_voice_sessions,
+    session_events,
+    warning_seconds=settings.SESSION_EXPIRY_WARNING_SECONDS,
+    on_expire=expire_voice_session
+)
+
+def backend_status() -> Dict[str, Any]:
+    return {
+        "type": "backend",
+        "rag_status": "enabled" if rag_chain is not None else "disabled",
+        "voice_status": "enabled" if settings.LIVEKIT_API_KEY and settings.LIVEKIT_API_SECRET else "disabled"
+    }
+
+def rank_knowledge(query: str, k: int) -> List[Tuple[Any, float]]:
+    """Ranked (document, distance) pairs from the live index, for the search cache"""
+    store = vectorstore
+    if store is None:
+        return []
+    return store.similarity_search_with_score(query, k=k)
+
+# Ranked result lists behind /api/knowledge/search, cleared whenever the index changes
+search_cache = SearchResultCache(
+    search=rank_knowledge,
+    max_entries=settings.SEARCH_CACHE_SIZE,
+    ttl_seconds=settings.SEARCH_CACHE_TTL,
+    max_results=settings.SEARCH_MAX_RESULTS
+)
+
 # Performance logging configuration
 PERFORMANCE_LOG_FILE = "backend/performance_logs.jsonl"
+PERF_LOG_SEGMENTS_DIR = f"backend/{settings.PERF_LOG_SEGMENTS_DIR}"
+PERF_LOG_STORE_DIR = f"backend/{settings.PERF_LOG_STORE_DIR}"
 
-def log_performance_metrics(response_time: float, confidence: float, user_message: str, success: bool = True, error_message: str = None):
+def log_performance_metrics(response_time: float, confidence: float, user_message: str, success: bool = True, error_message: str = None, stages: Optional[Dict[str, float]] = None, llm_route: Optional[Dict[str, Any]] = None):
     """Log performance metrics to filesystem"""
     try:
         log_entry = {
@@ -83,9 +176,16 @@ def log_performance_metrics(response_time: float, confidence: float, user_messag
             "success": success,
             "error": error_message
         }
+        if stages:
+            # Per-stage latency breakdown, e.g. retrieval / rerank / generation
+            log_entry["stages"] = {name: round(seconds, 4) for name, seconds in stages.items()}
+        if llm_route:
+            # Which provider answered, and whether the call was hedged or fell back
+            log_entry["llm"] = llm_route
         
         # Ensure the backend directory exists
         os.makedirs(os.path.dirname(PERFORMANCE_LOG_FILE), exist_ok=True)
+        rotate_log(PERFORMANCE_LOG_FILE, PERF_LOG_SEGMENTS_DIR, settings.PERF_LOG_ROTATE_BYTES)
         
         # Append to JSONL file (JSON Lines format for easy parsing)
         with open(PERFORMANCE_LOG_FILE, 'a', encoding='utf-8') as f:
@@ -98,12 +198,31 @@ def log_performance_metrics(response_time: float, confidence: float, user_messag
 class DebateMessage(BaseModel):
     content: str
     user_id: str = "default"
+    session_id: Optional[str] = Field(default=None, description="Debate/session identifier used to keep conversation history")
+    query_vector: Optional[List[float]] = Field(default=None, description="Query embedding from the shared embedding service (voice agent only, with X-Agent-Token)")
+
+    def memory_key(self) -> Optional[str]:
+        """Key for conversation memory; the shared anonymous user gets no history"""
+        if self.session_id:
+            return f"session:{self.session_id}"
+        if self.user_id and self.user_id != "default":
+            return f"user:{self.user_id}"
+        return None
 
 class DebateResponse(BaseModel):
     response: str
     confidence: float
     sources: List[str] = []
     retrieved_docs: List[Dict[str, Any]] = []
+    cached: bool = False  # True when served from the precomputed answer cache
+
+# Dropped by /api/debate/test?verbose=false; callers such as the voice agent only read `response`
+LEAN_RESPONSE_DROP = ("sources", "retrieved_docs")
+
+def render_debate_response(response: DebateResponse, fields: Optional[str], verbose: bool) -> FastJSONResponse:
+    """Serialize a debate response, keeping only the requested fields"""
+    payload = select_fields(response.model_dump(), fields, lean_drop=LEAN_RESPONSE_DROP, verbose=verbose)
+    return FastJSONResponse(payload)
 
 class VoiceSessionRequest(BaseModel):
     room_name: Optional[str] = Field(default=None, description="Room name for the voice session")
@@ -124,52 +243,24 @@ class VoiceSessionStatus(BaseModel):
     created_at: int
     expires_at: int
 
-def initialize_rag():
-    """Initialize RAG components on startup"""
-    global vectorstore, embeddings, llm, rag_chain
-    
-    try:
-        logger.info("Initializing RAG components...")
-        
-        # Check if OpenAI API key is available
-        if not settings.OPENAI_API_KEY:
-            logger.warning("OpenAI API key not found. RAG functionality will be limited.")
-            return False
-        
-        # Initialize embeddings
-        logger.info(f"Loading embeddings model: {settings.EMBEDDING_MODEL}")
-        embeddings = HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
-        
-        # Load FAISS vector store
-        if os.path.exists(f"backend/{settings.VECTOR_STORE_PATH}"):
-            logger.info(f"Loading FAISS vector store from: {settings.VECTOR_STORE_PATH}")
-            vectorstore = FAISS.load_local(
-                f"backend/{settings.VECTOR_STORE_PATH}", 
-                embeddings,
-                allow_dangerous_deserialization=True
-            )
-            logger.info(f"Vector store loaded successfully with {vectorstore.index.ntotal} documents")
-        else:
-            logger.error(f"FAISS vector store not found at: {settings.VECTOR_STORE_PATH}")
-            logger.error("Please run 'python backend/prepare_knowledge_base.py' first")
-            return False
-        
-        # Initialize OpenAI LLM
-        logger.info(f"Initializing OpenAI LLM: {settings.LLM_MODEL}")
-        llm = ChatOpenAI(
-            model=settings.LLM_MODEL,
-            temperature=settings.TEMPERATURE,
-            max_tokens=settings.MAX_TOKENS,
-            openai_api_key=settings.OPENAI_API_KEY
-        )
-        
-        # Create RAG prompt template
-        rag_prompt = PromptTemplate(
-            template="""You are an expert philosophical debate opponent. Your role is to challenge the user's argument with well-reasoned counter-arguments based on established philosophical positions.
+class VoiceBulkSessionRequest(BaseModel):
+    participants: Optional[List[VoiceSessionRequest]] = Field(default=None, description="One session per participant")
+    count: Optional[int] = Field(default=None, ge=1, description="Sessions with generated identities, when participants is not given")
+    identity_prefix: str = Field(default="participant", description="Generated identities are <prefix>-1, <prefix>-2, ...")
+    room_prefix: str = Field(default="debate", description="Prefix of generated room names")
+
+def build_rag_chain(chat_model):
+    """Build the LCEL generation chain: {docs, history, question} -> counter-argument"""
+    # Create RAG prompt template
+    rag_prompt = PromptTemplate(
+        template="""You are an expert philosophical debate opponent. Your role is to challenge the user's argument with well-reasoned counter-arguments based on established philosophical positions.
 
 Context from philosophical knowledge base:
 {context}
 
+Debate so far:
+{history}
+
 User's argument: {question}
 
 Instructions:
@@ -178,34 +269,229 @@ Instructions:
 3. Reference specific philosophical concepts, thinkers, or schools of thought when relevant
 4. Be intellectually rigorous but accessible
 5. Challenge assumptions and point out potential weaknesses
-6. Maintain a respectful but assertive debate tone
-7. Keep your response focused and under 200 words
+6. Build on the debate so far: do not repeat earlier counter-arguments, and hold the user to their previous points
+7. Maintain a respectful but assertive debate tone
+8. Keep your response focused and under 200 words
 
 Your counter-argument:""",
-            input_variables=["context", "question"]
-        )
+        input_variables=["context", "history", "question"]
+    )
+    
+    # Retrieval happens in retrieve_documents() so the same documents feed the
+    # prompt and the response, and each stage can be timed.
+    return (
+        {
+            "context": itemgetter("docs") | RunnableLambda(format_docs),
+            "history": itemgetter("history"),
+            "question": itemgetter("question")
+        }
+        | rag_prompt
+        | chat_model
+        | StrOutputParser()
+    )
+
+def initialize_rag():
+    """Initialize RAG components on startup"""
+    global vectorstore, embeddings, llm, rag_chain, reranker, answer_cache, index_reloader
+    
+    try:
+        logger.info("Initializing RAG components...")
+        
+        # Check if OpenAI API key is available (not needed with the fake provider)
+        if settings.LLM_PROVIDER == "openai" and not settings.OPENAI_API_KEY:
+            logger.warning("OpenAI API key not found. RAG functionality will be limited.")
+            return False
+        
+        if settings.EMBEDDING_SERVICE_URL:
+            # The embedding service owns the model and index; keep only a client here
+            embeddings, vectorstore = connect_embedding_service(
+                settings.EMBEDDING_SERVICE_URL,
+                pool_size=settings.EMBEDDING_SERVICE_POOL_SIZE,
+                timeout=settings.EMBEDDING_SERVICE_TIMEOUT
+            )
+        else:
+            # Initialize embeddings and load the FAISS vector store
+            embeddings = create_embeddings(settings)
+            # Resolve the version before loading: if a newer one is published meanwhile, the watcher picks it up
+            index_version, _ = resolve_index_version(f"backend/{settings.VECTOR_STORE_PATH}")
+            vectorstore = load_vectorstore(settings, embeddings)
+            if vectorstore is None:
+                return False
+            if settings.EMBEDDING_PROVIDER != "fake":
+                index_reloader = IndexReloader(
+                    f"backend/{settings.VECTOR_STORE_PATH}",
+                    loader=lambda index_dir: load_faiss_index(index_dir, embeddings, settings),
+                    on_swap=swap_vectorstore,
+                    smoke_query=settings.INDEX_SMOKE_QUERY,
+                    keep_versions=settings.INDEX_KEEP_VERSIONS,
+                    version=index_version
+                )
+        search_cache.clear()
+        
+        # Initialize the LLM (OpenAI, or the local fake provider) behind the failover/hedging router
+        llm = create_llm_router(settings)
         
         # Create RAG chain using LCEL
-        def format_docs(docs):
-            return "\n\n".join([doc.page_content for doc in docs])
+        rag_chain = build_rag_chain(llm)
         
-        rag_chain = (
-            {
-                "context": vectorstore.as_retriever(search_kwargs={"k": 3}) | format_docs,
-                "question": RunnablePassthrough()
-            }
-            | rag_prompt
-            | llm
-            | StrOutputParser()
-        )
+        # Optional cross-encoder re-ranking stage
+        if settings.RERANK_ENABLED:
+            reranker = load_reranker(
+                settings.RERANK_MODEL,
+                batch_size=settings.RERANK_BATCH_SIZE,
+                time_budget_ms=settings.RERANK_TIME_BUDGET_MS
+            )
+        
+        # Precomputed counter-arguments for canonical opening claims
+        if settings.ANSWER_CACHE_ENABLED:
+            answer_cache = load_answer_cache()
         
         logger.info("RAG chain initialized successfully")
+        session_events.publish(BROADCAST, backend_status())
         return True
         
     except Exception as e:
         logger.error(f"Failed to initialize RAG: {str(e)}")
         return False
 
+def swap_vectorstore(new_vectorstore, version: str):
+    """
+    Install a validated index version.
+
+    Rebinding the global is atomic; requests already running keep the store they
+    read at the start of retrieval. The answer cache is reloaded too, since it is
+    only valid for the knowledge base it was built from.
+    """
+    global vectorstore, answer_cache, suggest_index
+    vectorstore = new_vectorstore
+    search_cache.clear()
+    if settings.ANSWER_CACHE_ENABLED:
+        answer_cache = load_answer_cache()
+    suggest_index = load_suggest_index(version)
+    logger.info(f"Now serving knowledge base index version {version}")
+    session_events.publish(BROADCAST, dict(backend_status(), index_version=version))
+
+def load_suggest_index(version: Optional[str] = None) -> SuggestIndex:
+    """
+    Load the autocomplete index saved with an index version (default: the live
+    one), falling back to SUGGEST_INDEX_PATH, or build it from the knowledge base
+    """
+    _, index_dir = resolve_index_version(f"backend/{settings.VECTOR_STORE_PATH}", version)
+    paths = [os.path.join(index_dir, SUGGEST_INDEX_FILE)] if index_dir else []
+    paths.append(f"backend/{settings.SUGGEST_INDEX_PATH}")  # Indexes built before versions carried it
+    index = None
+    for path in paths:
+        try:
+            index = SuggestIndex.load(path)
+        except Exception as e:
+            logger.error(f"Failed to load suggest index {path}: {str(e)}")
+        if index is not None:
+            break
+    if index is None:
+        # Knowledge bases prepared before the suggest index existed: a few milliseconds of parsing
+        logger.info("Suggest index not found, building it from the knowledge base")
+        index = SuggestIndex(build_suggest_index(f"backend/{settings.KNOWLEDGE_BASE_PATH}"))
+    return index
+
+def load_answer_cache() -> Optional[AnswerCache]:
+    """Load the warm answer cache, unless it is stale and stale serving is disabled"""
+    try:
+        cache = AnswerCache.load(
+            f"backend/{settings.ANSWER_CACHE_PATH}",
+            kb_version=compute_kb_version(f"backend/{settings.KNOWLEDGE_BASE_PATH}"),
+            embedding_model=embedding_model_id(settings),
+            min_similarity=settings.ANSWER_CACHE_MIN_SIMILARITY,
+            max_age_days=settings.ANSWER_CACHE_MAX_AGE_DAYS
+        )
+    except Exception as e:
+        logger.error(f"Failed to load answer cache: {str(e)}")
+        return None
+    
+    if cache and cache.stale and not settings.ANSWER_CACHE_SERVE_STALE:
+        logger.warning("Answer cache disabled until it is rebuilt: run 'python backend/knowledge_base/warm_answer_cache.py'")
+        return None
+    return cache
+
+def format_docs(docs):
+    return "\n\n".join([doc.page_content for doc in docs])
+
+def describe_documents(docs) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Unique source file names and short previews for the response payload"""
+    sources = []
+    doc_info = []
+    for doc in docs:
+        if hasattr(doc, 'metadata') and 'source' in doc.metadata:
+            source = os.path.basename(doc.metadata['source'])
+            if source not in sources:
+                sources.append(source)
+            
+            info = {
+                "source": source,
+                "content_preview": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content
+            }
+            if doc.metadata.get("heading_path"):
+                info["section"] = doc.metadata["heading_path"]
+            if "score" in doc.metadata:
+                info["score"] = doc.metadata["score"]
+            doc_info.append(info)
+    return sources, doc_info
+
+def retrieve_documents(query: str, stages: Dict[str, float], query_vector: Optional[List[float]] = None) -> List[Any]:
+    """
+    Retrieve the context documents for a query, recording stage timings.
+
+    Without a re-ranker this is a plain top-k vector search. With one, a larger
+    candidate set is fetched and re-scored under RERANK_TIME_BUDGET_MS.
+
+    RETRIEVAL_ADAPTIVE_ENABLED replaces the fixed k: candidates are cut at the
+    RETRIEVAL_MIN_SCORE / RETRIEVAL_RELATIVE_SCORE thresholds and picked by MMR
+    up to RETRIEVAL_MAX_K chunks and RETRIEVAL_TOKEN_BUDGET tokens. With only
+    RETRIEVAL_MMR_ENABLED, MMR picks a fixed number of chunks. Both attach each
+    chunk's cosine similarity as metadata["score"].
+    """
+    top_k = settings.RETRIEVAL_TOP_K
+    fetch_k = max(top_k, settings.RERANK_CANDIDATES) if reranker else top_k
+    store = vectorstore  # One index version for the whole request, even if a reload swaps it meanwhile
+    
+    retrieval_start = time.perf_counter()
+    if (settings.RETRIEVAL_ADAPTIVE_ENABLED or settings.RETRIEVAL_MMR_ENABLED) and supports_vectors(store):
+        # The remote embedding service's store returns no vectors; it keeps plain top-k
+        if settings.RETRIEVAL_ADAPTIVE_ENABLED:
+            limits = {
+                "max_k": settings.RETRIEVAL_MAX_K,
+                "min_k": settings.RETRIEVAL_MIN_K,
+                "min_score": settings.RETRIEVAL_MIN_SCORE,
+                "relative_score": settings.RETRIEVAL_RELATIVE_SCORE,
+                "token_budget": settings.RETRIEVAL_TOKEN_BUDGET
+            }
+        else:
+            limits = {"max_k": fetch_k}
+        scored, _ = adaptive_retrieve(
+            store,
+            query_vector if query_vector is not None else embeddings.embed_query(query),
+            fetch_k=max(fetch_k, settings.RETRIEVAL_MMR_FETCH_K),
+            lambda_mult=settings.RETRIEVAL_MMR_LAMBDA,
+            **limits
+        )
+        docs = [Document(page_content=doc.page_content, metadata={**doc.metadata, "score": score}) for doc, score in scored]
+        if settings.RETRIEVAL_ADAPTIVE_ENABLED:
+            top_k = len(docs)  # The re-ranker orders the adaptive selection; it does not trim it
+    elif query_vector is not None:
+        # Query already embedded (e.g. for the answer cache); skip re-embedding
+        docs = store.similarity_search_by_vector(query_vector, k=fetch_k)
+    else:
+        docs = store.similarity_search(query, k=fetch_k)
+    stages["retrieval"] = time.perf_counter() - retrieval_start
+    
+    if reranker:
+        rerank_start = time.perf_counter()
+        docs, rerank_info = reranker.rerank(query, docs, top_k)
+        stages["rerank"] = time.perf_counter() - rerank_start
+        if rerank_info.get("timed_out"):
+            stages["rerank_fallback"] = 1.0
+    
+    return docs[:top_k]
+
 def get_timeout_seconds():
     """Helper function to safely get timeout in seconds"""
     if isinstance(settings.VOICE_SESSION_TIMEOUT, int):
@@ -239,22 +525,41 @@ def generate_livekit_token(room_name: str, identity: str, name: Optional[str] =
     
     return token.to_jwt()
 
+token_minter: Optional[TokenMinter] = None
+
+def get_token_minter() -> TokenMinter:
+    """Batch token minter for the configured LiveKit key (its HMAC key is prepared once)"""
+    global token_minter
+    if not settings.LIVEKIT_API_KEY or not settings.LIVEKIT_API_SECRET:
+        raise HTTPException(status_code=500, detail="LiveKit credentials not configured")
+    if token_minter is None or not token_minter.matches(settings.LIVEKIT_API_KEY, settings.LIVEKIT_API_SECRET):
+        token_minter = TokenMinter(settings.LIVEKIT_API_KEY, settings.LIVEKIT_API_SECRET)
+    return token_minter
+
 def cleanup_expired_sessions():
-    """Clean up expired voice sessions"""
-    current_time = int(time.time())
-    expired_sessions = [
-        session_id for session_id, session in active_voice_sessions.items()
-        if session["expires_at"] < current_time
-    ]
-    
-    for session_id in expired_sessions:
-        del active_voice_sessions[session_id]
-        logger.info(f"Cleaned up expired session: {session_id}")
+    """Clean up expired voice sessions (only the due entries of the expiry heap are visited)"""
+    session_expiry.expire_due()
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize RAG components when the app starts"""
-    success = initialize_rag()
+    global suggest_index
+    if rag_chain is not None:
+        # serve.py loaded everything in the master before forking; reuse the shared copy
+        logger.info("Using RAG components preloaded by the master process")
+        success = True
+    else:
+        success = initialize_rag()
+    # Expire voice sessions and send warnings on time, without waiting for a request
+    session_expiry.start()
+    loop_monitor.start()
+    if index_reloader and settings.INDEX_WATCH_INTERVAL > 0:
+        # Pick up indexes published by prepare_knowledge_base.py without a restart
+        index_reloader.start_watching(settings.INDEX_WATCH_INTERVAL)
+    try:
+        suggest_index = load_suggest_index(index_reloader.version if index_reloader else None)
+    except Exception as e:
+        logger.error(f"Concept autocomplete unavailable: {str(e)}")
     if success:
         logger.info("AI Debate Partner backend started successfully with RAG")
     else:
@@ -277,17 +582,71 @@ async def health_check():
         "status": "healthy", 
         "service": "ai-debate-partner",
         "rag_status": "enabled" if rag_chain is not None else "disabled",
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "llm_router": llm.stats() if hasattr(llm, "stats") else None,
         "voice_status": "enabled" if settings.LIVEKIT_API_KEY and settings.LIVEKIT_API_SECRET else "disabled"
     }
 
+def serve_cached_answer(message: DebateMessage, memory_key: Optional[str], entry: Dict[str, Any],
+                        similarity: float, start_time: float, stages: Dict[str, float]) -> DebateResponse:
+    """Answer an opening argument from the precomputed answer cache"""
+    if memory_key:
+        conversation_memory.add_exchange(memory_key, message.content, entry["response"])
+    
+    total_response_time = time.time() - start_time
+    response_confidence = 0.85
+    logger.info(f"Answer cache hit (similarity {similarity:.3f}) for canonical claim: {entry['claim'][:60]}...")
+    
+    log_performance_metrics(
+        response_time=total_response_time,
+        confidence=response_confidence,
+        user_message=message.content,
+        success=True,
+        stages=stages
+    )
+    
+    return DebateResponse(
+        response=entry["response"],
+        confidence=response_confidence,
+        sources=entry.get("sources", []),
+        retrieved_docs=entry.get("retrieved_docs", []),
+        cached=True
+    )
+
+def agent_query_vector(message: DebateMessage, agent_token: Optional[str]) -> Optional[List[float]]:
+    """
+    The voice agent's query embedding, if this request may use it.
+
+    It is only valid when this API embeds through the same shared service, and
+    only trusted from the agent (X-Agent-Token matching AGENT_API_TOKEN);
+    otherwise it is ignored and the text is embedded here. A trusted vector
+    whose length differs from the index dimension is rejected with 422.
+    """
+    if message.query_vector is None or not settings.EMBEDDING_SERVICE_URL:
+        return None
+    if not settings.AGENT_API_TOKEN or agent_token is None or \
+            not hmac.compare_digest(agent_token.encode("utf-8"), settings.AGENT_API_TOKEN.encode("utf-8")):
+        logger.warning("Ignoring query_vector from a caller without a valid X-Agent-Token")
+        return None
+    dimension = getattr(getattr(vectorstore, "index", None), "d", None)
+    if dimension and len(message.query_vector) != dimension:
+        raise HTTPException(status_code=422, detail=f"query_vector has {len(message.query_vector)} dimensions; the index uses {dimension}")
+    return message.query_vector
+
 # Main debate endpoint with RAG
-@app.post("/api/debate/test")
-async def debate_with_rag(message: DebateMessage):
+@app.post("/api/debate/test", response_model=DebateResponse)
+async def debate_with_rag(message: DebateMessage, fields: Optional[str] = None, verbose: bool = True,
+                          x_agent_token: Optional[str] = Header(default=None)):
     """
-    Enhanced debate endpoint powered by RAG
+    Enhanced debate endpoint powered by RAG.
+
+    `fields=response,confidence` returns only those keys; `verbose=false`
+    drops the sources and document previews.
     """
     start_time = time.time()
     response_confidence = 0.0
+    llm_route = None
+    query_vector = agent_query_vector(message, x_agent_token)
     
     try:
         logger.info(f"Received debate message: {message.content[:100]}...")
@@ -312,32 +671,46 @@ async def debate_with_rag(message: DebateMessage):
                 confidence=response_confidence,
                 sources=["system_fallback"]
             )
-            return response
+            return render_debate_response(response, fields, verbose)
+        
+        # Pull the bounded history for this debate (empty on the first turn)
+        memory_key = message.memory_key()
+        history = conversation_memory.get_history(memory_key) if memory_key else ""
+        
+        stages: Dict[str, float] = {}
+        
+        # Opening arguments are often canonical positions answered ahead of time
+        if answer_cache and not history:
+            cache_start = time.perf_counter()
+            if query_vector is None:
+                query_vector = await run_in_threadpool(embeddings.embed_query, message.content)
+            cached_entry, similarity = answer_cache.lookup(query_vector)
+            stages["answer_cache"] = time.perf_counter() - cache_start
+            if cached_entry:
+                cached_response = serve_cached_answer(message, memory_key, cached_entry, similarity, start_time, stages)
+                return render_debate_response(cached_response, fields, verbose)
+        
+        # Retrieve (and optionally re-rank) once, off the event loop
+        retrieved_docs = await run_in_threadpool(retrieve_documents, message.content, stages, query_vector)
         
         # Use RAG chain to generate response
         logger.info("Generating RAG response...")
         rag_start_time = time.time()
-        response = rag_chain.invoke(message.content)
+        llm_route = start_route_record()
+        response = await rag_chain.ainvoke({
+            "docs": retrieved_docs,
+            "question": message.content,
+            "history": history or "(This is the opening argument of the debate.)"
+        })
         rag_end_time = time.time()
         rag_response_time = rag_end_time - rag_start_time
-        
-        # Get retrieved documents for transparency
-        retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
-        retrieved_docs = retriever.invoke(message.content)
+        stages["generation"] = rag_response_time
         
         # Extract sources from retrieved documents
-        sources = []
-        doc_info = []
-        for doc in retrieved_docs:
-            if hasattr(doc, 'metadata') and 'source' in doc.metadata:
-                source = os.path.basename(doc.metadata['source'])
-                if source not in sources:
-                    sources.append(source)
-                
-                doc_info.append({
-                    "source": source,
-                    "content_preview": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content
-                })
+        sources, doc_info = describe_documents(retrieved_docs)
+        
+        if memory_key:
+            conversation_memory.add_exchange(memory_key, message.content, response)
         
         # Calculate total response time and set confidence
         total_response_time = time.time() - start_time
@@ -345,13 +718,17 @@ async def debate_with_rag(message: DebateMessage):
         
         logger.info(f"Generated response with {len(sources)} sources")
         logger.info(f"RAG response time: {rag_response_time:.3f}s, Total response time: {total_response_time:.3f}s")
+        if "rerank" in stages:
+            logger.info(f"Re-rank stage added {stages['rerank'] * 1000:.1f}ms")
         
         # Log performance metrics for successful response
         log_performance_metrics(
             response_time=total_response_time,
             confidence=response_confidence,
             user_message=message.content,
-            success=True
+            success=True,
+            stages=stages,
+            llm_route=llm_route
         )
         
         debate_response = DebateResponse(
@@ -360,7 +737,7 @@ async def debate_with_rag(message: DebateMessage):
             sources=sources,
             retrieved_docs=doc_info
         )
-        return debate_response
+        return render_debate_response(debate_response, fields, verbose)
         
     except Exception as e:
         # Calculate response time for error case
@@ -374,11 +751,74 @@ async def debate_with_rag(message: DebateMessage):
             confidence=0.0,
             user_message=message.content,
             success=False,
-            error_message=str(e)
+            error_message=str(e),
+            llm_route=llm_route
         )
         
+        if isinstance(e, LLMDeadlineExceeded):
+            raise HTTPException(status_code=504, detail=str(e))
+        if isinstance(e, LLMUnavailableError):
+            raise HTTPException(status_code=503, detail=str(e))
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+def create_batch_runner(concurrency: Optional[int] = None, use_answer_cache: bool = True) -> DebateBatchRunner:
+    """Batch runner over the live pipeline; also used by batch_debate.py"""
+    retrieve = None
+    if (settings.RETRIEVAL_ADAPTIVE_ENABLED or settings.RETRIEVAL_MMR_ENABLED) and supports_vectors(vectorstore):
+        # Per-item adaptive/MMR selection, the same chunks the debate endpoint would pick
+        retrieve = lambda question, query_vector: retrieve_documents(question, {}, query_vector=query_vector)
+    return DebateBatchRunner(
+        embeddings,
+        vectorstore,
+        rag_chain,
+        describe=describe_documents,
+        top_k=settings.RETRIEVAL_TOP_K,
+        reranker=reranker,
+        rerank_candidates=settings.RERANK_CANDIDATES,
+        answer_cache=answer_cache if use_answer_cache else None,
+        concurrency=min(concurrency or settings.BATCH_LLM_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY),
+        item_timeout=settings.BATCH_ITEM_TIMEOUT,
+        retrieve=retrieve
+    )
+
+@app.post("/api/debate/batch")
+async def debate_batch(request: Request, concurrency: Optional[int] = None, use_answer_cache: bool = True):
+    """
+    Counter-arguments for many opening arguments at once.
+
+    Body: {"arguments": ["...", {"id": "a1", "content": "..."}]}, or JSON Lines
+    (Content-Type: application/x-ndjson) with one argument per line. Results
+    stream back as NDJSON in completion order, each with its `id`, `index` and
+    per-item `timing`; the last line is {"summary": {...}}.
+    """
+    if not rag_chain:
+        raise HTTPException(status_code=503, detail="RAG pipeline not available")
+    
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith(("application/x-ndjson", "application/jsonl")):
+            items = parse_jsonl(body.decode("utf-8").splitlines())
+        else:
+            payload = json.loads(body or b"{}")
+            entries = payload.get("arguments") if isinstance(payload, dict) else payload
+            if not isinstance(entries, list):
+                raise ValueError("expected {\"arguments\": [...]} or a JSON list")
+            items = parse_batch_items(entries)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch limited to {settings.BATCH_MAX_ITEMS} arguments")
+    
+    runner = create_batch_runner(concurrency, use_answer_cache)
+    
+    async def stream_results():
+        async for result in runner.run(items):
+            yield dumps(result) + b"\n"
+        logger.info(f"Debate batch finished: {runner.summary}")
+        yield dumps({"summary": runner.summary}) + b"\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 # Knowledge base endpoints
 @app.get("/api/knowledge/topics")
 async def get_topics():
@@ -413,35 +853,79 @@ async def get_topics():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/knowledge/search")
-async def search_knowledge(query: str, limit: int = 5):
+async def search_knowledge(query: str, limit: int = 5, cursor: Optional[str] = None, snippets: bool = False):
     """
-    Search the knowledge base directly
+    Search the knowledge base directly.
+
+    `limit` is capped at SEARCH_MAX_LIMIT per page; pass the returned
+    `next_cursor` to get the next page of the same ranked list. With
+    `snippets=true` each result carries a short snippet with highlight offsets
+    instead of the full chunk text and metadata.
     """
     try:
         if not vectorstore:
             raise HTTPException(status_code=503, detail="Knowledge base not available")
         
-        # Perform similarity search
-        docs = vectorstore.similarity_search(query, k=limit)
+        limit = max(1, min(limit, settings.SEARCH_MAX_LIMIT))
+        if not query.strip():
+            return {"query": query, "results": [], "total_found": 0, "next_cursor": None, "cached": False}
+        
+        # Embedding and FAISS search are CPU-bound: keep them off the event loop
+        try:
+            page = await run_in_threadpool(search_cache.page, query, limit, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         results = []
-        for doc in docs:
-            results.append({
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-                "source": os.path.basename(doc.metadata.get('source', 'unknown'))
-            })
+        for doc, distance in page["items"]:
+            result = {
+                "source": os.path.basename(doc.metadata.get('source', 'unknown')),
+                "distance": round(float(distance), 4)
+            }
+            if snippets:
+                result.update(make_snippet(doc.page_content, query, width=settings.SEARCH_SNIPPET_CHARS))
+                if doc.metadata.get("heading_path"):
+                    result["section"] = doc.metadata["heading_path"]
+            else:
+                result["content"] = doc.page_content
+                result["metadata"] = doc.metadata
+            results.append(result)
         
         return {
             "query": query,
             "results": results,
-            "total_found": len(results)
+            "total_found": len(results),
+            "offset": page["offset"],
+            "total_ranked": page["total_ranked"],
+            "next_cursor": page["next_cursor"],
+            "cached": page["cached"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching knowledge base: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/knowledge/suggest")
+async def suggest_concepts(prefix: str, limit: int = 8):
+    """
+    Complete a typed prefix to knowledge base concepts (tags, headings, bold terms),
+    most frequently mentioned first. Pure in-memory lookup: no embedding or FAISS call.
+    """
+    if suggest_index is None:
+        raise HTTPException(status_code=503, detail="Concept suggestions not available")
+    limit = max(1, min(limit, settings.SUGGEST_MAX_LIMIT))
+    return {
+        "prefix": prefix,
+        "suggestions": suggest_index.suggest(prefix, limit)
+    }
+
+@app.get("/api/knowledge/search/stats")
+async def search_cache_stats():
+    """Hit rate and occupancy of the knowledge search result cache"""
+    return search_cache.stats()
+
 # Voice session endpoints (Sprint 3)
 @app.post("/api/voice/start-session", response_model=VoiceSessionResponse)
 async def start_voice_session(request: VoiceSessionRequest):
@@ -486,6 +970,7 @@ async def start_voice_session(request: VoiceSessionRequest):
             "expires_at": expires_at,
             "status": "active"
         }
+        session_expiry.schedule(session_id, expires_at)
         
         logger.info(f"Created voice session {session_id} for user {request.user_identity} in room {room_name}")
         
@@ -538,6 +1023,10 @@ async def end_voice_session(session_id: str):
         
         session = active_voice_sessions[session_id]
         del active_voice_sessions[session_id]
+        session_events.publish(session_id, {"type": "status", "session_id": session_id, "status": "ended"})
+        
+        # The voice agent keys its debate history on the room name
+        conversation_memory.clear(f"session:{session['room_name']}")
         
         logger.info(f"Ended voice session {session_id} in room {session['room_name']}")
         
@@ -549,6 +1038,55 @@ async def end_voice_session(session_id: str):
         logger.error(f"Error ending voice session: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.websocket("/api/voice/session/{session_id}/events")
+async def voice_session_events(websocket: WebSocket, session_id: str):
+    """
+    Push channel for one voice session.
+
+    Sends the current session status and backend readiness on connect, then
+    expiry warnings, status changes ("expired", "ended") and backend events as
+    they happen. The socket closes after the session's final status.
+    """
+    await websocket.accept()
+    cleanup_expired_sessions()
+    session = active_voice_sessions.get(session_id)
+    if session is None:
+        await websocket.send_text(dumps({"type": "status", "session_id": session_id, "status": "not_found"}).decode("utf-8"))
+        await websocket.close()
+        return
+
+    subscriber = session_events.subscribe(session_id)
+    try:
+        await websocket.send_text(dumps(backend_status()).decode("utf-8"))
+        await websocket.send_text(dumps({
+            "type": "status",
+            "session_id": session_id,
+            "status": session["status"],
+            "expires_at": session["expires_at"],
+            "seconds_left": max(0, int(session["expires_at"] - time.time()))
+        }).decode("utf-8"))
+
+        # The client sends nothing; watching receive() notices a disconnect promptly
+        disconnected = asyncio.ensure_future(websocket.receive())
+        try:
+            while True:
+                next_event = asyncio.ensure_future(subscriber.next())
+                done, _ = await asyncio.wait({next_event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected in done:
+                    next_event.cancel()
+                    break
+                event, payload = next_event.result()
+                await websocket.send_text(payload.decode("utf-8"))
+                if event.get("type") == "status" and event.get("status") in FINAL_STATUSES:
+                    await websocket.close()
+                    break
+        finally:
+            disconnected.cancel()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session_events.unsubscribe(subscriber)
+
 @app.get("/api/voice/sessions")
 async def list_active_sessions():
     """
@@ -576,6 +1114,26 @@ async def list_active_sessions():
         logger.error(f"Error listing active sessions: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def summarize_stage_latencies(metrics: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Average and p99 latency per pipeline stage (retrieval, rerank, generation, ...)"""
+    per_stage: Dict[str, List[float]] = {}
+    for metric in metrics:
+        for stage, seconds in (metric.get('stages') or {}).items():
+            if stage.endswith('_fallback'):
+                continue
+            per_stage.setdefault(stage, []).append(seconds)
+    
+    summary = {}
+    for stage, values in per_stage.items():
+        values.sort()
+        p99_index = min(len(values) - 1, int(round(0.99 * (len(values) - 1))))
+        summary[stage] = {
+            "average": round(sum(values) / len(values), 4),
+            "p99": round(values[p99_index], 4),
+            "count": len(values)
+        }
+    return summary
+
 # Performance metrics endpoint
 @app.get("/api/performance/metrics")
 async def get_performance_metrics(limit: int = 100):
@@ -588,9 +1146,8 @@ async def get_performance_metrics(limit: int = 100):
         
         metrics = []
         with open(PERFORMANCE_LOG_FILE, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            # Get the last 'limit' lines
-            recent_lines = lines[-limit:] if len(lines) > limit else lines
+            # Keep only the last 'limit' lines; older history is in the columnar store
+            recent_lines = deque(f, maxlen=max(1, limit))
             
             for line in recent_lines:
                 try:
@@ -611,7 +1168,8 @@ async def get_performance_metrics(limit: int = 100):
                 "successful_requests": len(successful_metrics),
                 "success_rate_percent": round(success_rate, 2),
                 "average_response_time_seconds": round(avg_response_time, 3),
-                "average_confidence_score": round(avg_confidence, 3)
+                "average_confidence_score": round(avg_confidence, 3),
+                "stage_latency_seconds": summarize_stage_latencies(successful_metrics)
             }
         else:
             stats = {}
@@ -626,6 +1184,204 @@ async def get_performance_metrics(limit: int = 100):
         logger.error(f"Error retrieving performance metrics: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def run_performance_analytics(since: Optional[str], until: Optional[str], bucket: str) -> Dict[str, Any]:
+    """Vectorized aggregations over the compacted performance logs"""
+    data = PerfLogStore(PERF_LOG_STORE_DIR).load(since, until)
+    stage_columns = sorted(name for name in data if name.startswith("stage_"))
+    return {
+        "days": data["days"],
+        "rows": data["rows"],
+        "bucket": bucket,
+        "latency": latency_percentiles(data, bucket),
+        "stage_latency": {name[len("stage_"):]: latency_percentiles(data, bucket, column=name) for name in stage_columns},
+        "errors": error_rates(data, bucket),
+        "confidence": confidence_histogram(data)
+    }
+
+@app.get("/api/performance/analytics")
+async def get_performance_analytics(since: Optional[str] = None, until: Optional[str] = None, bucket: str = "hour"):
+    """
+    Latency percentiles, error rates and confidence distribution over the
+    compacted performance logs (days are YYYY-MM-DD, UTC, inclusive)
+    """
+    if bucket not in ("hour", "day"):
+        raise HTTPException(status_code=400, detail="bucket must be 'hour' or 'day'")
+    try:
+        return await run_in_threadpool(run_performance_analytics, since, until, bucket)
+    except Exception as e:
+        logger.error(f"Error computing performance analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Admin endpoints (Sprint 4)
+def admin_token_valid(token: Optional[str]) -> bool:
+    """Whether `token` matches the configured ADMIN_TOKEN (always False when none is configured)"""
+    if not settings.ADMIN_TOKEN or token is None:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), settings.ADMIN_TOKEN.encode("utf-8"))
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Guard for /api/admin/*. Fails closed: without ADMIN_TOKEN every request is
+    refused, unless ADMIN_ALLOW_UNAUTHENTICATED opts a development setup in.
+    """
+    if not settings.ADMIN_TOKEN:
+        if settings.ADMIN_ALLOW_UNAUTHENTICATED:
+            return
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if not admin_token_valid(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+def require_admin_token():
+    """For admin endpoints that ADMIN_ALLOW_UNAUTHENTICATED must not open, such as minting LiveKit join tokens"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="This endpoint is disabled until ADMIN_TOKEN is set")
+
+class IndexReloadRequest(BaseModel):
+    version: Optional[str] = Field(default=None, description="Version to load (rollback/pin); defaults to faiss_index/CURRENT")
+    force: bool = False
+
+@app.get("/api/admin/index", dependencies=[Depends(require_admin)])
+async def get_index_status():
+    """
+    Index version currently served by this worker, and the versions on disk
+    """
+    if not index_reloader:
+        raise HTTPException(status_code=409, detail="Index hot reload unavailable (no on-disk index in this process)")
+    return index_reloader.status()
+
+@app.post("/api/admin/index/reload", dependencies=[Depends(require_admin)])
+async def reload_index(request: IndexReloadRequest = IndexReloadRequest()):
+    """
+    Load, validate and swap in an index version without dropping requests or sessions
+    """
+    if not index_reloader:
+        raise HTTPException(status_code=409, detail="Index hot reload unavailable (no on-disk index in this process)")
+    # Loading takes seconds; keep it off the event loop so other requests are unaffected
+    result = await run_in_threadpool(index_reloader.reload, request.version, request.force)
+    if result["status"] == "failed":
+        raise HTTPException(status_code=422, detail=result["error"])
+    return result
+
+@app.post("/api/admin/performance/compact", dependencies=[Depends(require_admin)])
+async def compact_performance_logs(rotate: bool = False):
+    """
+    Fold rotated performance log segments into the columnar store; with
+    rotate=true the live log is rotated first so it is included
+    """
+    if rotate:
+        rotate_log(PERFORMANCE_LOG_FILE, PERF_LOG_SEGMENTS_DIR, max_bytes=1)
+    return await run_in_threadpool(compact_segments, PERF_LOG_SEGMENTS_DIR, PERF_LOG_STORE_DIR)
+
+def require_profiling():
+    """Profiling needs PROFILING_ENABLED and a configured ADMIN_TOKEN; ADMIN_ALLOW_UNAUTHENTICATED does not open it"""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (PROFILING_ENABLED=false)")
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled until ADMIN_TOKEN is set")
+
+stack_sampling_lock = asyncio.Lock()
+
+@app.get("/api/admin/profile/stacks", dependencies=[Depends(require_profiling), Depends(require_admin)])
+async def profile_stacks(seconds: float = 5.0, interval_ms: Optional[float] = None, include_idle: bool = False):
+    """
+    Sample every thread's stack for `seconds` and return the collapsed-stack
+    profile (flamegraph.pl / speedscope input), most frequent stacks first
+    """
+    if not 0 < seconds <= settings.PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {settings.PROFILE_MAX_SECONDS}]")
+    if stack_sampling_lock.locked():
+        raise HTTPException(status_code=409, detail="A stack sampling run is already in progress")
+    interval = (interval_ms or settings.PROFILE_SAMPLE_INTERVAL_MS) / 1000.0
+    async with stack_sampling_lock:
+        # The sampler runs in a worker thread, so the event loop keeps serving (and is sampled too)
+        counts = await run_in_threadpool(sample_stacks, seconds, max(0.001, interval), include_idle)
+    return PlainTextResponse(format_collapsed(counts))
+
+@app.get("/api/admin/profile/requests", dependencies=[Depends(require_profiling), Depends(require_admin)])
+async def list_request_profiles():
+    """Recent requests profiled via PROFILE_REQUEST_HEADER, newest first"""
+    return {"header": settings.PROFILE_REQUEST_HEADER, "profiles": [p.summary() for p in reversed(request_profiles)]}
+
+@app.get("/api/admin/profile/requests/{profile_id}", dependencies=[Depends(require_profiling), Depends(require_admin)])
+async def get_request_profile(profile_id: str, sort: str = "cumulative", limit: int = 40):
+    """pstats report for one profiled request, threadpool work included"""
+    profile = find_profile(request_profiles, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    try:
+        report = profile.report(sort, limit)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown sort key: {sort}")
+    return PlainTextResponse(report)
+
+@app.get("/api/admin/profile/loop", dependencies=[Depends(require_admin)])
+async def event_loop_blocks():
+    """Event-loop blocks over LOOP_BLOCK_THRESHOLD_MS, each with the loop thread's stack"""
+    return loop_monitor.snapshot()
+
+@app.post("/api/admin/voice/sessions", dependencies=[Depends(require_admin_token), Depends(require_admin)])
+async def provision_voice_sessions(request: VoiceBulkSessionRequest):
+    """
+    Create many voice sessions, each in its own room, in one call (e.g. at the
+    start of a tournament round).
+
+    Capacity for the whole batch is reserved at once: either every session is
+    created or none is (429 with the free capacity). The handler never awaits,
+    so no other session request can interleave between the check and the
+    inserts. Tokens are minted in one batch with a shared nbf/exp.
+
+    The manifest lists one [session_id, room_name, user_identity, token] row
+    per session; livekit_url and expires_at are given once for the batch.
+    """
+    if request.participants:
+        participants = [(p.room_name, p.user_identity, p.participant_name) for p in request.participants]
+    elif request.count:
+        participants = [(None, f"{request.identity_prefix}-{i + 1}", None) for i in range(request.count)]
+    else:
+        raise HTTPException(status_code=400, detail="Provide participants or count")
+    if len(participants) > settings.VOICE_BULK_MAX_SESSIONS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.VOICE_BULK_MAX_SESSIONS} sessions per call")
+    minter = get_token_minter()
+
+    cleanup_expired_sessions()
+    available = max(0, settings.MAX_CONCURRENT_SESSIONS - len(active_voice_sessions))
+    if len(participants) > available:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Not enough voice session capacity: {len(participants)} requested, {available} available"
+        )
+
+    created_at = int(time.time())
+    timeout_seconds = get_timeout_seconds()
+    expires_at = created_at + timeout_seconds
+    participants = [(room_name or f"{request.room_prefix}-{uuid.uuid4().hex[:8]}", identity, name)
+                    for room_name, identity, name in participants]
+    tokens = minter.mint_many(participants, timeout_seconds, now=created_at)
+    session_ids = [str(uuid.uuid4()) for _ in participants]
+
+    rows = []
+    for session_id, (room_name, identity, name), token in zip(session_ids, participants, tokens):
+        active_voice_sessions[session_id] = {
+            "room_name": room_name,
+            "user_identity": identity,
+            "participant_name": name,
+            "created_at": created_at,
+            "expires_at": expires_at,
+            "status": "active"
+        }
+        rows.append([session_id, room_name, identity, token])
+    session_expiry.schedule_many(session_ids, expires_at)
+
+    logger.info(f"Provisioned {len(rows)} voice sessions ({len(active_voice_sessions)} active)")
+    return FastJSONResponse({
+        "livekit_url": settings.LIVEKIT_URL or "wss://your-livekit-server.com",
+        "created_at": created_at,
+        "expires_at": expires_at,
+        "count": len(rows),
+        "fields": ["session_id", "room_name", "user_identity", "token"],
+        "sessions": rows
+    })
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,112 @@
+"""
+AI Debate Partner - Performance Log Query CLI
+Sprint 4: Compact performance logs into columns and run aggregations over them
+
+Subcommands:
+    compact     fold rotated JSONL segments into the day-partitioned columnar store
+                (--rotate first rotates the live performance_logs.jsonl)
+    latency     response time percentiles per hour or day (--stage for one pipeline stage)
+    errors      request count, error rate and most common error per hour or day
+    confidence  confidence score histogram
+    days        list the compacted days
+
+Usage (from the project root):
+    python backend/perf_query.py compact --rotate
+    python backend/perf_query.py latency --since 2025-07-01 --bucket day
+    python backend/perf_query.py errors --since 2025-07-20 --until 2025-07-22
+    python backend/perf_query.py confidence --bins 20
+
+Results are printed as JSON. The same aggregations are served over HTTP as
+GET /api/performance/analytics.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+
+from config import settings
+from services.perf_store import (PerfLogStore, STAGE_PREFIX, compact_segments, confidence_histogram, error_rates,
+                                 latency_percentiles, rotate_log)
+
+logger = logging.getLogger("perf_query")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze compacted performance logs")
+    parser.add_argument("--store", default=os.path.join(BACKEND_DIR, settings.PERF_LOG_STORE_DIR),
+                        help="Columnar store directory")
+    parser.add_argument("--segments", default=os.path.join(BACKEND_DIR, settings.PERF_LOG_SEGMENTS_DIR),
+                        help="Rotated JSONL segments directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compact = commands.add_parser("compact", help="Fold rotated segments into the columnar store")
+    compact.add_argument("--rotate", action="store_true", help="Rotate the live log first so it is included")
+    compact.add_argument("--log", default=os.path.join(BACKEND_DIR, "performance_logs.jsonl"),
+                         help="Live performance log")
+    compact.add_argument("--keep-segments", action="store_true", help="Do not delete segments once compacted")
+
+    commands.add_parser("days", help="List compacted days")
+
+    for name, description in (("latency", "Latency percentiles"), ("errors", "Error rates"),
+                              ("confidence", "Confidence histogram")):
+        query = commands.add_parser(name, help=description)
+        query.add_argument("--since", help="First day, YYYY-MM-DD (UTC)")
+        query.add_argument("--until", help="Last day, YYYY-MM-DD (UTC)")
+        if name != "confidence":
+            query.add_argument("--bucket", choices=("hour", "day"), default="hour")
+        if name == "latency":
+            query.add_argument("--stage", help="Pipeline stage (e.g. retrieval) instead of the whole request")
+            query.add_argument("--percentiles", default="50,95,99", help="Comma-separated percentiles")
+        if name == "confidence":
+            query.add_argument("--bins", type=int, default=10)
+    return parser.parse_args(argv)
+
+
+def run_query(args):
+    store = PerfLogStore(args.store)
+    if args.command == "days":
+        return {"days": store.days()}
+
+    started = time.perf_counter()
+    if args.command == "latency":
+        column = STAGE_PREFIX + args.stage if args.stage else "response_time"
+        data = store.load(args.since, args.until, columns=["success", column])
+        percentiles = [float(p) for p in args.percentiles.split(",") if p.strip()]
+        result = latency_percentiles(data, args.bucket, percentiles, column=column)
+    elif args.command == "errors":
+        data = store.load(args.since, args.until, columns=["success", "error"])
+        result = error_rates(data, args.bucket)
+    else:
+        data = store.load(args.since, args.until, columns=["confidence"])
+        result = confidence_histogram(data, args.bins)
+    return {
+        "rows": data["rows"],
+        "days": len(data["days"]),
+        "seconds": round(time.perf_counter() - started, 3),
+        "result": result
+    }
+
+
+def main_cli(argv=None):
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    args = parse_args(argv)
+
+    if args.command == "compact":
+        if args.rotate:
+            rotate_log(args.log, args.segments, max_bytes=1)
+        summary = compact_segments(args.segments, args.store, keep_segments=args.keep_segments)
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(json.dumps(run_query(args), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
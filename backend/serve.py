@@ -0,0 +1,147 @@
+"""
+AI Debate Partner - Pre-fork Server
+Sprint 4: Multi-worker serving with the embedding model and FAISS index shared
+
+`uvicorn main:app --workers N` starts N independent processes, and each one runs
+initialize_rag() and loads its own copy of the MiniLM model and FAISS index.
+This launcher instead loads the RAG components once in a master process, freezes
+the garbage collector so those objects are never written to again, then forks the
+workers. Model weights and index vectors stay in pages shared copy-on-write with
+the master, so per-worker memory is only what the worker allocates itself.
+
+No inference runs in the master before forking: thread pools (OpenMP, tokenizers)
+must not be started in a process that is about to fork.
+
+Usage (from the project root):
+    python backend/serve.py --workers 4
+    python backend/serve.py --workers 4 --no-preload   # per-worker loading, for comparison
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import uvicorn
+
+from config import settings
+
+logger = logging.getLogger("serve")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-fork server for the AI Debate backend")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS)
+    parser.add_argument("--no-preload", dest="preload", action="store_false",
+                        help="Let every worker load its own RAG components")
+    parser.add_argument("--torch-threads", type=int, default=settings.TORCH_THREADS_PER_WORKER,
+                        help="Intra-op threads per worker for embedding inference (0 = library default)")
+    parser.set_defaults(preload=settings.SERVER_PRELOAD)
+    return parser.parse_args(argv)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Listening socket created once in the master and inherited by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, worker_id: int, args):
+    """Body of a forked worker: serve the shared app on the inherited socket"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    if args.torch_threads and "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(args.torch_threads)
+
+    import main
+    config = uvicorn.Config(
+        main.app,
+        log_level="info" if settings.DEBUG else "warning",
+        lifespan="on"
+    )
+    server = uvicorn.Server(config)
+    logger.info(f"Worker {worker_id} (pid {os.getpid()}) serving")
+    server.run(sockets=[sock])
+
+
+def spawn_worker(sock: socket.socket, worker_id: int, args) -> int:
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            run_worker(sock, worker_id, args)
+        except Exception:
+            logger.exception(f"Worker {worker_id} crashed")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    return pid
+
+
+def serve(args):
+    if args.preload:
+        import main
+        logger.info("Loading RAG components once in the master process")
+        if not main.initialize_rag():
+            logger.warning("RAG unavailable; workers will start with limited functionality")
+        # Move everything allocated so far out of the collector's reach, so GC passes
+        # in the workers do not touch (and thereby copy) the master's pages
+        gc.collect()
+        gc.freeze()
+
+    sock = bind_socket(args.host, args.port)
+    workers = {}
+    for worker_id in range(args.workers):
+        workers[spawn_worker(sock, worker_id, args)] = worker_id
+    logger.info(f"Master {os.getpid()} started {args.workers} workers on {args.host}:{args.port} (preload={args.preload})")
+
+    stopping = False
+
+    def handle_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        worker_id = workers.pop(pid, None)
+        if worker_id is None or stopping:
+            continue
+        logger.warning(f"Worker {worker_id} (pid {pid}) exited with status {status}; restarting")
+        time.sleep(1)
+        workers[spawn_worker(sock, worker_id, args)] = worker_id
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+if __name__ == "__main__":
+    serve(parse_args())
@@ -0,0 +1,2 @@
+# AI Debate Partner Services
+# Sprint 4: Business logic for RAG, memory and orchestration
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+AI Debate Partner - Adaptive Retrieval
+Sprint 4: Score thresholds, vectorized MMR and a token budget instead of a fixed k
+
+A fixed k=3 gave a narrow argument that matches one topic three chunks when one
+or two would do, and gave an argument spanning several topics too little. Now
+retrieval over-fetches candidates with their vectors and then:
+
+1. scores every candidate by cosine similarity to the query (one matrix-vector
+   product)
+2. drops candidates below an absolute floor or below a fraction of the best
+   score, which leaves fewer candidates for narrow queries
+3. picks chunks by maximal marginal relevance, up to max_k and a token budget.
+   Candidate-to-candidate similarities are computed once as a matrix, and each
+   pick updates a running "closest selected chunk" vector, so the loop runs once
+   per selected chunk and never once per candidate.
+
+Candidate vectors are rebuilt from the FAISS index in one reconstruct_batch call
+(instead of one reconstruct per candidate).
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .conversation_memory import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Selection:
+    indices: List[int]  # Into the candidate list, in selection order
+    scores: List[float]  # Cosine similarity to the query
+    tokens: int
+    eligible: int  # Candidates that passed the score thresholds
+
+
+def supports_vectors(store: Any) -> bool:
+    """Whether the store is a local FAISS store whose candidate vectors can be read back"""
+    return all(hasattr(store, name) for name in ("index", "index_to_docstore_id", "docstore"))
+
+
+def fetch_candidates(store: Any, query_vector: Sequence[float], fetch_k: int) -> Tuple[List[Any], np.ndarray]:
+    """Nearest `fetch_k` documents and their vectors from a LangChain FAISS store"""
+    query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+    if getattr(store, "_normalize_L2", False):
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+    _, ids = store.index.search(query, fetch_k)
+    ids = ids[0][ids[0] >= 0]
+    docs = [store.docstore.search(store.index_to_docstore_id[int(i)]) for i in ids]
+    vectors = store.index.reconstruct_batch(ids.astype(np.int64)) if len(ids) else np.empty((0, query.shape[1]), np.float32)
+    return docs, np.asarray(vectors, dtype=np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def select(query_vector: Sequence[float], candidate_vectors: np.ndarray, token_counts: Sequence[int],
+           max_k: int, min_k: int = 1, min_score: Optional[float] = None, relative_score: Optional[float] = None,
+           lambda_mult: float = 0.5, token_budget: Optional[int] = None) -> Selection:
+    """
+    Choose candidates by MMR among those that pass the score thresholds.
+
+    `relative_score` keeps candidates scoring at least that fraction of the best
+    one. The best `min_k` candidates are always eligible. A candidate that would
+    exceed `token_budget` is skipped, except that the first pick is always made.
+    """
+    if not len(candidate_vectors):
+        return Selection([], [], 0, 0)
+    candidates = _normalize(np.asarray(candidate_vectors, dtype=np.float32))
+    query = _normalize(np.asarray(query_vector, dtype=np.float32))
+    relevance = candidates @ query
+    tokens = np.asarray(token_counts, dtype=np.int64)
+
+    eligible = np.ones(len(relevance), dtype=bool)
+    best = float(relevance.max())
+    if min_score is not None:
+        eligible &= relevance >= min_score
+    if relative_score is not None and best > 0:
+        eligible &= relevance >= best * relative_score
+    eligible[np.argsort(-relevance)[:max(0, min_k)]] = True
+
+    redundancy = candidates @ candidates.T
+    closest_selected = np.full(len(relevance), -np.inf, dtype=np.float32)
+    available = eligible.copy()
+    remaining = token_budget
+    chosen: List[int] = []
+    while len(chosen) < max_k:
+        if remaining is not None and chosen:
+            available &= tokens <= remaining
+        if not available.any():
+            break
+        penalty = np.where(np.isfinite(closest_selected), closest_selected, 0.0)
+        mmr = np.where(available, lambda_mult * relevance - (1.0 - lambda_mult) * penalty, -np.inf)
+        pick = int(np.argmax(mmr))
+        chosen.append(pick)
+        available[pick] = False
+        closest_selected = np.maximum(closest_selected, redundancy[pick])
+        if remaining is not None:
+            remaining -= int(tokens[pick])
+
+    return Selection(
+        indices=chosen,
+        scores=[round(float(relevance[i]), 4) for i in chosen],
+        tokens=int(tokens[chosen].sum()) if chosen else 0,
+        eligible=int(eligible.sum())
+    )
+
+
+def adaptive_retrieve(store: Any, query_vector: Sequence[float], fetch_k: int, max_k: int, min_k: int = 1,
+                      min_score: Optional[float] = None, relative_score: Optional[float] = None,
+                      lambda_mult: float = 0.5, token_budget: Optional[int] = None) -> Tuple[List[Tuple[Any, float]], Selection]:
+    """(document, score) pairs chosen from the store's `fetch_k` nearest candidates"""
+    docs, vectors = fetch_candidates(store, query_vector, max(fetch_k, max_k))
+    selection = select(query_vector, vectors, [estimate_tokens(doc.page_content) for doc in docs], max_k,
+                       min_k=min_k, min_score=min_score, relative_score=relative_score,
+                       lambda_mult=lambda_mult, token_budget=token_budget)
+    return [(docs[i], score) for i, score in zip(selection.indices, selection.scores)], selection
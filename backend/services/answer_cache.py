@@ -0,0 +1,143 @@
+"""
+AI Debate Partner - Precomputed Answer Cache
+Sprint 4: Nearest-neighbour cache of counter-arguments to canonical openings
+
+The offline job in knowledge_base/warm_answer_cache.py generates counter-arguments
+for standard opening claims of every topic and stores them with their claim
+embeddings. At startup the cache is loaded into a normalised matrix; a first-turn
+argument that lands close enough to a canonical claim is answered straight from
+the cache instead of running retrieval and the LLM.
+
+Every cache records the knowledge base version it was built from. When the
+Markdown corpus changes the cache is marked stale and, by default, not served.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+ENTRIES_FILE = "answers.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+
+
+def compute_kb_version(knowledge_base_dir: str) -> str:
+    """Content hash of every Markdown file in the knowledge base"""
+    digest = hashlib.sha256()
+    for root, _, files in sorted(os.walk(knowledge_base_dir)):
+        for name in sorted(files):
+            if not name.endswith(".md"):
+                continue
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, knowledge_base_dir).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def save_answer_cache(output_dir: str, entries: List[Dict[str, Any]], vectors: List[List[float]],
+                      kb_version: str, embedding_model: str):
+    """Write a cache directory atomically (build in a temp dir, then rename)"""
+    tmp_dir = f"{output_dir}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    np.save(os.path.join(tmp_dir, EMBEDDINGS_FILE), np.asarray(vectors, dtype=np.float32))
+    with open(os.path.join(tmp_dir, ENTRIES_FILE), "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2)
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "kb_version": kb_version,
+            "embedding_model": embedding_model,
+            "created_at": time.time(),
+            "entries": len(entries)
+        }, f, indent=2)
+
+    if os.path.exists(output_dir):
+        old_dir = f"{output_dir}.old-{os.getpid()}"
+        os.rename(output_dir, old_dir)
+        os.rename(tmp_dir, output_dir)
+        for name in os.listdir(old_dir):
+            os.remove(os.path.join(old_dir, name))
+        os.rmdir(old_dir)
+    else:
+        os.rename(tmp_dir, output_dir)
+
+
+class AnswerCache:
+    """Read-only in-memory answer cache loaded from a directory built offline"""
+
+    def __init__(self, entries: List[Dict[str, Any]], vectors: np.ndarray, manifest: Dict[str, Any],
+                 min_similarity: float = 0.92, stale: bool = False):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.matrix = vectors / np.maximum(norms, 1e-12)
+        self.entries = entries
+        self.manifest = manifest
+        self.min_similarity = min_similarity
+        self.stale = stale
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, cache_dir: str, kb_version: str, embedding_model: str, min_similarity: float = 0.92,
+             max_age_days: Optional[float] = None) -> Optional["AnswerCache"]:
+        """Load a cache directory, flagging it stale if it no longer matches the corpus"""
+        manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            logger.info(f"No answer cache found at: {cache_dir}")
+            return None
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("embedding_model") != embedding_model:
+            # Vectors from another model live in a different space; never usable
+            logger.warning(
+                f"Answer cache built with {manifest.get('embedding_model')}, "
+                f"current model is {embedding_model}; ignoring cache"
+            )
+            return None
+
+        with open(os.path.join(cache_dir, ENTRIES_FILE), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        vectors = np.load(os.path.join(cache_dir, EMBEDDINGS_FILE))
+
+        stale_reasons = []
+        if manifest.get("kb_version") != kb_version:
+            stale_reasons.append(f"knowledge base changed ({manifest.get('kb_version')} -> {kb_version})")
+        if max_age_days and time.time() - manifest.get("created_at", 0) > max_age_days * 86400:
+            stale_reasons.append(f"older than {max_age_days} days")
+        if stale_reasons:
+            logger.warning(f"Answer cache is stale: {'; '.join(stale_reasons)}")
+
+        logger.info(f"Loaded answer cache with {len(entries)} canonical answers")
+        return cls(entries, vectors, manifest, min_similarity=min_similarity, stale=bool(stale_reasons))
+
+    def lookup(self, query_vector: List[float]) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Return (entry, similarity) for the nearest canonical claim, or (None, similarity)"""
+        if not self.entries:
+            return None, 0.0
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        similarities = self.matrix @ query
+        best = int(np.argmax(similarities))
+        score = float(similarities[best])
+        if score >= self.min_similarity:
+            self.hits += 1
+            return self.entries[best], score
+        self.misses += 1
+        return None, score
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.entries),
+            "kb_version": self.manifest.get("kb_version"),
+            "stale": self.stale,
+            "min_similarity": self.min_similarity,
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,236 @@
+"""
+AI Debate Partner - Phrase Audio Cache
+Sprint 4: Synthesize the agent's fixed utterances once and replay them from disk
+
+The LiveKit agent says the same welcome message in every room, and its fallback
+lines ("Let me think about that for a moment...", ...) never change either, yet
+each use went to the TTS provider again. PhraseAudioCache stores the synthesized
+audio of such phrases as raw 16-bit PCM on disk, keyed on the text and the voice
+configuration (TTS provider, model, voice, sample rate, channels), so the agent
+can push the frames straight into the room's audio track.
+
+- the voice configuration is fingerprinted; when it changes (another voice or
+  model), the cache directory is wiped on load and rebuilt on first use
+- the total size is capped at `max_bytes`; least recently used phrases are
+  evicted first
+- concurrent requests for the same missing phrase share one synthesis call
+
+Only short fixed phrases belong here; generated counter-arguments are still
+spoken through the normal TTS pipeline.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+SAMPLE_WIDTH = 2  # int16 PCM
+
+
+@dataclass
+class PhraseAudio:
+    """Interleaved little-endian int16 PCM for one phrase"""
+    pcm: bytes
+    sample_rate: int
+    num_channels: int = 1
+
+    @property
+    def duration_seconds(self) -> float:
+        return len(self.pcm) / (SAMPLE_WIDTH * self.num_channels * self.sample_rate)
+
+
+def voice_fingerprint(voice_config: Dict[str, Any]) -> str:
+    """Stable hash of the settings that change how a phrase sounds"""
+    encoded = json.dumps(voice_config, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def phrase_key(text: str, fingerprint: str) -> str:
+    normalized = " ".join(text.split())
+    return hashlib.sha256(f"{fingerprint}\n{normalized}".encode("utf-8")).hexdigest()[:32]
+
+
+def iter_frames(audio: PhraseAudio, frame_ms: int = 20) -> Iterator[Tuple[bytes, int]]:
+    """Split PCM into (frame bytes, samples per channel) chunks of `frame_ms`"""
+    samples_per_frame = max(1, audio.sample_rate * frame_ms // 1000)
+    frame_bytes = samples_per_frame * audio.num_channels * SAMPLE_WIDTH
+    for offset in range(0, len(audio.pcm), frame_bytes):
+        chunk = audio.pcm[offset:offset + frame_bytes]
+        yield chunk, len(chunk) // (audio.num_channels * SAMPLE_WIDTH)
+
+
+class PhraseAudioCache:
+    """Disk cache of synthesized phrases for one voice configuration"""
+
+    def __init__(self, cache_dir: str, voice_config: Dict[str, Any], max_bytes: int = 16 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.voice_config = voice_config
+        self.fingerprint = voice_fingerprint(voice_config)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.syntheses = 0
+        self._pending: Dict[str, asyncio.Future] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._entries = self._load_manifest()
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.cache_dir, MANIFEST_FILE)
+
+    def _audio_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pcm")
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable audio cache manifest, starting over: {str(e)}")
+            return None
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        manifest = self._read_manifest()
+        if manifest is None or manifest.get("voice") != self.fingerprint:
+            if manifest is not None:
+                logger.info(f"Voice configuration changed ({manifest.get('voice')} -> {self.fingerprint}), "
+                            f"clearing the phrase audio cache")
+            self._wipe()
+            self._entries = {}
+            self._write_manifest()
+            return self._entries
+        return {key: entry for key, entry in manifest.get("entries", {}).items()
+                if os.path.exists(self._audio_path(key))}
+
+    def _wipe(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pcm") or name == MANIFEST_FILE:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def _write_manifest(self):
+        tmp_path = f"{self._manifest_path()}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"voice": self.fingerprint, "voice_config": self.voice_config, "entries": self._entries},
+                      f, indent=2, default=str)
+        os.replace(tmp_path, self._manifest_path())
+
+    def get(self, text: str) -> Optional[PhraseAudio]:
+        key = phrase_key(text, self.fingerprint)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        try:
+            with open(self._audio_path(key), "rb") as f:
+                pcm = f.read()
+        except OSError:
+            self._entries.pop(key, None)
+            return None
+        entry["last_used"] = time.time()
+        return PhraseAudio(pcm, entry["sample_rate"], entry["num_channels"])
+
+    def put(self, text: str, audio: PhraseAudio):
+        size = len(audio.pcm)
+        if size > self.max_bytes:
+            logger.warning(f"Phrase audio of {size} bytes exceeds the cache limit; not cached")
+            return
+        key = phrase_key(text, self.fingerprint)
+        tmp_path = f"{self._audio_path(key)}.tmp-{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(audio.pcm)
+        os.replace(tmp_path, self._audio_path(key))
+
+        # Other agent processes share the directory: merge their entries before writing
+        manifest = self._read_manifest()
+        if manifest and manifest.get("voice") == self.fingerprint:
+            for other_key, entry in manifest.get("entries", {}).items():
+                self._entries.setdefault(other_key, entry)
+        now = time.time()
+        self._entries[key] = {
+            "text": text,
+            "bytes": size,
+            "sample_rate": audio.sample_rate,
+            "num_channels": audio.num_channels,
+            "created": now,
+            "last_used": now
+        }
+        self._evict(keep=key)
+        self._write_manifest()
+
+    def _evict(self, keep: str):
+        total = sum(entry["bytes"] for entry in self._entries.values())
+        for key, entry in sorted(self._entries.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= entry["bytes"]
+            del self._entries[key]
+            try:
+                os.remove(self._audio_path(key))
+            except OSError:
+                pass
+            logger.info(f"Evicted cached phrase audio: {entry['text'][:40]}")
+
+    async def get_or_synthesize(self, text: str, synthesize: Callable[[str], Awaitable[PhraseAudio]]) -> PhraseAudio:
+        """Cached audio for `text`, calling `synthesize` at most once per missing phrase"""
+        audio = self.get(text)
+        if audio is not None:
+            self.hits += 1
+            return audio
+
+        key = phrase_key(text, self.fingerprint)
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            audio = await synthesize(text)
+            self.syntheses += 1
+            self.put(text, audio)
+            future.set_result(audio)
+            return audio
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+    async def warm(self, phrases, synthesize: Callable[[str], Awaitable[PhraseAudio]]) -> int:
+        """Synthesize any missing phrases; returns how many were synthesized"""
+        before = self.syntheses
+        for text in phrases:
+            try:
+                await self.get_or_synthesize(text, synthesize)
+            except Exception as e:
+                logger.warning(f"Could not pre-synthesize phrase '{text[:40]}': {str(e)}")
+        return self.syntheses - before
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "voice": self.fingerprint,
+            "phrases": len(self._entries),
+            "bytes": sum(entry["bytes"] for entry in self._entries.values()),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "syntheses": self.syntheses
+        }
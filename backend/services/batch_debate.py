@@ -0,0 +1,222 @@
+"""
+AI Debate Partner - Batch Debate Runner
+Sprint 4: Evaluate many opening arguments in one pass
+
+Posting arguments one at a time to /api/debate/test pays for one embedding
+call, one FAISS search and one HTTP round trip per item, and runs the LLM calls
+strictly one after another. For a batch the runner instead
+
+1. embeds every argument with a single embed_documents call,
+2. searches all query vectors with one FAISS matrix query (or one request to
+   the embedding service),
+3. answers canonical claims from the answer cache when enabled, and
+4. fans the remaining LLM calls out under a semaphore,
+
+yielding each result as soon as its generation finishes, with per-item timing.
+Embedding and search time is shared by the whole batch, so each item reports
+its amortized share.
+
+Adaptive and MMR selection pick chunks per query, so with a `retrieve`
+callable the shared search and re-rank are replaced by one retrieval per item
+(still from the batch's query vectors), matching the single-debate endpoint.
+
+Every item is an independent opening argument: no conversation memory is read
+or written.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .embedding_service import search_vectors
+
+logger = logging.getLogger(__name__)
+
+OPENING_HISTORY = "(This is the opening argument of the debate.)"
+
+
+def parse_batch_items(entries: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    Normalize batch input to [{"id", "content"}].
+
+    Entries are argument strings or objects with "content" (or "argument") and
+    an optional "id"; items without an id are numbered by position.
+    """
+    items = []
+    for position, entry in enumerate(entries):
+        if isinstance(entry, str):
+            content, item_id = entry, position
+        elif isinstance(entry, dict):
+            content = entry.get("content", entry.get("argument"))
+            item_id = entry.get("id", position)
+        else:
+            raise ValueError(f"item {position}: expected a string or an object")
+        if not isinstance(content, str) or not content.strip():
+            raise ValueError(f"item {position}: missing argument text")
+        items.append({"id": item_id, "content": content})
+    return items
+
+
+def parse_jsonl(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """Batch items from JSON Lines; blank lines are skipped"""
+    entries = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            raise ValueError(f"line {number}: not valid JSON")
+    return parse_batch_items(entries)
+
+
+def search_many(vectorstore: Any, vectors: List[List[float]], k: int) -> List[List[Tuple[Any, float]]]:
+    """One search call for all vectors, locally or through the embedding service"""
+    if hasattr(vectorstore, "search_by_vectors"):
+        return vectorstore.search_by_vectors(vectors, k)
+    return search_vectors(vectorstore, vectors, k)
+
+
+class DebateBatchRunner:
+    """
+    Runs the debate pipeline over a batch of arguments.
+
+    `chain` is the RAG chain (`ainvoke({"docs", "question", "history"})`) and
+    `describe(docs)` returns (sources, previews) as in the debate endpoint.
+    `retrieve(question, query_vector)`, when given, returns the final context
+    documents for one item in place of the batched search and re-rank.
+    """
+
+    def __init__(self, embeddings: Any, vectorstore: Any, chain: Any,
+                 describe: Callable[[List[Any]], Tuple[List[str], List[Dict[str, Any]]]],
+                 top_k: int = 3, reranker: Any = None, rerank_candidates: int = 20,
+                 answer_cache: Any = None, concurrency: int = 8, item_timeout: Optional[float] = 60.0,
+                 retrieve: Optional[Callable[[str, List[float]], List[Any]]] = None):
+        self.embeddings = embeddings
+        self.vectorstore = vectorstore
+        self.chain = chain
+        self.describe = describe
+        self.top_k = top_k
+        self.reranker = reranker
+        self.fetch_k = max(top_k, rerank_candidates) if reranker else top_k
+        self.answer_cache = answer_cache
+        self.concurrency = max(1, concurrency)
+        self.item_timeout = item_timeout
+        self.retrieve = retrieve
+        self.summary: Dict[str, Any] = {}
+
+    async def run(self, items: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield one result per item, in completion order; `summary` is filled in at the end"""
+        batch_start = time.perf_counter()
+        count = len(items)
+        if not count:
+            self.summary = {"items": 0, "errors": 0, "cached": 0, "elapsed_seconds": 0.0}
+            return
+
+        embed_start = time.perf_counter()
+        vectors = await asyncio.to_thread(self.embeddings.embed_documents, [item["content"] for item in items])
+        embed_seconds = time.perf_counter() - embed_start
+
+        cached: Dict[int, Tuple[Dict[str, Any], float]] = {}
+        if self.answer_cache:
+            for i, vector in enumerate(vectors):
+                entry, similarity = self.answer_cache.lookup(vector)
+                if entry:
+                    cached[i] = (entry, similarity)
+
+        pending = [i for i in range(count) if i not in cached]
+        search_start = time.perf_counter()
+        if self.retrieve:
+            retrieved = {}  # Each item retrieves its own documents in _generate
+        else:
+            hits = await asyncio.to_thread(search_many, self.vectorstore, [vectors[i] for i in pending], self.fetch_k)
+            retrieved = {i: [doc for doc, _ in hit] for i, hit in zip(pending, hits)}
+        search_seconds = time.perf_counter() - search_start
+
+        shared = {
+            "embed_ms": round(embed_seconds * 1000 / count, 3),
+            "search_ms": round(search_seconds * 1000 / max(1, len(pending)), 3) if pending else 0.0
+        }
+        logger.info(f"Batch of {count}: embedded in {embed_seconds:.2f}s, searched {len(pending)} in {search_seconds:.3f}s, "
+                    f"{len(cached)} answer cache hits")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = []
+        for i, item in enumerate(items):
+            if i in cached:
+                tasks.append(asyncio.ensure_future(self._cached_result(i, item, *cached[i], shared, batch_start)))
+            else:
+                tasks.append(asyncio.ensure_future(
+                    self._generate(i, item, vectors[i], retrieved.get(i), semaphore, shared, batch_start)
+                ))
+
+        errors = 0
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                errors += 1 if result.get("error") else 0
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        elapsed = time.perf_counter() - batch_start
+        self.summary = {
+            "items": count,
+            "errors": errors,
+            "cached": len(cached),
+            "concurrency": self.concurrency,
+            "embed_seconds": round(embed_seconds, 3),
+            "search_seconds": round(search_seconds, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "items_per_second": round(count / elapsed, 2) if elapsed > 0 else None
+        }
+
+    async def _cached_result(self, index: int, item: Dict[str, Any], entry: Dict[str, Any], similarity: float,
+                             shared: Dict[str, float], batch_start: float) -> Dict[str, Any]:
+        return {
+            "index": index,
+            "id": item["id"],
+            "response": entry["response"],
+            "confidence": 0.85,
+            "sources": entry.get("sources", []),
+            "cached": True,
+            "timing": dict(shared, total_ms=round((time.perf_counter() - batch_start) * 1000, 3))
+        }
+
+    async def _generate(self, index: int, item: Dict[str, Any], vector: List[float], docs: Optional[List[Any]],
+                        semaphore: asyncio.Semaphore, shared: Dict[str, float], batch_start: float) -> Dict[str, Any]:
+        timing = dict(shared)
+        result: Dict[str, Any] = {"index": index, "id": item["id"], "cached": False}
+        queued = time.perf_counter()
+        async with semaphore:
+            started = time.perf_counter()
+            timing["queue_ms"] = round((started - queued) * 1000, 3)
+            try:
+                if self.retrieve:
+                    docs = await asyncio.to_thread(self.retrieve, item["content"], vector)
+                    timing["retrieval_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                else:
+                    if self.reranker:
+                        docs, _ = await asyncio.to_thread(self.reranker.rerank, item["content"], docs, self.top_k)
+                        timing["rerank_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                    docs = docs[:self.top_k]
+                generation_start = time.perf_counter()
+                response = await asyncio.wait_for(
+                    self.chain.ainvoke({"docs": docs, "question": item["content"], "history": OPENING_HISTORY}),
+                    timeout=self.item_timeout
+                )
+                timing["generation_ms"] = round((time.perf_counter() - generation_start) * 1000, 3)
+                sources, _ = self.describe(docs)
+                result.update(response=response, confidence=0.85, sources=sources)
+            except asyncio.TimeoutError:
+                result["error"] = f"timed out after {self.item_timeout}s"
+            except Exception as e:
+                logger.error(f"Batch item {item['id']} failed: {str(e)}")
+                result["error"] = str(e)
+        timing["total_ms"] = round((time.perf_counter() - batch_start) * 1000, 3)
+        result["timing"] = timing
+        return result
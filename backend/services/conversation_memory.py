@@ -0,0 +1,177 @@
+"""
+AI Debate Partner - Conversation Memory
+Sprint 4: Bounded multi-turn debate history per user or session
+
+Recent turns are kept verbatim in a rolling window. Turns that fall out of the
+window are folded into a running summary, so the history injected into the
+prompt stays within a fixed token budget however long the debate runs.
+Conversations are evicted least-recently-used first and expire after a TTL.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+# Roughly four characters per token for English text; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+ROLE_LABELS = {"user": "User", "opponent": "You (opponent)"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for prompt budgeting"""
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Trim text to roughly max_tokens, cutting on a word boundary"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:") + "..."
+
+
+@dataclass
+class Turn:
+    role: str  # "user" or "opponent"
+    content: str
+
+
+@dataclass
+class Conversation:
+    turns: List[Turn] = field(default_factory=list)
+    summary: str = ""
+    total_turns: int = 0
+    last_access: float = field(default_factory=time.time)
+
+
+def extractive_summarize(previous_summary: str, evicted: List[Turn], max_tokens: int) -> str:
+    """
+    Fold evicted turns into the running summary.
+
+    Each turn contributes its lead sentence; when the summary outgrows its budget
+    the oldest lines are dropped first, so the cost per call is bounded.
+    """
+    lines = [line for line in previous_summary.split("\n") if line]
+    for turn in evicted:
+        lead = re.split(r"(?<=[.!?])\s+", turn.content.strip(), maxsplit=1)[0]
+        lead = truncate_to_tokens(lead, max(8, max_tokens // 4))
+        verb = "argued" if turn.role == "user" else "countered"
+        lines.append(f"- {ROLE_LABELS.get(turn.role, turn.role)} {verb}: {lead}")
+
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return truncate_to_tokens("\n".join(lines), max_tokens)
+
+
+class ConversationMemory:
+    """In-process store of debate histories keyed by session_id or user_id"""
+
+    def __init__(
+        self,
+        max_turns: int = 6,
+        history_token_budget: int = 600,
+        summary_token_budget: int = 200,
+        max_conversations: int = 1000,
+        ttl_seconds: int = 3600,
+        summarizer: Optional[Callable[[str, List[Turn], int], str]] = None,
+    ):
+        self.max_turns = max_turns
+        self.history_token_budget = history_token_budget
+        self.summary_token_budget = min(summary_token_budget, history_token_budget)
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self.summarizer = summarizer or extractive_summarize
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        """Drop expired conversations, then the least recently used beyond capacity"""
+        # OrderedDict is kept in access order, so expired entries are at the front
+        while self._conversations:
+            key, conversation = next(iter(self._conversations.items()))
+            if now - conversation.last_access <= self.ttl_seconds:
+                break
+            del self._conversations[key]
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+
+    def _touch(self, key: str, create: bool) -> Optional[Conversation]:
+        now = time.time()
+        self._evict(now)
+        conversation = self._conversations.get(key)
+        if conversation is None:
+            if not create:
+                return None
+            conversation = Conversation()
+            self._conversations[key] = conversation
+        conversation.last_access = now
+        self._conversations.move_to_end(key)
+        return conversation
+
+    def _window_budget(self) -> int:
+        return self.history_token_budget - self.summary_token_budget
+
+    def _compact(self, conversation: Conversation):
+        """Move turns out of the verbatim window until it fits both limits"""
+        evicted = []
+        while conversation.turns and (
+            len(conversation.turns) > self.max_turns
+            or sum(estimate_tokens(t.content) for t in conversation.turns) > self._window_budget()
+        ):
+            evicted.append(conversation.turns.pop(0))
+        if evicted:
+            conversation.summary = self.summarizer(conversation.summary, evicted, self.summary_token_budget)
+
+    def add_exchange(self, key: str, user_message: str, response: str):
+        """Record one user argument and the opponent's counter-argument"""
+        # A single pasted wall of text must not blow the budget on its own
+        per_turn_limit = max(16, self._window_budget() // 2)
+        with self._lock:
+            conversation = self._touch(key, create=True)
+            conversation.turns.append(Turn("user", truncate_to_tokens(user_message, per_turn_limit)))
+            conversation.turns.append(Turn("opponent", truncate_to_tokens(response, per_turn_limit)))
+            conversation.total_turns += 2
+            self._compact(conversation)
+
+    def get_history(self, key: str) -> str:
+        """Render the bounded history block for the prompt; empty for a new debate"""
+        with self._lock:
+            conversation = self._touch(key, create=False)
+            if conversation is None or (not conversation.turns and not conversation.summary):
+                return ""
+            parts = []
+            if conversation.summary:
+                parts.append(f"Summary of earlier exchanges:\n{conversation.summary}")
+            if conversation.turns:
+                recent = "\n".join(
+                    f"{ROLE_LABELS.get(t.role, t.role)}: {t.content}" for t in conversation.turns
+                )
+                parts.append(f"Most recent exchanges:\n{recent}")
+            return "\n\n".join(parts)
+
+    def turn_count(self, key: str) -> int:
+        """Number of turns recorded for a conversation, including summarized ones"""
+        with self._lock:
+            conversation = self._conversations.get(key)
+            return conversation.total_turns if conversation else 0
+
+    def clear(self, key: str) -> bool:
+        """Forget a conversation, e.g. when its voice session ends"""
+        with self._lock:
+            return self._conversations.pop(key, None) is not None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._evict(time.time())
+            return {
+                "conversations": len(self._conversations),
+                "max_conversations": self.max_conversations,
+                "history_token_budget": self.history_token_budget,
+            }
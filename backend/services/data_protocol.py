@@ -0,0 +1,260 @@
+"""
+AI Debate Partner - Agent Data Channel Protocol
+Sprint 4: Compact binary caption frames with sequence numbers and text deltas
+
+The agent used to publish each counter-argument once, as a JSON blob, after it
+was spoken. Captions now stream while the audio plays. The text arrives as
+small deltas in a binary framing that the browser reads with a DataView, so
+nothing is re-parsed as the caption grows.
+
+Frame (version 1, big-endian):
+
+    magic 0xDB | version u8 | record*
+    record:  kind u8 | utterance u16 | seq u32 | length u16 | UTF-8 text
+
+Record kinds: START opens an utterance, DELTA appends text, and END closes it.
+The END payload is the complete text, so a client that missed deltas still ends
+up with the right caption. Sequence numbers rise by one per record sent to a
+receiver, starting at 1 after its hello is accepted (again on every reconnect),
+so a participant that joins after earlier captions never waits for records it
+was not sent. Receivers drop duplicates and hold records that arrive early
+until the gap is filled. Deltas that fall due in the same flush interval are merged into
+one record, and all records due together go out as one frame.
+
+Negotiation: a client that understands the framing publishes a JSON hello on
+the CAPTION_TOPIC topic listing its versions. The agent sends binary frames only
+to participants whose hello it accepted, and every other participant keeps
+getting the original {"type": "agent_text", "content": ...} JSON message.
+"""
+
+import asyncio
+import json
+import logging
+import struct
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_NAME = "debate-dc"
+PROTOCOL_VERSIONS = (1,)
+CAPTION_TOPIC = "captions"
+MAGIC = 0xDB
+
+KIND_START = 1
+KIND_DELTA = 2
+KIND_END = 3
+
+_FRAME_HEADER = struct.Struct(">BB")
+_RECORD_HEADER = struct.Struct(">BHIH")
+MAX_TEXT_BYTES = 0xFFFF
+
+
+@dataclass
+class CaptionRecord:
+    kind: int
+    utterance: int
+    seq: int
+    text: str = ""
+
+
+def encode_frame(records: Sequence[CaptionRecord], version: int = 1) -> bytes:
+    parts = [_FRAME_HEADER.pack(MAGIC, version)]
+    for record in records:
+        data = record.text.encode("utf-8")
+        if len(data) > MAX_TEXT_BYTES:
+            raise ValueError(f"record text is {len(data)} bytes; the limit is {MAX_TEXT_BYTES}")
+        parts.append(_RECORD_HEADER.pack(record.kind, record.utterance, record.seq, len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+
+def is_binary_frame(payload: bytes) -> bool:
+    return len(payload) >= _FRAME_HEADER.size and payload[0] == MAGIC
+
+
+def decode_frame(payload: bytes) -> List[CaptionRecord]:
+    if not is_binary_frame(payload):
+        raise ValueError("not a caption frame")
+    _, version = _FRAME_HEADER.unpack_from(payload, 0)
+    if version not in PROTOCOL_VERSIONS:
+        raise ValueError(f"unsupported caption frame version {version}")
+    records = []
+    offset = _FRAME_HEADER.size
+    while offset < len(payload):
+        if offset + _RECORD_HEADER.size > len(payload):
+            raise ValueError("truncated record header")
+        kind, utterance, seq, length = _RECORD_HEADER.unpack_from(payload, offset)
+        offset += _RECORD_HEADER.size
+        if offset + length > len(payload):
+            raise ValueError("truncated record text")
+        records.append(CaptionRecord(kind, utterance, seq, payload[offset:offset + length].decode("utf-8")))
+        offset += length
+    return records
+
+
+def hello_message(versions: Sequence[int] = PROTOCOL_VERSIONS) -> bytes:
+    return json.dumps({"type": "hello", "protocol": PROTOCOL_NAME, "versions": list(versions)}).encode("utf-8")
+
+
+def negotiate(payload: bytes) -> Optional[int]:
+    """Highest common version if `payload` is a client hello, else None"""
+    try:
+        message = json.loads(payload.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(message, dict) or message.get("type") != "hello" or message.get("protocol") != PROTOCOL_NAME:
+        return None
+    common = [v for v in message.get("versions", []) if v in PROTOCOL_VERSIONS]
+    return max(common) if common else None
+
+
+def hello_ack(version: int) -> bytes:
+    return json.dumps({"type": "hello_ack", "protocol": PROTOCOL_NAME, "version": version}).encode("utf-8")
+
+
+def legacy_text_message(text: str) -> bytes:
+    """The original JSON message, for clients that did not negotiate"""
+    return json.dumps({"type": "agent_text", "content": text}).encode("utf-8")
+
+
+def pace_words(text: str, duration_seconds: float) -> List[Tuple[float, str]]:
+    """(offset, delta) pairs that reveal `text` word by word over `duration_seconds`"""
+    words = text.split(" ")
+    total = max(1, sum(len(word) + 1 for word in words))
+    deltas = []
+    elapsed_chars = 0
+    for i, word in enumerate(words):
+        deltas.append((duration_seconds * elapsed_chars / total, word if i == 0 else " " + word))
+        elapsed_chars += len(word) + 1
+    return deltas
+
+
+class CaptionEncoder:
+    """Numbers utterances and records for one sender"""
+
+    def __init__(self):
+        self.seq = 0
+        self.utterance = 0
+
+    def record(self, kind: int, utterance: int, text: str = "") -> CaptionRecord:
+        self.seq += 1
+        return CaptionRecord(kind, utterance, self.seq, text)
+
+    def next_utterance(self) -> int:
+        self.utterance = (self.utterance + 1) % 0x10000
+        return self.utterance
+
+
+class CaptionPeers:
+    """
+    Receivers that negotiated the binary framing, each with its own sequence base.
+
+    The encoder numbers records once for the whole room; a receiver sees them
+    shifted so its numbering starts at 1 after its accepted hello.
+    """
+
+    def __init__(self, encoder: CaptionEncoder):
+        self.encoder = encoder
+        self.bases: Dict[str, int] = {}
+
+    def accept(self, identity: str):
+        """(Re)start `identity`'s numbering after the records sent so far"""
+        self.bases[identity] = self.encoder.seq
+
+    def __contains__(self, identity: object) -> bool:
+        return identity in self.bases
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.bases))
+
+    def __len__(self) -> int:
+        return len(self.bases)
+
+    def frames(self, frame: bytes, identities: Iterable[str]) -> List[Tuple[bytes, List[str]]]:
+        """`frame` renumbered for each receiver, as one (frame, identities) pair per sequence base"""
+        groups: Dict[int, List[str]] = {}
+        for identity in identities:
+            groups.setdefault(self.bases.get(identity, 0), []).append(identity)
+        if not any(groups):
+            return [(frame, group) for group in groups.values()]  # Everyone joined before the first record
+        records = decode_frame(frame)
+        frames = []
+        for base, group in groups.items():
+            shifted = [CaptionRecord(r.kind, r.utterance, r.seq - base, r.text) for r in records if r.seq > base]
+            if shifted:
+                frames.append((encode_frame(shifted), group))
+        return frames
+
+
+class CaptionAssembler:
+    """Receiver side: applies records in sequence order and rebuilds captions"""
+
+    def __init__(self):
+        self.last_seq = 0
+        self.pending: Dict[int, CaptionRecord] = {}
+        self.captions: Dict[int, str] = {}
+        self.finished: List[Tuple[int, str]] = []
+
+    def apply(self, records: Sequence[CaptionRecord]):
+        for record in records:
+            if record.seq > self.last_seq:
+                self.pending[record.seq] = record
+        self._drain()
+        ends = [seq for seq, record in self.pending.items() if record.kind == KIND_END]
+        if ends:
+            # An END carries the full text, so a gap before it is not waited for
+            for seq in sorted(seq for seq in self.pending if seq <= max(ends)):
+                self._apply_one(self.pending.pop(seq))
+            self._drain()
+
+    def _drain(self):
+        while self.last_seq + 1 in self.pending:
+            self._apply_one(self.pending.pop(self.last_seq + 1))
+
+    def _apply_one(self, record: CaptionRecord):
+        self.last_seq = max(self.last_seq, record.seq)
+        if record.kind == KIND_START:
+            self.captions[record.utterance] = ""
+        elif record.kind == KIND_DELTA:
+            self.captions[record.utterance] = self.captions.get(record.utterance, "") + record.text
+        elif record.kind == KIND_END:
+            self.captions.pop(record.utterance, None)
+            self.finished.append((record.utterance, record.text))
+
+
+async def stream_caption(text: str, send: Callable[[bytes], Awaitable[None]], encoder: CaptionEncoder,
+                         duration_seconds: float, flush_interval: float = 0.1):
+    """
+    Send `text` as START, paced DELTAs and a final END over `duration_seconds`.
+
+    Deltas due within the same `flush_interval` go out as one merged record.
+    The END (with the full text) is sent even if the stream is cancelled, e.g.
+    when the user interrupts the agent.
+    """
+    utterance = encoder.next_utterance()
+    deltas = pace_words(text, duration_seconds)
+    started = time.monotonic()
+    next_delta = 0
+    pending = [encoder.record(KIND_START, utterance)]
+    try:
+        while next_delta < len(deltas):
+            elapsed = time.monotonic() - started
+            due = []
+            while next_delta < len(deltas) and deltas[next_delta][0] <= elapsed:
+                due.append(deltas[next_delta][1])
+                next_delta += 1
+            if due:
+                pending.append(encoder.record(KIND_DELTA, utterance, "".join(due)))
+            if pending:
+                await send(encode_frame(pending))
+                pending = []
+            if next_delta < len(deltas):
+                await asyncio.sleep(max(flush_interval, deltas[next_delta][0] - elapsed))
+    finally:
+        pending.append(encoder.record(KIND_END, utterance, text))
+        try:
+            await send(encode_frame(pending))
+        except Exception as e:
+            logger.warning(f"Could not send caption end: {str(e)}")
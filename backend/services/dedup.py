@@ -0,0 +1,182 @@
+"""
+AI Debate Partner - Near-Duplicate Chunk Detection
+Sprint 4: MinHash/LSH deduplication of knowledge base chunks at index build time
+
+Topic files repeat the same figures (Kant, Mill and Hume come up in
+deontology, utilitarianism, empiricism and rationalism), and split sections
+overlap. When two chunks are nearly identical, top-k retrieval can fill the
+prompt with copies of the same passage.
+
+Each chunk is reduced to a set of word shingles and a MinHash signature.
+Signatures are split into LSH bands, and chunks that share a band bucket become
+candidate pairs. Only those pairs are compared exactly (Jaccard similarity of
+their shingle sets), so the cost stays close to linear in the number of chunks.
+For each pair at or above the threshold, the shorter chunk is dropped, unless
+the longer one was itself dropped as a copy of a third chunk.
+
+Paraphrases share few shingles. When the chunk embeddings are at hand (the
+index build computes them anyway), pairs whose cosine similarity passes a
+second threshold can be merged as well.
+"""
+
+import hashlib
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 5) -> Set[str]:
+    """Lower-cased word n-grams; a text shorter than `size` words is one shingle"""
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash32(values: Sequence[str]) -> np.ndarray:
+    return np.array([int.from_bytes(hashlib.blake2b(v.encode("utf-8"), digest_size=4).digest(), "little")
+                     for v in values], dtype=np.uint64)
+
+
+def lsh_params(threshold: float, num_perm: int, recall: float = 0.99) -> Tuple[int, int]:
+    """
+    (bands, rows) with the most rows per band that still make a pair at the
+    threshold a candidate with probability >= `recall`. Candidates are checked
+    exactly afterwards, so extra candidates only cost time, and missed ones are lost.
+    """
+    options = [(num_perm // rows, rows) for rows in range(num_perm, 0, -1) if num_perm % rows == 0]
+    for bands, rows in options:
+        if 1.0 - (1.0 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class MinHasher:
+    """Signatures from `num_perm` universal hash functions over 32-bit shingle hashes"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        # a, b < 2^31 keeps a * h + b below 2^64 for 32-bit h
+        self.a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self.num_perm = num_perm
+
+    def signature(self, shingle_set: Set[str]) -> np.ndarray:
+        if not shingle_set:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = _hash32(sorted(shingle_set))
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+def near_duplicate_pairs(texts: Sequence[str], threshold: float = 0.8, num_perm: int = 128,
+                         shingle_words: int = 5) -> List[Tuple[int, int, float]]:
+    """(i, j, Jaccard) for every pair of texts whose shingle sets are at least `threshold` similar"""
+    sets = [shingles(text, shingle_words) for text in texts]
+    hasher = MinHasher(num_perm)
+    signatures = np.stack([hasher.signature(s) for s in sets]) if sets else np.empty((0, num_perm), np.uint64)
+    bands, rows = lsh_params(threshold, num_perm)
+
+    candidates: Set[Tuple[int, int]] = set()
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = {}
+        for i, key in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            if sets[i]:
+                buckets.setdefault(key.tobytes(), []).append(i)
+        for members in buckets.values():
+            candidates.update((members[x], members[y]) for x in range(len(members)) for y in range(x + 1, len(members)))
+
+    pairs = []
+    for i, j in sorted(candidates):
+        jaccard = len(sets[i] & sets[j]) / len(sets[i] | sets[j])
+        if jaccard >= threshold:
+            pairs.append((i, j, jaccard))
+    return pairs
+
+
+def similar_vector_pairs(vectors: np.ndarray, threshold: float = 0.95, block: int = 1024) -> List[Tuple[int, int, float]]:
+    """(i, j, cosine) for every pair of embeddings at or above `threshold`, compared a block of rows at a time"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized = vectors / np.where(norms == 0, 1.0, norms)
+    pairs = []
+    for start in range(0, len(normalized), block):
+        similarity = normalized[start:start + block] @ normalized.T
+        rows, cols = np.nonzero(similarity >= threshold)
+        rows = rows + start
+        keep = cols > rows  # Each pair once, no self pairs
+        pairs.extend(zip(rows[keep].tolist(), cols[keep].tolist(), similarity[rows[keep] - start, cols[keep]].tolist()))
+    return pairs
+
+
+def select_representatives(lengths: Sequence[int], pairs: Sequence[Tuple[int, int, float]]) -> Dict[int, List[Tuple[int, float]]]:
+    """
+    Keep the longest item first; drop an item only when it is directly similar to
+    an item already kept. Returns {kept index: [(dropped index, similarity)]}.
+
+    Unlike connected components, a chain of pairwise-similar items (a ~ b ~ c,
+    but a and c far apart) does not collapse into one survivor.
+    """
+    neighbours: Dict[int, Dict[int, float]] = {}
+    for i, j, similarity in pairs:
+        neighbours.setdefault(i, {})[j] = similarity
+        neighbours.setdefault(j, {})[i] = similarity
+    kept: Dict[int, List[Tuple[int, float]]] = {}
+    for i in sorted(neighbours, key=lambda index: (-lengths[index], index)):
+        matches = [(similarity, k) for k, similarity in neighbours[i].items() if k in kept]
+        if matches:
+            similarity, leader = max(matches)
+            kept[leader].append((i, similarity))
+        else:
+            kept[i] = []
+    return {leader: dropped for leader, dropped in kept.items() if dropped}
+
+
+def _label(doc: Any) -> str:
+    source = str(doc.metadata.get("source", "")).replace("\\", "/").rsplit("/", 1)[-1]
+    section = doc.metadata.get("heading_path")
+    return f"{source} > {section}" if section else source
+
+
+def dedup_documents(docs: List[Any], threshold: float = 0.8, num_perm: int = 128, shingle_words: int = 5,
+                    vectors: Optional[np.ndarray] = None,
+                    embedding_threshold: Optional[float] = None) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Drop near-duplicate chunks, keeping the longer chunk of each similar pair.
+
+    Chunks are near duplicates when their shingle Jaccard similarity reaches
+    `threshold`, or, given their `vectors`, when their cosine similarity reaches
+    `embedding_threshold` (paraphrases). Returns (kept, report).
+    """
+    pairs = near_duplicate_pairs([doc.page_content for doc in docs], threshold, num_perm, shingle_words)
+    if vectors is not None and embedding_threshold is not None:
+        pairs += similar_vector_pairs(vectors, embedding_threshold)
+
+    dropped: Set[int] = set()
+    report_clusters = []
+    lengths = [len(doc.page_content) for doc in docs]
+    for keep, removed in sorted(select_representatives(lengths, pairs).items()):
+        dropped.update(i for i, _ in removed)
+        report_clusters.append({
+            "kept": _label(docs[keep]),
+            "dropped": [{"chunk": _label(docs[i]), "similarity": round(similarity, 3)} for i, similarity in removed]
+        })
+    report = {
+        "chunks": len(docs),
+        "kept": len(docs) - len(dropped),
+        "dropped": len(dropped),
+        "threshold": threshold,
+        "embedding_threshold": embedding_threshold,
+        "clusters": report_clusters,
+        "kept_indices": [i for i in range(len(docs)) if i not in dropped]
+    }
+    logger.info(f"Dedup dropped {len(dropped)} of {len(docs)} chunks")
+    return [docs[i] for i in report["kept_indices"]], report
@@ -0,0 +1,170 @@
+"""
+AI Debate Partner - Embedding Service Clients
+Sprint 4: Pooled clients for the standalone embedding service
+
+EMBEDDING_SERVICE_URL is either "unix:///path/to/socket" or "http://host:port".
+Both clients keep a bounded pool of keep-alive connections, so consecutive
+requests skip connection setup.
+
+- EmbeddingServiceClient: synchronous, used by the API server (its retrieval
+  already runs in a thread pool).
+- AsyncEmbeddingServiceClient: asyncio, used by the LiveKit agent.
+- RemoteEmbeddings / RemoteVectorStore: drop-in replacements for the
+  `embeddings` and `vectorstore` globals in main.py.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+UNIX_SCHEME = "unix://"
+
+
+def _transport_options(url: str) -> Tuple[str, Optional[str]]:
+    """(base_url, uds_path) for a service URL"""
+    if url.startswith(UNIX_SCHEME):
+        # Requests still need an http:// URL; the host part is ignored over a socket
+        return "http://embedding-service", url[len(UNIX_SCHEME):]
+    return url.rstrip("/"), None
+
+
+def _to_documents(results: List[List[Dict[str, Any]]]) -> List[List[Tuple[Document, float]]]:
+    return [
+        [(Document(page_content=hit["page_content"], metadata=hit.get("metadata", {})), hit["score"]) for hit in row]
+        for row in results
+    ]
+
+
+class EmbeddingServiceClient:
+    """Synchronous client with connection pooling"""
+
+    def __init__(self, url: str, pool_size: int = 8, timeout: float = 5.0):
+        base_url, uds = _transport_options(url)
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.url = url
+        self.client = httpx.Client(
+            base_url=base_url,
+            transport=httpx.HTTPTransport(uds=uds, limits=limits, retries=1),
+            timeout=timeout
+        )
+        self.index_stats: Dict[str, Any] = {}  # Index size as of the last health or search response
+
+    def _remember_index_stats(self, payload: Dict[str, Any]):
+        self.index_stats.update({key: payload[key] for key in ("documents", "dimension") if key in payload})
+
+    def health(self) -> Dict[str, Any]:
+        response = self.client.get("/health")
+        response.raise_for_status()
+        payload = response.json()
+        self._remember_index_stats(payload)
+        return payload
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.post("/embed", json={"texts": texts})
+        response.raise_for_status()
+        return response.json()["vectors"]
+
+    def search(self, queries: Optional[List[str]] = None, vectors: Optional[List[List[float]]] = None,
+               k: int = 4) -> List[List[Tuple[Document, float]]]:
+        response = self.client.post("/search", json={"queries": queries or [], "vectors": vectors or [], "k": k})
+        response.raise_for_status()
+        payload = response.json()
+        self._remember_index_stats(payload)
+        return _to_documents(payload["results"])
+
+    def close(self):
+        self.client.close()
+
+
+class AsyncEmbeddingServiceClient:
+    """asyncio client with connection pooling"""
+
+    def __init__(self, url: str, pool_size: int = 8, timeout: float = 5.0):
+        base_url, uds = _transport_options(url)
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.url = url
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            transport=httpx.AsyncHTTPTransport(uds=uds, limits=limits, retries=1),
+            timeout=timeout
+        )
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        response = await self.client.post("/embed", json={"texts": texts})
+        response.raise_for_status()
+        return response.json()["vectors"]
+
+    async def search(self, queries: Optional[List[str]] = None, vectors: Optional[List[List[float]]] = None,
+                     k: int = 4) -> List[List[Tuple[Document, float]]]:
+        response = await self.client.post("/search", json={"queries": queries or [], "vectors": vectors or [], "k": k})
+        response.raise_for_status()
+        return _to_documents(response.json()["results"])
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class RemoteEmbeddings(Embeddings):
+    """LangChain embeddings backed by the embedding service"""
+
+    def __init__(self, client: EmbeddingServiceClient):
+        self.client = client
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.embed([text])[0]
+
+
+class RemoteIndexInfo:
+    """
+    Stands in for `vectorstore.index` where only ntotal and d are read. Both
+    come from the last health or search response, so reading them never blocks
+    on the service.
+    """
+
+    def __init__(self, client: EmbeddingServiceClient):
+        self.client = client
+
+    @property
+    def ntotal(self) -> int:
+        return self.client.index_stats.get("documents", 0)
+
+    @property
+    def d(self) -> Optional[int]:
+        return self.client.index_stats.get("dimension")
+
+
+class RemoteVectorStore:
+    """The subset of the LangChain FAISS interface main.py uses, served remotely"""
+
+    def __init__(self, client: EmbeddingServiceClient):
+        self.client = client
+        self.index = RemoteIndexInfo(client)
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        return self.client.search(queries=[query], k=k)[0]
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> List[Document]:
+        return [doc for doc, _ in self.client.search(vectors=[embedding], k=k)[0]]
+
+    def search_by_vectors(self, vectors: List[List[float]], k: int = 4) -> List[List[Tuple[Document, float]]]:
+        """Many query vectors in one request, for batch evaluation"""
+        return self.client.search(vectors=vectors, k=k)
+
+
+def connect_embedding_service(url: str, pool_size: int = 8, timeout: float = 5.0) -> Tuple[RemoteEmbeddings, RemoteVectorStore]:
+    """Embeddings and vector store backed by a running service; fails fast if it is unreachable"""
+    client = EmbeddingServiceClient(url, pool_size=pool_size, timeout=timeout)
+    info = client.health()
+    logger.info(f"Using embedding service at {url} ({info['model']}, {info['documents']} documents)")
+    return RemoteEmbeddings(client), RemoteVectorStore(client)
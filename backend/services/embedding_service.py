@@ -0,0 +1,198 @@
+"""
+AI Debate Partner - Embedding Service
+Sprint 4: Standalone owner of the embedding model and FAISS index
+
+The API server and the LiveKit agent can talk to one embedding service over a
+Unix domain socket (or local TCP) instead of each loading MiniLM and the index.
+The service accepts batches of texts or queries and, on top of that, coalesces
+concurrent requests: texts arriving within EMBEDDING_SERVICE_BATCH_WAIT_MS of
+each other are embedded in a single model call, and all query vectors of a
+request are searched as one FAISS matrix query.
+
+Run it with backend/embedding_server.py; clients live in embedding_client.py.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+
+
+class SearchRequest(BaseModel):
+    queries: List[str] = []
+    vectors: List[List[float]] = []  # Pre-computed query vectors; their results come first
+    k: int = Field(default=4, ge=1, le=100)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests into batched model calls.
+
+    Callers await embed(); a single background task drains the queue, waiting at
+    most max_wait_ms for more texts once the first one arrives, and runs the
+    model off the event loop.
+    """
+
+    def __init__(self, embeddings: Any, max_batch: int = 64, max_wait_ms: float = 2.0):
+        self.embeddings = embeddings
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.texts = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if self._task is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            texts = [text for item_texts, _ in pending for text in item_texts]
+            try:
+                vectors = await loop.run_in_executor(None, self.embeddings.embed_documents, texts)
+            except Exception as e:
+                logger.error(f"Batched embedding of {len(texts)} texts failed: {str(e)}")
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            offset = 0
+            for item_texts, future in pending:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0
+        }
+
+
+def search_vectors(vectorstore: Any, vectors: List[List[float]], k: int) -> List[List[Tuple[Any, float]]]:
+    """
+    Search many query vectors with one FAISS call.
+
+    Mirrors FAISS.similarity_search_with_score_by_vector, so results and scores
+    match what the API would get from its in-process index.
+    """
+    if not vectors:
+        return []
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if getattr(vectorstore, "_normalize_L2", False):
+        import faiss
+        faiss.normalize_L2(matrix)
+    scores, indices = vectorstore.index.search(matrix, k)
+
+    results = []
+    for row_scores, row_indices in zip(scores, indices):
+        row = []
+        for score, i in zip(row_scores, row_indices):
+            if i == -1:
+                continue
+            doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[i])
+            row.append((doc, float(score)))
+        results.append(row)
+    return results
+
+
+def create_embedding_app(embeddings: Any, vectorstore: Any, model_id: str,
+                         max_batch: int = 64, batch_wait_ms: float = 2.0) -> FastAPI:
+    """FastAPI app exposing /embed, /search and /health for one model and index"""
+    app = FastAPI(title="AI Debate Partner Embedding Service")
+    batcher = EmbeddingBatcher(embeddings, max_batch=max_batch, max_wait_ms=batch_wait_ms)
+    app.state.batcher = batcher
+    started_at = time.time()
+
+    @app.on_event("startup")
+    async def start_batcher():
+        batcher.start()
+
+    @app.on_event("shutdown")
+    async def stop_batcher():
+        await batcher.stop()
+
+    @app.get("/health")
+    async def health():
+        return {
+            "status": "healthy",
+            "model": model_id,
+            "documents": vectorstore.index.ntotal if vectorstore is not None else 0,
+            "dimension": vectorstore.index.d if vectorstore is not None else None,
+            "uptime_seconds": round(time.time() - started_at, 1),
+            "batching": batcher.stats()
+        }
+
+    @app.post("/embed")
+    async def embed(request: EmbedRequest):
+        return {"vectors": await batcher.embed(request.texts)}
+
+    @app.post("/search")
+    async def search(request: SearchRequest):
+        if vectorstore is None:
+            raise HTTPException(status_code=503, detail="Vector index not loaded")
+
+        vectors = list(request.vectors)
+        if request.queries:
+            vectors.extend(await batcher.embed(request.queries))
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, search_vectors, vectorstore, vectors, request.k)
+        return {
+            "documents": vectorstore.index.ntotal,
+            "results": [
+                [{"page_content": doc.page_content, "metadata": doc.metadata, "score": score} for doc, score in row]
+                for row in results
+            ]
+        }
+
+    return app
@@ -0,0 +1,231 @@
+"""
+AI Debate Partner - Index Versions and Hot Reload
+Sprint 4: Swap in a rebuilt FAISS index without restarting the server
+
+Layout under VECTOR_STORE_PATH:
+
+    faiss_index/
+        CURRENT                   <- name of the live version
+        versions/20250801T120000.123456-3f9a1c/index.faiss, index.pkl (+ build artifacts, e.g. suggest_index.json)
+        versions/...
+
+prepare_knowledge_base.py publishes every build as a new version directory and
+then atomically replaces CURRENT. A server notices the change (file watcher or
+admin endpoint), loads the new version in a background thread, checks it with
+a smoke query and only then swaps its `vectorstore` reference. Requests that
+already hold the old store finish on it; nothing is reloaded on the request
+path, and voice sessions and conversation memory are untouched.
+
+An index saved directly into VECTOR_STORE_PATH (the pre-versioning layout) is
+still served, as version "legacy".
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+LEGACY_VERSION = "legacy"
+INDEX_FILE = "index.faiss"
+
+
+def new_version_name() -> str:
+    """Unique version name that sorts chronologically"""
+    now = time.time()
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.localtime(now))}.{int(now * 1e6) % 1_000_000:06d}-{uuid.uuid4().hex[:6]}"
+
+
+def read_current_version(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_index_version(root: str, version: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+    """(version, directory) of the requested or live index; (None, None) if there is none"""
+    version = version or read_current_version(root)
+    if version and version != LEGACY_VERSION:
+        path = os.path.join(root, VERSIONS_DIR, version)
+        if os.path.exists(os.path.join(path, INDEX_FILE)):
+            return version, path
+        logger.error(f"Index version {version} not found under {root}")
+        return None, None
+    if os.path.exists(os.path.join(root, INDEX_FILE)):
+        return LEGACY_VERSION, root
+    return None, None
+
+
+def list_versions(root: str) -> List[str]:
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(versions_dir)
+        if not name.endswith(".tmp") and os.path.isdir(os.path.join(versions_dir, name))
+    )
+
+
+def set_current_version(root: str, version: str):
+    """Point CURRENT at a version with an atomic rename"""
+    tmp_path = os.path.join(root, f"{CURRENT_FILE}.tmp-{os.getpid()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def gc_versions(root: str, keep: int, protect: Optional[List[str]] = None) -> List[str]:
+    """Delete all but the newest `keep` versions, never touching CURRENT or `protect`"""
+    protected = set(protect or [])
+    current = read_current_version(root)
+    if current:
+        protected.add(current)
+    versions = list_versions(root)
+    removable = [v for v in versions[:max(0, len(versions) - keep)] if v not in protected]
+    for version in removable:
+        shutil.rmtree(os.path.join(root, VERSIONS_DIR, version), ignore_errors=True)
+        logger.info(f"Removed old index version {version}")
+    return removable
+
+
+def publish_index_version(vectorstore: Any, root: str, keep: int = 3,
+                          write_extras: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Save a LangChain FAISS store as a new version and make it current.
+
+    `write_extras(directory)` adds files built alongside the index (such as the
+    suggest index) before CURRENT moves, so a reloading server never sees the
+    new version without them.
+    """
+    version = new_version_name()
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    os.makedirs(versions_dir, exist_ok=True)
+    tmp_dir = os.path.join(versions_dir, f"{version}.tmp")
+    vectorstore.save_local(tmp_dir)
+    if write_extras:
+        write_extras(tmp_dir)
+    os.rename(tmp_dir, os.path.join(versions_dir, version))
+    set_current_version(root, version)
+    gc_versions(root, keep)
+    return version
+
+
+class IndexReloader:
+    """
+    Loads, validates and swaps index versions for one process.
+
+    `loader(directory)` builds a vector store; `on_swap(store, version)` installs
+    it (in main.py: rebinding the `vectorstore` global, which is atomic).
+    """
+
+    def __init__(self, root: str, loader: Callable[[str], Any], on_swap: Callable[[Any, str], None],
+                 smoke_query: str, keep_versions: int = 3, version: Optional[str] = None):
+        self.root = root
+        self.loader = loader
+        self.on_swap = on_swap
+        self.smoke_query = smoke_query
+        self.keep_versions = keep_versions
+        self.version = version
+        self.loaded_at = time.time() if version else None
+        self.last_error: Optional[str] = None
+        self.history: List[Dict[str, Any]] = []
+        self._failed_version: Optional[str] = None
+        self._lock = threading.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def validate(self, store: Any):
+        """Raise unless the store is non-empty and answers the smoke query"""
+        if store.index.ntotal == 0:
+            raise ValueError("index is empty")
+        if not store.similarity_search(self.smoke_query, k=1):
+            raise ValueError(f"smoke query '{self.smoke_query}' returned no documents")
+
+    def reload(self, version: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+        """Load the requested (default: CURRENT) version and swap it in if it validates"""
+        if not self._lock.acquire(blocking=False):
+            return {"status": "in_progress", "version": self.version}
+        try:
+            target, path = resolve_index_version(self.root, version)
+            if target is None:
+                self.last_error = f"index version {version or '(current)'} not found"
+                return {"status": "failed", "error": self.last_error, "version": self.version}
+            if target == self.version and not force:
+                return {"status": "unchanged", "version": self.version}
+
+            start = time.perf_counter()
+            try:
+                store = self.loader(path)
+                self.validate(store)
+            except Exception as e:
+                self.last_error = f"{target}: {str(e)}"
+                self._failed_version = target
+                logger.error(f"Index version {target} rejected, keeping {self.version}: {str(e)}")
+                self._record(target, "failed", time.perf_counter() - start, str(e))
+                return {"status": "failed", "error": self.last_error, "version": self.version}
+
+            previous = self.version
+            self.on_swap(store, target)
+            if version and target != LEGACY_VERSION and read_current_version(self.root) != target:
+                # Explicit rollback/pin: move CURRENT too, so other workers follow and the watcher agrees
+                set_current_version(self.root, target)
+            self.version = target
+            self.loaded_at = time.time()
+            self.last_error = None
+            load_seconds = time.perf_counter() - start
+            self._record(target, "loaded", load_seconds)
+            logger.info(f"Swapped index {previous} -> {target} ({store.index.ntotal} vectors, loaded in {load_seconds:.2f}s)")
+
+            if target != LEGACY_VERSION:
+                gc_versions(self.root, self.keep_versions, protect=[target])
+            return {"status": "loaded", "version": target, "previous": previous, "load_seconds": round(load_seconds, 3)}
+        finally:
+            self._lock.release()
+
+    def _record(self, version: str, status: str, seconds: float, error: Optional[str] = None):
+        self.history.append({
+            "version": version, "status": status, "at": time.time(),
+            "load_seconds": round(seconds, 3), "error": error
+        })
+        del self.history[:-10]
+
+    def changed(self) -> bool:
+        """CURRENT points at a version that is neither loaded nor already rejected"""
+        current = read_current_version(self.root)
+        return current is not None and current not in (self.version, self._failed_version)
+
+    async def watch(self, interval: float):
+        """Poll CURRENT and reload in a worker thread when it changes"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.changed():
+                    await loop.run_in_executor(None, self.reload)
+            except Exception as e:
+                logger.error(f"Index watcher error: {str(e)}")
+
+    def start_watching(self, interval: float):
+        if interval > 0 and self._watch_task is None:
+            self._watch_task = asyncio.get_running_loop().create_task(self.watch(interval))
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "current_on_disk": read_current_version(self.root),
+            "available_versions": list_versions(self.root),
+            "watching": self._watch_task is not None,
+            "last_error": self.last_error,
+            "history": self.history,
+        }
@@ -0,0 +1,324 @@
+"""
+AI Debate Partner - LLM Provider Router
+Sprint 4: Deadlines, hedged requests, circuit breakers and fallback for generation
+
+The RAG chain used to call a single ChatOpenAI model with no timeout, so one
+slow or failing upstream call became a slow or failed debate turn. LLMRouter is
+a LangChain chat model that sits in the chain in its place and spreads each
+call over an ordered list of providers (primary first, then fallbacks):
+
+- every call has an overall deadline (LLM_DEADLINE_SECONDS)
+- if the primary has not answered after its recent p95 latency, a hedged
+  request is sent to the next provider (or the same one when there is no
+  other) and the first answer wins; the loser is cancelled
+- a provider that fails is skipped for the rest of the call, and the next
+  one is tried while time remains
+- each provider has a circuit breaker: after LLM_BREAKER_FAILURES consecutive
+  failures it is skipped for LLM_BREAKER_RESET_SECONDS, then one trial call
+  decides whether it closes again
+
+Which provider answered (and whether the call was hedged or fell back) is
+written into the dict returned by start_route_record(), which main.py puts in
+the performance log.
+
+Hedging applies to async calls (ainvoke, which is what the API uses); the sync
+path only falls back sequentially.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+_route_record: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("llm_route_record", default=None)
+
+
+def start_route_record() -> Dict[str, Any]:
+    """
+    Start recording routing decisions for calls made from the current context.
+
+    The returned dict is filled in by the router when the call finishes:
+    provider, hedged, fallback, attempts, failed providers and latency.
+    """
+    record: Dict[str, Any] = {}
+    _route_record.set(record)
+    return record
+
+
+class LLMUnavailableError(RuntimeError):
+    """Every provider failed, or all circuits are open"""
+
+
+class LLMDeadlineExceeded(LLMUnavailableError):
+    """No provider answered before the call deadline"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a half-open trial after `reset_seconds`"""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Claim permission for one call; in half-open state only one trial call is let through"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release(self):
+        """Give back a half-open trial that ended without a result (e.g. cancelled after another provider won)"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._trial_in_flight:
+                logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Recent successful call latencies, for the hedge delay"""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self.samples) < 10:
+            return None  # Too few samples to trust
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+
+class RoutedProvider:
+    """One chat model with its breaker and latency history"""
+
+    def __init__(self, name: str, model: BaseChatModel, breaker: CircuitBreaker):
+        self.name = name
+        self.model = model
+        self.breaker = breaker
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.wins = 0
+        self.failures = 0
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.latency.percentile(95)
+        return {
+            "name": self.name,
+            "circuit": self.breaker.state,
+            "calls": self.calls,
+            "wins": self.wins,
+            "failures": self.failures,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class LLMRouter(BaseChatModel):
+    """Chat model that routes each call across providers; see the module docstring"""
+
+    deadline_seconds: float = 20.0
+    hedge_enabled: bool = False
+    hedge_percentile: float = 95.0
+    hedge_min_delay: float = 0.5  # Seconds; also the delay before enough latencies are known
+    _providers: List[RoutedProvider] = PrivateAttr(default_factory=list)
+
+    def __init__(self, providers: List[RoutedProvider], **kwargs: Any):
+        super().__init__(**kwargs)
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self._providers = providers
+
+    @property
+    def providers(self) -> List[RoutedProvider]:
+        return self._providers
+
+    @property
+    def _llm_type(self) -> str:
+        return "llm-router"
+
+    def hedge_delay(self, provider: RoutedProvider) -> float:
+        observed = provider.latency.percentile(self.hedge_percentile)
+        return max(self.hedge_min_delay, observed if observed is not None else self.hedge_min_delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "deadline_seconds": self.deadline_seconds,
+            "hedge_enabled": self.hedge_enabled,
+            "providers": [provider.stats() for provider in self._providers],
+        }
+
+    def _candidates(self) -> List[RoutedProvider]:
+        # No side effects here: a half-open trial is claimed with allow() only right before a provider is called
+        candidates = [provider for provider in self._providers if provider.breaker.state != "open"]
+        if not candidates:
+            raise LLMUnavailableError("all LLM provider circuits are open")
+        return candidates
+
+    def _finish(self, record: Dict[str, Any], winner: RoutedProvider, started: float, hedged: bool,
+                attempts: int, failed: List[str]):
+        elapsed = time.perf_counter() - started
+        winner.wins += 1
+        if record is not None:
+            record.update(
+                provider=winner.name,
+                hedged=hedged,
+                fallback=winner is not self._providers[0],
+                attempts=attempts,
+                failed=failed,
+                latency_ms=round(elapsed * 1000, 1)
+            )
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        record = _route_record.get()
+        started = time.perf_counter()
+        failed: List[str] = []
+        attempt = 0
+        for provider in self._candidates():
+            if not provider.breaker.allow():
+                continue  # Another call holds this provider's half-open trial
+            attempt += 1
+            provider.calls += 1
+            call_start = time.perf_counter()
+            try:
+                result = provider.model._generate(messages, stop=stop, **kwargs)
+            except Exception as e:
+                provider.failures += 1
+                provider.breaker.record_failure()
+                failed.append(provider.name)
+                logger.warning(f"LLM provider {provider.name} failed: {str(e)}")
+                continue
+            provider.latency.add(time.perf_counter() - call_start)
+            provider.breaker.record_success()
+            self._finish(record, provider, started, False, attempt, failed)
+            return result
+        if not attempt:
+            raise LLMUnavailableError("all LLM provider circuits are open")
+        raise LLMUnavailableError(f"all LLM providers failed: {', '.join(failed)}")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        record = _route_record.get()
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        deadline = loop.time() + self.deadline_seconds
+
+        queue = self._candidates()
+        running: Dict[asyncio.Task, RoutedProvider] = {}
+        launched: Dict[asyncio.Task, float] = {}
+        failed: List[str] = []
+        attempts = 0
+        hedged = False
+
+        def launch(provider: RoutedProvider) -> bool:
+            if not provider.breaker.allow():
+                return False  # Another call holds this provider's half-open trial
+            nonlocal attempts
+            attempts += 1
+            provider.calls += 1
+            task = asyncio.ensure_future(provider.model._agenerate(messages, stop=stop, **kwargs))
+            running[task] = provider
+            launched[task] = time.perf_counter()
+            return True
+
+        def launch_next() -> Optional[RoutedProvider]:
+            while queue:
+                provider = queue.pop(0)
+                if launch(provider):
+                    return provider
+            return None
+
+        primary = launch_next()
+        if primary is None:
+            raise LLMUnavailableError("all LLM provider circuits are open")
+        hedge_at = loop.time() + self.hedge_delay(primary) if self.hedge_enabled else None
+
+        try:
+            while running:
+                now = loop.time()
+                if now >= deadline:
+                    for task, provider in running.items():
+                        provider.failures += 1
+                        provider.breaker.record_failure()
+                        failed.append(provider.name)
+                    raise LLMDeadlineExceeded(f"no LLM provider answered within {self.deadline_seconds}s")
+
+                wake_at = deadline if hedge_at is None else min(deadline, hedge_at)
+                done, _ = await asyncio.wait(list(running), timeout=max(0.0, wake_at - now),
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if hedge_at is not None and loop.time() >= hedge_at:
+                        # Primary is slower than its recent p95: race a second request
+                        target = launch_next() or (primary if launch(primary) else None)
+                        if target is not None:
+                            logger.info(f"Hedging LLM call to {target.name} after {self.hedge_delay(primary) * 1000:.0f}ms")
+                            hedged = True
+                        hedge_at = None
+                    continue
+
+                for task in done:
+                    provider = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        provider.latency.add(time.perf_counter() - launched[task])
+                        provider.breaker.record_success()
+                        self._finish(record, provider, started, hedged, attempts, failed)
+                        return task.result()
+                    provider.failures += 1
+                    provider.breaker.record_failure()
+                    failed.append(provider.name)
+                    logger.warning(f"LLM provider {provider.name} failed: {str(error)}")
+
+                if not running:
+                    if not queue:
+                        break
+                    # Fall back to the next provider for the time that is left
+                    if launch_next() is None:
+                        break
+                    hedge_at = None
+        finally:
+            for task, provider in running.items():
+                task.cancel()
+                provider.breaker.release()
+            if record is not None and "provider" not in record:
+                record.update(provider=None, hedged=hedged, attempts=attempts, failed=failed,
+                              latency_ms=round((time.perf_counter() - started) * 1000, 1))
+
+        raise LLMUnavailableError(f"all LLM providers failed: {', '.join(failed)}")
@@ -0,0 +1,241 @@
+"""
+AI Debate Partner - Markdown Chunker
+Sprint 4: Structure-aware chunking of the knowledge base
+
+Each knowledge base file is YAML frontmatter followed by a heading hierarchy
+(# title, ## section, ### subsection, ...). Instead of cutting every 1500
+characters with a 200 character overlap, chunks follow that hierarchy:
+
+- every chunk records its heading path, e.g. "Justice > Core Definition and
+  Overview > Key Historical Figures", plus the file's title and tags
+- consecutive small sections are packed together up to target_tokens; a new
+  top-level (##) section starts a new chunk unless the current one is only a
+  small remainder, and heading-only sections join the section that follows
+- only a section longer than max_tokens is split - on paragraph, then
+  sentence boundaries - and only those pieces overlap, by overlap_tokens
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+from .conversation_memory import estimate_tokens
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+PATH_SEPARATOR = " > "
+
+
+@dataclass
+class Section:
+    """Text under one heading, up to the next heading of any level"""
+    path: List[str]
+    text: str
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+def parse_frontmatter(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Split `---` delimited frontmatter from the body.
+
+    Only the flat `key: value` subset used by the knowledge base is supported;
+    values in [...] are parsed as JSON lists where possible.
+    """
+    if not text.startswith("---"):
+        return {}, text
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}, text
+
+    metadata: Dict[str, Any] = {}
+    for line in text[3:end].strip().splitlines():
+        key, sep, value = line.partition(":")
+        if not sep or not key.strip():
+            continue
+        value = value.strip()
+        if value.startswith("["):
+            try:
+                metadata[key.strip()] = json.loads(value)
+                continue
+            except ValueError:
+                pass
+        metadata[key.strip()] = value.strip("\"'")
+    body = text[end + 4:]
+    return metadata, body.lstrip("\n")
+
+
+def clean_heading(heading: str) -> str:
+    """Heading text without emphasis markers"""
+    return re.sub(r"[*_`]", "", heading).strip()
+
+
+def split_sections(body: str, root: str = "") -> List[Section]:
+    """
+    Split a Markdown body on headings, tracking the heading path of each section.
+
+    The document title (# heading) is replaced by `root` when given, so paths
+    read "Justice > ..." rather than repeating the full H1.
+    """
+    sections: List[Section] = []
+    stack: List[Tuple[int, str]] = []
+    lines: List[str] = []
+    in_fence = False
+
+    def current_path() -> List[str]:
+        return [root] + [title for _, title in stack] if root else [title for _, title in stack]
+
+    def flush():
+        text = "\n".join(lines).strip()
+        if text:
+            sections.append(Section(path=current_path(), text=text))
+        lines.clear()
+
+    for line in body.splitlines():
+        if FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING_PATTERN.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            title = clean_heading(match.group(2))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            if not (level == 1 and root):
+                stack.append((level, title))
+        lines.append(line)
+    flush()
+    return sections
+
+
+def merge_heading_only(sections: List[Section]) -> List[Section]:
+    """Attach sections that are just a heading line to the section that follows them"""
+    merged: List[Section] = []
+    carry: List[str] = []
+    for section in sections:
+        if "\n" not in section.text and HEADING_PATTERN.match(section.text):
+            carry.append(section.text)
+            continue
+        if carry:
+            section = Section(path=section.path, text="\n\n".join(carry + [section.text]))
+            carry = []
+        merged.append(section)
+    if carry:
+        merged.append(Section(path=sections[-1].path, text="\n\n".join(carry)))
+    return merged
+
+
+def common_path(paths: List[List[str]]) -> List[str]:
+    prefix = paths[0]
+    for path in paths[1:]:
+        length = 0
+        while length < min(len(prefix), len(path)) and prefix[length] == path[length]:
+            length += 1
+        prefix = prefix[:length]
+    return prefix
+
+
+def split_units(text: str, max_tokens: int) -> List[str]:
+    """Paragraphs, with any paragraph over max_tokens broken into sentences"""
+    units = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            units.append(paragraph)
+        else:
+            units.extend(s for s in SENTENCE_PATTERN.split(paragraph) if s.strip())
+    return units
+
+
+def tail_words(text: str, tokens: int) -> str:
+    """Roughly the last `tokens` tokens of text, starting on a word boundary"""
+    if tokens <= 0:
+        return ""
+    words = text.split()
+    tail: List[str] = []
+    for word in reversed(words):
+        if estimate_tokens(" ".join([word] + tail)) > tokens:
+            break
+        tail.insert(0, word)
+    return " ".join(tail)
+
+
+def split_section(section: Section, target_tokens: int, max_tokens: int, overlap_tokens: int) -> List[str]:
+    """Pieces of an oversized section, each carrying a short overlap from the previous one"""
+    pieces: List[str] = []
+    current: List[str] = []
+    for unit in split_units(section.text, max_tokens):
+        candidate = "\n\n".join(current + [unit])
+        has_body = any(not HEADING_PATTERN.match(part) for part in current)
+        if has_body and estimate_tokens(candidate) > target_tokens:
+            pieces.append("\n\n".join(current))
+            overlap = tail_words(pieces[-1], overlap_tokens)
+            current = [overlap, unit] if overlap else [unit]
+        else:
+            current.append(unit)
+    if current:
+        pieces.append("\n\n".join(current))
+    return pieces
+
+
+def chunk_markdown(text: str, source: str, target_tokens: int = 450, max_tokens: int = 600,
+                   overlap_tokens: int = 50) -> List[Document]:
+    """Chunk one Markdown file along its heading hierarchy"""
+    frontmatter, body = parse_frontmatter(text)
+    title = frontmatter.get("title", "")
+    sections = split_sections(body, root=title)
+
+    base_metadata: Dict[str, Any] = {"source": source}
+    if title:
+        base_metadata["title"] = title
+    if isinstance(frontmatter.get("tags"), list):
+        base_metadata["tags"] = frontmatter["tags"]
+
+    chunks: List[Document] = []
+
+    def emit(content: str, paths: List[List[str]], split: bool = False):
+        metadata = dict(base_metadata)
+        metadata["heading_path"] = PATH_SEPARATOR.join(common_path(paths))
+        metadata["sections"] = [PATH_SEPARATOR.join(path) for path in paths]
+        metadata["chunk_index"] = len(chunks)
+        if split:
+            metadata["split"] = True
+        chunks.append(Document(page_content=content, metadata=metadata))
+
+    pending: List[Section] = []
+
+    def flush_pending():
+        if pending:
+            emit("\n\n".join(s.text for s in pending), [s.path for s in pending])
+            pending.clear()
+
+    for section in merge_heading_only(sections):
+        if section.tokens > max_tokens:
+            paths = [section.path]
+            if pending and pending[0].path[:2] == section.path[:2] and sum(s.tokens for s in pending) < target_tokens // 3:
+                # A short lead-in (e.g. a parent section's intro) opens the first piece instead of standing alone
+                paths = [s.path for s in pending] + paths
+                section = Section(path=section.path, text="\n\n".join([s.text for s in pending] + [section.text]))
+                pending.clear()
+            flush_pending()
+            for i, piece in enumerate(split_section(section, target_tokens, max_tokens, overlap_tokens)):
+                emit(piece, paths if i == 0 else [section.path], split=True)
+            continue
+
+        if pending:
+            packed_tokens = sum(s.tokens for s in pending) + section.tokens
+            # A new top-level (##) section starts a new chunk unless the current one is a small remainder
+            new_group = pending[0].path[:2] != section.path[:2] and sum(s.tokens for s in pending) >= target_tokens // 3
+            if new_group or packed_tokens > target_tokens:
+                flush_pending()
+        pending.append(section)
+    flush_pending()
+    return chunks
@@ -0,0 +1,340 @@
+"""
+AI Debate Partner - Performance Log Store
+Sprint 4: Rotation, columnar compaction and vectorized analytics for performance logs
+
+performance_logs.jsonl used to grow without bound, and the only way to read it
+was line by line. The pipeline is now:
+
+1. rotate_log() moves the live JSONL file into a segments directory once it
+   passes a size limit (the API does this as it logs)
+2. compact_segments() parses rotated segments into NumPy column files,
+   partitioned by UTC day:
+
+       <store>/day=2025-07-22/timestamp.npy, response_time.npy, ...
+       <store>/day=2025-07-22/meta.json   (rows, vocabularies, source segments)
+
+   Free-text fields (error messages, LLM provider) become small integer codes
+   with a per-partition vocabulary. Stage latencies become one float column
+   per stage, NaN where a request had no such stage.
+3. PerfLogStore.load() memory-maps the partitions in a date range, and
+   latency_percentiles(), error_rates() and confidence_histogram() aggregate
+   them with sorting and bincount, without a Python loop per row.
+
+Compaction is idempotent: a partition records the segments it already holds,
+and segments are removed only after their rows are written.
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+NUMERIC_COLUMNS = {
+    "timestamp": np.float64,
+    "response_time": np.float32,
+    "confidence": np.float32,
+    "message_length": np.int32,
+    "success": np.bool_,
+}
+CODED_COLUMNS = ("error", "llm_provider")  # Stored as int16 codes; -1 means none
+STAGE_PREFIX = "stage_"
+BUCKET_SECONDS = {"hour": 3600, "day": 86400}
+
+
+def error_kind(message: Optional[str]) -> Optional[str]:
+    """Short, groupable form of an error message (status code or exception prefix)"""
+    if not message:
+        return None
+    status = re.search(r"Error code: (\d{3})", message)
+    if status:
+        return f"http_{status.group(1)}"
+    return message.split(":", 1)[0].strip()[:60] or "error"
+
+
+def rotate_log(log_path: str, segments_dir: str, max_bytes: int) -> Optional[str]:
+    """Move the live log into `segments_dir` once it is larger than `max_bytes`"""
+    try:
+        if max_bytes <= 0 or os.path.getsize(log_path) < max_bytes:
+            return None
+    except OSError:
+        return None
+    os.makedirs(segments_dir, exist_ok=True)
+    segment = os.path.join(segments_dir, f"performance_logs.{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}"
+                                         f".{os.getpid()}.jsonl")
+    try:
+        os.rename(log_path, segment)  # Appends that already opened the old file land in the segment
+    except FileNotFoundError:
+        return None  # Another worker rotated it first
+    logger.info(f"Rotated performance log to {segment}")
+    return segment
+
+
+def _day(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+def parse_entries(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    entries = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(entry, dict) and isinstance(entry.get("timestamp"), (int, float)):
+            entries.append(entry)
+    return entries
+
+
+def _encode(values: Sequence[Optional[str]], vocabulary: List[str]) -> np.ndarray:
+    index = {value: code for code, value in enumerate(vocabulary)}
+    codes = np.empty(len(values), dtype=np.int16)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = -1
+            continue
+        if value not in index:
+            index[value] = len(vocabulary)
+            vocabulary.append(value)
+        codes[i] = index[value]
+    return codes
+
+
+def build_columns(entries: List[Dict[str, Any]]) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+    """Column arrays and vocabularies for a list of log entries"""
+    columns: Dict[str, np.ndarray] = {
+        "timestamp": np.array([e["timestamp"] for e in entries], dtype=np.float64),
+        "response_time": np.array([e.get("response_time_seconds") or 0.0 for e in entries], dtype=np.float32),
+        "confidence": np.array([np.nan if e.get("confidence_score") is None else e["confidence_score"]
+                                for e in entries], dtype=np.float32),
+        "message_length": np.array([e.get("message_length") or 0 for e in entries], dtype=np.int32),
+        "success": np.array([bool(e.get("success", False)) for e in entries], dtype=np.bool_),
+    }
+    vocabularies: Dict[str, List[str]] = {"error": [], "llm_provider": []}
+    columns["error"] = _encode([error_kind(e.get("error")) for e in entries], vocabularies["error"])
+    columns["llm_provider"] = _encode([(e.get("llm") or {}).get("provider") for e in entries],
+                                      vocabularies["llm_provider"])
+    stage_names = sorted({name for e in entries for name in (e.get("stages") or {})})
+    for name in stage_names:
+        columns[STAGE_PREFIX + name] = np.array([(e.get("stages") or {}).get(name, np.nan) for e in entries],
+                                                dtype=np.float32)
+    return columns, vocabularies
+
+
+def _read_partition(path: str, mmap: bool = True) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+               for name in meta["columns"]}
+    return columns, meta
+
+
+def _merge(old: Tuple[Dict[str, np.ndarray], Dict[str, List[str]]],
+           new: Tuple[Dict[str, np.ndarray], Dict[str, List[str]]], rows_old: int, rows_new: int):
+    """Concatenate two column sets, remapping codes and filling missing stage columns with NaN"""
+    (old_columns, old_vocab), (new_columns, new_vocab) = old, new
+    merged_vocab = {name: list(old_vocab.get(name, [])) for name in CODED_COLUMNS}
+    merged: Dict[str, np.ndarray] = {}
+    for name in set(old_columns) | set(new_columns):
+        if name in CODED_COLUMNS:
+            vocabulary = merged_vocab[name]
+            for value in new_vocab.get(name, []):
+                if value not in vocabulary:
+                    vocabulary.append(value)
+            remap = np.array([vocabulary.index(v) for v in new_vocab.get(name, [])] + [-1], dtype=np.int16)
+            merged[name] = np.concatenate([old_columns[name], remap[new_columns[name]]])  # -1 indexes the trailing -1
+            continue
+        # Only stage columns can be missing from one side
+        first = old_columns[name] if name in old_columns else np.full(rows_old, np.nan, dtype=np.float32)
+        second = new_columns[name] if name in new_columns else np.full(rows_new, np.nan, dtype=np.float32)
+        merged[name] = np.concatenate([first, second])
+    return merged, merged_vocab
+
+
+def write_partition(path: str, columns: Dict[str, np.ndarray], vocabularies: Dict[str, List[str]],
+                    segments: List[str]):
+    """Write a partition directory atomically (temp dir, then rename over the old one)"""
+    order = np.argsort(columns["timestamp"], kind="stable")
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, values in columns.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(values[order]))
+    with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "rows": int(len(order)),
+            "columns": sorted(columns),
+            "vocabularies": vocabularies,
+            "segments": segments,
+        }, f, indent=2)
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def compact_segments(segments_dir: str, store_dir: str, keep_segments: bool = False) -> Dict[str, Any]:
+    """Fold every rotated segment into its day partitions; returns what was compacted"""
+    segments = sorted(glob.glob(os.path.join(segments_dir, "*.jsonl")))
+    os.makedirs(store_dir, exist_ok=True)
+    summary = {"segments": 0, "rows": 0, "partitions": []}
+    for segment in segments:
+        name = os.path.basename(segment)
+        with open(segment, "r", encoding="utf-8") as f:
+            entries = parse_entries(f)
+        by_day: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            by_day.setdefault(_day(entry["timestamp"]), []).append(entry)
+
+        for day, day_entries in sorted(by_day.items()):
+            path = os.path.join(store_dir, f"day={day}")
+            new_columns, new_vocab = build_columns(day_entries)
+            seen_segments: List[str] = []
+            if os.path.exists(os.path.join(path, META_FILE)):
+                old_columns, meta = _read_partition(path, mmap=False)
+                if name in meta.get("segments", []):
+                    continue  # Already compacted (an earlier run stopped before deleting the segment)
+                seen_segments = meta.get("segments", [])
+                columns, vocabularies = _merge((old_columns, meta["vocabularies"]), (new_columns, new_vocab),
+                                               meta["rows"], len(day_entries))
+            else:
+                columns, vocabularies = new_columns, new_vocab
+            write_partition(path, columns, vocabularies, seen_segments + [name])
+            summary["rows"] += len(day_entries)
+            if day not in summary["partitions"]:
+                summary["partitions"].append(day)
+
+        summary["segments"] += 1
+        if not keep_segments:
+            os.remove(segment)
+    return summary
+
+
+class PerfLogStore:
+    """Read side of the columnar store"""
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+
+    def days(self) -> List[str]:
+        paths = glob.glob(os.path.join(self.store_dir, "day=*", META_FILE))
+        return sorted(os.path.basename(os.path.dirname(p))[4:] for p in paths)
+
+    def load(self, since: Optional[str] = None, until: Optional[str] = None,
+             columns: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """
+        Concatenated columns for the days in [since, until] (YYYY-MM-DD, inclusive).
+
+        Coded columns are decoded lazily: the result holds codes plus a shared
+        vocabulary under "vocabularies". Missing stage columns are NaN.
+        """
+        days = [d for d in self.days() if (since is None or d >= since) and (until is None or d <= until)]
+        parts = [_read_partition(os.path.join(self.store_dir, f"day={day}")) for day in days]
+        if columns:
+            wanted = set(columns)
+        else:  # With no partitions, still return the base columns so aggregations see empty arrays
+            wanted = set().union(*(meta["columns"] for _, meta in parts)) if parts else set(NUMERIC_COLUMNS) | set(CODED_COLUMNS)
+        wanted.add("timestamp")
+
+        result: Dict[str, Any] = {"days": days, "rows": sum(meta["rows"] for _, meta in parts), "vocabularies": {}}
+        for name in sorted(wanted):
+            pieces = []
+            if name in CODED_COLUMNS:
+                vocabulary: List[str] = []
+                for part_columns, meta in parts:
+                    local = meta["vocabularies"].get(name, [])
+                    for value in local:
+                        if value not in vocabulary:
+                            vocabulary.append(value)
+                    remap = np.array([vocabulary.index(v) for v in local] + [-1], dtype=np.int16)
+                    pieces.append(remap[part_columns[name]] if name in part_columns
+                                  else np.full(meta["rows"], -1, dtype=np.int16))
+                result["vocabularies"][name] = vocabulary
+                result[name] = np.concatenate(pieces) if pieces else np.empty(0, dtype=np.int16)
+                continue
+            dtype = NUMERIC_COLUMNS.get(name, np.float32)
+            for part_columns, meta in parts:
+                pieces.append(part_columns[name] if name in part_columns else np.full(meta["rows"], np.nan, dtype=dtype))
+            result[name] = np.concatenate(pieces) if pieces else np.empty(0, dtype=dtype)
+        return result
+
+
+def _bucket_labels(starts: np.ndarray, bucket: str) -> List[str]:
+    fmt = "%Y-%m-%dT%H:00Z" if bucket == "hour" else "%Y-%m-%d"
+    return [time.strftime(fmt, time.gmtime(float(start))) for start in starts]
+
+
+def latency_percentiles(data: Dict[str, Any], bucket: str = "hour", percentiles: Sequence[float] = (50, 95, 99),
+                        column: str = "response_time") -> List[Dict[str, Any]]:
+    """Per-bucket latency percentiles of successful requests (nearest rank), fully vectorized"""
+    width = BUCKET_SECONDS[bucket]
+    values = np.asarray(data[column], dtype=np.float64)
+    mask = np.asarray(data["success"], dtype=bool) & ~np.isnan(values)
+    buckets = (np.asarray(data["timestamp"])[mask] // width).astype(np.int64)
+    values = values[mask]
+    if not len(values):
+        return []
+    order = np.lexsort((values, buckets))
+    buckets, values = buckets[order], values[order]
+    keys, starts, counts = np.unique(buckets, return_index=True, return_counts=True)
+    rows = {"bucket": _bucket_labels(keys * width, bucket), "count": counts.tolist(),
+            "mean": (np.add.reduceat(values, starts) / counts).round(4).tolist()}
+    for pct in percentiles:
+        rank = starts + np.ceil(pct / 100.0 * counts).astype(np.int64).clip(1, None) - 1
+        rows[f"p{pct:g}"] = values[rank].round(4).tolist()
+    return [dict(zip(rows, row)) for row in zip(*rows.values())]
+
+
+def error_rates(data: Dict[str, Any], bucket: str = "hour") -> List[Dict[str, Any]]:
+    """Requests, errors and error rate per bucket, with the most common error kind"""
+    width = BUCKET_SECONDS[bucket]
+    timestamps = np.asarray(data["timestamp"])
+    if not len(timestamps):
+        return []
+    keys, inverse = np.unique((timestamps // width).astype(np.int64), return_inverse=True)
+    failed = ~np.asarray(data["success"], dtype=bool)
+    totals = np.bincount(inverse, minlength=len(keys))
+    errors = np.bincount(inverse, weights=failed, minlength=len(keys)).astype(np.int64)
+
+    top_errors: List[Optional[str]] = [None] * len(keys)
+    codes = np.asarray(data.get("error", np.full(len(timestamps), -1, dtype=np.int16)))
+    vocabulary = data.get("vocabularies", {}).get("error", [])
+    coded = codes >= 0
+    if coded.any() and vocabulary:
+        pair_counts = np.zeros((len(keys), len(vocabulary)), dtype=np.int64)
+        np.add.at(pair_counts, (inverse[coded], codes[coded]), 1)
+        best = pair_counts.argmax(axis=1)
+        top_errors = [vocabulary[b] if pair_counts[i, b] else None for i, b in enumerate(best)]
+
+    labels = _bucket_labels(keys * width, bucket)
+    return [
+        {"bucket": labels[i], "requests": int(totals[i]), "errors": int(errors[i]),
+         "error_rate": round(float(errors[i] / totals[i]), 4), "top_error": top_errors[i]}
+        for i in range(len(keys))
+    ]
+
+
+def confidence_histogram(data: Dict[str, Any], bins: int = 10) -> Dict[str, Any]:
+    """Distribution of confidence scores over [0, 1]"""
+    confidence = np.asarray(data["confidence"], dtype=np.float64)
+    scored = confidence[~np.isnan(confidence)]
+    counts, edges = np.histogram(scored, bins=bins, range=(0.0, 1.0))
+    return {
+        "scored": int(len(scored)),
+        "unscored": int(len(confidence) - len(scored)),
+        "mean": round(float(scored.mean()), 4) if len(scored) else None,
+        "bins": [{"from": round(float(edges[i]), 3), "to": round(float(edges[i + 1]), 3), "count": int(counts[i])}
+                 for i in range(bins)]
+    }
@@ -0,0 +1,318 @@
+"""
+AI Debate Partner - On-Demand Profiling
+Sprint 4: Stack sampling, per-request cProfile and event-loop block detection
+
+When latency spikes, the slow part can be embedding, FAISS, JSON logging, the
+LLM client, or something blocking the event loop. Three tools narrow it down
+without restarting the process:
+
+- sample_stacks() reads every thread's stack at a fixed interval for N seconds
+  and counts identical stacks. The output is the "collapsed" format read by
+  flamegraph.pl, speedscope and similar tools:
+  `thread;outer (file:line);inner (file:line) count`
+- RequestProfilingMiddleware runs cProfile around any request that carries the
+  debug header. cProfile only sees its own thread, so this module also has a
+  run_in_threadpool() that profiles threadpool work done for that request
+  (embedding, FAISS) and merges it into the request's profile. Other coroutines
+  that interleave on the event loop during the request are included too, so
+  profile under light load.
+- LoopBlockMonitor is a watchdog thread that checks an event-loop heartbeat. If
+  the loop misses its beat by more than the threshold, the watchdog logs the
+  loop thread's stack while the block is still in progress, which shows the code
+  that caused it.
+
+None of this depends on FastAPI; the agent worker uses LoopBlockMonitor as well.
+"""
+
+import asyncio
+import contextvars
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool as _run_in_threadpool
+from starlette.datastructures import Headers
+
+logger = logging.getLogger(__name__)
+
+# Leaf frames of threads that are only waiting (locks, selectors, queues)
+IDLE_FRAMES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("selectors.py", "select"),
+    ("queue.py", "get"), ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace("\\", "/").split("/")
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+
+def collapse_stack(frame, root: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(root)
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, include_idle: bool = False) -> Counter:
+    """Collapsed stack -> sample count for every thread but the sampling one"""
+    me = threading.get_ident()
+    counts: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me or (not include_idle and _is_idle(frame)):
+                continue
+            counts[collapse_stack(frame, names.get(ident, f"thread-{ident}"))] += 1
+        time.sleep(interval)
+    return counts
+
+
+def format_collapsed(counts: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+def find_profile(profiles: Deque["RequestProfile"], profile_id: str) -> Optional["RequestProfile"]:
+    return next((p for p in profiles if p.id == profile_id), None)
+
+
+class RequestProfile:
+    """cProfile data for one request, including threadpool calls made on its behalf"""
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.duration_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.main = cProfile.Profile()
+        self.workers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def add_worker(self, profile: cProfile.Profile):
+        with self._lock:
+            self.workers.append(profile)
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.main)
+        with self._lock:
+            for profile in self.workers:
+                stats.add(profile)
+        return stats
+
+    def report(self, sort: str = "cumulative", limit: int = 40) -> str:
+        out = io.StringIO()
+        stats = self.stats()
+        stats.stream = out
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "threadpool_calls": len(self.workers)
+        }
+
+
+_active_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("active_profile", default=None)
+
+
+def _call_profiled(profile: RequestProfile, func: Callable, *args, **kwargs):
+    worker = cProfile.Profile()
+    try:
+        worker.enable()
+    except ValueError:  # Another profiler owns this interpreter (Python 3.12+ sys.monitoring)
+        return func(*args, **kwargs)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        worker.disable()
+        profile.add_worker(worker)
+
+
+async def run_in_threadpool(func: Callable, *args, **kwargs):
+    """starlette's run_in_threadpool, plus cProfile of the call when its request is being profiled"""
+    profile = _active_profile.get()
+    if profile is None:
+        return await _run_in_threadpool(func, *args, **kwargs)
+    return await _run_in_threadpool(_call_profiled, profile, func, *args, **kwargs)
+
+
+class RequestProfilingMiddleware:
+    """
+    Pure ASGI middleware: profiles requests carrying `header` that `authorize`
+    accepts, appends them to `profiles` and returns the profile id in
+    X-Profile-Id. One request is profiled at a time; others with the header
+    run unprofiled.
+    """
+
+    def __init__(self, app, profiles: Deque[RequestProfile], header: str = "X-Debug-Profile",
+                 authorize: Callable[[Headers], bool] = lambda headers: True):
+        self.app = app
+        self.profiles = profiles
+        self.header = header.lower()
+        self.authorize = authorize
+        self._busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if headers.get(self.header, "").lower() not in ("1", "true", "yes") or not self.authorize(headers):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        try:
+            profile.main.enable()
+        except ValueError:
+            await self.app(scope, receive, send)
+            return
+        self._busy = True
+        token = _active_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.main.disable()
+            _active_profile.reset(token)
+            self._busy = False
+            profile.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+            self.profiles.append(profile)
+            logger.info(f"Profiled {profile.method} {profile.path} in {profile.duration_ms} ms (profile {profile.id})")
+
+
+class LoopBlockMonitor:
+    """Logs the event-loop thread's stack while the loop is blocked for longer than `threshold_ms`"""
+
+    def __init__(self, threshold_ms: float = 100.0, keep: int = 20):
+        self.threshold = threshold_ms / 1000.0
+        self.beat_interval = max(0.01, self.threshold / 2)
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.blocks = 0
+        self.max_blocked_ms = 0.0
+        self._last_beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._pid: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start on the running loop; a no-op when already running in this process"""
+        if self.threshold <= 0:
+            return
+        if self._pid == os.getpid() and self._task is not None and not self._task.done():
+            return
+        self._pid = os.getpid()  # A forked job process starts its own heartbeat and watchdog
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="loop-block-monitor", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.beat_interval)
+
+    def _watch(self):
+        reported_beat = None
+        current: Optional[Dict[str, Any]] = None
+        while not self._stop.wait(self.beat_interval / 2):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat - self.beat_interval
+            if blocked <= self.threshold:
+                current = None
+                continue
+            blocked_ms = round(blocked * 1000, 1)
+            if beat != reported_beat:
+                reported_beat = beat
+                current = self._capture(blocked_ms)
+            elif current is not None:
+                current["blocked_ms"] = blocked_ms  # Still blocked; keep the running total
+            self.max_blocked_ms = max(self.max_blocked_ms, blocked_ms)
+
+    def _capture(self, blocked_ms: float) -> Optional[Dict[str, Any]]:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return None
+        stack = traceback.format_stack(frame)
+        event = {"at": time.time(), "blocked_ms": blocked_ms, "stack": collapse_stack(frame, "event-loop")}
+        self.events.append(event)
+        self.blocks += 1
+        logger.warning(f"Event loop blocked for over {blocked_ms:.0f} ms; loop thread is in:\n{''.join(stack[-12:])}")
+        return event
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "running": self._task is not None and not self._task.done() and self._pid == os.getpid(),
+            "blocks": self.blocks,
+            "max_blocked_ms": self.max_blocked_ms,
+            "recent": list(self.events)
+        }
+
+
+def install_profile_signal(directory: str, seconds: float = 10.0, interval: float = 0.005, signum: Optional[int] = None) -> bool:
+    """
+    On `signum` (SIGUSR1 by default), sample this process's stacks for `seconds`
+    in a background thread and write <directory>/<pid>-<time>.collapsed.
+    For processes without an HTTP endpoint, such as the agent worker and its job
+    processes. Returns False where signals cannot be installed (non-main thread, Windows).
+    """
+    import signal
+
+    signum = signum if signum is not None else getattr(signal, "SIGUSR1", None)
+    if signum is None:
+        return False
+
+    def dump():
+        counts = sample_stacks(seconds, interval)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S')}.collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(format_collapsed(counts))
+        logger.warning(f"Wrote {sum(counts.values())} stack samples to {path}")
+
+    try:
+        signal.signal(signum, lambda *_: threading.Thread(target=dump, name="stack-sampler", daemon=True).start())
+    except ValueError:
+        return False
+    return True
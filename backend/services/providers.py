@@ -0,0 +1,301 @@
+"""
+AI Debate Partner - Model Providers
+Sprint 4: Provider abstraction behind the `llm` and `embeddings` globals
+
+LLM_PROVIDER and EMBEDDING_PROVIDER select between the real services and
+built-in fake providers. The fakes are deterministic and fully local, so the
+complete retrieval + generation path (streaming, caching, logging) can be
+exercised and benchmarked on an air-gapped machine:
+
+- HashEmbeddings: signed feature hashing of word unigrams and bigrams. Texts
+  that share words get similar vectors, so retrieval results are meaningful,
+  stable across runs and independent of any model download.
+- FakeStreamingChatModel: emits a deterministic response token by token with
+  a configurable per-token delay and random failure rate.
+"""
+
+import asyncio
+import glob
+import hashlib
+import logging
+import os
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from .index_versions import resolve_index_version
+from .llm_router import CircuitBreaker, LLMRouter, RoutedProvider
+from .markdown_chunker import chunk_markdown
+from .quantization import quantize_embeddings, quantize_index
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDERS = ("openai", "fake")
+EMBEDDING_PROVIDERS = ("huggingface", "fake")
+CHUNKERS = ("markdown", "recursive")
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+FAKE_RESPONSE_WORDS = [
+    "Yet", "Kant", "would", "insist", "that", "duty", "precedes", "consequence,",
+    "and", "Hume", "reminds", "us", "that", "reason", "serves", "the", "passions;",
+    "your", "argument", "assumes", "what", "it", "sets", "out", "to", "prove."
+]
+
+
+class FakeProviderError(RuntimeError):
+    """Injected failure from a fake provider"""
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic bag-of-words embedder using signed feature hashing"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = WORD_PATTERN.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Deterministic chat model with a configurable per-token delay and failure rate"""
+
+    token_delay_ms: float = 20.0
+    response_tokens: int = 60
+    failure_rate: float = 0.0
+    seed: int = 0
+    model_name: str = "fake-chat"
+    _rng: random.Random = PrivateAttr(default=None)
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-chat"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = str(messages[-1].content)
+        offset = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        return [FAKE_RESPONSE_WORDS[(offset + i) % len(FAKE_RESPONSE_WORDS)] + " " for i in range(self.response_tokens)]
+
+    def _maybe_fail(self):
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            raise FakeProviderError(f"{self.model_name}: injected failure")
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        self._maybe_fail()
+        tokens = self._tokens(messages)
+        time.sleep(len(tokens) * self.token_delay_ms / 1000.0)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens).strip()))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        self._maybe_fail()
+        tokens = self._tokens(messages)
+        await asyncio.sleep(len(tokens) * self.token_delay_ms / 1000.0)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens).strip()))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self._maybe_fail()
+        for token in self._tokens(messages):
+            time.sleep(self.token_delay_ms / 1000.0)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self._maybe_fail()
+        for token in self._tokens(messages):
+            await asyncio.sleep(self.token_delay_ms / 1000.0)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+def embedding_model_id(settings) -> str:
+    """Identifier of the embedding space, stored alongside persisted vectors"""
+    if settings.EMBEDDING_PROVIDER == "fake":
+        return f"hash-embeddings-{settings.FAKE_EMBEDDING_DIM}"
+    return settings.EMBEDDING_MODEL
+
+
+def create_embeddings(settings) -> Embeddings:
+    """Build the embeddings provider selected by EMBEDDING_PROVIDER"""
+    if settings.EMBEDDING_PROVIDER == "fake":
+        logger.info(f"Using deterministic hash embeddings ({settings.FAKE_EMBEDDING_DIM} dims)")
+        return HashEmbeddings(dim=settings.FAKE_EMBEDDING_DIM)
+    if settings.EMBEDDING_PROVIDER == "huggingface":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        logger.info(f"Loading embeddings model: {settings.EMBEDDING_MODEL}")
+        embeddings = HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
+        return quantize_embeddings(embeddings, settings.EMBEDDING_QUANTIZATION)
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER '{settings.EMBEDDING_PROVIDER}', expected one of {EMBEDDING_PROVIDERS}")
+
+
+def create_chat_model(settings, provider: Optional[str] = None, model: Optional[str] = None) -> BaseChatModel:
+    """Build the chat model selected by LLM_PROVIDER (or an explicit provider/model, e.g. the fallback)"""
+    provider = provider or settings.LLM_PROVIDER
+    if provider == "fake":
+        logger.info(
+            f"Using fake streaming chat model ({settings.FAKE_LLM_TOKEN_DELAY_MS}ms/token, "
+            f"failure rate {settings.FAKE_LLM_FAILURE_RATE})"
+        )
+        return FakeStreamingChatModel(
+            token_delay_ms=settings.FAKE_LLM_TOKEN_DELAY_MS,
+            response_tokens=settings.FAKE_LLM_RESPONSE_TOKENS,
+            failure_rate=settings.FAKE_LLM_FAILURE_RATE,
+            seed=settings.FAKE_LLM_SEED,
+            model_name=f"fake-{model}" if model else "fake-chat"
+        )
+    if provider == "openai":
+        from langchain_openai import ChatOpenAI
+        model = model or settings.LLM_MODEL
+        logger.info(f"Initializing OpenAI LLM: {model}")
+        return ChatOpenAI(
+            model=model,
+            temperature=settings.TEMPERATURE,
+            max_tokens=settings.MAX_TOKENS,
+            openai_api_key=settings.OPENAI_API_KEY,
+            timeout=settings.LLM_DEADLINE_SECONDS,
+            max_retries=0  # The router retries on the next provider instead
+        )
+    raise ValueError(f"Unknown LLM_PROVIDER '{provider}', expected one of {LLM_PROVIDERS}")
+
+
+def create_llm_router(settings) -> LLMRouter:
+    """
+    The primary chat model plus the optional LLM_FALLBACK_* model behind one
+    router with deadline, hedging and circuit breaker settings.
+    """
+    def routed(provider: str, model: str) -> RoutedProvider:
+        return RoutedProvider(
+            f"{provider}:{model}",
+            create_chat_model(settings, provider, model),
+            CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET_SECONDS)
+        )
+
+    providers = [routed(settings.LLM_PROVIDER, settings.LLM_MODEL)]
+    if settings.LLM_FALLBACK_PROVIDER or settings.LLM_FALLBACK_MODEL:
+        providers.append(routed(
+            settings.LLM_FALLBACK_PROVIDER or settings.LLM_PROVIDER,
+            settings.LLM_FALLBACK_MODEL or settings.LLM_MODEL
+        ))
+    return LLMRouter(
+        providers,
+        deadline_seconds=settings.LLM_DEADLINE_SECONDS,
+        hedge_enabled=settings.LLM_HEDGE_ENABLED,
+        hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+        hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY_MS / 1000.0
+    )
+
+
+def chunking_options(settings) -> Dict[str, Any]:
+    """Chunker keyword arguments from the KB_CHUNK* settings"""
+    return {
+        "chunker": settings.KB_CHUNKER,
+        "target_tokens": settings.KB_CHUNK_TARGET_TOKENS,
+        "max_tokens": settings.KB_CHUNK_MAX_TOKENS,
+        "overlap_tokens": settings.KB_CHUNK_OVERLAP_TOKENS,
+    }
+
+
+def load_knowledge_base_chunks(knowledge_base_dir: str, chunker: str = "markdown", target_tokens: int = 450,
+                               max_tokens: int = 600, overlap_tokens: int = 50) -> List[Document]:
+    """
+    Read and chunk every Markdown file under the knowledge base directory.
+
+    "markdown" follows the heading hierarchy (see markdown_chunker.py);
+    "recursive" is the original fixed-size 1500/200 character splitter.
+    """
+    if chunker not in CHUNKERS:
+        raise ValueError(f"Unknown KB_CHUNKER '{chunker}', expected one of {CHUNKERS}")
+
+    paths = sorted(glob.glob(os.path.join(knowledge_base_dir, "**", "*.md"), recursive=True))
+    texts = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            texts.append(f.read())
+
+    if chunker == "markdown":
+        chunks = []
+        for path, text in zip(paths, texts):
+            chunks.extend(chunk_markdown(text, path, target_tokens=target_tokens,
+                                         max_tokens=max_tokens, overlap_tokens=overlap_tokens))
+    else:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        documents = [Document(page_content=text, metadata={"source": path}) for path, text in zip(paths, texts)]
+        chunks = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200).split_documents(documents)
+    logger.info(f"Split {len(paths)} knowledge base files into {len(chunks)} chunks ({chunker})")
+    return chunks
+
+
+def build_local_vectorstore(knowledge_base_dir: str, embeddings: Embeddings, **chunk_options: Any):
+    """
+    Index the Markdown knowledge base in memory.
+
+    Used with the fake embedder, whose vector space does not match an index
+    built offline with a real model.
+    """
+    from langchain_community.vectorstores import FAISS
+
+    return FAISS.from_documents(load_knowledge_base_chunks(knowledge_base_dir, **chunk_options), embeddings)
+
+
+def load_vectorstore(settings, embeddings: Embeddings):
+    """
+    Load the FAISS index for the configured embeddings, or None if it is missing.
+
+    Paths are relative to the project root, like the rest of the backend.
+    """
+    if settings.EMBEDDING_PROVIDER == "fake":
+        # An offline-built index lives in the real model's vector space; index locally instead
+        vectorstore = build_local_vectorstore(f"backend/{settings.KNOWLEDGE_BASE_PATH}", embeddings,
+                                              **chunking_options(settings))
+        return quantize_index(vectorstore, settings.VECTOR_INDEX_QUANTIZATION)
+
+    index_root = f"backend/{settings.VECTOR_STORE_PATH}"
+    version, index_dir = resolve_index_version(index_root)
+    if index_dir is None:
+        logger.error(f"FAISS vector store not found at: {settings.VECTOR_STORE_PATH}")
+        logger.error("Please run 'python backend/prepare_knowledge_base.py' first")
+        return None
+    logger.info(f"Loading FAISS vector store from: {settings.VECTOR_STORE_PATH} (version {version})")
+    vectorstore = load_faiss_index(index_dir, embeddings, settings)
+    logger.info(f"Vector store loaded successfully with {vectorstore.index.ntotal} documents")
+    return vectorstore
+
+
+def load_faiss_index(index_dir: str, embeddings: Embeddings, settings):
+    """Load one saved FAISS index directory, applying VECTOR_INDEX_QUANTIZATION"""
+    from langchain_community.vectorstores import FAISS
+
+    vectorstore = FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+    return quantize_index(vectorstore, settings.VECTOR_INDEX_QUANTIZATION)
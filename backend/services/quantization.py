@@ -0,0 +1,86 @@
+"""
+AI Debate Partner - Quantization
+Sprint 4: int8 embedding inference and 8-bit scalar-quantized vector storage
+
+Two independent options for CPU-only nodes:
+
+- EMBEDDING_QUANTIZATION="dynamic-int8": the Linear layers of the
+  sentence-transformers model are replaced by dynamically quantized int8
+  versions (weights stored as int8, activations quantized per batch). No
+  calibration data or export step is needed, and the output stays in the
+  float32 model's vector space, so an index built with either can be queried
+  with the other.
+- VECTOR_INDEX_QUANTIZATION="sq8": the flat float32 FAISS index is replaced by
+  an IndexScalarQuantizer storing one byte per dimension (4x smaller).
+
+benchmarks/quantization.py reports latency, memory and retrieval agreement
+against the float32 baseline.
+"""
+
+import logging
+import warnings
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_QUANTIZATION_MODES = ("none", "dynamic-int8")
+INDEX_QUANTIZATION_MODES = ("none", "sq8")
+
+
+def quantize_model(model: Any) -> Any:
+    """Dynamically quantize the Linear layers of a torch model to int8, in place"""
+    import torch
+
+    with warnings.catch_warnings():
+        # torch.ao.quantization is deprecated in favour of torchao, which we do not depend on
+        warnings.simplefilter("ignore")
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def quantize_embeddings(embeddings: Any, mode: str) -> Any:
+    """Apply EMBEDDING_QUANTIZATION to a HuggingFaceEmbeddings instance"""
+    if mode not in EMBEDDING_QUANTIZATION_MODES:
+        raise ValueError(f"Unknown EMBEDDING_QUANTIZATION '{mode}', expected one of {EMBEDDING_QUANTIZATION_MODES}")
+    if mode == "none":
+        return embeddings
+
+    client = getattr(embeddings, "_client", None)
+    if client is None:
+        logger.warning(f"{type(embeddings).__name__} has no local model to quantize; using it unchanged")
+        return embeddings
+    quantize_model(client)
+    logger.info("Embedding model quantized to dynamic int8")
+    return embeddings
+
+
+def quantize_index(vectorstore: Any, mode: str) -> Any:
+    """
+    Apply VECTOR_INDEX_QUANTIZATION to a LangChain FAISS store, in place.
+
+    Only flat indexes are converted; an index that is already quantized (e.g.
+    loaded from a build made with VECTOR_INDEX_QUANTIZATION=sq8) is left alone.
+    """
+    if mode not in INDEX_QUANTIZATION_MODES:
+        raise ValueError(f"Unknown VECTOR_INDEX_QUANTIZATION '{mode}', expected one of {INDEX_QUANTIZATION_MODES}")
+    if mode == "none":
+        return vectorstore
+
+    import faiss
+
+    index = vectorstore.index
+    if not isinstance(index, faiss.IndexFlat):
+        return vectorstore
+    vectors = index.reconstruct_n(0, index.ntotal)
+    quantized = faiss.IndexScalarQuantizer(index.d, faiss.ScalarQuantizer.QT_8bit, index.metric_type)
+    quantized.train(vectors)
+    quantized.add(vectors)
+    vectorstore.index = quantized
+    logger.info(f"Vector index scalar-quantized to 8 bits ({index.ntotal} vectors, {index.d} dims)")
+    return vectorstore
+
+
+def index_size_bytes(index: Any) -> int:
+    """Serialized size of a FAISS index, a close proxy for its resident memory"""
+    import faiss
+
+    return int(faiss.serialize_index(index).size)
@@ -0,0 +1,67 @@
+"""
+AI Debate Partner - Request Trace Capture
+Sprint 4: Record live API traffic for replay by the benchmark suite
+
+When REQUEST_TRACE_FILE is set, every /api/ request is appended to a JSONL
+trace with its offset from server start, method, path, query string and JSON
+body. benchmarks/load_test.py replays these traces against a stubbed pipeline.
+Debate bodies contain user arguments, so only enable this where that is fine.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTraceMiddleware:
+    """Pure ASGI middleware; requests are passed through untouched"""
+
+    def __init__(self, app, trace_file: str, path_prefix: str = "/api/"):
+        self.app = app
+        self.trace_file = trace_file
+        self.path_prefix = path_prefix
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(trace_file) or ".", exist_ok=True)
+        logger.info(f"Recording request trace to: {trace_file}")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        offset = time.time() - self.started_at
+        body_chunks = []
+
+        async def recording_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                body_chunks.append(message.get("body", b""))
+            return message
+
+        try:
+            await self.app(scope, recording_receive, send)
+        finally:
+            self._record(scope, offset, b"".join(body_chunks))
+
+    def _record(self, scope, offset: float, body: bytes):
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            payload = None
+        entry = {
+            "offset": round(offset, 4),
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "json": payload
+        }
+        try:
+            with self._lock, open(self.trace_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            logger.error(f"Failed to record request trace: {str(e)}")
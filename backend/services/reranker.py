@@ -0,0 +1,89 @@
+"""
+AI Debate Partner - Cross-Encoder Re-ranking
+Sprint 4: Optional second-stage ranking of retrieved chunks
+
+FAISS returns candidates ordered by bi-encoder cosine similarity. A small
+cross-encoder reads the query and each candidate together and scores them far
+more precisely, at a higher cost per pair. Scoring runs in CPU batches on a
+small scoring pool, and the request waits for it at most the per-request time
+budget. If the budget runs out (even in the middle of a slow batch) the original
+vector order is returned at once and the abandoned scoring stops after its
+current batch, so re-ranking can only ever cost a bounded amount of latency.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """Re-scores (query, chunk) pairs with a sentence-transformers CrossEncoder"""
+
+    def __init__(self, model_name: str, batch_size: int = 8, time_budget_ms: int = 150, model: Any = None,
+                 max_workers: int = 4):
+        if model is None:
+            # Imported lazily so the API runs without re-ranking installed/enabled
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(model_name, device="cpu")
+        self.model = model
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.time_budget = time_budget_ms / 1000.0
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="rerank")
+
+    def _score(self, query: str, docs: List[Any], cancelled: threading.Event) -> List[float]:
+        scores: List[float] = []
+        for i in range(0, len(docs), self.batch_size):
+            if cancelled.is_set():
+                break  # The request already fell back to vector order
+            batch = docs[i:i + self.batch_size]
+            batch_scores = self.model.predict(
+                [(query, doc.page_content) for doc in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False
+            )
+            scores.extend(float(s) for s in batch_scores)
+        return scores
+
+    def rerank(self, query: str, docs: List[Any], top_k: int) -> Tuple[List[Any], Dict[str, Any]]:
+        """
+        Return the top_k documents by cross-encoder score.
+
+        Falls back to the incoming (vector) order when the time budget runs out
+        before every candidate has been scored or when the model errors.
+        """
+        info: Dict[str, Any] = {"applied": False, "timed_out": False, "candidates": len(docs)}
+        if len(docs) <= 1:
+            return docs[:top_k], info
+
+        cancelled = threading.Event()
+        future = self._pool.submit(self._score, query, docs, cancelled)
+        try:
+            scores = future.result(timeout=self.time_budget)
+        except FutureTimeoutError:
+            cancelled.set()
+            info["timed_out"] = True
+            logger.warning(f"Re-ranking exceeded {self.time_budget * 1000:.0f}ms budget "
+                           f"for {len(docs)} candidates, keeping vector order")
+            return docs[:top_k], info
+        except Exception as e:
+            logger.error(f"Cross-encoder re-ranking failed, keeping vector order: {str(e)}")
+            info["error"] = str(e)
+            return docs[:top_k], info
+
+        order = sorted(range(len(docs)), key=lambda idx: scores[idx], reverse=True)
+        info["applied"] = True
+        return [docs[idx] for idx in order[:top_k]], info
+
+
+def load_reranker(model_name: str, batch_size: int, time_budget_ms: int) -> Optional[CrossEncoderReranker]:
+    """Load the re-ranker, or return None (vector order only) if it is unavailable"""
+    try:
+        logger.info(f"Loading cross-encoder re-ranker: {model_name}")
+        return CrossEncoderReranker(model_name, batch_size=batch_size, time_budget_ms=time_budget_ms)
+    except Exception as e:
+        logger.warning(f"Re-ranker unavailable, using vector order only: {str(e)}")
+        return None
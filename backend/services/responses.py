@@ -0,0 +1,160 @@
+"""
+AI Debate Partner - Response Encoding
+Sprint 4: Faster JSON serialization and negotiated compression
+
+FastJSONResponse renders with orjson when it is installed (several times faster
+than the standard library for the nested dicts the API returns) and falls back
+to json otherwise; it is the app's default response class.
+
+CompressionMiddleware compresses response bodies of at least `minimum_size`
+bytes with brotli or gzip, whichever the client prefers in Accept-Encoding and
+the server supports (brotli needs the optional `brotli` package). Small
+payloads such as lean debate turns are sent as-is: compressing them costs more
+time than the bytes it saves. Streaming responses are passed through untouched
+so they keep flushing incrementally.
+"""
+
+import gzip
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional codec
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/x-ndjson")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON, with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def select_fields(payload: Dict[str, Any], fields: Optional[str] = None,
+                  lean_drop: Tuple[str, ...] = (), verbose: bool = True) -> Dict[str, Any]:
+    """
+    Trim a response payload.
+
+    `fields` is a comma-separated allow-list ("response,confidence"); unknown
+    names are ignored. Without it, `verbose=False` drops the `lean_drop` keys.
+    """
+    if fields:
+        wanted = {name.strip() for name in fields.split(",") if name.strip()}
+        return {key: value for key, value in payload.items() if key in wanted}
+    if not verbose:
+        return {key: value for key, value in payload.items() if key not in lean_drop}
+    return payload
+
+
+def available_encodings() -> List[str]:
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """Best supported coding from an Accept-Encoding header, honouring q-values"""
+    preferences: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        preferences[name] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in supported:  # Server order breaks ties: brotli first
+        quality = preferences.get(encoding, preferences.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """ASGI middleware negotiating br/gzip for complete, compressible response bodies"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.supported = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.supported)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            compressible = (
+                not message.get("more_body", False)
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                and len(body) >= self.minimum_size
+            )
+            if compressible:
+                body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {"type": "http.response.body", "body": body, "more_body": False}
+            else:
+                # Streaming or small: send as produced, uncompressed
+                passthrough = True
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
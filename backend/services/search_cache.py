@@ -0,0 +1,226 @@
+"""
+AI Debate Partner - Knowledge Search Cache
+Sprint 4: Cached, paginated results for /api/knowledge/search
+
+A search embeds the query once and ranks up to `max_results` chunks. That
+ranked list is kept in a small LRU cache with a TTL, keyed by the normalized
+query, so the next page, a repeated query, or a search-as-you-type query that
+settles back on an earlier prefix costs a dictionary lookup instead of another
+embedding and FAISS scan. Pages are addressed by an opaque cursor holding the
+query key and offset; if the entry has been evicted the list is simply ranked
+again, which gives the same order for the same index.
+
+The cache is cleared whenever the index is swapped (see swap_vectorstore in
+main.py), so cached pages never mix two index versions. A search that was
+already running on the old index when the cache was cleared returns its
+results but does not cache them.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Stop words are not highlighted; they match nearly every snippet
+HIGHLIGHT_STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "to", "was", "what", "when", "which", "who", "why", "with"
+}
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as the cache key"""
+    return " ".join(query.lower().split())
+
+
+def query_key(query: str) -> str:
+    return hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(key: str, offset: int) -> str:
+    payload = json.dumps({"k": key, "o": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """(query key, offset) from a cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key, offset = str(payload["k"]), int(payload["o"])
+    except Exception:
+        raise ValueError("invalid cursor")
+    if offset < 0:
+        raise ValueError("invalid cursor")
+    return key, offset
+
+
+def highlight_terms(query: str) -> List[str]:
+    return sorted({
+        word for word in WORD_PATTERN.findall(query.lower())
+        if word not in HIGHLIGHT_STOP_WORDS and len(word) > 1
+    }, key=len, reverse=True)
+
+
+def make_snippet(text: str, query: str, width: int = 240) -> Dict[str, Any]:
+    """
+    A window of about `width` characters around the densest cluster of query
+    terms, with [start, end) offsets of each match inside the snippet.
+
+    Terms match as word prefixes, so a partially typed "categ" highlights
+    "categorical".
+    """
+    terms = highlight_terms(query)
+    matches: List[Tuple[int, int]] = []
+    if terms:
+        pattern = re.compile(r"\b(?:" + "|".join(re.escape(t) for t in terms) + r")\w*", re.IGNORECASE)
+        matches = [m.span() for m in pattern.finditer(text)]
+
+    if len(text) <= width:
+        start, end = 0, len(text)
+    else:
+        start = 0
+        if matches:
+            # Window start that covers the most matches
+            best_count = -1
+            for anchor, _ in matches:
+                candidate = max(0, anchor - width // 4)
+                count = sum(1 for s, e in matches if s >= candidate and e <= candidate + width)
+                if count > best_count:
+                    best_count, start = count, candidate
+        end = min(len(text), start + width)
+        start = max(0, end - width)
+        # Snap to word boundaries
+        if start > 0:
+            space = text.find(" ", start)
+            start = space + 1 if 0 <= space < start + 20 else start
+        if end < len(text):
+            space = text.rfind(" ", start, end)
+            end = space if space > end - 20 else end
+
+    snippet = text[start:end]
+    highlights = [[s - start, e - start] for s, e in matches if s >= start and e <= end]
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if end < len(text) else ""
+    if prefix:
+        highlights = [[s + len(prefix), e + len(prefix)] for s, e in highlights]
+    return {"snippet": f"{prefix}{snippet}{suffix}", "highlights": highlights}
+
+
+class SearchResultCache:
+    """
+    LRU + TTL cache of ranked (document, score) lists per normalized query.
+
+    `search(query, k)` is the underlying ranker; it is called at most once per
+    query key at a time, so concurrent identical requests share one search.
+    """
+
+    def __init__(self, search: Callable[[str, int], List[Tuple[Any, float]]], max_entries: int = 256,
+                 ttl_seconds: float = 300.0, max_results: int = 50):
+        self.search = search
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.max_results = max(1, max_results)
+        self._entries: "OrderedDict[str, Tuple[float, str, List[Tuple[Any, float]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._generation = 0  # Bumped by clear(); results ranked before then are not cached
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, key: str) -> Optional[List[Tuple[Any, float]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, _, results = entry
+            if self.ttl_seconds > 0 and time.time() - created > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return results
+
+    def _put(self, key: str, query: str, results: List[Tuple[Any, float]], generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return  # Ranked against an index that has since been swapped out
+            self._entries[key] = (time.time(), query, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def ranked(self, query: str) -> Tuple[List[Tuple[Any, float]], bool]:
+        """(ranked results, served from cache) for a query"""
+        key = query_key(query)
+        results = self._get(key)
+        if results is not None:
+            self.hits += 1
+            return results, True
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another request may have filled the entry while we waited
+            results = self._get(key)
+            if results is not None:
+                self.hits += 1
+                return results, True
+            self.misses += 1
+            generation = self._generation
+            results = list(self.search(normalize_query(query), self.max_results))
+            self._put(key, query, results, generation)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return results, False
+
+    def page(self, query: str, limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One page of results. Raises ValueError for a cursor that was issued for
+        a different query.
+        """
+        key = query_key(query)
+        offset = 0
+        if cursor:
+            cursor_key, offset = decode_cursor(cursor)
+            if cursor_key != key:
+                raise ValueError("cursor does not belong to this query")
+        results, cached = self.ranked(query)
+        items = results[offset:offset + limit]
+        next_offset = offset + len(items)
+        return {
+            "items": items,
+            "offset": offset,
+            "total_ranked": len(results),
+            "next_cursor": encode_cursor(key, next_offset) if next_offset < len(results) else None,
+            "cached": cached,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "max_results": self.max_results,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,208 @@
+"""
+AI Debate Partner - Voice Session Events
+Sprint 4: Push session status and expiry instead of REST polling
+
+Session lifecycle used to be discovered by polling /api/voice/session/{id},
+/api/voice/sessions and /health. Every one of those calls ran
+cleanup_expired_sessions(), which scanned the whole session dict.
+
+SessionExpiryScheduler keeps a heap of deadlines (expiry warnings and expiries).
+A background task sleeps until the next deadline, removes expired sessions and
+publishes events. Callers that still need an up-to-date store (the REST
+endpoints) call expire_due(), which pops only the heap entries that are due.
+
+SessionEventHub fans events out to WebSocket subscribers. Each event is
+encoded once, whatever the number of recipients. Every subscriber has a small
+bounded queue, so a slow client drops its oldest events and never holds up the
+others. Backend events (e.g. the RAG pipeline becoming ready) go to every
+subscriber; session events go to that session's subscribers only.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import Any, Callable, Dict, List, MutableMapping, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+BROADCAST = "*"
+FINAL_STATUSES = ("expired", "ended")
+
+
+class Subscriber:
+    """One client's bounded queue of (event, encoded event) pairs"""
+
+    def __init__(self, topic: str, max_queue: int = 32):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def offer(self, event: Dict[str, Any], payload: bytes):
+        if self.queue.full():
+            self.queue.get_nowait()  # Keep the newest status; drop the oldest
+            self.dropped += 1
+        self.queue.put_nowait((event, payload))
+
+    async def next(self) -> Tuple[Dict[str, Any], bytes]:
+        return await self.queue.get()
+
+
+class SessionEventHub:
+    """Topic-based fan-out of encoded events to subscribers"""
+
+    def __init__(self, encode: Callable[[Any], bytes], max_queue: int = 32):
+        self.encode = encode
+        self.max_queue = max_queue
+        self._topics: Dict[str, Set[Subscriber]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+
+    def subscribe(self, topic: str) -> Subscriber:
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(topic, self.max_queue)
+        self._topics.setdefault(topic, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self._topics.get(subscriber.topic)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._topics[subscriber.topic]
+
+    def subscriber_count(self, topic: Optional[str] = None) -> int:
+        if topic is not None:
+            return len(self._topics.get(topic, ()))
+        return sum(len(subscribers) for subscribers in self._topics.values())
+
+    def publish(self, topic: str, event: Dict[str, Any]):
+        """
+        Deliver to the topic's subscribers, or to everyone for BROADCAST.
+
+        Safe to call from other threads (e.g. the index reloader): delivery is
+        handed to the subscribers' event loop.
+        """
+        self.published += 1
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return  # Nobody has subscribed yet
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(topic, event)
+        else:
+            loop.call_soon_threadsafe(self._deliver, topic, event)
+
+    def _deliver(self, topic: str, event: Dict[str, Any]):
+        if topic == BROADCAST:
+            targets = [s for subscribers in self._topics.values() for s in subscribers]
+        else:
+            targets = list(self._topics.get(topic, ()))
+        if not targets:
+            return
+        payload = self.encode(event)
+        for subscriber in targets:
+            subscriber.offer(event, payload)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "topics": len(self._topics),
+            "subscribers": self.subscriber_count(),
+            "published": self.published
+        }
+
+
+class SessionExpiryScheduler:
+    """
+    Deadline heap over a session store of {"expires_at", "status", ...} dicts.
+
+    Expired sessions are removed from `sessions` and announced on the hub;
+    `on_expire(session_id, session)` runs for each, e.g. to clear debate memory.
+    """
+
+    def __init__(self, sessions: MutableMapping[str, Dict[str, Any]], hub: SessionEventHub,
+                 warning_seconds: float = 60.0, on_expire: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        self.sessions = sessions
+        self.hub = hub
+        self.warning_seconds = warning_seconds
+        self.on_expire = on_expire
+        self._heap: List[Tuple[float, str, str, float]] = []  # (when, kind, session_id, expires_at)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, session_id: str, expires_at: float):
+        """Track a new (or extended) session; superseded heap entries are skipped when popped"""
+        if self.warning_seconds > 0:
+            heapq.heappush(self._heap, (expires_at - self.warning_seconds, "warning", session_id, expires_at))
+        heapq.heappush(self._heap, (expires_at, "expired", session_id, expires_at))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def schedule_many(self, session_ids: List[str], expires_at: float):
+        """schedule() for a batch sharing one deadline; re-heapifies once when the batch outweighs the heap"""
+        entries = [(expires_at, "expired", session_id, expires_at) for session_id in session_ids]
+        if self.warning_seconds > 0:
+            entries += [(expires_at - self.warning_seconds, "warning", session_id, expires_at) for session_id in session_ids]
+        if len(entries) > len(self._heap):
+            self._heap.extend(entries)
+            heapq.heapify(self._heap)
+        else:
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+        if self._wakeup is not None and entries:
+            self._wakeup.set()
+
+    def expire_due(self, now: Optional[float] = None) -> List[str]:
+        """Handle every deadline up to `now`; returns the expired session ids"""
+        now = time.time() if now is None else now
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            _, kind, session_id, expires_at = heapq.heappop(self._heap)
+            session = self.sessions.get(session_id)
+            if session is None or session["expires_at"] != expires_at:
+                continue  # Ended early or rescheduled
+            if kind == "warning":
+                self.hub.publish(session_id, {
+                    "type": "expiry_warning",
+                    "session_id": session_id,
+                    "expires_at": expires_at,
+                    "seconds_left": max(0, int(expires_at - now))
+                })
+                continue
+            del self.sessions[session_id]
+            expired.append(session_id)
+            logger.info(f"Cleaned up expired session: {session_id}")
+            self.hub.publish(session_id, {"type": "status", "session_id": session_id, "status": "expired"})
+            if self.on_expire:
+                try:
+                    self.on_expire(session_id, session)
+                except Exception as e:
+                    logger.error(f"Expiry hook failed for session {session_id}: {str(e)}")
+        return expired
+
+    def next_deadline(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()  # Before expire_due, so a schedule() from here on is not missed
+            self.expire_due()
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
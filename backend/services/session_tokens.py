@@ -0,0 +1,77 @@
+"""
+AI Debate Partner - Batch LiveKit Token Minting
+Sprint 4: Room-join JWTs signed with a preloaded HMAC key, for bulk session provisioning
+
+livekit.api.AccessToken builds a Claims dataclass, converts it to a dict with
+dataclasses.asdict and camel-cases every key, then hands it to PyJWT, which
+re-parses the key and serializes the header for every token. That is fine for
+one session, but it dominates when a tournament provisions hundreds of sessions
+at once.
+
+TokenMinter produces the same HS256 tokens (same claims, verifiable with
+livekit.api.TokenVerifier) with the per-token work cut down to one JSON dump,
+one base64 encode and one HMAC:
+
+- the HMAC key schedule is computed once and copied per token
+- the JWT header segment is encoded once
+- mint_many() reads the clock once, so the whole batch shares nbf/exp
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HEADER_SEGMENT = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+
+
+def _b64(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+class TokenMinter:
+    """Mints LiveKit room-join tokens for one API key/secret pair"""
+
+    def __init__(self, api_key: str, api_secret: str):
+        if not api_key or not api_secret:
+            raise ValueError("api_key and api_secret must be set")
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self._mac = hmac.new(api_secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def matches(self, api_key: Optional[str], api_secret: Optional[str]) -> bool:
+        return api_key == self.api_key and api_secret == self.api_secret
+
+    def _sign(self, claims: dict) -> str:
+        signing_input = HEADER_SEGMENT + b"." + _b64(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return (signing_input + b"." + _b64(mac.digest())).decode("ascii")
+
+    def mint(self, room_name: str, identity: str, name: Optional[str], ttl_seconds: int,
+             now: Optional[int] = None) -> str:
+        """One token granting room join, publish, subscribe and data for `room_name`"""
+        if not identity or not room_name:
+            raise ValueError("identity and room must be set when joining a room")
+        now = int(time.time()) if now is None else now
+        claims = {
+            "name": name or identity,
+            "video": {"roomJoin": True, "room": room_name, "canPublish": True,
+                      "canSubscribe": True, "canPublishData": True},
+            "sub": identity,
+            "iss": self.api_key,
+            "nbf": now,
+            "exp": now + ttl_seconds
+        }
+        return self._sign(claims)
+
+    def mint_many(self, participants: Iterable[Tuple[str, str, Optional[str]]], ttl_seconds: int,
+                  now: Optional[int] = None) -> List[str]:
+        """Tokens for (room_name, identity, name) triples, all valid from the same instant"""
+        now = int(time.time()) if now is None else now
+        return [self.mint(room_name, identity, name, ttl_seconds, now) for room_name, identity, name in participants]
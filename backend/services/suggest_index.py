@@ -0,0 +1,198 @@
+"""
+AI Debate Partner - Concept Autocomplete
+Sprint 4: Prefix suggestions for philosophers and concepts in the knowledge base
+
+prepare_knowledge_base.py collects the concept names the knowledge base itself
+marks up - frontmatter tags, section headings and **bold** terms - and saves
+them with their frequency next to faiss_index. The server keeps them in sorted
+arrays and answers a prefix with two binary searches, so search-as-you-type
+never calls the embedding model or FAISS.
+
+Every word start of a term is indexed, so "imper" completes "Categorical
+Imperative" as well as "Imperfect Procedural Justice". Completions are ranked
+by how often the term is mentioned across the knowledge base.
+
+The files share a template, so not every bold span or heading is a concept:
+bold labels ("Objection:" anywhere, or "Core Claim" repeated within a file)
+and headings that recur across files ("Core Definition and Overview") are
+left out.
+"""
+
+import heapq
+import json
+import logging
+import os
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .markdown_chunker import HEADING_PATTERN, clean_heading, parse_frontmatter
+
+logger = logging.getLogger(__name__)
+
+BOLD_PATTERN = re.compile(r"\*\*([^*\n]+?)\*\*")
+PARENTHETICAL_PATTERN = re.compile(r"\s*\([^)]*\)")
+WORD_START_PATTERN = re.compile(r"\b\w")
+
+MAX_TERM_WORDS = 5  # Longer bold spans are emphasised phrases, not names
+MAX_BOLD_REPEATS = 2  # A bold span repeated more often within one file is a template label
+SUGGEST_INDEX_VERSION = 1
+SUGGEST_INDEX_FILE = "suggest_index.json"  # Saved inside each faiss_index version directory
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+def clean_term(term: str) -> str:
+    """Display form: no emphasis, dates in parentheses or trailing punctuation"""
+    term = PARENTHETICAL_PATTERN.sub("", clean_heading(term))
+    term = re.sub(r"^\d+(\.\d+)*\.?\s+", "", term)  # Numbered headings, "1. Utilitarianism"
+    term = re.sub(r"^the\s+", "", term, flags=re.IGNORECASE)
+    return term.strip(" \t:;,.-–—")
+
+
+def _candidate_terms(text: str) -> Tuple[List[Tuple[str, str]], set]:
+    """(term, kind) candidates from one file, and the bold spans used as labels in it"""
+    frontmatter, body = parse_frontmatter(text)
+    candidates: List[Tuple[str, str]] = []
+    tags = frontmatter.get("tags")
+    if isinstance(tags, list):
+        candidates.extend((str(tag), "tag") for tag in tags)
+    if frontmatter.get("title"):
+        candidates.append((frontmatter["title"], "topic"))
+
+    for line in body.splitlines():
+        match = HEADING_PATTERN.match(line)
+        if match and len(match.group(1)) > 1:
+            candidates.append((match.group(2), "heading"))
+
+    bold_counts: Dict[str, int] = defaultdict(int)
+    labels = set()
+    for match in BOLD_PATTERN.finditer(body):
+        raw = match.group(1).strip()
+        term = clean_term(raw)
+        if raw.endswith(":"):
+            labels.add(normalize_term(term))  # "**Objection:**" style label
+            continue
+        bold_counts[normalize_term(term)] += 1
+        candidates.append((term, "bold"))
+    labels.update(key for key, count in bold_counts.items() if count > MAX_BOLD_REPEATS)
+    return candidates, labels
+
+
+def extract_terms(documents: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    Concept terms from {source name: Markdown text}, with mention counts.
+
+    Each term is {"term", "kinds", "sources", "count"}; `count` is the number
+    of case-insensitive whole-word mentions across all documents.
+    """
+    terms: Dict[str, Dict[str, Any]] = {}
+    heading_files: Dict[str, set] = defaultdict(set)
+    labels = set()
+
+    for source, text in documents.items():
+        candidates, file_labels = _candidate_terms(text)
+        labels.update(file_labels)
+        for raw, kind in candidates:
+            term = clean_term(raw) if kind != "tag" else raw.strip()
+            key = normalize_term(term)
+            if not key or len(key) < 2 or len(key.split()) > MAX_TERM_WORDS:
+                continue
+            if kind == "heading":
+                heading_files[key].add(source)
+            entry = terms.setdefault(key, {"term": term, "kinds": set(), "sources": set()})
+            entry["kinds"].add(kind)
+            entry["sources"].add(source)
+            # Prefer a capitalised display form ("Free will" over "free will")
+            if term[:1].isupper() and not entry["term"][:1].isupper():
+                entry["term"] = term
+
+    corpus = "\n".join(parse_frontmatter(text)[1].lower() for text in documents.values())
+    results = []
+    for key, entry in terms.items():
+        if key in labels and "tag" not in entry["kinds"]:
+            continue
+        if len(heading_files.get(key, ())) > 1 and entry["kinds"] == {"heading"}:
+            continue  # Template heading shared by several files
+        mentions = len(re.findall(r"(?<!\w)" + re.escape(key) + r"(?!\w)", corpus))
+        results.append({
+            "term": entry["term"],
+            "kinds": sorted(entry["kinds"]),
+            "sources": sorted(entry["sources"]),
+            "count": max(1, mentions)
+        })
+    results.sort(key=lambda t: (-t["count"], t["term"].lower()))
+    return results
+
+
+def build_suggest_index(knowledge_base_dir: str) -> List[Dict[str, Any]]:
+    """Extract concept terms from every Markdown file in the knowledge base directory"""
+    documents = {}
+    for name in sorted(os.listdir(knowledge_base_dir)):
+        if name.endswith(".md"):
+            with open(os.path.join(knowledge_base_dir, name), "r", encoding="utf-8") as f:
+                documents[name] = f.read()
+    return extract_terms(documents)
+
+
+def save_suggest_index(path: str, terms: List[Dict[str, Any]]):
+    """Write the term list atomically, so a running server never reads half a file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": SUGGEST_INDEX_VERSION, "terms": terms}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+class SuggestIndex:
+    """
+    Sorted-array prefix index.
+
+    `keys` holds one lowercase entry per word start of each term, sorted; a
+    prefix maps to the contiguous range [bisect_left(prefix), bisect_left(
+    prefix + U+FFFF)), from which the most frequent distinct terms are taken.
+    """
+
+    def __init__(self, terms: List[Dict[str, Any]]):
+        self.terms = terms
+        entries = []
+        for term_id, term in enumerate(terms):
+            key = normalize_term(term["term"])
+            for match in WORD_START_PATTERN.finditer(key):
+                entries.append((key[match.start():], term_id))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.term_ids = [term_id for _, term_id in entries]
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SuggestIndex"]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        if data.get("version") != SUGGEST_INDEX_VERSION:
+            logger.warning(f"Ignoring suggest index {path} with unsupported version {data.get('version')}")
+            return None
+        return cls(data["terms"])
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        prefix = normalize_term(prefix)
+        if not prefix:
+            return []
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\uffff", lo)
+        term_ids = set(self.term_ids[lo:hi])
+        if len(term_ids) > limit:
+            term_ids = heapq.nsmallest(limit, term_ids, key=lambda i: (-self.terms[i]["count"], i))
+        else:
+            term_ids = sorted(term_ids, key=lambda i: (-self.terms[i]["count"], i))
+        return [self.terms[i] for i in term_ids]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"terms": len(self.terms), "keys": len(self.keys)}
@@ -0,0 +1,193 @@
+"""
+AI Debate Partner - Agent Worker Load
+Sprint 4: Load reporting and job admission for the LiveKit agent worker
+
+Each voice job runs VAD, STT/TTS streaming and RAG calls, and the worker used to
+accept every job LiveKit dispatched to it. Once the host is saturated every
+session on it stutters. WorkerLoadMonitor gives the worker a load figure in
+[0, 1] for LiveKit's load_fnc, taken as the highest of
+
+- active jobs / max jobs per worker
+- CPU utilisation of the host
+- event-loop lag / the lag that is considered fully loaded
+
+LiveKit stops dispatching to a worker whose load is above its load threshold,
+and admit() lets the worker's request_fnc reject a job outright when it is
+at its job limit, overloaded or draining, so the job goes to another worker.
+A job counts against the limit from the moment it is admitted: it holds a
+pending slot until LiveKit has launched it (release_pending()).
+
+When prometheus_client is installed the figures are also exported as gauges on
+the worker's /metrics endpoint.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil ships with livekit-agents
+    psutil = None
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+_gauges: Dict[str, Any] = {}
+
+
+def _gauge(name: str, description: str):
+    if prometheus_client is None:
+        return None
+    if name not in _gauges:
+        try:
+            _gauges[name] = prometheus_client.Gauge(name, description)
+        except ValueError:
+            # Registered by this module imported under its other name (services.* vs backend.services.*)
+            logger.debug(f"Gauge {name} is already registered; not exporting it twice")
+            _gauges[name] = None
+    return _gauges[name]
+
+
+def host_cpu_percent() -> float:
+    """CPU utilisation since the previous call (psutil), or the 1-minute load average per core"""
+    if psutil is not None:
+        return psutil.cpu_percent(interval=None)
+    try:
+        return min(100.0, os.getloadavg()[0] / (os.cpu_count() or 1) * 100.0)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+class LoopLagMonitor:
+    """Measures how late an event loop wakes up from a fixed sleep"""
+
+    def __init__(self, interval: float = 0.25, window: int = 40):
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start sampling on the running loop; a no-op when already started"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def lag_ms(self) -> float:
+        """Worst wake-up delay in the recent window"""
+        return max(self.samples) * 1000 if self.samples else 0.0
+
+
+class WorkerLoadMonitor:
+    """Load figure and admission decisions for one agent worker"""
+
+    def __init__(self, max_jobs: int, lag_limit_ms: float = 200.0, load_threshold: float = 0.8,
+                 cpu_sampler: Callable[[], float] = host_cpu_percent, lag_monitor: Optional[LoopLagMonitor] = None):
+        self.max_jobs = max(1, max_jobs)
+        self.lag_limit_ms = lag_limit_ms
+        self.load_threshold = load_threshold
+        self.cpu_sampler = cpu_sampler
+        self.lag_monitor = lag_monitor or LoopLagMonitor()
+        self.active_jobs = 0
+        self.pending_jobs = 0  # Admitted but not launched yet, so not in the worker's active jobs
+        self._lock = threading.Lock()  # LiveKit calls update() from an executor thread
+        self.cpu_percent = 0.0
+        self.load = 0.0
+        self.pressure = 0.0  # CPU and loop-lag part of the load, from the last update
+        self.accepted = 0
+        self.rejected = 0
+        self.last_rejection: Optional[str] = None
+        self.updated_at: Optional[float] = None
+
+        self._load_gauge = _gauge("debate_agent_worker_load", "Agent worker load (0-1) reported to LiveKit")
+        self._jobs_gauge = _gauge("debate_agent_active_jobs", "Voice jobs running on this worker")
+        self._cpu_gauge = _gauge("debate_agent_cpu_percent", "Host CPU utilisation seen by the worker")
+        self._lag_gauge = _gauge("debate_agent_loop_lag_ms", "Worst recent event-loop lag of the worker")
+        self._rejected_gauge = _gauge("debate_agent_rejected_jobs", "Jobs rejected by admission control")
+
+    def update(self, active_jobs: int) -> float:
+        """Recompute the load from the running and pending job counts, CPU and loop lag"""
+        with self._lock:
+            self.active_jobs = active_jobs
+            jobs = active_jobs + self.pending_jobs
+        self.cpu_percent = self.cpu_sampler()
+        lag_ms = self.lag_monitor.lag_ms()
+        self.pressure = max(self.cpu_percent / 100.0, lag_ms / self.lag_limit_ms if self.lag_limit_ms > 0 else 0.0)
+        self.load = min(1.0, max(jobs / self.max_jobs, self.pressure))
+        self.updated_at = time.time()
+        if self._load_gauge is not None:
+            self._load_gauge.set(self.load)
+            self._jobs_gauge.set(active_jobs)
+            self._cpu_gauge.set(self.cpu_percent)
+            self._lag_gauge.set(lag_ms)
+        return self.load
+
+    def admit(self, active_jobs: int, draining: bool = False) -> Tuple[bool, Optional[str]]:
+        """
+        Whether to accept one more job, with the reason when not.
+
+        `active_jobs` is the number of running jobs; admitted jobs that have not
+        launched yet count too. An admitted job holds a pending slot until
+        release_pending(). Uses the CPU and lag pressure from the last update()
+        (LiveKit's periodic load check), so a burst of requests does not
+        resample the CPU.
+        """
+        with self._lock:
+            jobs = active_jobs + self.pending_jobs
+            reason = None
+            if draining:
+                reason = "worker is draining"
+            elif jobs >= self.max_jobs:
+                reason = f"at job limit ({jobs}/{self.max_jobs})"
+            elif self.pressure >= self.load_threshold:
+                reason = f"load {self.pressure:.2f} above threshold {self.load_threshold:.2f}"
+            if reason is None:
+                self.pending_jobs += 1
+
+        if reason is None:
+            self.accepted += 1
+            return True, None
+        self.rejected += 1
+        self.last_rejection = reason
+        if self._rejected_gauge is not None:
+            self._rejected_gauge.set(self.rejected)
+        return False, reason
+
+    def release_pending(self):
+        """An admitted job has launched (and shows up in the active jobs) or failed to"""
+        with self._lock:
+            self.pending_jobs = max(0, self.pending_jobs - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "load": round(self.load, 3),
+            "active_jobs": self.active_jobs,
+            "pending_jobs": self.pending_jobs,
+            "max_jobs": self.max_jobs,
+            "cpu_percent": round(self.cpu_percent, 1),
+            "loop_lag_ms": round(self.lag_monitor.lag_ms(), 1),
+            "load_threshold": self.load_threshold,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "last_rejection": self.last_rejection,
+            "updated_at": self.updated_at
+        }
@@ -0,0 +1,76 @@
+"""
+AI Debate Partner - Adaptive Retrieval Tests
+Sprint 4: Score thresholds, vectorized MMR and token budgets
+"""
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from unittest.mock import MagicMock, patch
+
+import backend.main as app_main
+from backend.services.adaptive_retrieval import fetch_candidates, select, supports_vectors
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+class TestSelect:
+    """Test suite for threshold, MMR and budget selection"""
+
+    def test_narrow_query_gets_fewer_chunks(self):
+        query = unit(1, 0, 0)
+        narrow = np.stack([unit(1, 0.05, 0), unit(0.3, 1, 0), unit(0.2, 0, 1), unit(0.1, 1, 1)])
+        broad = np.stack([unit(1, 0.2, 0), unit(1, 0, 0.25), unit(1, 0.3, 0.3), unit(0.1, 1, 1)])
+        options = dict(max_k=4, min_score=0.2, relative_score=0.8, lambda_mult=0.7)
+        assert select(query, narrow, [100] * 4, **options).indices == [0]
+        wide = select(query, broad, [100] * 4, **options)
+        assert sorted(wide.indices) == [0, 1, 2] and wide.eligible == 3
+
+    def test_min_k_keeps_best_below_threshold(self):
+        selection = select(unit(1, 0), np.stack([unit(0, 1), unit(0.1, 1)]), [50, 50], max_k=3, min_score=0.5)
+        assert selection.indices == [1] and selection.scores[0] < 0.5
+
+    def test_mmr_prefers_diverse_chunk(self):
+        query = unit(1, 1, 0)
+        candidates = np.stack([unit(1, 0.9, 0), unit(1, 0.85, 0), unit(0.8, 1, 0.3)])
+        assert select(query, candidates, [10] * 3, max_k=2, lambda_mult=1.0).indices == [0, 1]
+        assert select(query, candidates, [10] * 3, max_k=2, lambda_mult=0.3).indices == [0, 2]
+
+    def test_token_budget(self):
+        query = unit(1, 0)
+        candidates = np.stack([unit(1, 0.1), unit(1, 0.2), unit(1, 0.3)])
+        selection = select(query, candidates, [600, 500, 300], max_k=3, lambda_mult=1.0, token_budget=1000)
+        assert selection.indices == [0, 2] and selection.tokens == 900
+        # The first pick is made even when it alone is over budget
+        assert select(query, candidates, [2000, 500, 300], max_k=3, lambda_mult=1.0, token_budget=100).indices == [0]
+
+class TestFaissCandidates:
+    """Test suite for reading candidate vectors back from FAISS"""
+
+    def test_fetch_candidates_with_vectors(self):
+        vectors = [[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]]
+        store = FAISS.from_embeddings(list(zip(["a", "b", "c"], vectors)), MagicMock())
+        docs, candidate_vectors = fetch_candidates(store, [1.0, 0.1], fetch_k=5)
+        assert [d.page_content for d in docs] == ["a", "c", "b"]
+        assert np.allclose(candidate_vectors, [vectors[0], vectors[2], vectors[1]])
+        assert supports_vectors(store) and not supports_vectors(object())
+
+class TestAdaptiveRetrieval:
+    """Test suite for RETRIEVAL_ADAPTIVE_ENABLED in the debate pipeline"""
+
+    def test_scores_in_retrieved_docs(self):
+        texts = ["Kant on duty", "Kant on the categorical imperative", "Mill on happiness"]
+        vectors = [[1.0, 0.1, 0.0], [1.0, 0.2, 0.0], [0.1, 1.0, 0.0]]
+        store = FAISS.from_embeddings(list(zip(texts, vectors)), MagicMock(),
+                                      metadatas=[{"source": f"backend/knowledge_base/{n}.md"} for n in "abc"])
+        with patch("backend.main.vectorstore", store), patch("backend.main.reranker", None), \
+             patch.object(app_main.settings, "RETRIEVAL_ADAPTIVE_ENABLED", True):
+            docs = app_main.retrieve_documents("Is duty rational?", {}, query_vector=[1.0, 0.15, 0.0])
+        assert len(docs) == 2  # Mill is below the relative threshold
+        _, doc_info = app_main.describe_documents(docs)
+        assert all(0.9 < info["score"] <= 1.0 for info in doc_info)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,98 @@
+"""
+AI Debate Partner - Answer Cache Tests
+Sprint 4: Unit tests for the precomputed first-turn answer cache
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock
+
+from backend.main import app
+from backend.services.answer_cache import AnswerCache, compute_kb_version, save_answer_cache
+
+client = TestClient(app)
+
+ENTRIES = [
+    {"topic": "free_will.md", "claim": "Free will is an illusion.", "response": "Cached rebuttal A", "sources": ["free_will.md"], "retrieved_docs": []},
+    {"topic": "justice.md", "claim": "Justice is equal shares.", "response": "Cached rebuttal B", "sources": ["justice.md"], "retrieved_docs": []},
+]
+VECTORS = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+
+class TestAnswerCache:
+    """Test suite for building, loading and querying the answer cache"""
+
+    def build(self, tmp_path, kb_version="v1", model="all-MiniLM-L6-v2"):
+        cache_dir = str(tmp_path / "answer_cache")
+        save_answer_cache(cache_dir, ENTRIES, VECTORS, kb_version, model)
+        return cache_dir
+
+    def test_lookup_hit_and_miss(self, tmp_path):
+        """Test that only queries above the similarity threshold are served"""
+        cache = AnswerCache.load(self.build(tmp_path), "v1", "all-MiniLM-L6-v2", min_similarity=0.9)
+
+        entry, score = cache.lookup([0.99, 0.05, 0.0])
+        assert entry["response"] == "Cached rebuttal A"
+        assert score > 0.9
+
+        entry, score = cache.lookup([0.6, 0.6, 0.5])
+        assert entry is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_stale_when_knowledge_base_changes(self, tmp_path):
+        """Test that a cache built from another knowledge base version is flagged stale"""
+        cache = AnswerCache.load(self.build(tmp_path, kb_version="old"), "new", "all-MiniLM-L6-v2")
+        assert cache.stale is True
+
+    def test_ignored_when_embedding_model_changes(self, tmp_path):
+        """Test that vectors from a different embedding model are never used"""
+        assert AnswerCache.load(self.build(tmp_path, model="other-model"), "v1", "all-MiniLM-L6-v2") is None
+
+    def test_missing_cache_directory(self, tmp_path):
+        assert AnswerCache.load(str(tmp_path / "missing"), "v1", "all-MiniLM-L6-v2") is None
+
+    def test_rebuild_replaces_existing_cache(self, tmp_path):
+        """Test that rebuilding overwrites the previous cache directory"""
+        cache_dir = self.build(tmp_path, kb_version="v1")
+        save_answer_cache(cache_dir, ENTRIES[:1], VECTORS[:1], "v2", "all-MiniLM-L6-v2")
+        cache = AnswerCache.load(cache_dir, "v2", "all-MiniLM-L6-v2")
+        assert len(cache.entries) == 1
+        assert cache.stale is False
+
+    def test_kb_version_tracks_content(self, tmp_path):
+        """Test that the knowledge base version changes with Markdown content"""
+        (tmp_path / "topic.md").write_text("# Topic\nOriginal")
+        before = compute_kb_version(str(tmp_path))
+        (tmp_path / "topic.md").write_text("# Topic\nEdited")
+        assert compute_kb_version(str(tmp_path)) != before
+
+class TestDebateEndpointAnswerCache:
+    """Test suite for serving opening arguments from the answer cache"""
+
+    def test_first_turn_served_from_cache(self, tmp_path):
+        """Test that a matching first turn skips retrieval and the LLM"""
+        cache_dir = str(tmp_path / "answer_cache")
+        save_answer_cache(cache_dir, ENTRIES, VECTORS, "v1", "all-MiniLM-L6-v2")
+        cache = AnswerCache.load(cache_dir, "v1", "all-MiniLM-L6-v2")
+
+        mock_embeddings = MagicMock()
+        mock_embeddings.embed_query.return_value = [1.0, 0.0, 0.0]
+        mock_chain = MagicMock()
+
+        with patch('backend.main.answer_cache', cache), \
+             patch('backend.main.embeddings', mock_embeddings), \
+             patch('backend.main.rag_chain', mock_chain), \
+             patch('backend.main.retrieve_documents') as mock_retrieve, \
+             patch('backend.main.log_performance_metrics'):
+            response = client.post("/api/debate/test", json={"content": "Free will is an illusion!"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["response"] == "Cached rebuttal A"
+        assert data["cached"] is True
+        assert data["sources"] == ["free_will.md"]
+        mock_retrieve.assert_not_called()
+        mock_chain.ainvoke.assert_not_called()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
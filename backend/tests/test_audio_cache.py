@@ -0,0 +1,96 @@
+"""
+AI Debate Partner - Phrase Audio Cache Tests
+Sprint 4: Synthesize-once playback of fixed agent phrases
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from backend.services.audio_cache import PhraseAudio, PhraseAudioCache, iter_frames, phrase_key
+
+VOICE = {"provider": "stub", "model": "tts-1", "voice": "alloy", "sample_rate": 24000, "num_channels": 1}
+
+class StubSynthesizer:
+    """Returns 100ms of silence per phrase and counts calls"""
+
+    def __init__(self, delay=0.0, sample_rate=24000):
+        self.delay = delay
+        self.sample_rate = sample_rate
+        self.calls = []
+
+    async def __call__(self, text):
+        self.calls.append(text)
+        await asyncio.sleep(self.delay)
+        return PhraseAudio(b"\x00\x01" * (self.sample_rate // 10), self.sample_rate, 1)
+
+def fetch(cache, text, synth):
+    return asyncio.run(cache.get_or_synthesize(text, synth))
+
+class TestPhraseAudioCache:
+    """Test suite for caching, invalidation and size limits"""
+
+    def test_synthesizes_once_and_persists(self, tmp_path):
+        synth = StubSynthesizer()
+        cache = PhraseAudioCache(str(tmp_path), VOICE)
+        first = fetch(cache, "Welcome to the AI Debate Arena!", synth)
+        second = fetch(cache, "Welcome  to the AI Debate Arena!", synth)  # Whitespace is normalized
+        assert synth.calls == ["Welcome to the AI Debate Arena!"]
+        assert second.pcm == first.pcm and second.duration_seconds == pytest.approx(0.1)
+
+        reopened = PhraseAudioCache(str(tmp_path), dict(VOICE))
+        fetch(reopened, "Welcome to the AI Debate Arena!", synth)
+        assert len(synth.calls) == 1
+        assert reopened.stats()["hits"] == 1 and reopened.stats()["phrases"] == 1
+
+    def test_voice_change_invalidates(self, tmp_path):
+        synth = StubSynthesizer()
+        fetch(PhraseAudioCache(str(tmp_path), VOICE), "Let me think about that for a moment...", synth)
+        other_voice = PhraseAudioCache(str(tmp_path), dict(VOICE, voice="nova"))
+        assert other_voice.stats()["phrases"] == 0
+        assert not [name for name in os.listdir(tmp_path) if name.endswith(".pcm")]
+        fetch(other_voice, "Let me think about that for a moment...", synth)
+        assert len(synth.calls) == 2
+
+    def test_size_limit_evicts_least_recently_used(self, tmp_path):
+        synth = StubSynthesizer()
+        cache = PhraseAudioCache(str(tmp_path), VOICE, max_bytes=10000)  # Room for two 4800-byte phrases
+        fetch(cache, "one", synth)
+        fetch(cache, "two", synth)
+        fetch(cache, "one", synth)  # "two" is now least recently used
+        fetch(cache, "three", synth)
+        assert cache.get("two") is None
+        assert cache.get("one") is not None and cache.get("three") is not None
+        assert cache.stats()["bytes"] <= 10000
+        assert not os.path.exists(os.path.join(tmp_path, f"{phrase_key('two', cache.fingerprint)}.pcm"))
+
+    def test_concurrent_misses_share_one_synthesis(self, tmp_path):
+        synth = StubSynthesizer(delay=0.05)
+        cache = PhraseAudioCache(str(tmp_path), VOICE)
+
+        async def run():
+            return await asyncio.gather(*[cache.get_or_synthesize("greeting", synth) for _ in range(5)])
+
+        results = asyncio.run(run())
+        assert len(synth.calls) == 1
+        assert all(result.pcm == results[0].pcm for result in results)
+
+    def test_warm_skips_failures(self, tmp_path):
+        async def flaky(text):
+            if text == "bad":
+                raise RuntimeError("TTS quota exceeded")
+            return PhraseAudio(b"\x00\x00" * 240, 24000, 1)
+
+        cache = PhraseAudioCache(str(tmp_path), VOICE)
+        assert asyncio.run(cache.warm(["good", "bad", "good"], flaky)) == 1
+        assert cache.get("good") is not None and cache.get("bad") is None
+
+    def test_iter_frames(self):
+        audio = PhraseAudio(b"\x00\x00" * 1000, 24000, 1)
+        frames = list(iter_frames(audio, frame_ms=20))
+        assert [samples for _, samples in frames] == [480, 480, 40]
+        assert b"".join(data for data, _ in frames) == audio.pcm
+
+if __name__ == "__main__":
+    pytest.main([__file__])
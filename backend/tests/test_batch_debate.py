@@ -0,0 +1,174 @@
+"""
+AI Debate Partner - Batch Debate Tests
+Sprint 4: Batched embedding and search, bounded LLM fan-out and NDJSON streaming
+"""
+
+import asyncio
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock, patch
+
+import backend.main as app_main
+from backend.main import app, describe_documents
+from backend.services.batch_debate import DebateBatchRunner, parse_batch_items, parse_jsonl
+from backend.services.providers import HashEmbeddings, build_local_vectorstore
+
+client = TestClient(app)
+
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "knowledge_base")
+
+@pytest.fixture(scope="module")
+def knowledge_store():
+    return build_local_vectorstore(KNOWLEDGE_BASE_DIR, HashEmbeddings(dim=64))
+
+class RecordingChain:
+    """Fake RAG chain that tracks how many calls are in flight"""
+
+    def __init__(self, delay=0.01, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def ainvoke(self, inputs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail_on and self.fail_on in inputs["question"]:
+                raise RuntimeError("model overloaded")
+            return f"Rebuttal to: {inputs['question']} ({len(inputs['docs'])} docs)"
+        finally:
+            self.in_flight -= 1
+
+def make_runner(store, chain, **kwargs):
+    embeddings = store.embedding_function
+    return DebateBatchRunner(embeddings, store, chain, describe=describe_documents, **kwargs)
+
+def collect(runner, items):
+    async def run():
+        return [result async for result in runner.run(items)]
+    return asyncio.run(run())
+
+class TestParsing:
+    """Test suite for batch input formats"""
+
+    def test_strings_and_objects(self):
+        items = parse_batch_items(["Free will is an illusion.", {"id": "x1", "content": "Lying is always wrong."}])
+        assert items == [
+            {"id": 0, "content": "Free will is an illusion."},
+            {"id": "x1", "content": "Lying is always wrong."}
+        ]
+
+    def test_jsonl(self):
+        items = parse_jsonl(['"Justice is equality."', "", '{"argument": "Minds are brains."}'])
+        assert [item["content"] for item in items] == ["Justice is equality.", "Minds are brains."]
+        with pytest.raises(ValueError):
+            parse_jsonl(["{not json"])
+        with pytest.raises(ValueError):
+            parse_batch_items([{"id": 1}])
+
+class TestBatchRunner:
+    """Test suite for the batch pipeline"""
+
+    def test_one_embedding_and_search_call(self, knowledge_store):
+        items = parse_batch_items([f"Argument {i} about free will and determinism" for i in range(12)])
+        runner = make_runner(knowledge_store, RecordingChain(), concurrency=4)
+        with patch.object(knowledge_store.embedding_function, "embed_documents",
+                          wraps=knowledge_store.embedding_function.embed_documents) as embed, \
+             patch.object(knowledge_store.index, "search", wraps=knowledge_store.index.search) as search:
+            results = collect(runner, items)
+
+        assert embed.call_count == 1
+        assert search.call_count == 1
+        assert sorted(r["index"] for r in results) == list(range(12))
+        assert all(r["response"].endswith("(3 docs)") for r in results)
+        assert all({"embed_ms", "search_ms", "queue_ms", "generation_ms", "total_ms"} <= set(r["timing"]) for r in results)
+        assert runner.summary["items"] == 12 and runner.summary["errors"] == 0
+
+    def test_concurrency_is_bounded(self, knowledge_store):
+        chain = RecordingChain(delay=0.02)
+        runner = make_runner(knowledge_store, chain, concurrency=3)
+        collect(runner, parse_batch_items([f"Claim {i}" for i in range(10)]))
+        assert chain.max_in_flight == 3
+
+    def test_failures_and_timeouts_are_per_item(self, knowledge_store):
+        runner = make_runner(knowledge_store, RecordingChain(fail_on="bad"), concurrency=2)
+        results = {r["id"]: r for r in collect(runner, parse_batch_items(["good one", {"id": "b", "content": "bad one"}]))}
+        assert results["b"]["error"] == "model overloaded"
+        assert results[0]["response"]
+        assert runner.summary["errors"] == 1
+
+        slow = make_runner(knowledge_store, RecordingChain(delay=1.0), concurrency=2, item_timeout=0.05)
+        assert "timed out" in collect(slow, parse_batch_items(["slow claim"]))[0]["error"]
+
+    def test_answer_cache_hits_skip_generation(self, knowledge_store):
+        cache = MagicMock()
+        cache.lookup.side_effect = lambda vector: ({"response": "Cached", "sources": ["free_will.md"]}, 0.97) \
+            if vector == knowledge_store.embedding_function.embed_query("canonical") else (None, 0.1)
+        chain = RecordingChain()
+        runner = make_runner(knowledge_store, chain, answer_cache=cache)
+        results = {r["id"]: r for r in collect(runner, parse_batch_items(["canonical", "novel"]))}
+        assert results[0]["cached"] and results[0]["response"] == "Cached"
+        assert not results[1]["cached"]
+        assert runner.summary["cached"] == 1
+
+    def test_honours_adaptive_retrieval(self, knowledge_store):
+        """Test that the batch picks the same chunks as the debate endpoint under RETRIEVAL_ADAPTIVE_ENABLED"""
+        chain = RecordingChain()
+        seen = {}
+        original = chain.ainvoke
+        async def capture(inputs):
+            seen[inputs["question"]] = inputs["docs"]
+            return await original(inputs)
+        chain.ainvoke = capture
+        question = "Is free will compatible with determinism?"
+
+        with patch("backend.main.rag_chain", chain), \
+             patch("backend.main.vectorstore", knowledge_store), \
+             patch("backend.main.embeddings", knowledge_store.embedding_function), \
+             patch("backend.main.reranker", None), \
+             patch.object(app_main.settings, "RETRIEVAL_ADAPTIVE_ENABLED", True), \
+             patch.object(app_main.settings, "RETRIEVAL_MAX_K", 2):
+            results = collect(app_main.create_batch_runner(use_answer_cache=False), parse_batch_items([question]))
+            expected = app_main.retrieve_documents(question, {})
+
+        assert "retrieval_ms" in results[0]["timing"]
+        docs = seen[question]
+        assert 1 <= len(docs) <= 2 and all("score" in doc.metadata for doc in docs)
+        assert [doc.page_content for doc in docs] == [doc.page_content for doc in expected]
+
+class TestBatchEndpoint:
+    """Test suite for POST /api/debate/batch"""
+
+    def test_streams_ndjson(self, knowledge_store):
+        with patch("backend.main.rag_chain", RecordingChain()), \
+             patch("backend.main.vectorstore", knowledge_store), \
+             patch("backend.main.embeddings", knowledge_store.embedding_function), \
+             patch("backend.main.answer_cache", None):
+            response = client.post("/api/debate/batch", json={"arguments": ["A", {"id": "b", "content": "B"}]})
+            ndjson = client.post(
+                "/api/debate/batch",
+                content='"Justice is equality."\n"Minds are brains."\n',
+                headers={"Content-Type": "application/x-ndjson"}
+            )
+
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert {line["id"] for line in lines[:-1]} == {0, "b"}
+        assert lines[-1]["summary"]["items"] == 2
+        assert len(ndjson.text.splitlines()) == 3
+
+    def test_rejects_bad_and_oversized_batches(self, knowledge_store):
+        with patch("backend.main.rag_chain", RecordingChain()):
+            assert client.post("/api/debate/batch", json={"arguments": "not a list"}).status_code == 400
+            with patch("backend.main.settings.BATCH_MAX_ITEMS", 2):
+                assert client.post("/api/debate/batch", json=["a", "b", "c"]).status_code == 413
+        with patch("backend.main.rag_chain", None):
+            assert client.post("/api/debate/batch", json=["a"]).status_code == 503
+
+if __name__ == "__main__":
+    pytest.main([__file__])
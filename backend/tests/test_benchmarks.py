@@ -0,0 +1,81 @@
+"""
+AI Debate Partner - Benchmark Suite Tests
+Sprint 4: Keep the offline load test runnable and its statistics correct
+"""
+
+import pytest
+
+from backend.benchmarks import load_test
+
+class TestBenchmarkStatistics:
+    """Test suite for percentile/summary/regression helpers"""
+
+    def test_percentile_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+        assert load_test.percentile(values, 50) == 50.0
+        assert load_test.percentile(values, 95) == 95.0
+        assert load_test.percentile(values, 99) == 99.0
+        assert load_test.percentile([], 99) == 0.0
+
+    def test_summarize(self):
+        summary = load_test.summarize([0.1, 0.2, 0.3, 0.4], errors=1, elapsed=2.0)
+        assert summary["requests"] == 4
+        assert summary["errors"] == 1
+        assert summary["rps"] == 2.0
+        assert summary["p50_ms"] == 200.0
+
+    def test_compare_to_baseline_flags_regressions(self):
+        baseline = {"overall": {"rps": 100.0}, "endpoints": {"POST /api/debate/test": {"p95_ms": 100.0}}}
+        report = {"overall": {"rps": 70.0}, "endpoints": {"POST /api/debate/test": {"p95_ms": 150.0}}}
+        problems = load_test.compare_to_baseline(report, baseline, max_regression=0.2)
+        assert len(problems) == 2
+
+    def test_compare_to_baseline_ignores_small_absolute_changes(self):
+        baseline = {"overall": {"rps": 100.0}, "endpoints": {"GET /api/voice/sessions": {"p95_ms": 1.0}}}
+        report = {"overall": {"rps": 100.0}, "endpoints": {"GET /api/voice/sessions": {"p95_ms": 3.0}}}
+        assert load_test.compare_to_baseline(report, baseline, max_regression=0.2) == []
+
+    def test_synthetic_trace_mix(self):
+        trace = load_test.synthetic_trace(50)
+        paths = {entry["path"] for entry in trace}
+        assert len(trace) == 50
+        assert "/api/debate/test" in paths
+        assert "/api/knowledge/search" in paths
+        assert "/api/voice/start-session" in paths
+
+# Globals that install_offline_pipeline() / initialize_rag() replace on the app module
+PIPELINE_GLOBALS = [
+    "vectorstore", "embeddings", "llm", "rag_chain", "reranker", "answer_cache", "index_reloader",
+    "suggest_index", "PERFORMANCE_LOG_FILE"
+]
+# Settings the benchmark reconfigures
+TOUCHED_SETTINGS = [
+    "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET", "MAX_CONCURRENT_SESSIONS", "LLM_PROVIDER",
+    "EMBEDDING_PROVIDER", "FAKE_LLM_TOKEN_DELAY_MS", "FAKE_LLM_RESPONSE_TOKENS",
+    "FAKE_LLM_FAILURE_RATE", "RERANK_ENABLED", "ANSWER_CACHE_ENABLED"
+]
+
+@pytest.fixture
+def offline_pipeline(monkeypatch):
+    """Restore the app's pipeline globals and settings after the benchmark has replaced them"""
+    for name in PIPELINE_GLOBALS:
+        monkeypatch.setattr(load_test.main, name, getattr(load_test.main, name))
+    settings = load_test.settings
+    for name in TOUCHED_SETTINGS:
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+    yield
+
+class TestOfflineLoadRun:
+    """Smoke test: a short run against the stubbed pipeline"""
+
+    def test_short_run_has_no_errors(self, offline_pipeline):
+        args = load_test.parse_args(["--requests", "30", "--concurrency", "4", "--token-latency-ms", "0"])
+        report = load_test.run_benchmark(args)
+
+        assert report["overall"]["requests"] > 0
+        assert report["overall"]["errors"] == 0
+        assert "POST /api/debate/test" in report["endpoints"]
+        assert report["event_loop_lag"]["samples"] >= 0
+
+if __name__ == "__main__":
+    pytest.main([__file__])
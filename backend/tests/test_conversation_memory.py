@@ -0,0 +1,104 @@
+"""
+AI Debate Partner - Conversation Memory Tests
+Sprint 4: Unit tests for bounded multi-turn debate history
+"""
+
+import pytest
+from unittest.mock import patch
+
+from backend.services.conversation_memory import ConversationMemory, estimate_tokens
+
+class TestConversationMemory:
+    """Test suite for the rolling window + summary history store"""
+
+    def test_new_conversation_has_empty_history(self):
+        """Test that an unknown key renders no history"""
+        memory = ConversationMemory()
+        assert memory.get_history("session:new") == ""
+        assert memory.turn_count("session:new") == 0
+
+    def test_recent_turns_kept_verbatim(self):
+        """Test that turns inside the window are rendered as-is"""
+        memory = ConversationMemory(max_turns=4)
+        memory.add_exchange("session:a", "Free will is an illusion.", "Compatibilists would disagree.")
+
+        history = memory.get_history("session:a")
+        assert "Free will is an illusion." in history
+        assert "Compatibilists would disagree." in history
+        assert "Summary of earlier exchanges" not in history
+
+    def test_older_turns_are_summarized(self):
+        """Test that turns leaving the window are folded into the summary"""
+        memory = ConversationMemory(max_turns=2)
+        memory.add_exchange("session:a", "First claim. With detail.", "First reply.")
+        memory.add_exchange("session:a", "Second claim.", "Second reply.")
+
+        history = memory.get_history("session:a")
+        assert "Summary of earlier exchanges" in history
+        assert "First claim." in history
+        assert "With detail." not in history
+        assert memory.turn_count("session:a") == 4
+
+    def test_history_size_stays_bounded(self):
+        """Test that a long debate never exceeds the history token budget"""
+        memory = ConversationMemory(max_turns=6, history_token_budget=300, summary_token_budget=100)
+        sizes = []
+        for i in range(200):
+            memory.add_exchange(
+                "session:long",
+                f"Argument number {i} about determinism and moral responsibility. " * 5,
+                f"Counter-argument number {i} drawing on Kant and Hume. " * 5
+            )
+            sizes.append(estimate_tokens(memory.get_history("session:long")))
+
+        # Headers add a few tokens on top of the content budget
+        assert max(sizes) <= 300 + 20
+        assert sizes[-1] <= max(sizes[:20]) + 20
+
+    def test_lru_eviction(self):
+        """Test that the least recently used conversation is evicted at capacity"""
+        memory = ConversationMemory(max_conversations=2)
+        memory.add_exchange("a", "claim", "reply")
+        memory.add_exchange("b", "claim", "reply")
+        memory.get_history("a")  # Touch "a" so "b" becomes least recently used
+        memory.add_exchange("c", "claim", "reply")
+
+        assert memory.get_history("a") != ""
+        assert memory.get_history("b") == ""
+        assert memory.get_history("c") != ""
+
+    def test_ttl_expiry(self):
+        """Test that idle conversations expire"""
+        memory = ConversationMemory(ttl_seconds=10)
+        with patch("backend.services.conversation_memory.time.time", return_value=1000.0):
+            memory.add_exchange("a", "claim", "reply")
+        with patch("backend.services.conversation_memory.time.time", return_value=1020.0):
+            assert memory.get_history("a") == ""
+            assert memory.stats()["conversations"] == 0
+
+    def test_clear(self):
+        """Test clearing a conversation"""
+        memory = ConversationMemory()
+        memory.add_exchange("a", "claim", "reply")
+        assert memory.clear("a") is True
+        assert memory.clear("a") is False
+        assert memory.get_history("a") == ""
+
+class TestDebateMessageMemoryKey:
+    """Test suite for conversation keys derived from debate requests"""
+
+    def test_session_id_takes_precedence(self):
+        from backend.main import DebateMessage
+        message = DebateMessage(content="x", user_id="alice", session_id="room-1")
+        assert message.memory_key() == "session:room-1"
+
+    def test_named_user_without_session(self):
+        from backend.main import DebateMessage
+        assert DebateMessage(content="x", user_id="alice").memory_key() == "user:alice"
+
+    def test_anonymous_default_user_has_no_memory(self):
+        from backend.main import DebateMessage
+        assert DebateMessage(content="x").memory_key() is None
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,140 @@
+"""
+AI Debate Partner - Agent Data Channel Protocol Tests
+Sprint 4: Binary caption framing, negotiation, ordering and paced deltas
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from backend.services.data_protocol import (
+    KIND_DELTA,
+    KIND_END,
+    KIND_START,
+    CaptionAssembler,
+    CaptionEncoder,
+    CaptionPeers,
+    CaptionRecord,
+    decode_frame,
+    encode_frame,
+    hello_message,
+    is_binary_frame,
+    legacy_text_message,
+    negotiate,
+    pace_words,
+    stream_caption,
+)
+
+def collect_stream(text, duration, flush_interval=0.02):
+    frames = []
+
+    async def send(frame):
+        frames.append(frame)
+
+    asyncio.run(stream_caption(text, send, CaptionEncoder(), duration, flush_interval=flush_interval))
+    return frames
+
+class TestFraming:
+    """Test suite for frame encoding and negotiation"""
+
+    def test_round_trip(self):
+        records = [CaptionRecord(KIND_START, 7, 1), CaptionRecord(KIND_DELTA, 7, 2, "Kant — über"),
+                   CaptionRecord(KIND_END, 7, 3, "Kant — über alles")]
+        frame = encode_frame(records)
+        assert is_binary_frame(frame) and not is_binary_frame(legacy_text_message("hi"))
+        assert decode_frame(frame) == records
+        assert len(encode_frame([CaptionRecord(KIND_DELTA, 1, 9, " word")])) == 2 + 9 + 5
+
+    def test_rejects_malformed_frames(self):
+        frame = encode_frame([CaptionRecord(KIND_DELTA, 1, 1, "hello")])
+        with pytest.raises(ValueError):
+            decode_frame(frame[:-2])
+        with pytest.raises(ValueError):
+            decode_frame(frame[:1] + b"\x09" + frame[2:])  # Unknown version
+
+    def test_negotiation(self):
+        assert negotiate(hello_message()) == 1
+        assert negotiate(json.dumps({"type": "hello", "protocol": "debate-dc", "versions": [7]}).encode()) is None
+        assert negotiate(legacy_text_message("Welcome")) is None
+        assert negotiate(b"\xdb\x01") is None
+
+class TestCaptions:
+    """Test suite for paced deltas and reassembly"""
+
+    def test_pace_words_spans_duration(self):
+        deltas = pace_words("Is justice merely convention", 2.0)
+        assert "".join(delta for _, delta in deltas) == "Is justice merely convention"
+        offsets = [offset for offset, _ in deltas]
+        assert offsets[0] == 0.0 and offsets == sorted(offsets) and offsets[-1] < 2.0
+
+    def test_stream_batches_and_reassembles(self):
+        text = "Consider what Hume says about causation and habit in the Enquiry"
+        frames = collect_stream(text, duration=0.1, flush_interval=0.05)
+        records = [record for frame in frames for record in decode_frame(frame)]
+        assert records[0].kind == KIND_START and records[-1].kind == KIND_END
+        assert [record.seq for record in records] == list(range(1, len(records) + 1))
+        deltas = [record for record in records if record.kind == KIND_DELTA]
+        assert len(deltas) < len(text.split())  # Words due together were merged
+        assert "".join(record.text for record in deltas) == text
+
+        assembler = CaptionAssembler()
+        for frame in frames:
+            assembler.apply(decode_frame(frame))
+        assert assembler.finished == [(1, text)]
+
+    def test_assembler_orders_and_closes_gaps(self):
+        assembler = CaptionAssembler()
+        start, d1, d2 = CaptionRecord(KIND_START, 1, 1), CaptionRecord(KIND_DELTA, 1, 2, "Free"), \
+            CaptionRecord(KIND_DELTA, 1, 3, " will")
+        assembler.apply([start, d2])
+        assert assembler.captions[1] == ""  # Held until seq 2 arrives
+        assembler.apply([d1, d1])
+        assert assembler.captions[1] == "Free will"
+
+        assembler.apply([CaptionRecord(KIND_END, 1, 6, "Free will is real")])  # 4 and 5 never arrive
+        assert assembler.finished == [(1, "Free will is real")] and assembler.last_seq == 6
+
+    def test_late_and_reconnecting_clients_stream_live(self):
+        """Test that a client whose hello comes after earlier captions gets its own numbering from 1"""
+        encoder = CaptionEncoder()
+        peers = CaptionPeers(encoder)
+        peers.accept("early")
+        earlier = encoder.next_utterance()
+        first = encode_frame([encoder.record(KIND_START, earlier), encoder.record(KIND_END, earlier, "Earlier reply")])
+        assert peers.frames(first, ["early"]) == [(first, ["early"])]
+
+        peers.accept("late")
+        utterance = encoder.next_utterance()
+        frame = encode_frame([encoder.record(KIND_START, utterance), encoder.record(KIND_DELTA, utterance, "Free will")])
+        sent = {tuple(group): payload for payload, group in peers.frames(frame, ["early", "late"])}
+        assert sent[("early",)] == frame
+
+        late = CaptionAssembler()  # Fresh assembler, never saw seqs 1-2
+        late.apply(decode_frame(sent[("late",)]))
+        assert late.captions == {utterance: "Free will"} and not late.pending
+
+        peers.accept("early")  # Reconnected with a fresh assembler
+        end = encode_frame([encoder.record(KIND_END, utterance, "Free will is real")])
+        for payload, group in peers.frames(end, ["early", "late"]):
+            assert [record.seq for record in decode_frame(payload)] == ([1] if group == ["early"] else [3])
+
+    def test_cancelled_stream_still_sends_full_text(self):
+        frames = []
+
+        async def send(frame):
+            frames.append(frame)
+
+        async def run():
+            task = asyncio.create_task(stream_caption("one two three four", send, CaptionEncoder(), 1.0))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        last = decode_frame(frames[-1])[-1]
+        assert last.kind == KIND_END and last.text == "one two three four"
+
+if __name__ == "__main__":
+    pytest.main([__file__])
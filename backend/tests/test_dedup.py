@@ -0,0 +1,103 @@
+"""
+AI Debate Partner - Near-Duplicate Chunk Tests
+Sprint 4: MinHash/LSH dedup at index build time and MMR retrieval
+"""
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from unittest.mock import MagicMock, patch
+
+import backend.main as app_main
+from backend.services.dedup import (dedup_documents, lsh_params, near_duplicate_pairs, select_representatives,
+                                    similar_vector_pairs)
+
+KANT = ("Immanuel Kant argued that moral duties are derived from reason alone. The categorical imperative "
+        "commands us to act only according to maxims we could will to become universal laws, and to treat "
+        "humanity never merely as a means but always as an end in itself. Good will is the only thing good "
+        "without qualification, and actions have moral worth only when done from duty.")
+MILL = ("John Stuart Mill defended utilitarianism: actions are right in proportion as they tend to promote "
+        "happiness and wrong as they tend to produce the reverse. He distinguished higher and lower pleasures "
+        "and argued that it is better to be a human being dissatisfied than a pig satisfied.")
+
+def doc(text, source, section=None):
+    metadata = {"source": f"backend/knowledge_base/{source}"}
+    if section:
+        metadata["heading_path"] = section
+    return Document(page_content=text, metadata=metadata)
+
+class TestNearDuplicates:
+    """Test suite for shingle MinHash/LSH detection"""
+
+    def test_finds_near_copy_only(self):
+        near_copy = KANT.replace("Good will is", "A good will is") + " Kant wrote the Groundwork in 1785."
+        pairs = near_duplicate_pairs([KANT, MILL, near_copy], threshold=0.7)
+        assert [(i, j) for i, j, _ in pairs] == [(0, 2)]
+        assert 0.7 <= pairs[0][2] < 1.0
+
+    def test_lsh_params_cover_permutations(self):
+        bands, rows = lsh_params(0.8, 128)
+        assert bands * rows == 128 and 1 - (1 - 0.8 ** rows) ** bands >= 0.99
+        assert lsh_params(0.9, 128)[1] >= rows  # Higher thresholds allow longer, more selective bands
+
+    def test_chains_do_not_collapse(self):
+        # 0 ~ 1 ~ 2 but 0 and 2 are not similar: only 1 goes
+        kept = select_representatives([30, 20, 10], [(0, 1, 0.9), (1, 2, 0.9)])
+        assert kept == {0: [(1, 0.9)]}
+
+    def test_embedding_pairs(self):
+        vectors = np.array([[1.0, 0.0], [0.99, 0.05], [0.0, 1.0]], dtype=np.float32)
+        pairs = similar_vector_pairs(vectors, threshold=0.95, block=2)
+        assert [(i, j) for i, j, _ in pairs] == [(0, 1)]
+
+class TestDedupDocuments:
+    """Test suite for the index build stage"""
+
+    def test_keeps_longest_and_reports(self):
+        docs = [
+            doc(KANT, "deontology.md", "Deontology > Key Historical Figures"),
+            doc(MILL, "utilitarianism.md"),
+            doc(KANT + " See also the Critique of Practical Reason.", "rationalism.md", "Rationalism > Kant")
+        ]
+        kept, report = dedup_documents(docs, threshold=0.7)
+        assert [d.metadata["source"].split("/")[-1] for d in kept] == ["utilitarianism.md", "rationalism.md"]
+        assert report["dropped"] == 1 and report["kept_indices"] == [1, 2]
+        assert report["clusters"][0]["kept"] == "rationalism.md > Rationalism > Kant"
+        assert report["clusters"][0]["dropped"][0]["chunk"] == "deontology.md > Deontology > Key Historical Figures"
+
+    def test_paraphrases_need_embedding_threshold(self):
+        docs = [doc(KANT, "deontology.md"), doc(MILL, "utilitarianism.md")]
+        vectors = np.array([[1.0, 0.0], [0.98, 0.1]])
+        assert dedup_documents(docs, threshold=0.8)[1]["dropped"] == 0
+        kept, report = dedup_documents(docs, threshold=0.8, vectors=vectors, embedding_threshold=0.95)
+        assert report["dropped"] == 1 and len(kept) == 1
+
+class TestMMRRetrieval:
+    """Test suite for RETRIEVAL_MMR_ENABLED"""
+
+    def make_store(self):
+        texts = [KANT, KANT + " Again.", MILL]
+        vectors = [[1.0, 0.0, 0.0], [0.99, -0.05, 0.0], [0.7, 0.7, 0.1]]
+        return FAISS.from_embeddings(list(zip(texts, vectors)), MagicMock(),
+                                     metadatas=[{"source": "deontology.md"}, {"source": "rationalism.md"},
+                                                {"source": "utilitarianism.md"}])
+
+    def test_mmr_skips_the_copy(self):
+        with patch("backend.main.vectorstore", self.make_store()), patch("backend.main.reranker", None), \
+             patch.object(app_main.settings, "RETRIEVAL_MMR_ENABLED", True), \
+             patch.object(app_main.settings, "RETRIEVAL_TOP_K", 2):
+            stages = {}
+            docs = app_main.retrieve_documents("Is duty rational?", stages, query_vector=[1.0, 0.3, 0.0])
+        assert [d.metadata["source"] for d in docs] == ["deontology.md", "utilitarianism.md"]
+        assert "retrieval" in stages and docs[0].metadata["score"] > docs[1].metadata["score"]
+
+    def test_plain_top_k_by_default(self):
+        with patch("backend.main.vectorstore", self.make_store()), patch("backend.main.reranker", None), \
+             patch.object(app_main.settings, "RETRIEVAL_TOP_K", 2):
+            docs = app_main.retrieve_documents("Is duty rational?", {}, query_vector=[1.0, 0.3, 0.0])
+        assert [d.metadata["source"] for d in docs] == ["deontology.md", "rationalism.md"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
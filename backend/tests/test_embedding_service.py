@@ -0,0 +1,190 @@
+"""
+AI Debate Partner - Embedding Service Tests
+Sprint 4: Batching, search parity and the pooled clients over a Unix socket
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+import httpx
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import backend.main as app_main
+
+from backend.services.embedding_client import EmbeddingServiceClient, connect_embedding_service
+from backend.services.embedding_service import EmbeddingBatcher, create_embedding_app, search_vectors
+from backend.services.providers import HashEmbeddings, build_local_vectorstore
+
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "knowledge_base")
+
+@pytest.fixture(scope="module")
+def local_index():
+    embeddings = HashEmbeddings(dim=64)
+    return embeddings, build_local_vectorstore(KNOWLEDGE_BASE_DIR, embeddings)
+
+@pytest.fixture(scope="module")
+def uds_service(local_index):
+    """The embedding service running on a Unix socket in a background thread"""
+    embeddings, vectorstore = local_index
+    app = create_embedding_app(embeddings, vectorstore, model_id="hash-embeddings-64")
+    socket_path = os.path.join(tempfile.mkdtemp(), "embeddings.sock")
+    server = uvicorn.Server(uvicorn.Config(app, uds=socket_path, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    yield f"unix://{socket_path}"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+class CountingEmbeddings(HashEmbeddings):
+    def __init__(self):
+        super().__init__(dim=16)
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(len(texts))
+        return super().embed_documents(texts)
+
+class TestEmbeddingBatcher:
+    """Test suite for request coalescing"""
+
+    def test_concurrent_requests_share_model_calls(self):
+        embedder = CountingEmbeddings()
+
+        async def run():
+            batcher = EmbeddingBatcher(embedder, max_batch=64, max_wait_ms=20)
+            batcher.start()
+            results = await asyncio.gather(*[batcher.embed([f"argument {i}", f"premise {i}"]) for i in range(10)])
+            await batcher.stop()
+            return results
+
+        results = asyncio.run(run())
+        assert [len(r) for r in results] == [2] * 10
+        assert results[3][1] == embedder.embed_query("premise 3")
+        assert sum(embedder.calls) >= 20
+        assert len(embedder.calls) < 10
+
+    def test_max_batch_splits_model_calls(self):
+        embedder = CountingEmbeddings()
+
+        async def run():
+            batcher = EmbeddingBatcher(embedder, max_batch=4, max_wait_ms=20)
+            await asyncio.gather(*[batcher.embed([f"claim {i}"]) for i in range(8)])
+            await batcher.stop()
+
+        asyncio.run(run())
+        assert max(embedder.calls) <= 4
+
+class TestSearchParity:
+    """Matrix search must match the in-process LangChain search"""
+
+    def test_search_vectors_matches_faiss(self, local_index):
+        embeddings, vectorstore = local_index
+        queries = ["Is free will compatible with determinism?", "Utilitarian calculus of happiness"]
+        results = search_vectors(vectorstore, embeddings.embed_documents(queries), k=3)
+        for query, row in zip(queries, results):
+            expected = vectorstore.similarity_search_with_score(query, k=3)
+            assert [doc.page_content for doc, _ in row] == [doc.page_content for doc, _ in expected]
+            assert [score for _, score in row] == pytest.approx([float(score) for _, score in expected])
+
+    def test_http_endpoints(self, local_index):
+        embeddings, vectorstore = local_index
+        app = create_embedding_app(embeddings, vectorstore, model_id="hash-embeddings-64")
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                health = (await client.get("/health")).json()
+                embedded = (await client.post("/embed", json={"texts": ["justice as fairness"]})).json()
+                searched = (await client.post("/search", json={"queries": ["justice as fairness"], "k": 2})).json()
+                return health, embedded, searched
+
+        health, embedded, searched = asyncio.run(run())
+        assert health["documents"] == searched["documents"] == vectorstore.index.ntotal
+        assert health["dimension"] == 64
+        assert embedded["vectors"][0] == embeddings.embed_query("justice as fairness")
+        assert len(searched["results"][0]) == 2
+
+class TestEmbeddingClients:
+    """End-to-end over a Unix domain socket"""
+
+    def test_remote_embeddings_and_vectorstore(self, local_index, uds_service):
+        embeddings, vectorstore = local_index
+        remote_embeddings, remote_store = connect_embedding_service(uds_service, pool_size=2)
+
+        query = "Hume on the limits of reason"
+        assert remote_embeddings.embed_query(query) == pytest.approx(embeddings.embed_query(query))
+        with patch.object(remote_store.client, "health", side_effect=AssertionError("blocking health call")):
+            assert remote_store.index.ntotal == vectorstore.index.ntotal  # Cached from the connect-time health check
+            assert remote_store.index.d == vectorstore.index.d
+
+        expected = [doc.page_content for doc in vectorstore.similarity_search(query, k=3)]
+        assert [doc.page_content for doc in remote_store.similarity_search(query, k=3)] == expected
+        by_vector = remote_store.similarity_search_by_vector(embeddings.embed_query(query), k=3)
+        assert [doc.page_content for doc in by_vector] == expected
+        assert by_vector[0].metadata["source"].endswith(".md")
+
+    def test_batched_search_through_client(self, uds_service):
+        client = EmbeddingServiceClient(uds_service, pool_size=2)
+        try:
+            results = client.search(queries=["free will", "consciousness", "empiricism"], k=2)
+        finally:
+            client.close()
+        assert len(results) == 3
+        assert all(len(row) == 2 for row in results)
+
+class TestAgentQueryVector:
+    """The voice agent's query embedding is used for retrieval instead of re-embedding"""
+
+    def post_with_vector(self, service_url, query_vector=(0.1, 0.2, 0.3), agent_token="agent-secret", status=200):
+        mock_embeddings = MagicMock()
+        mock_chain = MagicMock()
+        mock_chain.ainvoke = AsyncMock(return_value="Counter-argument")
+        mock_store = MagicMock()
+        mock_store.index.d = 3
+        headers = {"X-Agent-Token": agent_token} if agent_token else {}
+        with patch.object(app_main.settings, "EMBEDDING_SERVICE_URL", service_url), \
+             patch.object(app_main.settings, "AGENT_API_TOKEN", "agent-secret"), \
+             patch("backend.main.embeddings", mock_embeddings), \
+             patch("backend.main.vectorstore", mock_store), \
+             patch("backend.main.rag_chain", mock_chain), \
+             patch("backend.main.answer_cache", None), \
+             patch("backend.main.retrieve_documents", return_value=[]) as mock_retrieve, \
+             patch("backend.main.log_performance_metrics"):
+            response = TestClient(app_main.app).post("/api/debate/test", headers=headers, json={
+                "content": "Free will is an illusion", "user_id": "voice_agent", "query_vector": list(query_vector)
+            })
+        assert response.status_code == status
+        if status != 200:
+            mock_retrieve.assert_not_called()
+            return None, mock_embeddings
+        return mock_retrieve.call_args.args[2], mock_embeddings
+
+    def test_vector_used_with_shared_service(self):
+        query_vector, mock_embeddings = self.post_with_vector("unix:///tmp/debate-embeddings.sock")
+        assert query_vector == [0.1, 0.2, 0.3]
+        mock_embeddings.embed_query.assert_not_called()
+
+    def test_vector_ignored_without_shared_service(self):
+        # In-process embeddings may be a different model than the agent's service
+        query_vector, _ = self.post_with_vector(None)
+        assert query_vector is None
+
+    def test_vector_ignored_without_agent_token(self):
+        # Public callers cannot choose the retrieved context with a crafted vector
+        for token in (None, "wrong"):
+            query_vector, _ = self.post_with_vector("unix:///tmp/debate-embeddings.sock", agent_token=token)
+            assert query_vector is None
+
+    def test_wrong_dimension_rejected(self):
+        self.post_with_vector("unix:///tmp/debate-embeddings.sock", query_vector=(0.1, 0.2), status=422)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,196 @@
+"""
+AI Debate Partner - Index Versioning Tests
+Sprint 4: Publishing, validating, swapping and garbage-collecting index versions
+"""
+
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_community.vectorstores import FAISS
+from unittest.mock import patch
+
+import backend.main as app_main
+from backend.main import app
+from backend.services.index_versions import (
+    IndexReloader,
+    list_versions,
+    publish_index_version,
+    read_current_version,
+    resolve_index_version,
+)
+from backend.services.providers import HashEmbeddings
+from backend.services.suggest_index import SUGGEST_INDEX_FILE, save_suggest_index
+
+client = TestClient(app)
+
+EMBEDDINGS = HashEmbeddings(dim=32)
+
+def build_store(texts, embeddings=EMBEDDINGS):
+    return FAISS.from_texts(texts, embeddings)
+
+def make_reloader(root, swaps, version=None, embeddings=EMBEDDINGS):
+    return IndexReloader(
+        root,
+        loader=lambda index_dir: FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True),
+        on_swap=lambda store, v: swaps.append((store, v)),
+        smoke_query="What is justice?",
+        keep_versions=2,
+        version=version
+    )
+
+class TestPublishing:
+    """Test suite for the on-disk version layout"""
+
+    def test_publish_sets_current_and_gcs(self, tmp_path):
+        root = str(tmp_path / "faiss_index")
+        versions = [publish_index_version(build_store([f"justice text {i}"]), root, keep=2) for i in range(4)]
+
+        assert read_current_version(root) == versions[-1]
+        assert list_versions(root) == versions[-2:]
+        version, path = resolve_index_version(root)
+        assert version == versions[-1]
+        assert os.path.exists(os.path.join(path, "index.faiss"))
+
+    def test_extras_saved_before_current_moves(self, tmp_path):
+        root = str(tmp_path / "faiss_index")
+        first = publish_index_version(build_store(["justice v1"]), root)
+        seen = {}
+
+        def write_extras(directory):
+            seen["current"] = read_current_version(root)
+            save_suggest_index(os.path.join(directory, SUGGEST_INDEX_FILE),
+                               [{"term": "Zebra Paradox", "kinds": ["tag"], "sources": ["justice.md"], "count": 3}])
+
+        second = publish_index_version(build_store(["justice v2"]), root, write_extras=write_extras)
+        assert seen["current"] == first
+        with patch("backend.main.resolve_index_version", side_effect=lambda _, version: resolve_index_version(root, version)):
+            assert app_main.load_suggest_index(second).suggest("zebra")[0]["term"] == "Zebra Paradox"
+
+    def test_legacy_layout_still_resolves(self, tmp_path):
+        root = str(tmp_path / "faiss_index")
+        build_store(["justice as fairness"]).save_local(root)
+        version, path = resolve_index_version(root)
+        assert version == "legacy"
+        assert path == root
+
+    def test_missing_index(self, tmp_path):
+        assert resolve_index_version(str(tmp_path)) == (None, None)
+
+class TestIndexReloader:
+    """Test suite for background reload and swap"""
+
+    def test_reload_swaps_new_version(self, tmp_path):
+        root = str(tmp_path / "faiss_index")
+        first = publish_index_version(build_store(["justice v1"]), root)
+        swaps = []
+        reloader = make_reloader(root, swaps, version=first)
+        assert reloader.reload()["status"] == "unchanged"
+
+        second = publish_index_version(build_store(["justice v2", "more justice"]), root)
+        assert reloader.changed()
+        result = reloader.reload()
+
+        assert result["status"] == "loaded"
+        assert result["previous"] == first
+        assert reloader.version == second
+        assert swaps[-1][1] == second
+        assert swaps[-1][0].index.ntotal == 2
+        assert not reloader.changed()
+
+    def test_invalid_version_is_rejected(self, tmp_path):
+        root = str(tmp_path / "faiss_index")
+        good = publish_index_version(build_store(["justice"]), root)
+        swaps = []
+        reloader = make_reloader(root, swaps, version=good)
+
+        # Built with a different embedding dimension: the smoke query fails
+        publish_index_version(build_store(["justice"], HashEmbeddings(dim=16)), root)
+        result = reloader.reload()
+
+        assert result["status"] == "failed"
+        assert reloader.version == good
+        assert swaps == []
+        assert not reloader.changed()  # The rejected version is not retried by the watcher
+
+    def test_explicit_version_rolls_back_current(self, tmp_path):
+        root = str(tmp_path / "faiss_index")
+        first = publish_index_version(build_store(["justice v1"]), root)
+        second = publish_index_version(build_store(["justice v2"]), root)
+        reloader = make_reloader(root, [], version=second)
+
+        assert reloader.reload(version=first)["status"] == "loaded"
+        assert read_current_version(root) == first
+        assert not reloader.changed()
+
+    def test_watcher_picks_up_new_version(self, tmp_path):
+        root = str(tmp_path / "faiss_index")
+        first = publish_index_version(build_store(["justice v1"]), root)
+        swaps = []
+        reloader = make_reloader(root, swaps, version=first)
+
+        async def run():
+            reloader.start_watching(0.01)
+            second = publish_index_version(build_store(["justice v2"]), root)
+            for _ in range(200):
+                if reloader.version == second:
+                    break
+                await asyncio.sleep(0.01)
+            reloader._watch_task.cancel()
+            return second
+
+        second = asyncio.run(run())
+        assert reloader.version == second
+        assert swaps[-1][1] == second
+
+ADMIN_HEADERS = {"X-Admin-Token": "secret"}
+
+class TestAdminEndpoints:
+    """Test suite for /api/admin/index"""
+
+    @pytest.fixture(autouse=True)
+    def admin_token(self):
+        with patch("backend.main.settings.ADMIN_TOKEN", "secret"):
+            yield
+
+    def test_reload_endpoint(self, tmp_path):
+        root = str(tmp_path / "faiss_index")
+        first = publish_index_version(build_store(["justice v1"]), root)
+        reloader = make_reloader(root, [], version=first)
+        second = publish_index_version(build_store(["justice v2"]), root)
+
+        with patch("backend.main.index_reloader", reloader):
+            response = client.post("/api/admin/index/reload", json={}, headers=ADMIN_HEADERS)
+            assert response.status_code == 200
+            assert response.json()["version"] == second
+
+            status = client.get("/api/admin/index", headers=ADMIN_HEADERS).json()
+            assert status["version"] == second
+            assert status["history"][-1]["status"] == "loaded"
+
+    def test_admin_token_enforced(self, tmp_path):
+        root = str(tmp_path / "faiss_index")
+        reloader = make_reloader(root, [], version=publish_index_version(build_store(["justice"]), root))
+
+        with patch("backend.main.index_reloader", reloader):
+            assert client.get("/api/admin/index").status_code == 403
+            assert client.get("/api/admin/index", headers={"X-Admin-Token": "wrong"}).status_code == 403
+            assert client.get("/api/admin/index", headers=ADMIN_HEADERS).status_code == 200
+
+    def test_fails_closed_without_admin_token(self, tmp_path):
+        root = str(tmp_path / "faiss_index")
+        reloader = make_reloader(root, [], version=publish_index_version(build_store(["justice"]), root))
+
+        with patch("backend.main.index_reloader", reloader), patch("backend.main.settings.ADMIN_TOKEN", None):
+            assert client.get("/api/admin/index").status_code == 403
+            assert client.post("/api/admin/index/reload", json={}).status_code == 403
+            with patch("backend.main.settings.ADMIN_ALLOW_UNAUTHENTICATED", True):
+                assert client.get("/api/admin/index").status_code == 200
+
+    def test_unavailable_without_reloader(self):
+        with patch("backend.main.index_reloader", None):
+            assert client.post("/api/admin/index/reload", json={}, headers=ADMIN_HEADERS).status_code == 409
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,155 @@
+"""
+AI Debate Partner - Knowledge Search Tests
+Sprint 4: Capped limits, cursor pagination, snippets and the result cache
+"""
+
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from backend.main import app, search_cache
+from backend.services.providers import HashEmbeddings, build_local_vectorstore
+from backend.services.search_cache import SearchResultCache, decode_cursor, encode_cursor, make_snippet
+
+client = TestClient(app)
+
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "knowledge_base")
+
+@pytest.fixture(scope="module")
+def knowledge_store():
+    return build_local_vectorstore(KNOWLEDGE_BASE_DIR, HashEmbeddings(dim=64))
+
+@pytest.fixture
+def live_store(knowledge_store):
+    search_cache.clear()
+    with patch("backend.main.vectorstore", knowledge_store):
+        yield knowledge_store
+    search_cache.clear()
+
+class CountingSearch:
+    def __init__(self, size=30):
+        self.calls = 0
+        self.size = size
+
+    def __call__(self, query, k):
+        self.calls += 1
+        return [(f"{query}-{i}", float(i)) for i in range(min(k, self.size))]
+
+class TestSearchResultCache:
+    """Test suite for the ranked-list cache"""
+
+    def test_pages_share_one_search(self):
+        search = CountingSearch()
+        cache = SearchResultCache(search, max_results=25)
+
+        first = cache.page("Justice", limit=10)
+        second = cache.page("justice ", limit=10, cursor=first["next_cursor"])
+        third = cache.page("JUSTICE", limit=10, cursor=second["next_cursor"])
+
+        assert search.calls == 1
+        assert [r for r, _ in first["items"]][:2] == ["justice-0", "justice-1"]
+        assert second["offset"] == 10 and second["cached"]
+        assert len(third["items"]) == 5
+        assert third["next_cursor"] is None
+
+    def test_lru_eviction_and_ttl(self):
+        search = CountingSearch()
+        cache = SearchResultCache(search, max_entries=2, ttl_seconds=0)
+        for query in ["a", "b", "c"]:
+            cache.ranked(query)
+        assert cache.stats()["evictions"] == 1
+        cache.ranked("a")  # Evicted: ranked again
+        assert search.calls == 4
+
+        expiring = SearchResultCache(search, ttl_seconds=0.01)
+        expiring.ranked("x")
+        time.sleep(0.02)
+        expiring.ranked("x")
+        assert expiring.stats()["misses"] == 2
+
+    def test_clear_during_search_drops_stale_results(self):
+        """Test that a search still running on the old index when the cache is cleared is not cached"""
+        index = {"version": "old"}
+        cache = SearchResultCache(lambda query, k: [(f"{index['version']}-{query}", 1.0)])
+        original = cache.search
+
+        def swap_during_search(query, k):
+            results = original(query, k)
+            index["version"] = "new"
+            cache.clear()  # swap_vectorstore lands while this search is in flight
+            return results
+
+        cache.search = swap_during_search
+        results, cached = cache.ranked("justice")
+        assert results == [("old-justice", 1.0)] and not cached
+        cache.search = original
+        assert cache.ranked("justice") == ([("new-justice", 1.0)], False)
+        assert cache.ranked("justice")[1]
+
+    def test_cursor_round_trip_and_validation(self):
+        assert decode_cursor(encode_cursor("abc", 7)) == ("abc", 7)
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+        cache = SearchResultCache(CountingSearch())
+        cursor = cache.page("justice", limit=2)["next_cursor"]
+        with pytest.raises(ValueError):
+            cache.page("virtue", limit=2, cursor=cursor)
+
+class TestSnippets:
+    """Test suite for snippet extraction"""
+
+    def test_snippet_centres_on_matches(self):
+        text = "Filler sentence. " * 40 + "The categorical imperative binds rational agents." + " More filler." * 40
+        result = make_snippet(text, "the categ", width=120)
+        assert len(result["snippet"]) <= 126
+        assert result["snippet"].startswith("...") and result["snippet"].endswith("...")
+        matched = [result["snippet"][s:e] for s, e in result["highlights"]]
+        assert "categorical" in matched
+        assert "The" not in matched  # Stop words are not highlighted
+
+    def test_short_text_is_returned_whole(self):
+        result = make_snippet("Justice as fairness.", "fairness")
+        assert result["snippet"] == "Justice as fairness."
+        assert result["highlights"] == [[11, 19]]
+
+class TestSearchEndpoint:
+    """Test suite for /api/knowledge/search"""
+
+    def test_limit_is_capped(self, live_store):
+        with patch("backend.main.settings.SEARCH_MAX_LIMIT", 4):
+            data = client.get("/api/knowledge/search", params={"query": "justice", "limit": 1000}).json()
+        assert data["total_found"] == 4
+        assert data["next_cursor"]
+
+    def test_pagination_walks_ranked_list_once(self, live_store):
+        seen = []
+        params = {"query": "free will and determinism", "limit": 7}
+        with patch.object(live_store, "similarity_search_with_score", wraps=live_store.similarity_search_with_score) as search:
+            while True:
+                data = client.get("/api/knowledge/search", params=params).json()
+                seen.extend(r["content"] for r in data["results"])
+                if not data["next_cursor"]:
+                    break
+                params["cursor"] = data["next_cursor"]
+            assert search.call_count == 1
+        assert len(seen) == min(live_store.index.ntotal, search_cache.max_results)
+        assert len(set(seen)) == len(seen)
+
+    def test_snippet_mode(self, live_store):
+        data = client.get("/api/knowledge/search", params={"query": "categorical imperative", "snippets": True}).json()
+        result = data["results"][0]
+        assert "content" not in result and "metadata" not in result
+        assert len(result["snippet"]) <= 250
+        assert result["section"]
+
+    def test_bad_cursor_and_missing_index(self, live_store):
+        response = client.get("/api/knowledge/search", params={"query": "justice", "cursor": "garbage"})
+        assert response.status_code == 400
+        with patch("backend.main.vectorstore", None):
+            assert client.get("/api/knowledge/search", params={"query": "justice"}).status_code == 503
+
+if __name__ == "__main__":
+    pytest.main([__file__])
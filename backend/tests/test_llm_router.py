@@ -0,0 +1,219 @@
+"""
+AI Debate Partner - LLM Router Tests
+Sprint 4: Deadlines, hedging, circuit breakers and fallback against stub providers
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from unittest.mock import AsyncMock, patch
+
+from backend.main import build_rag_chain
+from backend.services.llm_router import (
+    CircuitBreaker,
+    LLMDeadlineExceeded,
+    LLMRouter,
+    LLMUnavailableError,
+    RoutedProvider,
+    start_route_record,
+)
+from backend.services.providers import FakeStreamingChatModel, create_llm_router
+
+class StubChatModel(BaseChatModel):
+    """Answers with its name after `delay` seconds, or raises while `failing`"""
+
+    reply: str = "stub"
+    delay: float = 0.0
+    failing: bool = False
+    calls: int = 0
+    cancelled: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _result(self) -> ChatResult:
+        if self.failing:
+            raise RuntimeError(f"{self.reply} unavailable")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        time.sleep(self.delay)
+        return self._result()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self._result()
+
+def make_router(*models, failures=3, reset=30.0, **kwargs):
+    providers = [RoutedProvider(m.reply, m, CircuitBreaker(failures, reset)) for m in models]
+    return LLMRouter(providers, **kwargs)
+
+def ask(router) -> tuple:
+    async def run():
+        record = start_route_record()
+        result = await router.ainvoke([HumanMessage(content="Free will is an illusion")])
+        return result.content, record
+    return asyncio.run(run())
+
+class TestCircuitBreaker:
+    """Test suite for the per-provider breaker"""
+
+    def test_opens_and_half_opens(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open" and not breaker.allow()
+        time.sleep(0.06)
+        assert breaker.allow()  # One trial call
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+class TestRouting:
+    """Test suite for fallback, hedging and deadlines"""
+
+    def test_primary_answers(self):
+        primary, fallback = StubChatModel(reply="primary"), StubChatModel(reply="fallback")
+        content, record = ask(make_router(primary, fallback))
+        assert content == "primary"
+        assert record["provider"] == "primary" and not record["fallback"] and not record["hedged"]
+        assert fallback.calls == 0
+
+    def test_failure_falls_back(self):
+        primary, fallback = StubChatModel(reply="primary", failing=True), StubChatModel(reply="fallback")
+        content, record = ask(make_router(primary, fallback))
+        assert content == "fallback"
+        assert record["fallback"] and record["failed"] == ["primary"] and record["attempts"] == 2
+
+    def test_hedge_wins_against_slow_primary(self):
+        primary, fallback = StubChatModel(reply="primary", delay=1.0), StubChatModel(reply="fallback", delay=0.01)
+        router = make_router(primary, fallback, hedge_enabled=True, hedge_min_delay=0.05, deadline_seconds=5)
+        started = time.perf_counter()
+        content, record = ask(router)
+        assert content == "fallback"
+        assert record["hedged"]
+        assert time.perf_counter() - started < 0.5
+        assert primary.cancelled == 1
+
+    def test_hedge_delay_follows_observed_p95(self):
+        primary = StubChatModel(reply="primary")
+        router = make_router(primary, StubChatModel(reply="fallback"), hedge_enabled=True, hedge_min_delay=0.01)
+        for latency in [0.1] * 18 + [0.4, 0.5]:
+            router.providers[0].latency.add(latency)
+        assert router.hedge_delay(router.providers[0]) == pytest.approx(0.5)
+
+    def test_deadline(self):
+        router = make_router(StubChatModel(reply="slow", delay=1.0), deadline_seconds=0.05)
+        with pytest.raises(LLMDeadlineExceeded):
+            ask(router)
+
+    def test_open_circuit_skips_provider(self):
+        primary, fallback = StubChatModel(reply="primary", failing=True), StubChatModel(reply="fallback")
+        router = make_router(primary, fallback, failures=2)
+        for _ in range(3):
+            ask(router)
+        assert primary.calls == 2  # Third call skipped the open circuit
+        assert router.providers[0].breaker.state == "open"
+        assert ask(router)[1]["attempts"] == 1
+
+        fallback.failing = True
+        with pytest.raises(LLMUnavailableError):
+            ask(router)
+
+    def test_unlaunched_half_open_provider_keeps_its_trial(self):
+        primary, fallback = StubChatModel(reply="primary"), StubChatModel(reply="fallback")
+        router = make_router(primary, fallback, failures=1, reset=0.01)
+        router.providers[1].breaker.record_failure()
+        time.sleep(0.02)
+        assert router.providers[1].breaker.state == "half-open"
+        assert ask(router)[0] == "primary"  # Fallback was a candidate but never launched
+        assert router.invoke([HumanMessage(content="hi")]).content == "primary"
+
+        primary.failing = True
+        content, record = ask(router)
+        assert content == "fallback" and record["fallback"]
+        assert router.providers[1].breaker.state == "closed"
+
+    def test_cancelled_hedge_releases_its_trial(self):
+        primary, fallback = StubChatModel(reply="primary", delay=0.1), StubChatModel(reply="fallback", delay=1.0)
+        router = make_router(primary, fallback, failures=1, reset=0.01, hedge_enabled=True, hedge_min_delay=0.02, deadline_seconds=5)
+        router.providers[1].breaker.record_failure()
+        time.sleep(0.02)
+        content, record = ask(router)
+        assert content == "primary" and record["hedged"] and fallback.cancelled == 1
+
+        primary.failing, fallback.delay = True, 0.0
+        assert ask(router)[0] == "fallback"
+
+    def test_sync_path_falls_back(self):
+        router = make_router(StubChatModel(reply="primary", failing=True), StubChatModel(reply="fallback"))
+        assert router.invoke([HumanMessage(content="hi")]).content == "fallback"
+
+class TestIntegration:
+    """Test suite for settings wiring and the RAG chain"""
+
+    def test_router_from_settings(self):
+        settings = SimpleNamespace(
+            LLM_PROVIDER="fake", LLM_MODEL="primary-model", LLM_FALLBACK_PROVIDER=None, LLM_FALLBACK_MODEL="small-model",
+            FAKE_LLM_TOKEN_DELAY_MS=0.0, FAKE_LLM_RESPONSE_TOKENS=4, FAKE_LLM_FAILURE_RATE=0.0, FAKE_LLM_SEED=0,
+            LLM_DEADLINE_SECONDS=5.0, LLM_HEDGE_ENABLED=True, LLM_HEDGE_PERCENTILE=95.0, LLM_HEDGE_MIN_DELAY_MS=200.0,
+            LLM_BREAKER_FAILURES=5, LLM_BREAKER_RESET_SECONDS=30.0
+        )
+        router = create_llm_router(settings)
+        assert [p.name for p in router.providers] == ["fake:primary-model", "fake:small-model"]
+        assert all(isinstance(p.model, FakeStreamingChatModel) for p in router.providers)
+        assert router.hedge_min_delay == pytest.approx(0.2)
+
+    def test_route_recorded_through_rag_chain(self):
+        router = make_router(StubChatModel(reply="primary", failing=True), StubChatModel(reply="fallback"))
+        chain = build_rag_chain(router)
+
+        async def run():
+            record = start_route_record()
+            answer = await chain.ainvoke({"docs": [], "question": "Is lying wrong?", "history": ""})
+            return answer, record
+
+        answer, record = asyncio.run(run())
+        assert answer == "fallback"
+        assert record["provider"] == "fallback" and record["fallback"]
+
+    def test_router_errors_map_to_503_and_504(self):
+        from fastapi.testclient import TestClient
+        import backend.main as app_main
+
+        client = TestClient(app_main.app)
+        for error, status in [(app_main.LLMUnavailableError("all LLM providers failed"), 503),
+                              (app_main.LLMDeadlineExceeded("no LLM provider answered"), 504)]:
+            chain = SimpleNamespace(ainvoke=AsyncMock(side_effect=error))
+            with patch("backend.main.rag_chain", chain), \
+                 patch("backend.main.answer_cache", None), \
+                 patch("backend.main.retrieve_documents", return_value=[]), \
+                 patch("backend.main.log_performance_metrics") as log:
+                response = client.post("/api/debate/test", json={"content": "Justice is equality"})
+            assert response.status_code == status
+            assert "llm_route" in log.call_args.kwargs
+
+if __name__ == "__main__":
+    pytest.main([__file__])
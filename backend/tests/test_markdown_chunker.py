@@ -0,0 +1,105 @@
+"""
+AI Debate Partner - Markdown Chunker Tests
+Sprint 4: Heading paths, packing and split-only overlap
+"""
+
+import os
+
+import pytest
+
+from backend.services.markdown_chunker import chunk_markdown, parse_frontmatter, split_sections
+from backend.services.providers import load_knowledge_base_chunks
+
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "knowledge_base")
+
+SAMPLE = """---
+title: "Justice"
+tags: ["fairness", "Rawls"]
+---
+
+# Justice: Concepts of Fairness
+
+## Core Definition and Overview
+
+Justice is the proper ordering of society.
+
+### Key Historical Figures
+
+**Plato** tied justice to harmony of the soul.
+
+## Major Theories
+
+```python
+# not a heading
+```
+
+### Justice as Fairness
+
+Rawls asks what principles we would choose behind a veil of ignorance.
+"""
+
+def long_section(paragraphs: int) -> str:
+    body = "\n\n".join(
+        f"Paragraph {i} argues that the categorical imperative binds every rational agent without exception." * 3
+        for i in range(paragraphs)
+    )
+    return f"---\ntitle: \"Deontology\"\n---\n\n# Deontology\n\n## Kant\n\n{body}\n"
+
+class TestParsing:
+    """Test suite for frontmatter and heading parsing"""
+
+    def test_frontmatter(self):
+        metadata, body = parse_frontmatter(SAMPLE)
+        assert metadata["title"] == "Justice"
+        assert metadata["tags"] == ["fairness", "Rawls"]
+        assert body.startswith("# Justice")
+
+    def test_heading_paths_ignore_code_fences(self):
+        _, body = parse_frontmatter(SAMPLE)
+        paths = [" > ".join(s.path) for s in split_sections(body, root="Justice")]
+        assert "Justice > Core Definition and Overview > Key Historical Figures" in paths
+        assert "Justice > Major Theories > Justice as Fairness" in paths
+        assert not any("not a heading" in path for path in paths)
+
+class TestChunking:
+    """Test suite for packing and splitting"""
+
+    def test_small_sections_packed_within_top_level_section(self):
+        chunks = chunk_markdown(SAMPLE, "justice.md", target_tokens=60, max_tokens=300)
+        assert len(chunks) == 2
+        first, second = chunks
+        assert first.metadata["heading_path"] == "Justice > Core Definition and Overview"
+        assert "Justice > Core Definition and Overview > Key Historical Figures" in first.metadata["sections"]
+        assert "Plato" in first.page_content
+        assert second.metadata["heading_path"] == "Justice > Major Theories"
+        assert first.metadata["tags"] == ["fairness", "Rawls"]
+        assert first.metadata["source"] == "justice.md"
+
+    def test_oversized_section_split_with_overlap(self):
+        chunks = chunk_markdown(long_section(12), "deontology.md", target_tokens=150, max_tokens=200, overlap_tokens=20)
+        assert len(chunks) > 1
+        assert all(chunk.metadata.get("split") for chunk in chunks)
+        assert all(chunk.metadata["heading_path"] == "Deontology > Kant" for chunk in chunks)
+        # Consecutive pieces share a short overlap
+        tail = chunks[0].page_content.split()[-3:]
+        assert " ".join(tail) in chunks[1].page_content
+
+    def test_unsplit_sections_do_not_overlap(self):
+        chunks = chunk_markdown(SAMPLE, "justice.md", target_tokens=20, max_tokens=300, overlap_tokens=50)
+        text = "".join(chunk.page_content for chunk in chunks)
+        assert text.count("Plato tied justice") == 0
+        assert text.count("**Plato** tied justice") == 1
+
+    def test_knowledge_base_has_fewer_chunks_than_fixed_splitter(self):
+        markdown = load_knowledge_base_chunks(KNOWLEDGE_BASE_DIR, chunker="markdown")
+        recursive = load_knowledge_base_chunks(KNOWLEDGE_BASE_DIR, chunker="recursive")
+        assert len(markdown) < len(recursive)
+        assert sum(len(c.page_content) for c in markdown) < sum(len(c.page_content) for c in recursive)
+        assert all(chunk.metadata["heading_path"] for chunk in markdown)
+
+    def test_unknown_chunker_rejected(self):
+        with pytest.raises(ValueError):
+            load_knowledge_base_chunks(KNOWLEDGE_BASE_DIR, chunker="semantic")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,145 @@
+"""
+AI Debate Partner - Performance Log Analytics Tests
+Sprint 4: Log rotation, columnar compaction and vectorized aggregations
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+import backend.main as app_main
+from backend.services.perf_store import (PerfLogStore, compact_segments, confidence_histogram, error_kind,
+                                         error_rates, latency_percentiles, rotate_log)
+
+client = TestClient(app_main.app)
+
+DAY1 = 1753142400.0  # 2025-07-22T00:00Z
+DAY2 = DAY1 + 86400
+
+
+def entry(timestamp, latency, success=True, confidence=0.8, error=None, stages=None):
+    record = {
+        "timestamp": timestamp,
+        "response_time_seconds": latency,
+        "confidence_score": confidence,
+        "message_length": 42,
+        "success": success,
+        "error": error
+    }
+    if stages:
+        record["stages"] = stages
+    return record
+
+def write_segment(directory, name, entries):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+        for record in entries:
+            f.write(json.dumps(record) + "\n")
+
+class TestCompaction:
+    """Test suite for rotation and compaction"""
+
+    def test_rotate_only_past_limit(self, tmp_path):
+        log = tmp_path / "performance_logs.jsonl"
+        log.write_text(json.dumps(entry(DAY1, 1.0)) + "\n")
+        assert rotate_log(str(log), str(tmp_path / "segments"), max_bytes=10_000) is None
+        segment = rotate_log(str(log), str(tmp_path / "segments"), max_bytes=10)
+        assert segment and os.path.exists(segment) and not log.exists()
+
+    def test_partitions_by_day_and_merges_segments(self, tmp_path):
+        segments, store = str(tmp_path / "segments"), str(tmp_path / "store")
+        write_segment(segments, "a.jsonl", [
+            entry(DAY1 + 10, 1.0, stages={"retrieval": 0.1}),
+            entry(DAY1 + 20, 2.0, success=False, confidence=None, error="Error code: 429 - rate limited"),
+            entry(DAY2 + 5, 3.0)
+        ])
+        write_segment(segments, "b.jsonl", [entry(DAY1 + 30, 4.0, success=False, error="TimeoutError: slow")])
+
+        summary = compact_segments(segments, store)
+        assert summary["rows"] == 4 and summary["segments"] == 2
+        assert os.listdir(segments) == []
+
+        data = PerfLogStore(store).load()
+        assert data["days"] == ["2025-07-22", "2025-07-23"] and data["rows"] == 4
+        assert data["response_time"].tolist() == [1.0, 2.0, 4.0, 3.0]
+        assert np.isnan(data["confidence"][1])
+        # Segment b had no stages: its row is NaN, not dropped
+        assert data["stage_retrieval"][0] == pytest.approx(0.1) and np.isnan(data["stage_retrieval"][2])
+        errors = [data["vocabularies"]["error"][c] if c >= 0 else None for c in data["error"]]
+        assert errors == [None, "http_429", "TimeoutError", None]
+
+        only_day2 = PerfLogStore(store).load(since="2025-07-23")
+        assert only_day2["rows"] == 1
+
+    def test_compaction_is_idempotent(self, tmp_path):
+        segments, store = str(tmp_path / "segments"), str(tmp_path / "store")
+        write_segment(segments, "a.jsonl", [entry(DAY1, 1.0)])
+        compact_segments(segments, store, keep_segments=True)
+        compact_segments(segments, store, keep_segments=True)
+        assert PerfLogStore(store).load()["rows"] == 1
+
+class TestAggregations:
+    """Test suite for the vectorized aggregations"""
+
+    def make_data(self):
+        timestamps = np.concatenate([DAY1 + np.arange(100), DAY1 + 3600 + np.arange(10)])
+        latency = np.concatenate([np.arange(1, 101), np.full(10, 5)]).astype(np.float32)
+        success = np.ones(110, dtype=bool)
+        success[100:105] = False
+        return {
+            "timestamp": timestamps,
+            "response_time": latency,
+            "success": success,
+            "confidence": np.where(np.arange(110) % 2 == 0, 0.95, np.nan).astype(np.float32),
+            "error": np.where(success, -1, 0).astype(np.int16),
+            "vocabularies": {"error": ["http_429"]}
+        }
+
+    def test_latency_percentiles_by_hour(self):
+        rows = latency_percentiles(self.make_data(), "hour")
+        assert [r["bucket"] for r in rows] == ["2025-07-22T00:00Z", "2025-07-22T01:00Z"]
+        assert (rows[0]["p50"], rows[0]["p95"], rows[0]["p99"]) == (50, 95, 99)
+        assert rows[1]["count"] == 5  # Failed requests are excluded
+
+    def test_error_rates_and_confidence(self):
+        data = self.make_data()
+        hourly = error_rates(data, "hour")
+        assert hourly[0]["error_rate"] == 0 and hourly[0]["top_error"] is None
+        assert hourly[1]["errors"] == 5 and hourly[1]["error_rate"] == 0.5 and hourly[1]["top_error"] == "http_429"
+        assert error_rates(data, "day")[0]["requests"] == 110
+
+        histogram = confidence_histogram(data, bins=10)
+        assert histogram["scored"] == 55 and histogram["unscored"] == 55
+        assert histogram["bins"][-1]["count"] == 55
+
+    def test_error_kind(self):
+        assert error_kind("Error code: 503 - upstream") == "http_503"
+        assert error_kind("LLMDeadlineExceeded: 20s") == "LLMDeadlineExceeded"
+        assert error_kind(None) is None
+
+class TestAnalyticsEndpoint:
+    """Test suite for GET /api/performance/analytics"""
+
+    def test_analytics_over_store(self, tmp_path):
+        segments, store = str(tmp_path / "segments"), str(tmp_path / "store")
+        write_segment(segments, "a.jsonl", [entry(DAY1 + i, 1.0 + i, stages={"generation": 0.5}) for i in range(5)])
+        compact_segments(segments, store)
+
+        with patch("backend.main.PERF_LOG_STORE_DIR", store):
+            response = client.get("/api/performance/analytics?bucket=day")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["rows"] == 5 and body["latency"][0]["p50"] == 3.0
+        assert body["stage_latency"]["generation"][0]["count"] == 5
+        assert body["errors"][0]["error_rate"] == 0
+
+    def test_rejects_unknown_bucket(self):
+        assert client.get("/api/performance/analytics?bucket=week").status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
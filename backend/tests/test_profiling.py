@@ -0,0 +1,120 @@
+"""
+AI Debate Partner - Profiling Tests
+Sprint 4: Stack sampling, per-request cProfile and event-loop block detection
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+import backend.main as app_main
+from backend.services.profiling import LoopBlockMonitor, format_collapsed, sample_stacks
+
+client = TestClient(app_main.app)
+
+ADMIN_HEADERS = {"X-Admin-Token": "secret"}
+
+@pytest.fixture
+def admin_token():
+    with patch.object(app_main.settings, "ADMIN_TOKEN", "secret"):
+        yield
+
+def spin_until(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def block_the_loop(seconds):
+    time.sleep(seconds)
+
+class TestStackSampling:
+    """Test suite for the collapsed-stack sampler"""
+
+    def test_samples_busy_thread(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=spin_until, args=(stop,), name="busy-worker")
+        worker.start()
+        try:
+            counts = sample_stacks(0.2, interval=0.005)
+        finally:
+            stop.set()
+            worker.join()
+        busy = [stack for stack in counts if stack.startswith("busy-worker;")]
+        assert busy and all("spin_until (tests/test_profiling.py:" in stack for stack in busy)
+        line = format_collapsed(counts).splitlines()[0]
+        assert line.rsplit(" ", 1)[1].isdigit()
+
+    def test_stacks_endpoint(self, admin_token):
+        response = client.get("/api/admin/profile/stacks?seconds=0.1", headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert client.get("/api/admin/profile/stacks?seconds=3600", headers=ADMIN_HEADERS).status_code == 400
+
+class TestRequestProfiling:
+    """Test suite for the debug-header cProfile middleware"""
+
+    def test_profiles_request_and_threadpool_work(self, tmp_path, admin_token):
+        with patch("backend.main.PERF_LOG_STORE_DIR", str(tmp_path)):
+            response = client.get("/api/performance/analytics", headers={"X-Debug-Profile": "1", **ADMIN_HEADERS})
+        assert response.status_code == 200
+        profile_id = response.headers["x-profile-id"]
+
+        listed = client.get("/api/admin/profile/requests", headers=ADMIN_HEADERS).json()["profiles"]
+        assert listed[0]["id"] == profile_id and listed[0]["threadpool_calls"] == 1
+        report = client.get(f"/api/admin/profile/requests/{profile_id}?limit=200", headers=ADMIN_HEADERS).text
+        assert "run_performance_analytics" in report  # Ran in the threadpool, not on the loop thread
+        assert client.get(f"/api/admin/profile/requests/{profile_id}?sort=bogus", headers=ADMIN_HEADERS).status_code == 400
+
+    def test_requires_header_and_admin_token(self):
+        assert "x-profile-id" not in client.get("/health", headers={"X-Debug-Profile": "1"}).headers
+        with patch.object(app_main.settings, "ADMIN_TOKEN", "secret"):
+            assert "x-profile-id" not in client.get("/health").headers
+            response = client.get("/health", headers={"X-Debug-Profile": "1"})
+            assert "x-profile-id" not in response.headers
+            response = client.get("/health", headers={"X-Debug-Profile": "1", "X-Admin-Token": "secret"})
+            assert "x-profile-id" in response.headers
+
+    def test_fails_closed_without_admin_token(self):
+        """Test that nothing is profiled while ADMIN_TOKEN is unset, even with the development opt-in"""
+        with patch.object(app_main.settings, "ADMIN_TOKEN", None), \
+             patch.object(app_main.settings, "ADMIN_ALLOW_UNAUTHENTICATED", True):
+            for header in ({"X-Debug-Profile": "1"}, {"X-Debug-Profile": "1", "X-Admin-Token": ""}):
+                assert "x-profile-id" not in client.get("/health", headers=header).headers
+            assert client.get("/api/admin/profile/requests").status_code == 404
+            assert client.get("/api/admin/profile/stacks?seconds=0.1").status_code == 404
+
+class TestLoopBlockMonitor:
+    """Test suite for the event-loop watchdog"""
+
+    def test_captures_blocking_stack(self):
+        monitor = LoopBlockMonitor(threshold_ms=50)
+
+        async def run():
+            monitor.start()
+            await asyncio.sleep(0.05)
+            block_the_loop(0.3)
+            await asyncio.sleep(0.05)
+            monitor.stop()
+
+        asyncio.run(run())
+        snapshot = monitor.snapshot()
+        assert snapshot["blocks"] == 1 and snapshot["max_blocked_ms"] >= 100
+        assert "block_the_loop" in snapshot["recent"][0]["stack"]
+
+    def test_quiet_loop_has_no_blocks(self):
+        monitor = LoopBlockMonitor(threshold_ms=50)
+
+        async def run():
+            monitor.start()
+            await asyncio.sleep(0.3)
+            monitor.stop()
+
+        asyncio.run(run())
+        assert monitor.snapshot()["blocks"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,88 @@
+"""
+AI Debate Partner - Provider Tests
+Sprint 4: Unit tests for the fake LLM/embedding providers
+"""
+
+import asyncio
+import pytest
+import numpy as np
+from types import SimpleNamespace
+
+from langchain_core.messages import HumanMessage
+
+from backend.services.providers import (
+    FakeProviderError,
+    FakeStreamingChatModel,
+    HashEmbeddings,
+    create_chat_model,
+    create_embeddings,
+    embedding_model_id,
+)
+
+def fake_settings(**overrides):
+    values = dict(
+        LLM_PROVIDER="fake", EMBEDDING_PROVIDER="fake", FAKE_EMBEDDING_DIM=64,
+        FAKE_LLM_TOKEN_DELAY_MS=0.0, FAKE_LLM_RESPONSE_TOKENS=5, FAKE_LLM_FAILURE_RATE=0.0,
+        FAKE_LLM_SEED=0, EMBEDDING_MODEL="all-MiniLM-L6-v2"
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+class TestHashEmbeddings:
+    """Test suite for the deterministic hash embedder"""
+
+    def test_deterministic_and_normalized(self):
+        embedder = HashEmbeddings(dim=64)
+        first = embedder.embed_query("Kant and the categorical imperative")
+        second = HashEmbeddings(dim=64).embed_query("Kant and the categorical imperative")
+        assert first == second
+        assert len(first) == 64
+        assert np.linalg.norm(first) == pytest.approx(1.0, abs=1e-5)
+
+    def test_shared_words_are_more_similar(self):
+        embedder = HashEmbeddings(dim=256)
+        query = np.array(embedder.embed_query("free will and determinism"))
+        related = np.array(embedder.embed_query("determinism denies free will"))
+        unrelated = np.array(embedder.embed_query("the veil of ignorance in Rawls"))
+        assert query @ related > query @ unrelated
+
+class TestFakeStreamingChatModel:
+    """Test suite for the fake chat model"""
+
+    def test_invoke_is_deterministic(self):
+        model = FakeStreamingChatModel(token_delay_ms=0, response_tokens=8)
+        first = model.invoke([HumanMessage(content="prompt")]).content
+        assert first == model.invoke([HumanMessage(content="prompt")]).content
+        assert len(first.split()) == 8
+
+    def test_streams_one_chunk_per_token(self):
+        model = FakeStreamingChatModel(token_delay_ms=0, response_tokens=6)
+
+        async def collect():
+            return [chunk.content async for chunk in model.astream([HumanMessage(content="prompt")])]
+
+        chunks = asyncio.run(collect())
+        assert len(chunks) == 6
+
+    def test_failure_rate(self):
+        model = FakeStreamingChatModel(token_delay_ms=0, response_tokens=1, failure_rate=1.0)
+        with pytest.raises(FakeProviderError):
+            model.invoke([HumanMessage(content="prompt")])
+
+class TestProviderFactories:
+    """Test suite for provider selection via settings"""
+
+    def test_fake_providers_selected(self):
+        settings = fake_settings()
+        assert isinstance(create_embeddings(settings), HashEmbeddings)
+        assert isinstance(create_chat_model(settings), FakeStreamingChatModel)
+        assert embedding_model_id(settings) == "hash-embeddings-64"
+
+    def test_unknown_provider_rejected(self):
+        with pytest.raises(ValueError):
+            create_chat_model(fake_settings(LLM_PROVIDER="nope"))
+        with pytest.raises(ValueError):
+            create_embeddings(fake_settings(EMBEDDING_PROVIDER="nope"))
+
+if __name__ == "__main__":
+    pytest.main([__file__])
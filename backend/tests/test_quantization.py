@@ -0,0 +1,67 @@
+"""
+AI Debate Partner - Quantization Tests
+Sprint 4: int8 model quantization and SQ8 index conversion
+"""
+
+import os
+
+import faiss
+import pytest
+import torch
+
+from backend.services.providers import HashEmbeddings, build_local_vectorstore
+from backend.services.quantization import index_size_bytes, quantize_embeddings, quantize_index, quantize_model
+
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "knowledge_base")
+
+class TestModelQuantization:
+    """Test suite for dynamic int8 quantization"""
+
+    def test_linear_layers_are_quantized(self):
+        model = torch.nn.Sequential(torch.nn.Linear(32, 16), torch.nn.ReLU(), torch.nn.Linear(16, 8))
+        inputs = torch.randn(4, 32)
+        expected = model(inputs)
+
+        quantize_model(model)
+
+        assert "quantized" in type(model[0]).__module__
+        assert torch.allclose(model(inputs), expected, atol=0.05)
+
+    def test_embeddings_without_local_model_are_unchanged(self):
+        embeddings = HashEmbeddings(dim=16)
+        assert quantize_embeddings(embeddings, "dynamic-int8") is embeddings
+        assert quantize_embeddings(embeddings, "none") is embeddings
+
+    def test_unknown_mode_rejected(self):
+        with pytest.raises(ValueError):
+            quantize_embeddings(HashEmbeddings(dim=16), "int4")
+
+class TestIndexQuantization:
+    """Test suite for SQ8 vector storage"""
+
+    def test_sq8_index_is_smaller_and_agrees(self):
+        embeddings = HashEmbeddings(dim=64)
+        baseline = build_local_vectorstore(KNOWLEDGE_BASE_DIR, embeddings)
+        quantized = build_local_vectorstore(KNOWLEDGE_BASE_DIR, embeddings)
+        flat_size = index_size_bytes(quantized.index)
+
+        quantize_index(quantized, "sq8")
+
+        assert isinstance(quantized.index, faiss.IndexScalarQuantizer)
+        assert quantized.index.ntotal == baseline.index.ntotal
+        assert index_size_bytes(quantized.index) < flat_size / 3
+
+        queries = ["categorical imperative", "veil of ignorance", "hard problem of consciousness"]
+        for query in queries:
+            expected = baseline.similarity_search(query, k=1)[0].page_content
+            assert quantized.similarity_search(query, k=1)[0].page_content == expected
+
+    def test_already_quantized_index_left_alone(self):
+        vectorstore = build_local_vectorstore(KNOWLEDGE_BASE_DIR, HashEmbeddings(dim=32))
+        quantize_index(vectorstore, "sq8")
+        index = vectorstore.index
+        assert quantize_index(vectorstore, "sq8").index is index
+        assert quantize_index(vectorstore, "none").index is index
+
+if __name__ == "__main__":
+    pytest.main([__file__])
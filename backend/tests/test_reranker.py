@@ -0,0 +1,99 @@
+"""
+AI Debate Partner - Re-ranking Tests
+Sprint 4: Unit tests for the cross-encoder stage and its latency budget
+"""
+
+import pytest
+import time
+from unittest.mock import MagicMock
+
+from backend.services.reranker import CrossEncoderReranker
+
+class FakeDoc:
+    def __init__(self, content):
+        self.page_content = content
+        self.metadata = {"source": f"{content}.md"}
+
+class FakeCrossEncoder:
+    """Scores a pair by the number in the chunk text; optionally slow"""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [float(text.split("-")[1]) for _, text in pairs]
+
+class TestCrossEncoderReranker:
+    """Test suite for CrossEncoderReranker"""
+
+    def setup_method(self):
+        self.docs = [FakeDoc(f"chunk-{score}") for score in [1, 9, 3, 7, 5]]
+
+    def test_reorders_by_cross_encoder_score(self):
+        """Test that the top_k highest-scoring chunks are returned in order"""
+        reranker = CrossEncoderReranker("fake", batch_size=2, time_budget_ms=1000, model=FakeCrossEncoder())
+        docs, info = reranker.rerank("query", self.docs, top_k=3)
+
+        assert [d.page_content for d in docs] == ["chunk-9", "chunk-7", "chunk-5"]
+        assert info["applied"] is True
+        assert info["timed_out"] is False
+
+    def test_scores_in_batches(self):
+        """Test that candidates are scored in batches of batch_size"""
+        model = FakeCrossEncoder()
+        reranker = CrossEncoderReranker("fake", batch_size=2, time_budget_ms=1000, model=model)
+        reranker.rerank("query", self.docs, top_k=3)
+
+        assert model.calls == 3
+
+    def test_budget_exceeded_keeps_vector_order(self):
+        """Test fallback to the incoming order when the time budget runs out"""
+        reranker = CrossEncoderReranker("fake", batch_size=1, time_budget_ms=5, model=FakeCrossEncoder(delay=0.01))
+        docs, info = reranker.rerank("query", self.docs, top_k=3)
+
+        assert [d.page_content for d in docs] == ["chunk-1", "chunk-9", "chunk-3"]
+        assert info["applied"] is False
+        assert info["timed_out"] is True
+
+    def test_slow_batch_stays_within_budget(self):
+        """Test that one batch slower than the whole budget does not hold up the request"""
+        model = FakeCrossEncoder(delay=0.5)
+        reranker = CrossEncoderReranker("fake", batch_size=8, time_budget_ms=50, model=model)
+        start = time.perf_counter()
+        docs, info = reranker.rerank("query", self.docs, top_k=3)
+
+        assert time.perf_counter() - start < 0.25
+        assert [d.page_content for d in docs] == ["chunk-1", "chunk-9", "chunk-3"]
+        assert info["timed_out"] is True
+
+    def test_model_error_keeps_vector_order(self):
+        """Test fallback to the incoming order when the model raises"""
+        model = MagicMock()
+        model.predict.side_effect = RuntimeError("boom")
+        reranker = CrossEncoderReranker("fake", model=model)
+        docs, info = reranker.rerank("query", self.docs, top_k=2)
+
+        assert [d.page_content for d in docs] == ["chunk-1", "chunk-9"]
+        assert "error" in info
+
+class TestStageLatencySummary:
+    """Test suite for per-stage latency statistics"""
+
+    def test_summarize_stage_latencies(self):
+        from backend.main import summarize_stage_latencies
+        metrics = [
+            {"stages": {"retrieval": 0.01, "rerank": 0.05, "rerank_fallback": 1.0}},
+            {"stages": {"retrieval": 0.03, "rerank": 0.15}},
+            {"response_time_seconds": 1.0},
+        ]
+        summary = summarize_stage_latencies(metrics)
+
+        assert set(summary) == {"retrieval", "rerank"}
+        assert summary["retrieval"]["average"] == pytest.approx(0.02)
+        assert summary["rerank"]["p99"] == pytest.approx(0.15)
+        assert summary["rerank"]["count"] == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__])
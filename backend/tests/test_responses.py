@@ -0,0 +1,106 @@
+"""
+AI Debate Partner - Response Encoding Tests
+Sprint 4: Field selection, orjson rendering and br/gzip negotiation
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.main import app
+from backend.services.responses import (
+    CompressionMiddleware,
+    FastJSONResponse,
+    negotiate_encoding,
+    select_fields,
+)
+
+client = TestClient(app)
+
+def make_app(minimum_size=100):
+    demo = FastAPI(default_response_class=FastJSONResponse)
+    demo.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+
+    @demo.get("/large")
+    async def large():
+        return {"items": [{"content": "justice as fairness " * 5, "rank": i} for i in range(50)]}
+
+    @demo.get("/small")
+    async def small():
+        return {"response": "Short rebuttal"}
+
+    @demo.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(3):
+                yield json.dumps({"item": i, "padding": "x" * 200}) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return TestClient(demo)
+
+class TestFieldSelection:
+    """Test suite for lean payloads"""
+
+    def test_select_fields(self):
+        payload = {"response": "r", "confidence": 0.85, "sources": ["a.md"], "retrieved_docs": [{}]}
+        assert select_fields(payload, "response") == {"response": "r"}
+        assert select_fields(payload, "response, confidence,bogus") == {"response": "r", "confidence": 0.85}
+        assert select_fields(payload, None, lean_drop=("sources", "retrieved_docs"), verbose=False) == {"response": "r", "confidence": 0.85}
+        assert select_fields(payload) is payload
+
+    def test_debate_endpoint_fields(self):
+        docs = [MagicMock(page_content="Kant grounds duty in reason. " * 20, metadata={"source": "deontology.md"})]
+        chain = MagicMock()
+        chain.ainvoke = AsyncMock(return_value="Duty is not mere convention.")
+        with patch("backend.main.rag_chain", chain), \
+             patch("backend.main.answer_cache", None), \
+             patch("backend.main.retrieve_documents", return_value=docs), \
+             patch("backend.main.log_performance_metrics"):
+            full = client.post("/api/debate/test", json={"content": "Morality is convention"}).json()
+            lean = client.post("/api/debate/test?verbose=false", json={"content": "Morality is convention"}).json()
+            minimal = client.post("/api/debate/test?fields=response", json={"content": "Morality is convention"}).json()
+
+        assert full["retrieved_docs"][0]["source"] == "deontology.md"
+        assert set(lean) == {"response", "confidence", "cached"}
+        assert minimal == {"response": "Duty is not mere convention."}
+
+class TestCompression:
+    """Test suite for Accept-Encoding negotiation"""
+
+    def test_negotiate_encoding(self):
+        assert negotiate_encoding("gzip, deflate, br", ["br", "gzip"]) == "br"
+        assert negotiate_encoding("gzip, deflate, br", ["gzip"]) == "gzip"
+        assert negotiate_encoding("br;q=0.5, gzip;q=0.9", ["br", "gzip"]) == "gzip"
+        assert negotiate_encoding("identity", ["br", "gzip"]) is None
+        assert negotiate_encoding("*", ["gzip"]) == "gzip"
+        assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+
+    def test_large_json_is_gzipped(self):
+        demo = make_app()
+        response = demo.get("/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(json.dumps(response.json())) / 5
+        assert len(response.json()["items"]) == 50
+
+        raw = demo.get("/large", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in raw.headers
+
+    def test_small_and_streaming_bodies_untouched(self):
+        demo = make_app()
+        assert "content-encoding" not in demo.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+        stream = demo.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in stream.headers
+        assert [json.loads(line)["item"] for line in stream.text.splitlines()] == [0, 1, 2]
+
+    def test_brotli_preferred_when_installed(self):
+        pytest.importorskip("brotli")
+        response = make_app().get("/large", headers={"Accept-Encoding": "gzip, br"})
+        assert response.headers["content-encoding"] == "br"
+
+if __name__ == "__main__":
+    pytest.main([__file__])
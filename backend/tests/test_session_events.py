@@ -0,0 +1,132 @@
+"""
+AI Debate Partner - Voice Session Event Tests
+Sprint 4: Expiry scheduling and pushed session status over WebSocket
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+
+import backend.main as app_main
+from backend.services.session_events import BROADCAST, SessionEventHub, SessionExpiryScheduler
+
+client = TestClient(app_main.app)
+
+def make_hub(max_queue=32):
+    encode = MagicMock(side_effect=lambda event: json.dumps(event).encode("utf-8"))
+    return SessionEventHub(encode=encode, max_queue=max_queue), encode
+
+class TestSessionEventHub:
+    """Test suite for fan-out"""
+
+    def test_encodes_once_per_event(self):
+        async def run():
+            hub, encode = make_hub()
+            watchers = [hub.subscribe("s1") for _ in range(50)]
+            other = hub.subscribe("s2")
+            hub.publish("s1", {"type": "status", "status": "expired"})
+            hub.publish(BROADCAST, {"type": "backend", "rag_status": "enabled"})
+            assert encode.call_count == 2
+            assert all(w.queue.qsize() == 2 for w in watchers) and other.queue.qsize() == 1
+            event, payload = await other.next()
+            assert event["type"] == "backend" and json.loads(payload)["rag_status"] == "enabled"
+            hub.unsubscribe(other)
+            assert hub.stats()["subscribers"] == 50 and hub.stats()["topics"] == 1
+
+        asyncio.run(run())
+
+    def test_slow_subscriber_drops_oldest(self):
+        async def run():
+            hub, _ = make_hub(max_queue=2)
+            subscriber = hub.subscribe("s1")
+            for i in range(5):
+                hub.publish("s1", {"n": i})
+            assert subscriber.dropped == 3
+            assert [(await subscriber.next())[0]["n"] for _ in range(2)] == [3, 4]
+
+        asyncio.run(run())
+
+class TestExpiryScheduler:
+    """Test suite for the deadline heap"""
+
+    def test_warning_then_expiry(self):
+        async def run():
+            hub, _ = make_hub()
+            sessions = {"a": {"expires_at": 1000, "status": "active"}, "b": {"expires_at": 2000, "status": "active"}}
+            expired_hook = MagicMock()
+            scheduler = SessionExpiryScheduler(sessions, hub, warning_seconds=60, on_expire=expired_hook)
+            for session_id, session in sessions.items():
+                scheduler.schedule(session_id, session["expires_at"])
+            watcher = hub.subscribe("a")
+
+            assert scheduler.expire_due(now=500) == []
+            assert scheduler.expire_due(now=950) == []
+            warning, _ = await watcher.next()
+            assert warning["type"] == "expiry_warning" and warning["seconds_left"] == 50
+
+            assert scheduler.expire_due(now=1000) == ["a"]
+            status, _ = await watcher.next()
+            assert status["status"] == "expired" and "a" not in sessions
+            expired_hook.assert_called_once()
+            assert scheduler.next_deadline() == 1940
+
+        asyncio.run(run())
+
+    def test_ended_and_extended_sessions_are_skipped(self):
+        hub, _ = make_hub()
+        sessions = {"a": {"expires_at": 100}, "b": {"expires_at": 100}}
+        scheduler = SessionExpiryScheduler(sessions, hub, warning_seconds=0)
+        scheduler.schedule("a", 100)
+        scheduler.schedule("b", 100)
+        del sessions["a"]  # Ended early
+        sessions["b"]["expires_at"] = 300
+        scheduler.schedule("b", 300)  # Extended
+        assert scheduler.expire_due(now=200) == []
+        assert scheduler.expire_due(now=300) == ["b"]
+
+    def test_background_task_expires_on_time(self):
+        async def run():
+            hub, _ = make_hub()
+            sessions = {}
+            scheduler = SessionExpiryScheduler(sessions, hub, warning_seconds=0)
+            scheduler.start()
+            watcher = hub.subscribe("a")
+            expires_at = time.time() + 0.05
+            sessions["a"] = {"expires_at": expires_at}
+            scheduler.schedule("a", expires_at)
+            event, _ = await asyncio.wait_for(watcher.next(), timeout=1.0)
+            scheduler.stop()
+            return event
+
+        assert asyncio.run(run())["status"] == "expired"
+
+class TestSessionEventsEndpoint:
+    """Test suite for /api/voice/session/{id}/events"""
+
+    def test_pushes_status_and_end(self):
+        session_id = "ws-test-session"
+        expires_at = int(time.time()) + 3600
+        app_main.active_voice_sessions[session_id] = {
+            "room_name": "ws-room", "user_identity": "u", "participant_name": "p",
+            "created_at": int(time.time()), "expires_at": expires_at, "status": "active"
+        }
+        app_main.session_expiry.schedule(session_id, expires_at)
+
+        with client.websocket_connect(f"/api/voice/session/{session_id}/events") as websocket:
+            assert websocket.receive_json()["type"] == "backend"
+            status = websocket.receive_json()
+            assert status["status"] == "active" and status["expires_at"] == expires_at
+            assert client.delete(f"/api/voice/session/{session_id}").status_code == 200
+            assert websocket.receive_json() == {"type": "status", "session_id": session_id, "status": "ended"}
+        assert app_main.session_events.subscriber_count(session_id) == 0
+
+    def test_unknown_session(self):
+        with client.websocket_connect("/api/voice/session/missing/events") as websocket:
+            assert websocket.receive_json()["status"] == "not_found"
+
+if __name__ == "__main__":
+    pytest.main([__file__])
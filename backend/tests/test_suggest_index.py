@@ -0,0 +1,115 @@
+"""
+AI Debate Partner - Concept Autocomplete Tests
+Sprint 4: Term extraction, prefix lookup and /api/knowledge/suggest
+"""
+
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from backend.main import app
+from backend.services.suggest_index import SuggestIndex, build_suggest_index, extract_terms, save_suggest_index
+
+client = TestClient(app)
+
+KNOWLEDGE_BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "knowledge_base")
+
+SAMPLE = """---
+title: "Justice"
+tags: ["fairness", "Rawls"]
+---
+
+# Justice: Concepts of Fairness
+
+## Core Definition and Overview
+
+**Justice** concerns fairness. Rawls and justice again; justice.
+
+- **John Rawls (1921-2002)**: Justice as fairness behind the **Veil of Ignorance**.
+- **Objection:** Not a concept.
+- **Core Claim**: one. **Core Claim**: two. **Core Claim**: three.
+"""
+
+OTHER = """---
+title: "Deontology"
+---
+
+## Core Definition and Overview
+
+The **Categorical Imperative** binds rational agents, Rawls notwithstanding.
+"""
+
+@pytest.fixture(scope="module")
+def knowledge_index():
+    return SuggestIndex(build_suggest_index(KNOWLEDGE_BASE_DIR))
+
+class TestTermExtraction:
+    """Test suite for concept extraction from Markdown"""
+
+    def test_tags_headings_and_bold_terms(self):
+        terms = {t["term"]: t for t in extract_terms({"justice.md": SAMPLE, "deontology.md": OTHER})}
+        assert {"Justice", "Rawls", "John Rawls", "Veil of Ignorance", "Categorical Imperative"} <= set(terms)
+        assert terms["Rawls"]["kinds"] == ["tag"]
+        assert terms["Rawls"]["count"] == 3
+        assert terms["Justice"]["sources"] == ["justice.md"]
+
+    def test_template_labels_are_dropped(self):
+        terms = {t["term"] for t in extract_terms({"justice.md": SAMPLE, "deontology.md": OTHER})}
+        assert "Objection" not in terms
+        assert "Core Claim" not in terms
+        assert "Core Definition and Overview" not in terms
+
+class TestSuggestIndex:
+    """Test suite for prefix lookup"""
+
+    def test_completions_ranked_by_frequency(self):
+        index = SuggestIndex([
+            {"term": "Justice", "count": 90},
+            {"term": "Justice as Fairness", "count": 4},
+            {"term": "Just War Theory", "count": 12},
+            {"term": "Utilitarianism", "count": 30},
+        ])
+        assert [t["term"] for t in index.suggest("jus")] == ["Justice", "Just War Theory", "Justice as Fairness"]
+        assert [t["term"] for t in index.suggest("JUSTICE ")] == ["Justice", "Justice as Fairness"]
+        assert [t["term"] for t in index.suggest("jus", limit=1)] == ["Justice"]
+        assert index.suggest("") == []
+
+    def test_inner_words_complete(self, knowledge_index):
+        assert "Categorical Imperative" in [t["term"] for t in knowledge_index.suggest("imper")]
+        assert "Daniel Dennett" in [t["term"] for t in knowledge_index.suggest("denn")]
+
+    def test_lookup_is_sub_millisecond(self, knowledge_index):
+        start = time.perf_counter()
+        for _ in range(1000):
+            knowledge_index.suggest("a", 8)
+        assert (time.perf_counter() - start) / 1000 < 0.001
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "suggest_index.json")
+        save_suggest_index(path, [{"term": "Qualia", "kinds": ["tag"], "sources": ["consciousness.md"], "count": 16}])
+        assert SuggestIndex.load(path).suggest("qua")[0]["term"] == "Qualia"
+        assert SuggestIndex.load(str(tmp_path / "missing.json")) is None
+
+class TestSuggestEndpoint:
+    """Test suite for /api/knowledge/suggest"""
+
+    def test_suggest_endpoint(self, knowledge_index):
+        with patch("backend.main.suggest_index", knowledge_index), \
+             patch("backend.main.vectorstore") as vectorstore:
+            data = client.get("/api/knowledge/suggest", params={"prefix": "free", "limit": 50}).json()
+            vectorstore.similarity_search.assert_not_called()
+        assert data["prefix"] == "free"
+        assert 0 < len(data["suggestions"]) <= 10
+        assert "Free Will" in [t["term"] for t in data["suggestions"]]
+        counts = [t["count"] for t in data["suggestions"]]
+        assert counts == sorted(counts, reverse=True)
+
+    def test_unavailable_without_index(self):
+        with patch("backend.main.suggest_index", None):
+            assert client.get("/api/knowledge/suggest", params={"prefix": "kant"}).status_code == 503
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,134 @@
+"""
+AI Debate Partner - Bulk Voice Session Provisioning Tests
+Sprint 4: Batch token minting, atomic capacity reservation and the session manifest
+"""
+
+import datetime
+import time
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+from livekit.api import AccessToken, TokenVerifier, VideoGrants
+from unittest.mock import patch
+
+import backend.main as app_main
+from backend.benchmarks import session_provisioning
+from backend.services.session_events import SessionEventHub, SessionExpiryScheduler
+from backend.services.session_tokens import TokenMinter
+
+client = TestClient(app_main.app)
+
+API_KEY = "test-key"
+API_SECRET = "test-secret-" + "s" * 32
+ADMIN_HEADERS = {"X-Admin-Token": "secret"}
+
+@pytest.fixture
+def livekit():
+    with patch.object(app_main.settings, "LIVEKIT_API_KEY", API_KEY), \
+         patch.object(app_main.settings, "LIVEKIT_API_SECRET", API_SECRET), \
+         patch.object(app_main.settings, "MAX_CONCURRENT_SESSIONS", 10), \
+         patch.object(app_main.settings, "ADMIN_TOKEN", "secret"), \
+         patch.dict(app_main.active_voice_sessions, clear=True):
+        yield
+
+class TestTokenMinter:
+    """Test suite for the preloaded-key JWT minter"""
+
+    def test_matches_access_token(self):
+        now = int(time.time())
+        token = TokenMinter(API_KEY, API_SECRET).mint("room-1", "alice", "Alice", 3600, now=now)
+        reference = AccessToken(API_KEY, API_SECRET).with_identity("alice").with_name("Alice").with_grants(
+            VideoGrants(room_join=True, room="room-1", can_publish=True, can_subscribe=True, can_publish_data=True)
+        ).with_ttl(datetime.timedelta(seconds=3600)).to_jwt()
+        assert jwt.decode(token, options={"verify_signature": False}) == jwt.decode(reference, options={"verify_signature": False})
+        claims = TokenVerifier(API_KEY, API_SECRET).verify(token)
+        assert claims.identity == "alice" and claims.video.room == "room-1" and claims.video.room_join
+
+    def test_mint_many_shares_validity_window(self):
+        tokens = TokenMinter(API_KEY, API_SECRET).mint_many([("r1", "a", None), ("r2", "b", "Bee")], 60, now=1000)
+        decoded = [jwt.decode(t, options={"verify_signature": False}) for t in tokens]
+        assert [(d["sub"], d["name"], d["video"]["room"]) for d in decoded] == [("a", "a", "r1"), ("b", "Bee", "r2")]
+        assert all(d["nbf"] == 1000 and d["exp"] == 1060 for d in decoded)
+        with pytest.raises(ValueError):
+            TokenMinter(API_KEY, API_SECRET).mint("", "a", None, 60)
+
+class TestScheduleMany:
+    """Test suite for batch expiry scheduling"""
+
+    def test_batch_expires_with_single_schedules(self):
+        sessions = {}
+        scheduler = SessionExpiryScheduler(sessions, SessionEventHub(encode=app_main.dumps), warning_seconds=10)
+        sessions.update({"solo": {"expires_at": 150}, "a": {"expires_at": 100}, "b": {"expires_at": 100}})
+        scheduler.schedule("solo", 150)
+        scheduler.schedule_many(["a", "b"], 100)
+        assert scheduler.next_deadline() == 90
+        assert sorted(scheduler.expire_due(now=100)) == ["a", "b"]
+        assert scheduler.expire_due(now=150) == ["solo"]
+
+class TestBulkProvisioning:
+    """Test suite for POST /api/admin/voice/sessions"""
+
+    def test_manifest(self, livekit):
+        response = client.post("/api/admin/voice/sessions", json={"count": 3, "identity_prefix": "student"}, headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        manifest = response.json()
+        assert manifest["count"] == 3 and manifest["fields"] == ["session_id", "room_name", "user_identity", "token"]
+        verifier = TokenVerifier(API_KEY, API_SECRET)
+        for session_id, room_name, identity, token in manifest["sessions"]:
+            claims = verifier.verify(token)
+            assert (claims.identity, claims.video.room) == (identity, room_name)
+            assert app_main.active_voice_sessions[session_id]["expires_at"] == manifest["expires_at"]
+        assert [row[2] for row in manifest["sessions"]] == ["student-1", "student-2", "student-3"]
+        assert len({row[1] for row in manifest["sessions"]}) == 3
+
+        session_id = manifest["sessions"][0][0]
+        assert client.get(f"/api/voice/session/{session_id}").json()["status"] == "active"
+
+    def test_explicit_participants(self, livekit):
+        participants = [{"user_identity": "alice", "room_name": "final-1"}, {"user_identity": "bob", "participant_name": "Bob"}]
+        manifest = client.post("/api/admin/voice/sessions", json={"participants": participants}, headers=ADMIN_HEADERS).json()
+        assert [row[1] == "final-1" for row in manifest["sessions"]] == [True, False]
+        session = app_main.active_voice_sessions[manifest["sessions"][1][0]]
+        assert session["participant_name"] == "Bob"
+
+    def test_capacity_is_all_or_nothing(self, livekit):
+        assert client.post("/api/admin/voice/sessions", json={"count": 7}, headers=ADMIN_HEADERS).status_code == 200
+        response = client.post("/api/admin/voice/sessions", json={"count": 4}, headers=ADMIN_HEADERS)
+        assert response.status_code == 429 and "3 available" in response.json()["detail"]
+        assert len(app_main.active_voice_sessions) == 7
+
+    def test_rejects_bad_requests(self, livekit):
+        assert client.post("/api/admin/voice/sessions", json={}, headers=ADMIN_HEADERS).status_code == 400
+        with patch.object(app_main.settings, "VOICE_BULK_MAX_SESSIONS", 2):
+            assert client.post("/api/admin/voice/sessions", json={"count": 3}, headers=ADMIN_HEADERS).status_code == 400
+        with patch.object(app_main.settings, "LIVEKIT_API_SECRET", None):
+            assert client.post("/api/admin/voice/sessions", json={"count": 1}, headers=ADMIN_HEADERS).status_code == 500
+        assert client.post("/api/admin/voice/sessions", json={"count": 1}).status_code == 403
+        assert not app_main.active_voice_sessions
+
+    def test_refused_without_admin_token(self, livekit):
+        """Test that no sessions are minted while ADMIN_TOKEN is unset, even with the development opt-in"""
+        with patch.object(app_main.settings, "ADMIN_TOKEN", None):
+            assert client.post("/api/admin/voice/sessions", json={"count": 1}).status_code == 403
+            with patch.object(app_main.settings, "ADMIN_ALLOW_UNAUTHENTICATED", True):
+                for headers in ({}, {"X-Admin-Token": ""}, ADMIN_HEADERS):
+                    assert client.post("/api/admin/voice/sessions", json={"count": 1}, headers=headers).status_code == 403
+        assert not app_main.active_voice_sessions
+
+class TestProvisioningBenchmark:
+    """Smoke test for benchmarks/session_provisioning.py"""
+
+    def test_short_run(self, livekit, monkeypatch):
+        # The benchmark reconfigures the settings it imports; restore them afterwards
+        for name in ("LIVEKIT_API_KEY", "LIVEKIT_API_SECRET", "MAX_CONCURRENT_SESSIONS", "VOICE_BULK_MAX_SESSIONS", "ADMIN_TOKEN"):
+            monkeypatch.setattr(session_provisioning.settings, name, getattr(session_provisioning.settings, name))
+        with patch.object(app_main.settings, "VOICE_BULK_MAX_SESSIONS", 500):
+            args = session_provisioning.parse_args(["--sessions", "20", "--concurrency", "5", "--repeat", "1"])
+            report = session_provisioning.run_benchmark(args)
+        assert report["api"]["bulk_provision"]["sessions_per_second"] > 0
+        assert not app_main.active_voice_sessions
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
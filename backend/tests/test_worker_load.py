@@ -0,0 +1,123 @@
+"""
+AI Debate Partner - Agent Worker Load Tests
+Sprint 4: Load figure, loop lag and job admission for the LiveKit worker
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import patch
+
+from backend.agents import debate_agent
+from backend.services.worker_load import LoopLagMonitor, WorkerLoadMonitor
+
+def make_monitor(cpu=10.0, **kwargs):
+    return WorkerLoadMonitor(cpu_sampler=lambda: cpu, **kwargs)
+
+class TestWorkerLoad:
+    """Test suite for the load function and admission control"""
+
+    def test_load_is_highest_pressure(self):
+        monitor = make_monitor(cpu=30.0, max_jobs=4)
+        assert monitor.update(1) == pytest.approx(0.3)
+        assert monitor.update(3) == pytest.approx(0.75)
+        assert make_monitor(cpu=250.0, max_jobs=4).update(0) == 1.0  # Clipped
+
+    def test_loop_lag_counts_toward_load(self):
+        lag = LoopLagMonitor()
+        lag.samples.extend([0.01, 0.15, 0.02])
+        monitor = make_monitor(cpu=5.0, max_jobs=10, lag_limit_ms=200.0, lag_monitor=lag)
+        assert monitor.update(0) == pytest.approx(0.75)
+        assert monitor.snapshot()["loop_lag_ms"] == pytest.approx(150.0)
+
+    def test_admission(self):
+        monitor = make_monitor(cpu=20.0, max_jobs=2, load_threshold=0.8)
+        monitor.update(0)
+        assert monitor.admit(1) == (True, None)
+        accepted, reason = monitor.admit(2)
+        assert not accepted and "job limit" in reason
+        assert not monitor.admit(0, draining=True)[0]
+
+        monitor.cpu_sampler = lambda: 95.0
+        monitor.update(0)
+        accepted, reason = monitor.admit(0)
+        assert not accepted and "threshold" in reason
+        assert monitor.snapshot()["rejected"] == 3 and monitor.snapshot()["accepted"] == 1
+
+    def test_pending_jobs_count_until_launched(self):
+        monitor = make_monitor(cpu=10.0, max_jobs=2)
+        monitor.update(0)
+        assert monitor.admit(0)[0] and monitor.admit(0)[0]
+        accepted, reason = monitor.admit(0)  # Two admitted jobs not launched yet
+        assert not accepted and "(2/2)" in reason
+        assert monitor.update(0) == pytest.approx(1.0)  # A load update does not forget them
+        monitor.release_pending()
+        assert monitor.update(1) == pytest.approx(1.0)
+        monitor.release_pending()
+        assert monitor.update(2) == pytest.approx(1.0) and monitor.pending_jobs == 0
+
+    def test_lag_monitor_sees_blocked_loop(self):
+        async def run():
+            lag = LoopLagMonitor(interval=0.01)
+            lag.start()
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)  # Block the loop like a CPU-bound handler would
+            await asyncio.sleep(0.03)
+            lag.stop()
+            return lag.lag_ms()
+
+        assert asyncio.run(run()) >= 50
+
+class FakeJobRequest:
+    """JobRequest whose accept() only returns once the test lets the job launch"""
+
+    def __init__(self, launched: asyncio.Event):
+        self.room = SimpleNamespace(name="room")
+        self.launched = launched
+        self.answer = None
+
+    async def accept(self):
+        self.answer = "accepted"
+        await self.launched.wait()
+
+    async def reject(self, terminate=False):
+        self.answer = "rejected"
+
+class TestRequestFnc:
+    """Test suite for the agent worker's job admission"""
+
+    def test_concurrent_requests_respect_job_limit(self):
+        monitor = make_monitor(cpu=10.0, max_jobs=1)
+        monitor.update(0)
+
+        async def run():
+            launched = asyncio.Event()
+            first, second = FakeJobRequest(launched), FakeJobRequest(launched)
+            pending = asyncio.ensure_future(debate_agent.request_fnc(first))
+            await asyncio.sleep(0)
+            monitor.update(0)  # Load update from LiveKit before the first job shows up as running
+            await debate_agent.request_fnc(second)
+            launched.set()
+            await pending
+            return first.answer, second.answer
+
+        with patch.object(debate_agent, "worker_load", monitor):
+            assert asyncio.run(run()) == ("accepted", "rejected")
+        assert monitor.pending_jobs == 0
+
+    def test_monitors_start_with_the_worker(self):
+        async def run():
+            debate_agent.start_worker_monitors()
+            try:
+                await asyncio.sleep(0.3)
+                return debate_agent.worker_load.lag_monitor.samples
+            finally:
+                debate_agent.worker_load.lag_monitor.stop()
+                debate_agent.loop_monitor.stop()
+
+        assert len(asyncio.run(run())) >= 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -44,6 +44,7 @@ function App() {
     remoteAudioTracks, // Get remote audio tracks from the hook
     latestAgentText, // Get latest agent text from the hook
     clearLatestAgentText, // Get function to clear agent text from the hook
+    liveCaption, // Words the agent has spoken so far in its current reply
   } = useLiveKitAudio();
 
   // State management
@@ -61,6 +62,9 @@ function App() {
   // Refs for DOM access
   const chatHistoryRef = useRef<HTMLDivElement>(null);
 
+  // Identifies this debate so the backend can keep its conversation history
+  const debateSessionIdRef = useRef<string>(crypto.randomUUID());
+
   // API configuration
   const apiBaseUrl = 'http://localhost:8000'; // DO NOT CHANGE: User constraint
 
@@ -75,7 +79,7 @@ function App() {
       scrollToBottom();
     }, 300);
     return () => clearTimeout(timeoutId);
-  }, [messages, isTyping]);
+  }, [messages, isTyping, liveCaption]);
 
   // Mouse tracking for glow effect
   useEffect(() => {
@@ -106,6 +110,41 @@ function App() {
     }
   }, [latestAgentText, clearLatestAgentText]);
 
+  // Session status is pushed by the backend: expiry warnings, expiry and readiness changes
+  useEffect(() => {
+    if (!voiceSession) {
+      return;
+    }
+    const wsBaseUrl = apiBaseUrl.replace(/^http/, 'ws');
+    const socket = new WebSocket(`${wsBaseUrl}/api/voice/session/${voiceSession.session_id}/events`);
+
+    socket.onmessage = (message) => {
+      try {
+        const event = JSON.parse(message.data);
+        if (event.type === 'expiry_warning') {
+          addMessage(`Voice session expires in ${Math.max(1, Math.round(event.seconds_left / 60))} minute(s).`, 'ai');
+        } else if (event.type === 'status' && (event.status === 'expired' || event.status === 'not_found')) {
+          stopMic();
+          disconnect();
+          setVoiceSession(null);
+          addMessage('Voice session expired. Start a new session to keep debating.', 'ai');
+        } else if (event.type === 'backend') {
+          setIsConnected(true);
+          setConnectionStatus(event.rag_status === 'enabled' ? 'Connected to server' : 'Connected (knowledge base unavailable)');
+        }
+      } catch (error) {
+        console.error('Error parsing session event:', error);
+      }
+    };
+    socket.onerror = (error) => {
+      console.warn('Session event channel error:', error);
+    };
+
+    return () => {
+      socket.close();
+    };
+  }, [voiceSession?.session_id]);
+
   const checkServerConnection = async () => {
     try {
       const response = await fetch(`${apiBaseUrl}/health`);
@@ -171,7 +210,8 @@ function App() {
         },
         body: JSON.stringify({
           content: message,
-          user_id: 'default'
+          user_id: 'default',
+          session_id: debateSessionIdRef.current
         })
       });
 
@@ -535,6 +575,15 @@ function App() {
                 </div>
               </motion.div>
             )}
+
+            {/* Live caption of the agent's spoken reply */}
+            {liveCaption && (
+              <div className="flex justify-start">
+                <div className="max-w-[80%] bg-white/[0.05] text-white/70 rounded-2xl p-4 border border-white/[0.1] italic">
+                  {liveCaption}
+                </div>
+              </div>
+            )}
           </div>
         </motion.div>
 
@@ -0,0 +1,120 @@
+// Binary caption frames from the debate agent (see backend/services/data_protocol.py)
+//
+// Frame (version 1, big-endian):
+//   magic 0xDB | version u8 | record*
+//   record: kind u8 | utterance u16 | seq u32 | length u16 | UTF-8 text
+
+export const CAPTION_TOPIC = "captions";
+export const PROTOCOL_NAME = "debate-dc";
+export const PROTOCOL_VERSIONS = [1];
+
+const MAGIC = 0xdb;
+const FRAME_HEADER_BYTES = 2;
+const RECORD_HEADER_BYTES = 9;
+
+export const KIND_START = 1;
+export const KIND_DELTA = 2;
+export const KIND_END = 3;
+
+export interface CaptionRecord {
+  kind: number;
+  utterance: number;
+  seq: number;
+  text: string;
+}
+
+const textDecoder = new TextDecoder();
+const textEncoder = new TextEncoder();
+
+export function helloMessage(): Uint8Array {
+  return textEncoder.encode(JSON.stringify({ type: "hello", protocol: PROTOCOL_NAME, versions: PROTOCOL_VERSIONS }));
+}
+
+export function isBinaryFrame(payload: Uint8Array): boolean {
+  return payload.length >= FRAME_HEADER_BYTES && payload[0] === MAGIC;
+}
+
+export function decodeFrame(payload: Uint8Array): CaptionRecord[] {
+  const view = new DataView(payload.buffer, payload.byteOffset, payload.byteLength);
+  const version = view.getUint8(1);
+  if (!PROTOCOL_VERSIONS.includes(version)) {
+    throw new Error(`Unsupported caption frame version ${version}`);
+  }
+  const records: CaptionRecord[] = [];
+  let offset = FRAME_HEADER_BYTES;
+  while (offset < payload.length) {
+    if (offset + RECORD_HEADER_BYTES > payload.length) {
+      throw new Error("Truncated caption record");
+    }
+    const kind = view.getUint8(offset);
+    const utterance = view.getUint16(offset + 1);
+    const seq = view.getUint32(offset + 3);
+    const length = view.getUint16(offset + 7);
+    offset += RECORD_HEADER_BYTES;
+    if (offset + length > payload.length) {
+      throw new Error("Truncated caption text");
+    }
+    records.push({ kind, utterance, seq, text: textDecoder.decode(payload.subarray(offset, offset + length)) });
+    offset += length;
+  }
+  return records;
+}
+
+export interface CaptionUpdate {
+  live: { utterance: number; text: string } | null;
+  finished: string[];
+}
+
+// Applies records in sequence order: duplicates are dropped, early records wait
+// for the gap to fill, and an END (which carries the full text) closes any gap before it.
+export class CaptionAssembler {
+  private lastSeq = 0;
+  private pending = new Map<number, CaptionRecord>();
+  private captions = new Map<number, string>();
+  private current: number | null = null;
+
+  apply(records: CaptionRecord[]): CaptionUpdate {
+    const finished: string[] = [];
+    for (const record of records) {
+      if (record.seq > this.lastSeq) {
+        this.pending.set(record.seq, record);
+      }
+    }
+    this.drain(finished);
+    const ends = [...this.pending.values()].filter(r => r.kind === KIND_END).map(r => r.seq);
+    if (ends.length > 0) {
+      const lastEnd = Math.max(...ends);
+      const due = [...this.pending.keys()].filter(seq => seq <= lastEnd).sort((a, b) => a - b);
+      for (const seq of due) {
+        this.applyOne(this.pending.get(seq)!, finished);
+        this.pending.delete(seq);
+      }
+      this.drain(finished);
+    }
+    const live = this.current !== null && this.captions.has(this.current)
+      ? { utterance: this.current, text: this.captions.get(this.current)! }
+      : null;
+    return { live, finished };
+  }
+
+  private drain(finished: string[]) {
+    while (this.pending.has(this.lastSeq + 1)) {
+      const record = this.pending.get(this.lastSeq + 1)!;
+      this.pending.delete(record.seq);
+      this.applyOne(record, finished);
+    }
+  }
+
+  private applyOne(record: CaptionRecord, finished: string[]) {
+    this.lastSeq = Math.max(this.lastSeq, record.seq);
+    if (record.kind === KIND_START) {
+      this.captions.set(record.utterance, "");
+      this.current = record.utterance;
+    } else if (record.kind === KIND_DELTA) {
+      this.captions.set(record.utterance, (this.captions.get(record.utterance) ?? "") + record.text);
+    } else if (record.kind === KIND_END) {
+      this.captions.delete(record.utterance);
+      finished.push(record.text);
+    }
+  }
+}
@@ -1,5 +1,6 @@
 import { useRef, useState, useEffect, useCallback } from "react"; // Import useState and useEffect
 import { Room, connect, createLocalAudioTrack, LocalAudioTrack, RoomEvent, RemoteParticipant, LocalParticipant, RemoteAudioTrack } from "livekit-client"; // Import RoomEvent
+import { CAPTION_TOPIC, CaptionAssembler, decodeFrame, helloMessage, isBinaryFrame } from "./captionProtocol";
 
 export function useLiveKitAudio() {
   const roomRef = useRef<Room | null>(null);
@@ -11,6 +12,8 @@ export function useLiveKitAudio() {
   const [micError, setMicError] = useState<Error | null>(null);
   const [remoteAudioTracks, setRemoteAudioTracks] = useState<RemoteAudioTrack[]>([]);
   const [latestAgentText, setLatestAgentText] = useState<string | null>(null);
+  const [liveCaption, setLiveCaption] = useState<string | null>(null); // Agent words spoken so far
+  const captionAssemblerRef = useRef<CaptionAssembler>(new CaptionAssembler());
 
   // Function to clear the latest agent text after it's been processed
   const clearLatestAgentText = useCallback(() => {
@@ -27,11 +30,22 @@ export function useLiveKitAudio() {
       setMicError(null); // Clear previous errors
       const room = new Room();
       roomRef.current = room;
+      captionAssemblerRef.current = new CaptionAssembler();
+
+      // Offer the binary caption protocol; agents that don't answer keep sending JSON
+      const sendCaptionHello = () => {
+        room.localParticipant.publishData(helloMessage(), { reliable: true, topic: CAPTION_TOPIC })
+          .catch(error => console.warn('Failed to send caption hello:', error));
+      };
 
       // Set up event listeners for the room
       room.on(RoomEvent.Connected, () => {
         setIsLiveKitConnected(true);
         console.log('Connected to LiveKit room:', roomName || 'unknown room');
+        sendCaptionHello();
+      });
+      room.on(RoomEvent.ParticipantConnected, () => {
+        sendCaptionHello(); // The agent usually joins after us
       });
       room.on(RoomEvent.Disconnected, () => {
         setIsLiveKitConnected(false);
@@ -62,13 +76,24 @@ export function useLiveKitAudio() {
           setRemoteAudioTracks(prev => prev.filter(t => t !== track));
         }
       });
-      room.on(RoomEvent.DataReceived, (payload, participant) => {
+      room.on(RoomEvent.DataReceived, (payload, participant, kind, topic) => {
         try {
+          if (topic === CAPTION_TOPIC && isBinaryFrame(payload)) {
+            // Caption deltas: only the new words are decoded
+            const update = captionAssemblerRef.current.apply(decodeFrame(payload));
+            setLiveCaption(update.live ? update.live.text : null);
+            if (update.finished.length > 0) {
+              setLatestAgentText(update.finished[update.finished.length - 1]);
+            }
+            return;
+          }
           const textDecoder = new TextDecoder();
           const message = textDecoder.decode(payload);
           const data = JSON.parse(message);
           if (data.type === "agent_text" && data.content) {
             setLatestAgentText(data.content);
+          } else if (data.type === "hello_ack") {
+            console.log('Caption protocol negotiated, version', data.version);
           }
         } catch (error) {
           console.error('Error parsing data message:', error);
@@ -138,6 +163,7 @@ export function useLiveKitAudio() {
     setMicError(null); // Clear any errors
     setRemoteAudioTracks([]); // Clear remote audio tracks
     setLatestAgentText(null); // Clear latest agent text
+    setLiveCaption(null);
   }, [stopMic]); // Dependency on stopMic
 
   // Cleanup on component unmount
@@ -161,6 +187,7 @@ export function useLiveKitAudio() {
     remoteAudioTracks,  // Now returned
     latestAgentText,    // Now returned
     clearLatestAgentText, // Now returned
+    liveCaption,        // Streaming caption of what the agent is saying
     // roomRef, // You generally don't need to expose the ref directly unless a very specific use case
   };
 }
\ No newline at end of file